@@ -1,61 +1,71 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-from database import create_app, init_db, db
+from database import create_app, db
 from models import *
+from folios import generate_folio
+import balanza
+import bancos
+import bulk_import
+import cierres
+import contadores
+import dashboard
+import depreciacion
+import eventos
+import inventario
+import journal
+import nomina
+import trabajos
+from listing import (EXPOSED_HEADERS, LIST_QUERY_BUDGET, ListError, ListSpec,
+                     paginate, page_response, parse_limit, stream_response, wants_stream,
+                     date_range, search, equals, sum_of, count_where, as_is, as_iso, as_float,
+                     as_float_if_set, parse_int, parse_str, parse_bool)
+import query_guard
+import reportes
+import response_cache
+from response_cache import cached_response
+from query_guard import query_budget
 from datetime import datetime, date
 from decimal import Decimal
 import os
 
 app = create_app()
-CORS(app)
+CORS(app, expose_headers=EXPOSED_HEADERS)
+query_guard.configure(app)
+response_cache.configure(app)
 
-# Initialize database
-init_db(app)
-
-# Utility functions
-def generate_folio(prefix, model_class):
-    """Generate unique folio for invoices, receipts, etc."""
-    today = datetime.now().strftime('%Y%m%d')
-    count = model_class.query.filter(
-        model_class.folio.like(f'{prefix}{today}%')
-    ).count() + 1
-    return f'{prefix}{today}{count:03d}'
+# The schema is managed by migrations.py (python backend/migrations.py upgrade);
+# importing the app never issues DDL or metadata queries.
 
 # Dashboard/Summary Routes
 @app.route('/api/dashboard/summary', methods=['GET'])
 def get_dashboard_summary():
     """Get financial summary for dashboard"""
     try:
-        # Calculate Assets
-        cuentas_por_cobrar = db.session.query(db.func.coalesce(db.func.sum(FacturaVenta.total), 0)).filter(
-            FacturaVenta.estado == 'Pendiente'
-        ).scalar() or 0
-        
-        efectivo = db.session.query(db.func.coalesce(db.func.sum(CuentaBancaria.saldo_actual), 0)).scalar() or 0
-        
-        inventario = db.session.query(db.func.coalesce(
-            db.func.sum(ArticuloInventario.stock_actual * ArticuloInventario.precio_compra), 0
-        )).scalar() or 0
+        if request.args.get('fresh', type=int):
+            resumen = dashboard.rebuild_snapshot()
+            db.session.commit()
+        else:
+            resumen = dashboard.get_snapshot()
         
-        activos_fijos = db.session.query(db.func.coalesce(
-            db.func.sum(ActivoFijo.valor_adquisicion), 0
-        )).filter(ActivoFijo.estado == 'Activo').scalar() or 0
+        # Calculate Assets
+        cuentas_por_cobrar = resumen.cuentas_por_cobrar
+        efectivo = resumen.efectivo
+        inventario = resumen.inventario
+        # Fixed assets at book value: cost minus the posted depreciation
+        depreciacion_acumulada = resumen.depreciacion_acumulada
+        activos_fijos = resumen.activos_fijos - depreciacion_acumulada
         
         total_activos = cuentas_por_cobrar + efectivo + inventario + activos_fijos
         
         # Calculate Liabilities
-        cuentas_por_pagar = db.session.query(db.func.coalesce(db.func.sum(FacturaCompra.total), 0)).filter(
-            FacturaCompra.estado == 'Pendiente'
-        ).scalar() or 0
+        cuentas_por_pagar = resumen.cuentas_por_pagar
         
         impuestos_pagar = cuentas_por_pagar * Decimal('0.15')  # 15% IVA
         
         total_pasivos = cuentas_por_pagar + impuestos_pagar
         
         # Calculate Income
-        ventas = db.session.query(db.func.coalesce(db.func.sum(FacturaVenta.total), 0)).filter(
-            FacturaVenta.estado == 'Pagada'
-        ).scalar() or 0
+        ventas = resumen.ventas
         
         intereses = Decimal('565')  # Placeholder for interest income
         
@@ -77,7 +87,8 @@ def get_dashboard_summary():
                     'efectivo': float(efectivo),
                     'inventario': float(inventario),
                     'activos_fijos': float(activos_fijos)
-                }
+                },
+                'depreciacion_acumulada': float(depreciacion_acumulada)
             },
             'pasivos': {
                 'total': float(total_pasivos),
@@ -101,26 +112,56 @@ def get_dashboard_summary():
                     'equipo_computo': float(equipo_computo),
                     'reparaciones': float(reparaciones)
                 }
-            }
+            },
+            'as_of': resumen.actualizado.isoformat() if resumen.actualizado else None
         })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/dashboard/summary/verificar', methods=['GET'])
+def verify_dashboard_summary():
+    """Diff the materialized dashboard summary against the base tables"""
+    try:
+        diferencias = dashboard.check_consistency()
+        return jsonify({'consistente': not diferencias, 'diferencias': diferencias})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Hit rate of the listing response cache in this process"""
+    try:
+        backend = response_cache.get_backend()
+        return jsonify(dict(
+            response_cache.stats.snapshot(),
+            backend=backend.name if backend else 'off',
+            entradas=len(backend) if backend else 0
+        ))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # Client Routes
+CLIENTES_LIST = ListSpec(Cliente, {
+    'id': (Cliente.id, as_is),
+    'nombre': (Cliente.nombre, as_is),
+    'rfc': (Cliente.rfc, as_is),
+    'direccion': (Cliente.direccion, as_is),
+    'telefono': (Cliente.telefono, as_is),
+    'email': (Cliente.email, as_is),
+    'fecha_registro': (Cliente.fecha_registro, as_iso)
+}, filters={
+    **search(Cliente.nombre, Cliente.rfc, Cliente.email),
+    'rfc': (Cliente.rfc, parse_str, equals)
+})
+
 @app.route('/api/clientes', methods=['GET'])
+@query_budget(LIST_QUERY_BUDGET + 1)
+@cached_response(Cliente)
 def get_clientes():
-    """Get all clients"""
+    """Get clients (paginated)"""
     try:
-        clientes = Cliente.query.all()
-        return jsonify([{
-            'id': c.id,
-            'nombre': c.nombre,
-            'rfc': c.rfc,
-            'direccion': c.direccion,
-            'telefono': c.telefono,
-            'email': c.email,
-            'fecha_registro': c.fecha_registro.isoformat() if c.fecha_registro else None
-        } for c in clientes])
+        return paginate(CLIENTES_LIST)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -137,6 +178,8 @@ def create_cliente():
             email=data.get('email')
         )
         db.session.add(cliente)
+        contadores.added(Cliente)
+        eventos.publish('cliente', cliente)
         db.session.commit()
         return jsonify({'id': cliente.id, 'message': 'Cliente creado exitosamente'}), 201
     except Exception as e:
@@ -144,20 +187,26 @@ def create_cliente():
         return jsonify({'error': str(e)}), 500
 
 # Supplier Routes
+PROVEEDORES_LIST = ListSpec(Proveedor, {
+    'id': (Proveedor.id, as_is),
+    'nombre': (Proveedor.nombre, as_is),
+    'rfc': (Proveedor.rfc, as_is),
+    'direccion': (Proveedor.direccion, as_is),
+    'telefono': (Proveedor.telefono, as_is),
+    'email': (Proveedor.email, as_is),
+    'fecha_registro': (Proveedor.fecha_registro, as_iso)
+}, filters={
+    **search(Proveedor.nombre, Proveedor.rfc, Proveedor.email),
+    'rfc': (Proveedor.rfc, parse_str, equals)
+})
+
 @app.route('/api/proveedores', methods=['GET'])
+@query_budget(LIST_QUERY_BUDGET + 1)
+@cached_response(Proveedor)
 def get_proveedores():
-    """Get all suppliers"""
+    """Get suppliers (paginated)"""
     try:
-        proveedores = Proveedor.query.all()
-        return jsonify([{
-            'id': p.id,
-            'nombre': p.nombre,
-            'rfc': p.rfc,
-            'direccion': p.direccion,
-            'telefono': p.telefono,
-            'email': p.email,
-            'fecha_registro': p.fecha_registro.isoformat() if p.fecha_registro else None
-        } for p in proveedores])
+        return paginate(PROVEEDORES_LIST)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -174,6 +223,8 @@ def create_proveedor():
             email=data.get('email')
         )
         db.session.add(proveedor)
+        contadores.added(Proveedor)
+        eventos.publish('proveedor', proveedor)
         db.session.commit()
         return jsonify({'id': proveedor.id, 'message': 'Proveedor creado exitosamente'}), 201
     except Exception as e:
@@ -181,19 +232,27 @@ def create_proveedor():
         return jsonify({'error': str(e)}), 500
 
 # Bank Account Routes
+CUENTAS_BANCARIAS_LIST = ListSpec(CuentaBancaria, {
+    'id': (CuentaBancaria.id, as_is),
+    'nombre': (CuentaBancaria.nombre, as_is),
+    'banco': (CuentaBancaria.banco, as_is),
+    'numero_cuenta': (CuentaBancaria.numero_cuenta, as_is),
+    'saldo_actual': (CuentaBancaria.saldo_actual, as_float),
+    'fecha_apertura': (CuentaBancaria.fecha_apertura, as_iso)
+}, filters={
+    **search(CuentaBancaria.nombre, CuentaBancaria.banco, CuentaBancaria.numero_cuenta),
+    'banco': (CuentaBancaria.banco, parse_str, equals)
+}, totals={
+    'saldo_actual': (sum_of(CuentaBancaria.saldo_actual), as_float)
+})
+
 @app.route('/api/cuentas-bancarias', methods=['GET'])
+@query_budget(LIST_QUERY_BUDGET + 1)
+@cached_response(CuentaBancaria)
 def get_cuentas_bancarias():
-    """Get all bank accounts"""
+    """Get bank accounts (paginated)"""
     try:
-        cuentas = CuentaBancaria.query.all()
-        return jsonify([{
-            'id': c.id,
-            'nombre': c.nombre,
-            'banco': c.banco,
-            'numero_cuenta': c.numero_cuenta,
-            'saldo_actual': float(c.saldo_actual),
-            'fecha_apertura': c.fecha_apertura.isoformat() if c.fecha_apertura else None
-        } for c in cuentas])
+        return paginate(CUENTAS_BANCARIAS_LIST)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -210,6 +269,9 @@ def create_cuenta_bancaria():
             saldo_actual=Decimal(str(data.get('saldo_inicial', 0)))
         )
         db.session.add(cuenta)
+        deltas = dashboard.apply_delta(efectivo=cuenta.saldo_actual)
+        contadores.added(CuentaBancaria)
+        eventos.publish('cuenta_bancaria', cuenta, deltas)
         db.session.commit()
         return jsonify({'id': cuenta.id, 'message': 'Cuenta bancaria creada exitosamente'}), 201
     except Exception as e:
@@ -217,22 +279,36 @@ def create_cuenta_bancaria():
         return jsonify({'error': str(e)}), 500
 
 # Inventory Routes
+ARTICULOS_LIST = ListSpec(ArticuloInventario, {
+    'id': (ArticuloInventario.id, as_is),
+    'codigo': (ArticuloInventario.codigo, as_is),
+    'nombre': (ArticuloInventario.nombre, as_is),
+    'descripcion': (ArticuloInventario.descripcion, as_is),
+    'precio_compra': (ArticuloInventario.precio_compra, as_float_if_set),
+    'precio_venta': (ArticuloInventario.precio_venta, as_float_if_set),
+    'stock_actual': (ArticuloInventario.stock_actual, as_is),
+    'stock_minimo': (ArticuloInventario.stock_minimo, as_is),
+    'unidad_medida': (ArticuloInventario.unidad_medida, as_is),
+    'costo_promedio': (ArticuloInventario.costo_promedio, as_float),
+    'valor_inventario': (ArticuloInventario.valor_inventario, as_float),
+    'bajo_stock': (ArticuloInventario.bajo_stock, as_is)
+}, filters={
+    **search(ArticuloInventario.codigo, ArticuloInventario.nombre, ArticuloInventario.descripcion),
+    'codigo': (ArticuloInventario.codigo, parse_str, equals),
+    'bajo_stock': (ArticuloInventario.bajo_stock, parse_bool, equals)
+}, totals={
+    'valor_inventario': (sum_of(ArticuloInventario.valor_inventario), as_float),
+    'bajo_stock': (count_where(ArticuloInventario.bajo_stock), int),
+    'agotados': (count_where(ArticuloInventario.stock_actual <= 0), int)
+})
+
 @app.route('/api/articulos', methods=['GET'])
+@query_budget(LIST_QUERY_BUDGET + 1)
+@cached_response(ArticuloInventario)
 def get_articulos():
-    """Get all inventory items"""
+    """Get inventory items (paginated)"""
     try:
-        articulos = ArticuloInventario.query.all()
-        return jsonify([{
-            'id': a.id,
-            'codigo': a.codigo,
-            'nombre': a.nombre,
-            'descripcion': a.descripcion,
-            'precio_compra': float(a.precio_compra) if a.precio_compra else None,
-            'precio_venta': float(a.precio_venta) if a.precio_venta else None,
-            'stock_actual': a.stock_actual,
-            'stock_minimo': a.stock_minimo,
-            'unidad_medida': a.unidad_medida
-        } for a in articulos])
+        return paginate(ARTICULOS_LIST)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -241,161 +317,194 @@ def create_articulo():
     """Create new inventory item"""
     try:
         data = request.get_json()
+        precio_compra = Decimal(str(data.get('precio_compra', 0))) if data.get('precio_compra') else None
         articulo = ArticuloInventario(
             codigo=data['codigo'],
             nombre=data['nombre'],
             descripcion=data.get('descripcion'),
-            precio_compra=Decimal(str(data.get('precio_compra', 0))) if data.get('precio_compra') else None,
+            precio_compra=precio_compra,
             precio_venta=Decimal(str(data.get('precio_venta', 0))) if data.get('precio_venta') else None,
             stock_actual=data.get('stock_actual', 0),
             stock_minimo=data.get('stock_minimo', 0),
-            unidad_medida=data.get('unidad_medida', 'PZA')
+            unidad_medida=data.get('unidad_medida', 'PZA'),
+            **inventario.opening_values(precio_compra, data.get('stock_actual', 0), data.get('stock_minimo', 0))
         )
         db.session.add(articulo)
+        db.session.flush()  # Get the ID
+        inventario.record_opening(articulo)
+        deltas = dashboard.apply_delta(inventario=articulo.valor_inventario)
+        contadores.added(ArticuloInventario)
+        eventos.publish('articulo', articulo, deltas)
         db.session.commit()
         return jsonify({'id': articulo.id, 'message': 'Artículo creado exitosamente'}), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+MOVIMIENTOS_INVENTARIO_LIST = ListSpec(MovimientoInventario, {
+    'id': (MovimientoInventario.id, as_is),
+    'articulo_id': (MovimientoInventario.articulo_id, as_is),
+    'fecha': (MovimientoInventario.fecha, as_iso),
+    'tipo': (MovimientoInventario.tipo, as_is),
+    'cantidad': (MovimientoInventario.cantidad, as_is),
+    'costo_unitario': (MovimientoInventario.costo_unitario, as_float),
+    'importe': (MovimientoInventario.importe, as_float),
+    'existencia': (MovimientoInventario.existencia, as_is),
+    'origen': (MovimientoInventario.origen, as_is),
+    'documento_id': (MovimientoInventario.documento_id, as_is)
+}, filters={
+    **date_range(MovimientoInventario.fecha),
+    'articulo_id': (MovimientoInventario.articulo_id, parse_int, equals),
+    'tipo': (MovimientoInventario.tipo, parse_str, equals)
+})
+
+@app.route('/api/inventario/movimientos', methods=['GET'])
+@query_budget(LIST_QUERY_BUDGET)
+def get_movimientos_inventario():
+    """Get stock movements (paginated, ?articulo_id= for one article's ledger)"""
+    try:
+        return paginate(MOVIMIENTOS_INVENTARIO_LIST)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/inventario/valuacion', methods=['GET'])
+@query_budget(2)
+def get_valuacion_inventario():
+    """Get the inventory value (maintained) and how many articles are below their minimum stock"""
+    try:
+        resumen = dashboard.get_snapshot()
+        bajo_stock = db.session.query(db.func.count(ArticuloInventario.id)).filter(
+            ArticuloInventario.bajo_stock == True
+        ).scalar()
+        return jsonify({
+            'valor_inventario': float(resumen.inventario),
+            'articulos_bajo_stock': bajo_stock
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Sales Invoice Routes
+FACTURAS_VENTA_LIST = ListSpec(FacturaVenta, {
+    'id': (FacturaVenta.id, as_is),
+    'folio': (FacturaVenta.folio, as_is),
+    'fecha': (FacturaVenta.fecha, as_iso),
+    'cliente_id': (FacturaVenta.cliente_id, as_is),
+    'cliente_nombre': (Cliente.nombre, as_is),
+    'subtotal': (FacturaVenta.subtotal, as_float),
+    'iva': (FacturaVenta.iva, as_float),
+    'total': (FacturaVenta.total, as_float),
+    'estado': (FacturaVenta.estado, as_is)
+}, joins=[
+    (Cliente, FacturaVenta.cliente_id == Cliente.id)
+], filters={
+    **date_range(FacturaVenta.fecha),
+    **search(FacturaVenta.folio, Cliente.nombre),
+    'estado': (FacturaVenta.estado, parse_str, equals),
+    'cliente_id': (FacturaVenta.cliente_id, parse_int, equals)
+}, totals={
+    'total': (sum_of(FacturaVenta.total), as_float),
+    'pendientes': (count_where(FacturaVenta.estado == 'Pendiente'), int),
+    'canceladas': (count_where(FacturaVenta.estado == 'Cancelada'), int)
+})
+
 @app.route('/api/facturas-venta', methods=['GET'])
+@query_budget(LIST_QUERY_BUDGET)
 def get_facturas_venta():
-    """Get all sales invoices"""
+    """Get sales invoices (paginated)"""
     try:
-        facturas = FacturaVenta.query.all()
-        return jsonify([{
-            'id': f.id,
-            'folio': f.folio,
-            'fecha': f.fecha.isoformat() if f.fecha else None,
-            'cliente_nombre': f.cliente.nombre if f.cliente else None,
-            'subtotal': float(f.subtotal),
-            'iva': float(f.iva),
-            'total': float(f.total),
-            'estado': f.estado
-        } for f in facturas])
+        return paginate(FACTURAS_VENTA_LIST)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def create_journal_entry_for_sale(factura_id, cliente_id, subtotal, iva, total, fecha, concepto="Venta de productos"):
+def create_journal_entry_for_sale(factura_folio, cliente_id, subtotal, iva, total, fecha, concepto="Venta de productos"):
     """Create journal entry for sales invoice"""
-    try:
-        # Generate folio for journal entry
-        folio = generate_folio('AC', AsientoContable)
-        
-        # Create journal entry
-        asiento = AsientoContable(
-            folio=folio,
-            fecha=fecha,
-            mes=fecha.month,
-            anio=fecha.year,
-            concepto=f"{concepto} - Factura {FacturaVenta.query.get(factura_id).folio}",
-            total_debe=total,
-            total_haber=total,
-            estado='Aplicado'
+    # Generate folio for journal entry
+    folio = generate_folio('AC', AsientoContable)
+    
+    # Create journal entry
+    asiento = AsientoContable(
+        folio=folio,
+        fecha=fecha,
+        mes=fecha.month,
+        anio=fecha.year,
+        concepto=f"{concepto} - Factura {factura_folio}",
+        total_debe=total,
+        total_haber=total,
+        estado='Aplicado'
+    )
+    db.session.add(asiento)
+    db.session.flush()  # Get the ID
+    contadores.added(AsientoContable)
+    
+    # Create movements
+    movimientos = journal.sale_movements(cliente_id, subtotal, iva, total)
+    
+    for mov_data in movimientos:
+        movimiento = MovimientoContable(
+            asiento_id=asiento.id,
+            cuenta=mov_data['cuenta'],
+            debe=Decimal(str(mov_data['debe'])),
+            haber=Decimal(str(mov_data['haber'])),
+            concepto=mov_data['concepto']
         )
-        db.session.add(asiento)
-        db.session.flush()  # Get the ID
-        
-        # Create movements
-        movimientos = [
-            {
-                'cuenta': 'Cuentas por Cobrar',
-                'debe': total,
-                'haber': 0,
-                'concepto': f'Cobro pendiente - Cliente ID: {cliente_id}'
-            },
-            {
-                'cuenta': 'Ventas',
-                'debe': 0,
-                'haber': subtotal,
-                'concepto': 'Venta de productos'
-            },
-            {
-                'cuenta': 'IVA por Pagar',
-                'debe': 0,
-                'haber': iva,
-                'concepto': 'IVA de venta'
-            }
-        ]
-        
-        for mov_data in movimientos:
-            movimiento = MovimientoContable(
-                asiento_id=asiento.id,
-                cuenta=mov_data['cuenta'],
-                debe=Decimal(str(mov_data['debe'])),
-                haber=Decimal(str(mov_data['haber'])),
-                concepto=mov_data['concepto']
-            )
-            db.session.add(movimiento)
-        
-        return asiento.id
-    except Exception as e:
-        print(f"Error creating journal entry: {e}")
-        return None
+        db.session.add(movimiento)
+    
+    balanza.post_movements(asiento.anio, asiento.mes, [
+        (mov_data['cuenta'], mov_data['debe'], mov_data['haber']) for mov_data in movimientos
+    ], asiento.estado)
+    
+    return asiento.id
 
-def create_journal_entry_for_purchase(factura_id, proveedor_id, subtotal, iva, total, fecha, concepto="Compra de productos"):
+def create_journal_entry_for_purchase(factura_folio, proveedor_id, subtotal, iva, total, fecha, concepto="Compra de productos"):
     """Create journal entry for purchase invoice"""
-    try:
-        # Generate folio for journal entry
-        folio = generate_folio('AC', AsientoContable)
-        
-        # Create journal entry
-        asiento = AsientoContable(
-            folio=folio,
-            fecha=fecha,
-            mes=fecha.month,
-            anio=fecha.year,
-            concepto=f"{concepto} - Factura {FacturaCompra.query.get(factura_id).folio}",
-            total_debe=total,
-            total_haber=total,
-            estado='Aplicado'
+    # Generate folio for journal entry
+    folio = generate_folio('AC', AsientoContable)
+    
+    # Create journal entry
+    asiento = AsientoContable(
+        folio=folio,
+        fecha=fecha,
+        mes=fecha.month,
+        anio=fecha.year,
+        concepto=f"{concepto} - Factura {factura_folio}",
+        total_debe=total,
+        total_haber=total,
+        estado='Aplicado'
+    )
+    db.session.add(asiento)
+    db.session.flush()  # Get the ID
+    contadores.added(AsientoContable)
+    
+    # Create movements
+    movimientos = journal.purchase_movements(proveedor_id, subtotal, iva, total)
+    
+    for mov_data in movimientos:
+        movimiento = MovimientoContable(
+            asiento_id=asiento.id,
+            cuenta=mov_data['cuenta'],
+            debe=Decimal(str(mov_data['debe'])),
+            haber=Decimal(str(mov_data['haber'])),
+            concepto=mov_data['concepto']
         )
-        db.session.add(asiento)
-        db.session.flush()  # Get the ID
-        
-        # Create movements
-        movimientos = [
-            {
-                'cuenta': 'Compras',
-                'debe': subtotal,
-                'haber': 0,
-                'concepto': 'Compra de productos'
-            },
-            {
-                'cuenta': 'IVA Acreditable',
-                'debe': iva,
-                'haber': 0,
-                'concepto': 'IVA de compra'
-            },
-            {
-                'cuenta': 'Cuentas por Pagar',
-                'debe': 0,
-                'haber': total,
-                'concepto': f'Pago pendiente - Proveedor ID: {proveedor_id}'
-            }
-        ]
-        
-        for mov_data in movimientos:
-            movimiento = MovimientoContable(
-                asiento_id=asiento.id,
-                cuenta=mov_data['cuenta'],
-                debe=Decimal(str(mov_data['debe'])),
-                haber=Decimal(str(mov_data['haber'])),
-                concepto=mov_data['concepto']
-            )
-            db.session.add(movimiento)
-        
-        return asiento.id
-    except Exception as e:
-        print(f"Error creating journal entry: {e}")
-        return None
+        db.session.add(movimiento)
+    
+    balanza.post_movements(asiento.anio, asiento.mes, [
+        (mov_data['cuenta'], mov_data['debe'], mov_data['haber']) for mov_data in movimientos
+    ], asiento.estado)
+    
+    return asiento.id
 
 @app.route('/api/facturas-venta', methods=['POST'])
 def create_factura_venta():
     """Create new sales invoice"""
     try:
         data = request.get_json()
+        fecha = datetime.strptime(data['fecha'], '%Y-%m-%d').date()
+        cierres.ensure_open(fecha)
+        
+        # Whole units only, checked before the totals are computed from them
+        for item in data['detalles']:
+            item['cantidad'] = inventario.whole_quantity(item['cantidad'])
         
         # Generate folio
         folio = generate_folio('FV', FacturaVenta)
@@ -408,7 +517,7 @@ def create_factura_venta():
         # Create invoice
         factura = FacturaVenta(
             folio=folio,
-            fecha=datetime.strptime(data['fecha'], '%Y-%m-%d').date(),
+            fecha=fecha,
             cliente_id=data['cliente_id'],
             subtotal=subtotal,
             iva=iva,
@@ -417,6 +526,12 @@ def create_factura_venta():
         )
         db.session.add(factura)
         db.session.flush()  # Get the ID
+        contadores.added(FacturaVenta)
+        
+        # Stock movements first: they lock the articles the details reference
+        valor_inventario = inventario.post_movements(
+            inventario.invoice_lines('venta', factura.id, fecha, factura.estado, data['detalles'])
+        )
         
         # Create details
         for detalle_data in data['detalles']:
@@ -431,7 +546,7 @@ def create_factura_venta():
         
         # Create automatic journal entry
         asiento_id = create_journal_entry_for_sale(
-            factura.id, 
+            folio, 
             data['cliente_id'], 
             subtotal, 
             iva, 
@@ -439,6 +554,11 @@ def create_factura_venta():
             factura.fecha
         )
         
+        componente = dashboard.FACTURA_VENTA_POR_ESTADO.get(factura.estado)
+        deltas = dashboard.apply_delta(inventario=valor_inventario, **({componente: total} if componente else {}))
+        eventos.publish('factura_venta', factura, deltas)
+        response_cache.bump(ArticuloInventario)
+        
         db.session.commit()
         
         response_data = {
@@ -449,26 +569,67 @@ def create_factura_venta():
         }
         
         return jsonify(response_data), 201
+    except cierres.PeriodoCerrado as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
+    except inventario.MovimientoInvalido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/facturas-venta/bulk', methods=['POST'])
+def bulk_facturas_venta():
+    """Import many sales invoices (JSON array or NDJSON) in batched transactions"""
+    try:
+        rows = bulk_import.parse_payload(request)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if request.args.get('asincrono', type=int):
+        return queue_job('importar_facturas', {'tipo': 'venta', 'filas': rows})
+    try:
+        resultados = bulk_import.import_invoices('venta', rows)
+        creadas = sum(1 for r in resultados if 'error' not in r)
+        return jsonify({
+            'creadas': creadas,
+            'errores': len(resultados) - creadas,
+            'resultados': resultados
+        }), 201 if creadas else 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 # Purchase Invoice Routes
+FACTURAS_COMPRA_LIST = ListSpec(FacturaCompra, {
+    'id': (FacturaCompra.id, as_is),
+    'folio': (FacturaCompra.folio, as_is),
+    'fecha': (FacturaCompra.fecha, as_iso),
+    'proveedor_id': (FacturaCompra.proveedor_id, as_is),
+    'proveedor_nombre': (Proveedor.nombre, as_is),
+    'subtotal': (FacturaCompra.subtotal, as_float),
+    'iva': (FacturaCompra.iva, as_float),
+    'total': (FacturaCompra.total, as_float),
+    'estado': (FacturaCompra.estado, as_is)
+}, joins=[
+    (Proveedor, FacturaCompra.proveedor_id == Proveedor.id)
+], filters={
+    **date_range(FacturaCompra.fecha),
+    **search(FacturaCompra.folio, Proveedor.nombre),
+    'estado': (FacturaCompra.estado, parse_str, equals),
+    'proveedor_id': (FacturaCompra.proveedor_id, parse_int, equals)
+}, totals={
+    'total': (sum_of(FacturaCompra.total), as_float),
+    'pendientes': (count_where(FacturaCompra.estado == 'Pendiente'), int),
+    'canceladas': (count_where(FacturaCompra.estado == 'Cancelada'), int)
+})
+
 @app.route('/api/facturas-compra', methods=['GET'])
+@query_budget(LIST_QUERY_BUDGET)
 def get_facturas_compra():
-    """Get all purchase invoices"""
+    """Get purchase invoices (paginated)"""
     try:
-        facturas = FacturaCompra.query.all()
-        return jsonify([{
-            'id': f.id,
-            'folio': f.folio,
-            'fecha': f.fecha.isoformat() if f.fecha else None,
-            'proveedor_nombre': f.proveedor.nombre if f.proveedor else None,
-            'subtotal': float(f.subtotal),
-            'iva': float(f.iva),
-            'total': float(f.total),
-            'estado': f.estado
-        } for f in facturas])
+        return paginate(FACTURAS_COMPRA_LIST)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -477,6 +638,12 @@ def create_factura_compra():
     """Create new purchase invoice"""
     try:
         data = request.get_json()
+        fecha = datetime.strptime(data['fecha'], '%Y-%m-%d').date()
+        cierres.ensure_open(fecha)
+        
+        # Whole units only, checked before the totals are computed from them
+        for item in data['detalles']:
+            item['cantidad'] = inventario.whole_quantity(item['cantidad'])
         
         # Generate folio
         folio = generate_folio('FC', FacturaCompra)
@@ -489,7 +656,7 @@ def create_factura_compra():
         # Create invoice
         factura = FacturaCompra(
             folio=folio,
-            fecha=datetime.strptime(data['fecha'], '%Y-%m-%d').date(),
+            fecha=fecha,
             proveedor_id=data['proveedor_id'],
             subtotal=subtotal,
             iva=iva,
@@ -498,6 +665,12 @@ def create_factura_compra():
         )
         db.session.add(factura)
         db.session.flush()  # Get the ID
+        contadores.added(FacturaCompra)
+        
+        # Stock movements first: they lock the articles the details reference
+        valor_inventario = inventario.post_movements(
+            inventario.invoice_lines('compra', factura.id, fecha, factura.estado, data['detalles'])
+        )
         
         # Create details
         for detalle_data in data['detalles']:
@@ -512,7 +685,7 @@ def create_factura_compra():
         
         # Create automatic journal entry
         asiento_id = create_journal_entry_for_purchase(
-            factura.id, 
+            folio, 
             data['proveedor_id'], 
             subtotal, 
             iva, 
@@ -520,6 +693,11 @@ def create_factura_compra():
             factura.fecha
         )
         
+        componente = dashboard.FACTURA_COMPRA_POR_ESTADO.get(factura.estado)
+        deltas = dashboard.apply_delta(inventario=valor_inventario, **({componente: total} if componente else {}))
+        eventos.publish('factura_compra', factura, deltas)
+        response_cache.bump(ArticuloInventario)
+        
         db.session.commit()
         
         response_data = {
@@ -530,25 +708,67 @@ def create_factura_compra():
         }
         
         return jsonify(response_data), 201
+    except cierres.PeriodoCerrado as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
+    except inventario.MovimientoInvalido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/facturas-compra/bulk', methods=['POST'])
+def bulk_facturas_compra():
+    """Import many purchase invoices (JSON array or NDJSON) in batched transactions"""
+    try:
+        rows = bulk_import.parse_payload(request)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if request.args.get('asincrono', type=int):
+        return queue_job('importar_facturas', {'tipo': 'compra', 'filas': rows})
+    try:
+        resultados = bulk_import.import_invoices('compra', rows)
+        creadas = sum(1 for r in resultados if 'error' not in r)
+        return jsonify({
+            'creadas': creadas,
+            'errores': len(resultados) - creadas,
+            'resultados': resultados
+        }), 201 if creadas else 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 # Receipt Routes
+RECIBOS_LIST = ListSpec(Recibo, {
+    'id': (Recibo.id, as_is),
+    'folio': (Recibo.folio, as_is),
+    'fecha': (Recibo.fecha, as_iso),
+    'cliente_id': (Recibo.cliente_id, as_is),
+    'cliente_nombre': (Cliente.nombre, as_is),
+    'factura_venta_id': (Recibo.factura_venta_id, as_is),
+    'cuenta_bancaria_id': (Recibo.cuenta_bancaria_id, as_is),
+    'monto': (Recibo.monto, as_float),
+    'concepto': (Recibo.concepto, as_is),
+    'metodo_pago': (Recibo.metodo_pago, as_is)
+}, joins=[
+    (Cliente, Recibo.cliente_id == Cliente.id)
+], filters={
+    **date_range(Recibo.fecha),
+    **search(Recibo.folio, Cliente.nombre),
+    'cliente_id': (Recibo.cliente_id, parse_int, equals),
+    'factura_venta_id': (Recibo.factura_venta_id, parse_int, equals),
+    'cuenta_bancaria_id': (Recibo.cuenta_bancaria_id, parse_int, equals)
+}, totals={
+    'monto': (sum_of(Recibo.monto), as_float)
+})
+
 @app.route('/api/recibos', methods=['GET'])
+@query_budget(LIST_QUERY_BUDGET)
 def get_recibos():
-    """Get all receipts"""
+    """Get receipts (paginated)"""
     try:
-        recibos = Recibo.query.all()
-        return jsonify([{
-            'id': r.id,
-            'folio': r.folio,
-            'fecha': r.fecha.isoformat() if r.fecha else None,
-            'cliente_nombre': r.cliente.nombre if r.cliente else None,
-            'monto': float(r.monto),
-            'concepto': r.concepto,
-            'metodo_pago': r.metodo_pago
-        } for r in recibos])
+        return paginate(RECIBOS_LIST)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -571,33 +791,53 @@ def create_recibo():
             concepto=data.get('concepto'),
             metodo_pago=data.get('metodo_pago', 'Efectivo')
         )
+        # Atomic balance increment, before the INSERT locks the account row as parent
+        bancos.apply_movement(recibo.cuenta_bancaria_id, recibo.monto)
         db.session.add(recibo)
-        
-        # Update bank account balance
-        cuenta = CuentaBancaria.query.get(data['cuenta_bancaria_id'])
-        cuenta.saldo_actual += Decimal(str(data['monto']))
+        deltas = dashboard.apply_delta(efectivo=recibo.monto)
+        contadores.added(Recibo)
+        eventos.publish('recibo', recibo, deltas)
+        response_cache.bump(CuentaBancaria)
         
         db.session.commit()
         return jsonify({'id': recibo.id, 'folio': folio, 'message': 'Recibo creado exitosamente'}), 201
+    except bancos.CuentaInexistente as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 # Payment Routes
+PAGOS_LIST = ListSpec(Pago, {
+    'id': (Pago.id, as_is),
+    'folio': (Pago.folio, as_is),
+    'fecha': (Pago.fecha, as_iso),
+    'proveedor_id': (Pago.proveedor_id, as_is),
+    'proveedor_nombre': (Proveedor.nombre, as_is),
+    'factura_compra_id': (Pago.factura_compra_id, as_is),
+    'cuenta_bancaria_id': (Pago.cuenta_bancaria_id, as_is),
+    'monto': (Pago.monto, as_float),
+    'concepto': (Pago.concepto, as_is),
+    'metodo_pago': (Pago.metodo_pago, as_is)
+}, joins=[
+    (Proveedor, Pago.proveedor_id == Proveedor.id)
+], filters={
+    **date_range(Pago.fecha),
+    **search(Pago.folio, Proveedor.nombre),
+    'proveedor_id': (Pago.proveedor_id, parse_int, equals),
+    'factura_compra_id': (Pago.factura_compra_id, parse_int, equals),
+    'cuenta_bancaria_id': (Pago.cuenta_bancaria_id, parse_int, equals)
+}, totals={
+    'monto': (sum_of(Pago.monto), as_float)
+})
+
 @app.route('/api/pagos', methods=['GET'])
+@query_budget(LIST_QUERY_BUDGET)
 def get_pagos():
-    """Get all payments"""
+    """Get payments (paginated)"""
     try:
-        pagos = Pago.query.all()
-        return jsonify([{
-            'id': p.id,
-            'folio': p.folio,
-            'fecha': p.fecha.isoformat() if p.fecha else None,
-            'proveedor_nombre': p.proveedor.nombre if p.proveedor else None,
-            'monto': float(p.monto),
-            'concepto': p.concepto,
-            'metodo_pago': p.metodo_pago
-        } for p in pagos])
+        return paginate(PAGOS_LIST)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -620,37 +860,52 @@ def create_pago():
             concepto=data.get('concepto'),
             metodo_pago=data.get('metodo_pago', 'Efectivo')
         )
+        # Atomic balance decrement, before the INSERT locks the account row as parent
+        bancos.apply_movement(pago.cuenta_bancaria_id, -pago.monto)
         db.session.add(pago)
-        
-        # Update bank account balance
-        cuenta = CuentaBancaria.query.get(data['cuenta_bancaria_id'])
-        cuenta.saldo_actual -= Decimal(str(data['monto']))
+        deltas = dashboard.apply_delta(efectivo=-pago.monto)
+        contadores.added(Pago)
+        eventos.publish('pago', pago, deltas)
+        response_cache.bump(CuentaBancaria)
         
         db.session.commit()
         return jsonify({'id': pago.id, 'folio': folio, 'message': 'Pago creado exitosamente'}), 201
+    except bancos.CuentaInexistente as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 # Employee Routes
+EMPLEADOS_LIST = ListSpec(Empleado, {
+    'id': (Empleado.id, as_is),
+    'nombre': (Empleado.nombre, as_is),
+    'apellido_paterno': (Empleado.apellido_paterno, as_is),
+    'apellido_materno': (Empleado.apellido_materno, as_is),
+    'rfc': (Empleado.rfc, as_is),
+    'curp': (Empleado.curp, as_is),
+    'fecha_nacimiento': (Empleado.fecha_nacimiento, as_iso),
+    'fecha_ingreso': (Empleado.fecha_ingreso, as_iso),
+    'salario_diario': (Empleado.salario_diario, as_float_if_set),
+    'puesto': (Empleado.puesto, as_is),
+    'activo': (Empleado.activo, as_is)
+}, filters={
+    **search(Empleado.nombre, Empleado.apellido_paterno, Empleado.puesto),
+    'activo': (Empleado.activo, parse_bool, equals),
+    'puesto': (Empleado.puesto, parse_str, equals)
+}, totals={
+    'activos': (count_where(Empleado.activo), int),
+    'salario_diario': (sum_of(Empleado.salario_diario), as_float)
+})
+
 @app.route('/api/empleados', methods=['GET'])
+@query_budget(LIST_QUERY_BUDGET + 1)
+@cached_response(Empleado)
 def get_empleados():
-    """Get all employees"""
+    """Get employees (paginated)"""
     try:
-        empleados = Empleado.query.all()
-        return jsonify([{
-            'id': e.id,
-            'nombre': e.nombre,
-            'apellido_paterno': e.apellido_paterno,
-            'apellido_materno': e.apellido_materno,
-            'rfc': e.rfc,
-            'curp': e.curp,
-            'fecha_nacimiento': e.fecha_nacimiento.isoformat() if e.fecha_nacimiento else None,
-            'fecha_ingreso': e.fecha_ingreso.isoformat() if e.fecha_ingreso else None,
-            'salario_diario': float(e.salario_diario) if e.salario_diario else None,
-            'puesto': e.puesto,
-            'activo': e.activo
-        } for e in empleados])
+        return paginate(EMPLEADOS_LIST)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -671,6 +926,8 @@ def create_empleado():
             activo=data.get('activo', True)
         )
         db.session.add(empleado)
+        contadores.added(Empleado)
+        eventos.publish('empleado', empleado)
         db.session.commit()
         return jsonify({'id': empleado.id, 'message': 'Empleado creado exitosamente'}), 201
     except Exception as e:
@@ -678,23 +935,35 @@ def create_empleado():
         return jsonify({'error': str(e)}), 500
 
 # Fixed Assets Routes
+ACTIVOS_FIJOS_LIST = ListSpec(ActivoFijo, {
+    'id': (ActivoFijo.id, as_is),
+    'codigo': (ActivoFijo.codigo, as_is),
+    'nombre': (ActivoFijo.nombre, as_is),
+    'descripcion': (ActivoFijo.descripcion, as_is),
+    'categoria': (ActivoFijo.categoria, as_is),
+    'valor_adquisicion': (ActivoFijo.valor_adquisicion, as_float),
+    'fecha_adquisicion': (ActivoFijo.fecha_adquisicion, as_iso),
+    'vida_util_anos': (ActivoFijo.vida_util_anos, as_is),
+    'valor_residual': (ActivoFijo.valor_residual, as_float),
+    'metodo_depreciacion': (ActivoFijo.metodo_depreciacion, as_is),
+    'estado': (ActivoFijo.estado, as_is)
+}, filters={
+    **date_range(ActivoFijo.fecha_adquisicion),
+    **search(ActivoFijo.codigo, ActivoFijo.nombre, ActivoFijo.categoria),
+    'estado': (ActivoFijo.estado, parse_str, equals),
+    'categoria': (ActivoFijo.categoria, parse_str, equals)
+}, totals={
+    'valor_adquisicion': (sum_of(ActivoFijo.valor_adquisicion), as_float),
+    'activos': (count_where(ActivoFijo.estado == 'Activo'), int),
+    'bajas': (count_where(ActivoFijo.estado == 'Dado de baja'), int)
+})
+
 @app.route('/api/activos-fijos', methods=['GET'])
+@query_budget(LIST_QUERY_BUDGET)
 def get_activos_fijos():
-    """Get all fixed assets"""
+    """Get fixed assets (paginated)"""
     try:
-        activos = ActivoFijo.query.all()
-        return jsonify([{
-            'id': a.id,
-            'codigo': a.codigo,
-            'nombre': a.nombre,
-            'descripcion': a.descripcion,
-            'categoria': a.categoria,
-            'valor_adquisicion': float(a.valor_adquisicion),
-            'fecha_adquisicion': a.fecha_adquisicion.isoformat() if a.fecha_adquisicion else None,
-            'vida_util_anos': a.vida_util_anos,
-            'valor_residual': float(a.valor_residual),
-            'estado': a.estado
-        } for a in activos])
+        return paginate(ACTIVOS_FIJOS_LIST)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -703,6 +972,9 @@ def create_activo_fijo():
     """Create new fixed asset"""
     try:
         data = request.get_json()
+        metodo = data.get('metodo_depreciacion', 'linea_recta')
+        if metodo not in depreciacion.METODOS:
+            return jsonify({'error': f'Método de depreciación inválido: {metodo}'}), 400
         activo = ActivoFijo(
             codigo=data['codigo'],
             nombre=data['nombre'],
@@ -712,15 +984,80 @@ def create_activo_fijo():
             fecha_adquisicion=datetime.strptime(data['fecha_adquisicion'], '%Y-%m-%d').date(),
             vida_util_anos=data.get('vida_util_anos', 5),
             valor_residual=Decimal(str(data.get('valor_residual', 0))),
+            metodo_depreciacion=metodo,
             estado=data.get('estado', 'Activo')
         )
         db.session.add(activo)
+        contadores.added(ActivoFijo)
+        deltas = {}
+        if activo.estado == 'Activo':
+            deltas = dashboard.apply_delta(activos_fijos=activo.valor_adquisicion)
+        eventos.publish('activo_fijo', activo, deltas)
         db.session.commit()
         return jsonify({'id': activo.id, 'message': 'Activo fijo creado exitosamente'}), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/activos-fijos/depreciacion', methods=['GET'])
+@query_budget(2)
+@cached_response(ActivoFijo)
+def get_depreciacion():
+    """Get the depreciation of a month and the book values (totals, per category or per asset)"""
+    try:
+        hoy = date.today()
+        anio = request.args.get('anio', hoy.year, type=int)
+        mes = request.args.get('mes', hoy.month, type=int)
+        if not 1 <= mes <= 12:
+            return jsonify({'error': f'Mes inválido: {mes}'}), 400
+        
+        cartera = depreciacion.load_assets()
+        if request.args.get('detalle', type=int):
+            activos, next_cursor = depreciacion.asset_page(
+                cartera, anio, mes,
+                after=request.args.get('after', type=int),
+                limit=parse_limit(request.args)
+            )
+            return page_response(activos, next_cursor)
+        return jsonify(depreciacion.month_summary(cartera, anio, mes))
+    except ListError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/activos-fijos/depreciacion/contabilizar', methods=['POST'])
+def contabilizar_depreciacion():
+    """Post the depreciation entries of every pending month up to anio/mes"""
+    try:
+        data = request.get_json() or {}
+        hoy = date.today()
+        anio = int(data.get('anio', hoy.year))
+        mes = int(data.get('mes', hoy.month))
+        if not 1 <= mes <= 12:
+            return jsonify({'error': f'Mes inválido: {mes}'}), 400
+        
+        registros = depreciacion.post_through(anio, mes)
+        db.session.commit()
+        return jsonify({
+            'meses': [{
+                'anio': r['anio'],
+                'mes': r['mes'],
+                'asiento_id': r['asiento_id'],
+                'importe': float(r['importe']),
+                'acumulada': float(r['acumulada'])
+            } for r in registros],
+            'message': f'{len(registros)} meses contabilizados'
+        }), 201
+    except cierres.PeriodoCerrado as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 # Journal Entry Routes
 
 @app.route('/api/asientos-contables', methods=['POST'])
@@ -728,6 +1065,8 @@ def create_asiento_contable():
     """Create new journal entry"""
     try:
         data = request.get_json()
+        fecha = datetime.strptime(data['fecha'], '%Y-%m-%d').date()
+        cierres.ensure_open(fecha)
         
         # Generate folio
         folio = generate_folio('AC', AsientoContable)
@@ -742,9 +1081,9 @@ def create_asiento_contable():
         # Create journal entry
         asiento = AsientoContable(
             folio=folio,
-            fecha=datetime.strptime(data['fecha'], '%Y-%m-%d').date(),
-            mes=datetime.strptime(data['fecha'], '%Y-%m-%d').date().month,
-            anio=datetime.strptime(data['fecha'], '%Y-%m-%d').date().year,
+            fecha=fecha,
+            mes=fecha.month,
+            anio=fecha.year,
             concepto=data['concepto'],
             total_debe=total_debe,
             total_haber=total_haber,
@@ -752,6 +1091,7 @@ def create_asiento_contable():
         )
         db.session.add(asiento)
         db.session.flush()  # Get the ID
+        contadores.added(AsientoContable)
         
         # Create movements
         for mov_data in data['movimientos']:
@@ -764,28 +1104,48 @@ def create_asiento_contable():
             )
             db.session.add(movimiento)
         
+        balanza.post_movements(asiento.anio, asiento.mes, [
+            (mov_data['cuenta'], mov_data['debe'], mov_data['haber']) for mov_data in data['movimientos']
+        ], asiento.estado)
+        eventos.publish('asiento_contable', asiento)
+        
         db.session.commit()
         return jsonify({'id': asiento.id, 'folio': folio, 'message': 'Asiento contable creado exitosamente'}), 201
+    except cierres.PeriodoCerrado as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 # Payroll Routes
+RECIBOS_NOMINA_LIST = ListSpec(ReciboNomina, {
+    'id': (ReciboNomina.id, as_is),
+    'folio': (ReciboNomina.folio, as_is),
+    'fecha': (ReciboNomina.fecha, as_iso),
+    'empleado_id': (ReciboNomina.empleado_id, as_is),
+    'empleado_nombre': (Empleado.nombre + ' ' + Empleado.apellido_paterno, as_is),
+    'periodo_inicio': (ReciboNomina.periodo_inicio, as_iso),
+    'periodo_fin': (ReciboNomina.periodo_fin, as_iso),
+    'total_bruto': (ReciboNomina.total_bruto, as_float),
+    'total_neto': (ReciboNomina.total_neto, as_float)
+}, joins=[
+    (Empleado, ReciboNomina.empleado_id == Empleado.id)
+], filters={
+    **date_range(ReciboNomina.fecha),
+    **search(ReciboNomina.folio, Empleado.nombre, Empleado.apellido_paterno),
+    'empleado_id': (ReciboNomina.empleado_id, parse_int, equals)
+}, totals={
+    'total_bruto': (sum_of(ReciboNomina.total_bruto), as_float),
+    'total_neto': (sum_of(ReciboNomina.total_neto), as_float)
+})
+
 @app.route('/api/recibos-nomina', methods=['GET'])
+@query_budget(LIST_QUERY_BUDGET)
 def get_recibos_nomina():
-    """Get all payroll receipts"""
+    """Get payroll receipts (paginated)"""
     try:
-        recibos = ReciboNomina.query.all()
-        return jsonify([{
-            'id': r.id,
-            'folio': r.folio,
-            'fecha': r.fecha.isoformat() if r.fecha else None,
-            'empleado_nombre': f"{r.empleado.nombre} {r.empleado.apellido_paterno}" if r.empleado else None,
-            'periodo_inicio': r.periodo_inicio.isoformat() if r.periodo_inicio else None,
-            'periodo_fin': r.periodo_fin.isoformat() if r.periodo_fin else None,
-            'total_bruto': float(r.total_bruto),
-            'total_neto': float(r.total_neto)
-        } for r in recibos])
+        return paginate(RECIBOS_NOMINA_LIST)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -821,80 +1181,220 @@ def create_recibo_nomina():
             total_neto=total_neto
         )
         db.session.add(recibo)
+        contadores.added(ReciboNomina)
+        eventos.publish('recibo_nomina', recibo)
         db.session.commit()
         return jsonify({'id': recibo.id, 'folio': folio, 'message': 'Recibo de nómina creado exitosamente'}), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# Payroll runs: every active employee in one background job
+CORRIDAS_NOMINA_LIST = ListSpec(CorridaNomina, {
+    'id': (CorridaNomina.id, as_is),
+    'fecha': (CorridaNomina.fecha, as_iso),
+    'periodo_inicio': (CorridaNomina.periodo_inicio, as_iso),
+    'periodo_fin': (CorridaNomina.periodo_fin, as_iso),
+    'estado': (CorridaNomina.estado, as_is),
+    'empleados': (CorridaNomina.empleados, as_is),
+    'procesados': (CorridaNomina.procesados, as_is),
+    'total_bruto': (CorridaNomina.total_bruto, as_float),
+    'total_neto': (CorridaNomina.total_neto, as_float),
+    'asiento_id': (CorridaNomina.asiento_id, as_is)
+}, filters={
+    **date_range(CorridaNomina.fecha),
+    'estado': (CorridaNomina.estado, parse_str, equals)
+})
+
+@app.route('/api/nomina/corridas', methods=['GET'])
+@query_budget(LIST_QUERY_BUDGET)
+def get_corridas_nomina():
+    """Get payroll runs (paginated)"""
+    try:
+        return paginate(CORRIDAS_NOMINA_LIST)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/nomina/corridas', methods=['POST'])
+def create_corrida_nomina():
+    """Queue a payroll run for a period, poll its URL for progress"""
+    try:
+        corrida = nomina.create_run(request.get_json() or {})
+        # Executed by a trabajos worker, queued in the same transaction as the run
+        trabajo = trabajos.submit('nomina', {'corrida_id': corrida.id})
+        db.session.commit()
+        response = jsonify(dict(nomina.serialize(corrida), trabajo_id=trabajo.id))
+        response.status_code = 202
+        response.headers['Location'] = f'/api/nomina/corridas/{corrida.id}'
+        return response
+    except nomina.CorridaConflicto as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
+    except cierres.PeriodoCerrado as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/nomina/corridas/<int:corrida_id>', methods=['GET'])
+@query_budget(1)
+def get_corrida_nomina(corrida_id):
+    """Get the state and progress of a payroll run"""
+    try:
+        corrida = db.session.get(CorridaNomina, corrida_id)
+        if corrida is None:
+            return jsonify({'error': 'Corrida no encontrada'}), 404
+        return jsonify(nomina.serialize(corrida))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/nomina/corridas/<int:corrida_id>/reanudar', methods=['POST'])
+def reanudar_corrida_nomina(corrida_id):
+    """Resume a failed or interrupted payroll run"""
+    try:
+        corrida = db.session.get(CorridaNomina, corrida_id)
+        if corrida is None:
+            return jsonify({'error': 'Corrida no encontrada'}), 404
+        if not nomina.resumable(corrida):
+            return jsonify({'error': f'La corrida {corrida_id} no está detenida ni interrumpida'}), 409
+        trabajo = trabajos.submit('nomina', {'corrida_id': corrida_id, 'reanudar': True})
+        db.session.commit()
+        response = jsonify(dict(nomina.serialize(corrida), trabajo_id=trabajo.id))
+        response.status_code = 202
+        response.headers['Location'] = f'/api/nomina/corridas/{corrida_id}'
+        return response
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# Background jobs, executed by python backend/trabajos.py worker
+TRABAJOS_LIST = ListSpec(Trabajo, {
+    'id': (Trabajo.id, as_is),
+    'tipo': (Trabajo.tipo, as_is),
+    'estado': (Trabajo.estado, as_is),
+    'procesados': (Trabajo.procesados, as_is),
+    'total': (Trabajo.total, as_is),
+    'error': (Trabajo.error, as_is),
+    'worker': (Trabajo.worker, as_is),
+    'fecha_creacion': (Trabajo.fecha_creacion, as_iso),
+    'inicio': (Trabajo.inicio, as_iso),
+    'fin': (Trabajo.fin, as_iso)
+}, filters={
+    'tipo': (Trabajo.tipo, parse_str, equals),
+    'estado': (Trabajo.estado, parse_str, equals)
+})
+
+def queue_job(tipo, parametros):
+    """Queue a job and answer 202 with the URL to poll"""
+    try:
+        trabajo = trabajos.submit(tipo, parametros)
+        db.session.commit()
+        response = jsonify(trabajos.serialize(trabajo))
+        response.status_code = 202
+        response.headers['Location'] = f'/api/jobs/{trabajo.id}'
+        return response
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs', methods=['GET'])
+@query_budget(LIST_QUERY_BUDGET)
+def get_trabajos():
+    """Get background jobs (paginated)"""
+    try:
+        return paginate(TRABAJOS_LIST)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def create_trabajo():
+    """Queue a background job, poll its URL for progress and result"""
+    data = request.get_json() or {}
+    return queue_job(data.get('tipo'), data.get('parametros'))
+
+@app.route('/api/jobs/<int:trabajo_id>', methods=['GET'])
+@query_budget(1)
+def get_trabajo(trabajo_id):
+    """Get the state, progress and result of a background job"""
+    try:
+        trabajo = db.session.get(Trabajo, trabajo_id)
+        if trabajo is None:
+            return jsonify({'error': 'Trabajo no encontrado'}), 404
+        return jsonify(trabajos.serialize(trabajo))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<int:trabajo_id>/cancelar', methods=['POST'])
+def cancelar_trabajo(trabajo_id):
+    """Cancel a pending job or stop a running one at its next progress report"""
+    try:
+        trabajo = db.session.get(Trabajo, trabajo_id)
+        if trabajo is None:
+            return jsonify({'error': 'Trabajo no encontrado'}), 404
+        if not trabajos.cancel(trabajo):
+            return jsonify({'error': f'El trabajo {trabajo_id} ya terminó ({trabajo.estado})'}), 409
+        return jsonify(trabajos.serialize(trabajo)), 200 if trabajo.estado == 'Cancelado' else 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 # Count endpoints for sidebar
 @app.route('/api/counts', methods=['GET'])
+@query_budget(1)
 def get_counts():
-    """Get counts for all modules for sidebar"""
-    try:
-        counts = {
-            'clientes': Cliente.query.count(),
-            'proveedores': Proveedor.query.count(),
-            'cuentas_bancarias': CuentaBancaria.query.count(),
-            'articulos': ArticuloInventario.query.count(),
-            'facturas_venta': FacturaVenta.query.count(),
-            'facturas_compra': FacturaCompra.query.count(),
-            'recibos': Recibo.query.count(),
-            'pagos': Pago.query.count(),
-            'empleados': Empleado.query.count(),
-            'recibos_nomina': ReciboNomina.query.count(),
-            'activos_fijos': ActivoFijo.query.count(),
-            'asientos_contables': AsientoContable.query.count()
-        }
-        return jsonify(counts)
+    """Get counts for all modules for sidebar (maintained counters)"""
+    try:
+        counts = contadores.get_counts()
+        etag = contadores.counts_etag(counts)
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = jsonify(counts)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-# Journal entries with month/year filtering
+# Journal entries with month/year filtering (plus the closed period lookup)
 @app.route('/api/asientos-contables', methods=['GET'])
+@query_budget(LIST_QUERY_BUDGET + 2)
 def get_asientos_contables():
-    """Get journal entries with optional month/year filtering"""
+    """Get journal entries with optional month/year filtering (paginated)"""
     try:
         mes = request.args.get('mes', type=int)
         anio = request.args.get('anio', type=int)
+        q = request.args.get('q')
+        criteria = journal.period_criteria(mes, anio, q)
         
-        query = AsientoContable.query
+        # Closed periods are served from their frozen snapshot; a search reads the (unchanging) live rows
+        cerrado_en = cierres.closed_at(anio, mes) if mes and anio and not q else None
+        if cerrado_en is not None:
+            return cierres.frozen_response(anio, mes, cerrado_en)
         
-        if mes:
-            query = query.filter(AsientoContable.mes == mes)
-        if anio:
-            query = query.filter(AsientoContable.anio == anio)
-            
-        asientos = query.order_by(AsientoContable.fecha.desc()).all()
+        if wants_stream():
+            return stream_response(journal.stream_entries(criteria, after=request.args.get('after')))
         
-        result = []
-        for asiento in asientos:
-            asiento_data = {
-                'id': asiento.id,
-                'folio': asiento.folio,
-                'fecha': asiento.fecha.isoformat(),
-                'mes': asiento.mes,
-                'anio': asiento.anio,
-                'concepto': asiento.concepto,
-                'total_debe': float(asiento.total_debe),
-                'total_haber': float(asiento.total_haber),
-                'estado': asiento.estado,
-                'fecha_creacion': asiento.fecha_creacion.isoformat(),
-                'movimientos': []
-            }
-            
-            for movimiento in asiento.movimientos:
-                asiento_data['movimientos'].append({
-                    'id': movimiento.id,
-                    'cuenta': movimiento.cuenta,
-                    'debe': float(movimiento.debe),
-                    'haber': float(movimiento.haber),
-                    'concepto': movimiento.concepto
-                })
-            
-            result.append(asiento_data)
+        asientos, next_cursor = journal.fetch_entries(
+            criteria,
+            after=request.args.get('after'),
+            limit=parse_limit(request.args)
+        )
+        total = totales = None
+        con_totales = bool(request.args.get('totales', type=int))
+        if request.args.get('count', type=int) or con_totales:
+            total, totales = journal.count_entries(criteria, con_totales)
         
-        return jsonify(result)
+        return page_response(asientos, next_cursor, total, totales)
+    except ListError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -902,17 +1402,28 @@ def get_asientos_contables():
 def get_periodos_disponibles():
     """Get available months and years for filtering"""
     try:
-        periodos = db.session.query(
+        # Closed periods keep their stored count; only open ones are grouped live
+        cerrados = db.session.query(
+            CierrePeriodo.anio,
+            CierrePeriodo.mes,
+            CierrePeriodo.asientos.label('cantidad'),
+            db.literal(True).label('cerrado')
+        )
+        abiertos = db.session.query(
             AsientoContable.anio,
             AsientoContable.mes,
-            db.func.count(AsientoContable.id).label('cantidad')
+            db.func.count(AsientoContable.id).label('cantidad'),
+            db.literal(False).label('cerrado')
+        ).outerjoin(
+            CierrePeriodo,
+            db.and_(CierrePeriodo.anio == AsientoContable.anio, CierrePeriodo.mes == AsientoContable.mes)
+        ).filter(
+            CierrePeriodo.anio.is_(None)
         ).group_by(
             AsientoContable.anio,
             AsientoContable.mes
-        ).order_by(
-            AsientoContable.anio.desc(),
-            AsientoContable.mes.desc()
-        ).all()
+        )
+        periodos = sorted(cerrados.all() + abiertos.all(), key=lambda p: (p.anio, p.mes), reverse=True)
         
         result = []
         for periodo in periodos:
@@ -920,6 +1431,7 @@ def get_periodos_disponibles():
                 'anio': periodo.anio,
                 'mes': periodo.mes,
                 'cantidad': periodo.cantidad,
+                'cerrado': bool(periodo.cerrado),
                 'nombre_mes': [
                     'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
                     'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
@@ -930,5 +1442,109 @@ def get_periodos_disponibles():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Period close
+@app.route('/api/periodos/cierres', methods=['GET'])
+def get_cierres():
+    """Get closed accounting periods"""
+    try:
+        return jsonify(cierres.list_closed())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/periodos/<int:anio>/<int:mes>/cierre', methods=['GET'])
+def get_cierre(anio, mes):
+    """Get the frozen totals of a closed period"""
+    try:
+        cierre = db.session.get(CierrePeriodo, (anio, mes))
+        if cierre is None:
+            return jsonify({'error': 'El periodo no está cerrado'}), 404
+        return jsonify(cierres.summary(cierre))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/periodos/<int:anio>/<int:mes>/cerrar', methods=['POST'])
+def cerrar_periodo(anio, mes):
+    """Close a period and freeze its snapshot"""
+    try:
+        resumen = cierres.close_period(anio, mes)
+        db.session.commit()
+        return jsonify(resumen), 201
+    except cierres.PeriodoCerrado as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/periodos/<int:anio>/<int:mes>/reabrir', methods=['POST'])
+def reabrir_periodo(anio, mes):
+    """Reopen a closed period and drop its snapshot"""
+    try:
+        if not cierres.reopen_period(anio, mes):
+            return jsonify({'error': 'El periodo no está cerrado'}), 404
+        db.session.commit()
+        return jsonify({'message': 'Periodo reabierto exitosamente'})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# Trial balance
+@app.route('/api/balanza', methods=['GET'])
+@query_budget(1)
+def get_balanza():
+    """Get the trial balance for a month (or a whole year) from maintained totals"""
+    try:
+        anio = request.args.get('anio', type=int) or datetime.now().year
+        mes = request.args.get('mes', type=int)
+        
+        cuentas = balanza.trial_balance(anio, mes)
+        total_debe = sum((c['debe'] for c in cuentas), Decimal('0'))
+        total_haber = sum((c['haber'] for c in cuentas), Decimal('0'))
+        
+        return jsonify({
+            'anio': anio,
+            'mes': mes,
+            'cuentas': [{
+                'cuenta': c['cuenta'],
+                'debe': float(c['debe']),
+                'haber': float(c['haber']),
+                'saldo': float(c['saldo'])
+            } for c in cuentas],
+            'total_debe': float(total_debe),
+            'total_haber': float(total_haber),
+            'cuadrada': total_debe == total_haber
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Aggregate reports
+@app.route('/api/reportes/ventas', methods=['GET'])
+@query_budget(2)
+@cached_response(FacturaVenta, Cliente, ArticuloInventario)
+def get_reporte_ventas():
+    """Get sales grouped by the requested dimensions"""
+    try:
+        return jsonify(reportes.run_report('ventas', request.args))
+    except reportes.ReporteError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/reportes/compras', methods=['GET'])
+@query_budget(2)
+@cached_response(FacturaCompra, Proveedor, ArticuloInventario)
+def get_reporte_compras():
+    """Get purchases grouped by the requested dimensions"""
+    try:
+        return jsonify(reportes.run_report('compras', request.args))
+    except reportes.ReporteError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Development server only; production runs under gunicorn (see wsgi.py)
+    app.run(debug=os.getenv('FLASK_ENV', 'development') == 'development', host='0.0.0.0', port=5000)
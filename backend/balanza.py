@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Balanza de comprobación con saldos incrementales por cuenta
+
+La tabla saldos_cuenta guarda los totales de debe y haber por (anio, mes,
+cuenta). Cada asiento suma sus movimientos a esos totales en la misma
+transacción en que se crea, así que la balanza de un periodo se lee sin
+recorrer movimientos_contables. Los asientos cancelados no se acumulan.
+
+Uso:
+    python balanza.py rebuild [anio]   # recalcula los saldos desde los movimientos
+"""
+
+import sys
+from decimal import Decimal
+from sqlalchemy import delete, insert, select
+from database import create_app, db
+from models import AsientoContable, MovimientoContable, SaldoCuenta
+import upsert
+
+ESTADOS_EXCLUIDOS = ('Cancelado',)
+
+_saldos = SaldoCuenta.__table__
+
+
+def post_movement_rows(rows):
+    """Add (anio, mes, cuenta, debe, haber) movements of many entries to the totals"""
+    upsert.increment_many(_saldos, ('anio', 'mes', 'cuenta'), [
+        {
+            'anio': anio,
+            'mes': mes,
+            'cuenta': cuenta,
+            'debe': Decimal(str(debe or 0)),
+            'haber': Decimal(str(haber or 0))
+        }
+        for anio, mes, cuenta, debe, haber in rows
+    ])
+
+
+def post_movements(anio, mes, movimientos, estado=None):
+    """Add (cuenta, debe, haber) movements of one entry to the period totals"""
+    if estado in ESTADOS_EXCLUIDOS:
+        return
+    post_movement_rows((anio, mes, cuenta, debe, haber) for cuenta, debe, haber in movimientos)
+
+
+def trial_balance(anio, mes=None):
+    """Return per-account totals for a month, or for the whole year when mes is None"""
+    if mes:
+        query = select(_saldos.c.cuenta, _saldos.c.debe, _saldos.c.haber).where(
+            _saldos.c.anio == anio, _saldos.c.mes == mes
+        )
+    else:
+        query = select(
+            _saldos.c.cuenta,
+            db.func.sum(_saldos.c.debe).label('debe'),
+            db.func.sum(_saldos.c.haber).label('haber')
+        ).where(_saldos.c.anio == anio).group_by(_saldos.c.cuenta)
+
+    cuentas = []
+    for row in db.session.execute(query.order_by(_saldos.c.cuenta)):
+        debe = Decimal(str(row.debe or 0))
+        haber = Decimal(str(row.haber or 0))
+        cuentas.append({'cuenta': row.cuenta, 'debe': debe, 'haber': haber, 'saldo': debe - haber})
+    return cuentas
+
+
+def rebuild(anio=None, conn=None):
+    """Recompute the period totals from the journal in one set-based statement"""
+    executor = conn if conn is not None else db.session
+    asientos = AsientoContable.__table__
+    movimientos = MovimientoContable.__table__
+
+    borrar = delete(_saldos)
+    totales = (
+        select(
+            asientos.c.anio,
+            asientos.c.mes,
+            movimientos.c.cuenta,
+            db.func.coalesce(db.func.sum(movimientos.c.debe), 0),
+            db.func.coalesce(db.func.sum(movimientos.c.haber), 0)
+        )
+        .select_from(movimientos.join(asientos, movimientos.c.asiento_id == asientos.c.id))
+        .where(asientos.c.estado.notin_(ESTADOS_EXCLUIDOS))
+        .group_by(asientos.c.anio, asientos.c.mes, movimientos.c.cuenta)
+    )
+    if anio:
+        borrar = borrar.where(_saldos.c.anio == anio)
+        totales = totales.where(asientos.c.anio == anio)
+
+    executor.execute(borrar)
+    result = executor.execute(
+        insert(_saldos).from_select(['anio', 'mes', 'cuenta', 'debe', 'haber'], totales)
+    )
+    return result.rowcount
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'rebuild':
+        print(__doc__)
+        sys.exit(2)
+    anio = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    app = create_app()
+    with app.app_context():
+        renglones = rebuild(anio)
+        db.session.commit()
+        print(f"✅ Saldos recalculados ({renglones} renglones)")
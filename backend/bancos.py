@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Saldos de cuentas bancarias con incrementos atómicos
+
+Recibos y pagos mueven saldo_actual con un solo
+UPDATE cuentas_bancarias SET saldo_actual = saldo_actual + :monto dentro de
+la transacción del documento, sin leer la cuenta antes. Dos movimientos
+concurrentes sobre la misma cuenta se serializan en el bloqueo del renglón en
+lugar de perder uno de los incrementos.
+
+El saldo se mueve antes de insertar el recibo o pago: el INSERT con llave
+foránea toma un bloqueo compartido sobre la cuenta en InnoDB, y si el UPDATE
+llegara después, dos transacciones con el bloqueo compartido esperarían una a
+la otra para tomar el exclusivo (deadlock).
+
+check_consistency() compara cada saldo con saldo_inicial + recibos - pagos.
+
+Uso:
+    python bancos.py [--reparar]
+"""
+
+import sys
+from decimal import Decimal
+from sqlalchemy import select, update
+from database import db
+from models import CuentaBancaria, Pago, Recibo
+
+_cuentas = CuentaBancaria.__table__
+
+
+class CuentaInexistente(ValueError):
+    """The bank account of a receipt or payment does not exist"""
+
+
+def apply_movement(cuenta_id, monto):
+    """Add an amount (negative for payments) to the account balance inside the current transaction"""
+    result = db.session.execute(
+        update(_cuentas).where(_cuentas.c.id == cuenta_id)
+        .values(saldo_actual=db.func.coalesce(_cuentas.c.saldo_actual, 0) + Decimal(str(monto)))
+    )
+    if result.rowcount == 0:
+        raise CuentaInexistente(f'La cuenta bancaria {cuenta_id} no existe')
+
+
+def expected_balances():
+    """saldo_inicial + receipts - payments of every account"""
+    recibos = (
+        select(Recibo.cuenta_bancaria_id, db.func.sum(Recibo.monto).label('monto'))
+        .group_by(Recibo.cuenta_bancaria_id).subquery()
+    )
+    pagos = (
+        select(Pago.cuenta_bancaria_id, db.func.sum(Pago.monto).label('monto'))
+        .group_by(Pago.cuenta_bancaria_id).subquery()
+    )
+    rows = db.session.execute(
+        select(
+            CuentaBancaria.id,
+            CuentaBancaria.saldo_actual,
+            db.func.coalesce(CuentaBancaria.saldo_inicial, 0)
+            + db.func.coalesce(recibos.c.monto, 0) - db.func.coalesce(pagos.c.monto, 0)
+        )
+        .outerjoin(recibos, recibos.c.cuenta_bancaria_id == CuentaBancaria.id)
+        .outerjoin(pagos, pagos.c.cuenta_bancaria_id == CuentaBancaria.id)
+    )
+    return {cuenta_id: (guardado, Decimal(str(esperado))) for cuenta_id, guardado, esperado in rows}
+
+
+def check_consistency():
+    """Accounts whose stored balance differs from their movements, returns the differences"""
+    return {
+        cuenta_id: {'guardado': float(guardado) if guardado is not None else None, 'calculado': float(esperado)}
+        for cuenta_id, (guardado, esperado) in expected_balances().items()
+        if guardado is None or Decimal(str(guardado)) != esperado
+    }
+
+
+def repair(cuenta_ids):
+    for cuenta_id, (_, esperado) in expected_balances().items():
+        if cuenta_id in cuenta_ids:
+            db.session.execute(update(_cuentas).where(_cuentas.c.id == cuenta_id).values(saldo_actual=esperado))
+
+
+if __name__ == '__main__':
+    from app import app
+
+    with app.app_context():
+        diferencias = check_consistency()
+        if not diferencias:
+            print("✅ Los saldos bancarios coinciden con recibos y pagos")
+        else:
+            for cuenta_id, valores in diferencias.items():
+                print(f"⚠️  cuenta {cuenta_id}: guardado={valores['guardado']} calculado={valores['calculado']}")
+            if '--reparar' in sys.argv:
+                repair(set(diferencias))
+                db.session.commit()
+                print("✅ Saldos corregidos (actualiza el dashboard con python dashboard.py --reparar)")
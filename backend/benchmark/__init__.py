@@ -0,0 +1,15 @@
+"""
+Benchmarks reproducibles del backend
+
+generador.py llena una base vacía con datos sintéticos deterministas (misma
+semilla, mismos datos) a la escala pedida usando inserciones múltiples, y
+deja consistentes los saldos, el dashboard, los contadores y la valuación de
+inventario. suite.py mide cada endpoint de app.py sobre esos datos en SQLite
+y en un servidor compatible con MySQL y escribe un JSON que se compara entre
+commits para detectar regresiones.
+
+Uso (desde backend/):
+    python -m benchmark.generador --escala 100k --db sqlite:////tmp/bench.db
+    python -m benchmark.suite correr --escalas 1k,100k --salida resultados.json
+    python -m benchmark.suite comparar base.json resultados.json
+"""
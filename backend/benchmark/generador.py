@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Generador de datos sintéticos para benchmarks
+
+La escala es el número de facturas de venta; las demás tablas se derivan de
+ella (conteos_para) y cada conteo se puede ajustar por separado. Con la
+misma semilla y los mismos conteos los datos son idénticos en cualquier
+máquina: fechas en 2023-2024, importes en centavos enteros.
+
+Los renglones se insertan por bloques de BLOQUE con ids explícitos (una
+inserción múltiple y una transacción por bloque), sin pasar por las rutas.
+Cada bloque de facturas se inserta junto con sus detalles, asientos y
+movimientos (generados como los genera la aplicación), así la memoria no
+crece con la escala y las llaves foráneas siempre apuntan a renglones ya
+insertados. Los folios siguen el formato de folios.py por día. Al final se
+reconstruyen los saldos de la balanza, el resumen del dashboard, los
+contadores y la valuación de inventario (existencia inicial a precio de
+compra), y los saldos bancarios quedan en saldo_inicial + recibos - pagos.
+
+generate() borra todas las tablas de la base y aplica las migraciones antes
+de insertar. Sin --db la base es un archivo SQLite en --datos (nunca
+DATABASE_URL); una base que no sea SQLite solo se borra con --borrar.
+
+Uso (desde backend/):
+    python -m benchmark.generador --escala 1k|100k|1m [--semilla 1]
+                                  [--datos DIR] [--db URL --borrar] [--clientes N ...]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import insert, update
+from database import create_app, db
+from folios import format_folio
+from models import (ActivoFijo, ArticuloInventario, AsientoContable, Cliente, CuentaBancaria,
+                    DetalleFacturaCompra, DetalleFacturaVenta, Empleado, FacturaCompra, FacturaVenta,
+                    MovimientoContable, Pago, Proveedor, Recibo, ReciboNomina)
+import balanza
+import contadores
+import dashboard
+import inventario
+import journal
+import migrations
+
+ESCALAS = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+BLOQUE = 5000
+
+FECHA_INICIAL = date(2023, 1, 1)
+DIAS = 731  # 2023-01-01 to 2024-12-31
+REGISTRO = datetime(2022, 12, 1)  # fecha_registro of every catalog row
+IVA_PORCENTAJE = 15
+ESTADOS_FACTURA = (('Pagada', 60), ('Pendiente', 30), ('Cancelada', 10))
+CATEGORIAS_ACTIVO = ('Equipo de cómputo', 'Mobiliario', 'Vehículos', 'Maquinaria')
+CUENTAS_GASTO = ('Gastos Generales', 'Renta', 'Servicios', 'Papelería')
+
+# Invoice kind -> folio prefix, party column, detail column, entry concept, journal movements
+FACTURAS = {
+    'venta': (FacturaVenta, DetalleFacturaVenta, 'FV', 'cliente_id', 'factura_venta_id',
+              'Venta de productos', journal.sale_movements),
+    'compra': (FacturaCompra, DetalleFacturaCompra, 'FC', 'proveedor_id', 'factura_compra_id',
+               'Compra de productos', journal.purchase_movements),
+}
+
+
+def conteos_para(facturas):
+    """Row counts of every table for a scale (number of sales invoices)"""
+    empleados = max(5, facturas // 200)
+    return {
+        'clientes': max(10, facturas // 20),
+        'proveedores': max(5, facturas // 100),
+        'articulos': max(20, facturas // 50),
+        'cuentas_bancarias': 5,
+        'empleados': empleados,
+        'activos_fijos': max(5, facturas // 500),
+        'facturas_venta': facturas,
+        'facturas_compra': facturas // 4,
+        'renglones': 5,  # Up to this many lines per invoice (3 on average)
+        'recibos': facturas // 2,
+        'pagos': facturas // 8,
+        'recibos_nomina': empleados * 24,  # Two payrolls a month
+        'asientos': facturas // 10,  # Manual entries, besides the ones of each invoice
+    }
+
+
+def _money(centavos):
+    return Decimal(centavos).scaleb(-2)
+
+
+def _midnight(dia):
+    return datetime.combine(dia, datetime.min.time())
+
+
+class Generador:
+    def __init__(self, conteos, semilla):
+        self.conteos = conteos
+        self.rnd = random.Random(semilla)
+        self.folios = defaultdict(int)  # (prefix, day) -> last consecutive
+        self.ultimo_id = defaultdict(int)  # table name -> last explicit id
+        self.precios = []  # Sale price in cents of each article (index = id - 1)
+        self.saldos = defaultdict(int)  # Bank account -> cents moved by receipts and payments
+        self.insertados = defaultdict(int)
+        self.segundos = defaultdict(float)
+
+    def next_id(self, tabla):
+        self.ultimo_id[tabla] += 1
+        return self.ultimo_id[tabla]
+
+    def fecha(self):
+        return FECHA_INICIAL + timedelta(days=self.rnd.randrange(DIAS))
+
+    def folio(self, prefix, fecha):
+        day = fecha.strftime('%Y%m%d')
+        self.folios[prefix, day] += 1
+        return format_folio(prefix, day, self.folios[prefix, day])
+
+    def estado(self):
+        return self.rnd.choices([e for e, _ in ESTADOS_FACTURA], [p for _, p in ESTADOS_FACTURA])[0]
+
+    def insert(self, model, filas):
+        """Insert rows in blocks of BLOQUE, each block in its own transaction"""
+        tabla = model.__table__
+        inicio = time.perf_counter()
+        for i in range(0, len(filas), BLOQUE):
+            with db.engine.begin() as conn:
+                conn.execute(insert(tabla), filas[i:i + BLOQUE])
+        self.insertados[tabla.name] += len(filas)
+        self.segundos[tabla.name] += time.perf_counter() - inicio
+
+    def insert_blocks(self, model, n, build):
+        """Insert n rows built by build(row_id) without holding more than a block in memory"""
+        for inicio in range(0, n, BLOQUE):
+            self.insert(model, [build(self.next_id(model.__tablename__)) for _ in range(min(BLOQUE, n - inicio))])
+
+    # Catalogs
+
+    def cliente(self, i):
+        return {'id': i, 'nombre': f'Cliente {i}', 'rfc': f'CLI{i:010d}', 'telefono': f'555{i:07d}',
+                'email': f'cliente{i}@ejemplo.com', 'fecha_registro': REGISTRO}
+
+    def proveedor(self, i):
+        return {'id': i, 'nombre': f'Proveedor {i}', 'rfc': f'PRO{i:010d}', 'telefono': f'556{i:07d}',
+                'email': f'proveedor{i}@ejemplo.com', 'fecha_registro': REGISTRO}
+
+    def cuenta(self, i):
+        return {'id': i, 'nombre': f'Cuenta {i}', 'banco': f'Banco {i}', 'numero_cuenta': f'{i:016d}',
+                'saldo_inicial': _money(100_000_000), 'saldo_actual': _money(100_000_000),
+                'fecha_apertura': REGISTRO}
+
+    def articulo(self, i):
+        compra = self.rnd.randrange(1_000, 500_000)
+        venta = compra * 13 // 10
+        self.precios.append(venta)
+        return {'id': i, 'codigo': f'ART{i:07d}', 'nombre': f'Artículo {i}', 'precio_compra': _money(compra),
+                'precio_venta': _money(venta), 'stock_actual': self.rnd.randrange(0, 1_000),
+                'stock_minimo': self.rnd.randrange(0, 100), 'unidad_medida': 'PZA', 'fecha_registro': REGISTRO}
+
+    def empleado(self, i):
+        return {'id': i, 'nombre': f'Empleado {i}', 'apellido_paterno': f'Apellido {i % 97}',
+                'fecha_nacimiento': date(1970, 1, 1) + timedelta(days=self.rnd.randrange(12_000)),
+                'fecha_ingreso': date(2020, 1, 1), 'salario_diario': _money(self.rnd.randrange(25_000, 150_000)),
+                'puesto': 'Operativo', 'activo': self.rnd.random() < 0.9}
+
+    def activo(self, i):
+        return {'id': i, 'codigo': f'AF{i:07d}', 'nombre': f'Activo {i}', 'categoria': self.rnd.choice(CATEGORIAS_ACTIVO),
+                'valor_adquisicion': _money(self.rnd.randrange(500_000, 50_000_000)),
+                'fecha_adquisicion': date(2020, 1, 1) + timedelta(days=self.rnd.randrange(1_800)),
+                'vida_util_anos': self.rnd.randrange(3, 11), 'valor_residual': 0,
+                'metodo_depreciacion': 'linea_recta', 'estado': 'Activo', 'fecha_registro': REGISTRO}
+
+    # Documents
+
+    def asiento(self, fecha, concepto, movimientos, bloque):
+        """Add an applied entry and its (cuenta, debe, haber, concepto) movements to the block"""
+        asiento_id = self.next_id('asientos_contables')
+        centavos = sum(debe for _, debe, _, _ in movimientos)
+        bloque['asientos'].append({
+            'id': asiento_id, 'folio': self.folio('AC', fecha), 'fecha': fecha, 'mes': fecha.month,
+            'anio': fecha.year, 'concepto': concepto, 'total_debe': _money(centavos), 'total_haber': _money(centavos),
+            'estado': 'Aplicado', 'fecha_creacion': _midnight(fecha)
+        })
+        for cuenta, debe, haber, mov_concepto in movimientos:
+            bloque['movimientos'].append({
+                'id': self.next_id('movimientos_contables'), 'asiento_id': asiento_id, 'cuenta': cuenta,
+                'debe': _money(debe), 'haber': _money(haber), 'concepto': mov_concepto
+            })
+
+    def invoice_blocks(self, tipo, n, terceros):
+        """Insert n invoices block by block, each block with its details, entries and movements"""
+        modelo, detalle, prefijo, tercero_fk, detalle_fk, concepto, generar = FACTURAS[tipo]
+        for inicio in range(0, n, BLOQUE):
+            bloque = {'facturas': [], 'detalles': [], 'asientos': [], 'movimientos': []}
+            for _ in range(min(BLOQUE, n - inicio)):
+                factura_id = self.next_id(modelo.__tablename__)
+                fecha = self.fecha()
+                tercero = self.rnd.randrange(1, terceros + 1)
+                subtotal = 0
+                for _ in range(self.rnd.randrange(1, self.conteos['renglones'] + 1)):
+                    articulo = self.rnd.randrange(1, len(self.precios) + 1)
+                    cantidad = self.rnd.randrange(1, 11)
+                    precio = self.precios[articulo - 1]
+                    subtotal += precio * cantidad
+                    bloque['detalles'].append({
+                        'id': self.next_id(detalle.__tablename__), detalle_fk: factura_id, 'articulo_id': articulo,
+                        'cantidad': cantidad, 'precio_unitario': _money(precio), 'subtotal': _money(precio * cantidad)
+                    })
+                iva = (subtotal * IVA_PORCENTAJE + 50) // 100
+                folio = self.folio(prefijo, fecha)
+                bloque['facturas'].append({
+                    'id': factura_id, 'folio': folio, 'fecha': fecha, tercero_fk: tercero,
+                    'subtotal': _money(subtotal), 'iva': _money(iva), 'total': _money(subtotal + iva),
+                    'estado': self.estado(), 'fecha_creacion': _midnight(fecha)
+                })
+                movimientos = generar(tercero, subtotal, iva, subtotal + iva)
+                self.asiento(fecha, f'{concepto} - Factura {folio}', [
+                    (m['cuenta'], m['debe'], m['haber'], m['concepto']) for m in movimientos
+                ], bloque)
+            self.insert(modelo, bloque['facturas'])
+            self.insert(detalle, bloque['detalles'])
+            self.insert(AsientoContable, bloque['asientos'])
+            self.insert(MovimientoContable, bloque['movimientos'])
+
+    def manual_entries(self, n):
+        """Insert n expense entries paid from the bank"""
+        for inicio in range(0, n, BLOQUE):
+            bloque = {'asientos': [], 'movimientos': []}
+            for _ in range(min(BLOQUE, n - inicio)):
+                centavos = self.rnd.randrange(10_000, 5_000_000)
+                cuenta = self.rnd.choice(CUENTAS_GASTO)
+                self.asiento(self.fecha(), f'Gasto de {cuenta}', [
+                    (cuenta, centavos, 0, f'Gasto de {cuenta}'), ('Bancos', 0, centavos, f'Gasto de {cuenta}')
+                ], bloque)
+            self.insert(AsientoContable, bloque['asientos'])
+            self.insert(MovimientoContable, bloque['movimientos'])
+
+    def bank_movement(self, tipo, terceros):
+        prefijo, tercero_fk, signo = {'recibo': ('RC', 'cliente_id', 1), 'pago': ('PG', 'proveedor_id', -1)}[tipo]
+        cuentas = self.conteos['cuentas_bancarias']
+
+        def build(i):
+            fecha = self.fecha()
+            cuenta = self.rnd.randrange(1, cuentas + 1)
+            centavos = self.rnd.randrange(10_000, 2_000_000)
+            self.saldos[cuenta] += signo * centavos
+            return {'id': i, 'folio': self.folio(prefijo, fecha), 'fecha': fecha,
+                    tercero_fk: self.rnd.randrange(1, terceros + 1), 'cuenta_bancaria_id': cuenta,
+                    'monto': _money(centavos), 'concepto': f'{tipo.capitalize()} {i}',
+                    'metodo_pago': self.rnd.choice(('Efectivo', 'Transferencia', 'Cheque')),
+                    'fecha_creacion': _midnight(fecha)}
+        return build
+
+    def recibo_nomina(self, i):
+        inicio = FECHA_INICIAL + timedelta(days=15 * self.rnd.randrange(DIAS // 15))
+        fin = inicio + timedelta(days=14)
+        base = self.rnd.randrange(25_000, 150_000) * 15
+        bonos = self.rnd.choice((0, 0, 0, 50_000))
+        deducciones = base // 10
+        return {'id': i, 'folio': self.folio('RN', fin), 'fecha': fin,
+                'empleado_id': self.rnd.randrange(1, self.conteos['empleados'] + 1),
+                'periodo_inicio': inicio, 'periodo_fin': fin, 'salario_base': _money(base), 'horas_extra': 0,
+                'bonos': _money(bonos), 'deducciones': _money(deducciones), 'total_bruto': _money(base + bonos),
+                'total_neto': _money(base + bonos - deducciones), 'fecha_creacion': _midnight(fin)}
+
+
+def generate(conteos, semilla=1, progress=None, borrar=False):
+    """Drop every table, apply the migrations and fill them with synthetic data, returns the rows per table
+
+    A database other than SQLite is only dropped with borrar=True.
+    """
+    if db.engine.dialect.name != 'sqlite' and not borrar:
+        raise ValueError(f'{db.engine.url.render_as_string(hide_password=True)} no es SQLite; '
+                         'sus tablas solo se borran con --borrar')
+    db.drop_all()
+    migrations.upgrade()
+
+    g = Generador(conteos, semilla)
+    g.insert_blocks(Cliente, conteos['clientes'], g.cliente)
+    g.insert_blocks(Proveedor, conteos['proveedores'], g.proveedor)
+    g.insert_blocks(CuentaBancaria, conteos['cuentas_bancarias'], g.cuenta)
+    g.insert_blocks(ArticuloInventario, conteos['articulos'], g.articulo)
+    g.insert_blocks(Empleado, conteos['empleados'], g.empleado)
+    g.insert_blocks(ActivoFijo, conteos['activos_fijos'], g.activo)
+    g.invoice_blocks('venta', conteos['facturas_venta'], conteos['clientes'])
+    g.invoice_blocks('compra', conteos['facturas_compra'], conteos['proveedores'])
+    g.manual_entries(conteos['asientos'])
+    g.insert_blocks(Recibo, conteos['recibos'], g.bank_movement('recibo', conteos['clientes']))
+    g.insert_blocks(Pago, conteos['pagos'], g.bank_movement('pago', conteos['proveedores']))
+    g.insert_blocks(ReciboNomina, conteos['recibos_nomina'], g.recibo_nomina)
+    if progress:
+        for tabla, filas in g.insertados.items():
+            progress(tabla, filas, g.segundos[tabla])
+
+    # Maintained state, as if every row had gone through the routes
+    for cuenta_id, centavos in sorted(g.saldos.items()):
+        db.session.execute(update(CuentaBancaria).where(CuentaBancaria.id == cuenta_id)
+                           .values(saldo_actual=CuentaBancaria.saldo_inicial + _money(centavos)))
+    inventario.open_balances()
+    balanza.rebuild()
+    dashboard.rebuild_snapshot()
+    contadores.reconcile(fix=True)
+    db.session.commit()
+    return dict(g.insertados)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Datos sintéticos para benchmarks')
+    parser.add_argument('--escala', default='1k', help=f"{', '.join(ESCALAS)} o número de facturas de venta")
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--datos', default=os.path.join(tempfile.gettempdir(), 'benchmark-contable'),
+                        help='carpeta de la base SQLite cuando no se indica --db')
+    parser.add_argument('--db', help='URL de la base (SQLite en --datos por defecto); sus tablas se borran')
+    parser.add_argument('--borrar', action='store_true', help='permite borrar una base --db que no sea SQLite')
+    for nombre in conteos_para(1):
+        parser.add_argument(f"--{nombre.replace('_', '-')}", type=int, dest=nombre)
+    args = parser.parse_args(argv)
+
+    if args.db:
+        url = args.db
+    else:
+        os.makedirs(args.datos, exist_ok=True)
+        url = f"sqlite:///{os.path.join(args.datos, f'generador-{args.escala.lower()}-{args.semilla}.db')}"
+    # Never DATABASE_URL: generating drops every table of the base
+    os.environ['DATABASE_URL'] = url
+    facturas = ESCALAS.get(args.escala.lower()) or int(args.escala)
+    conteos = conteos_para(facturas)
+    conteos.update({nombre: getattr(args, nombre) for nombre in conteos if getattr(args, nombre) is not None})
+
+    app = create_app()
+    inicio = time.perf_counter()
+    with app.app_context():
+        try:
+            insertados = generate(
+                conteos, args.semilla,
+                progress=lambda tabla, filas, segundos: print(f"   {tabla}: {filas} renglones en {segundos:.1f}s"),
+                borrar=args.borrar
+            )
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+    transcurrido = time.perf_counter() - inicio
+    total = sum(insertados.values())
+    print(f"✅ {total} renglones en {transcurrido:.1f}s ({total / transcurrido:.0f}/s), semilla {args.semilla}, en {url}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
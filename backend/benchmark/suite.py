@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks de todos los endpoints
+
+Para cada base (SQLite siempre; con --mysql, además un servidor compatible con
+MySQL como MariaDB o MySQL en un contenedor) y cada escala, un proceso nuevo
+genera los datos con benchmark.generador, prepara lo que las rutas necesitan
+(un periodo cerrado, una corrida de nómina, un trabajo) y mide cada endpoint
+con el cliente de pruebas de Flask, sin red de por medio:
+
+- Lecturas: cada regla GET de app.py (las de /api/debug y /api/metrics solo
+  existen con esas funciones activadas y no se miden), más las variantes con
+  filtros de VARIANTES.
+- Escrituras: los escenarios de ESCRITURAS, que arman un cuerpo distinto en
+  cada repetición y, fuera del tiempo medido, dejan la base lista para la
+  siguiente (p. ej. reabren el periodo antes de cerrarlo otra vez).
+
+De cada endpoint se guarda la primera solicitud (caché vacía), la mediana,
+p95 y mínimo de las repeticiones, el código de respuesta, las sentencias SQL
+y los bytes. Una regla sin escenario aparece en "sin_escenario" para que
+una ruta nueva no quede fuera sin que se note.
+
+La base SQLite de cada escala y semilla se genera una vez
+(bench-<escala>-<semilla>.db en --datos) y cada corrida trabaja sobre una
+copia, así que con --reusar todas las corridas parten de los mismos datos.
+La base de --mysql se borra y se regenera en cada escala.
+
+comparar lee dos resultados y termina con código 1 si algún endpoint es más
+lento que la tolerancia (relativa y absoluta), emite más sentencias SQL o
+cambia de código de respuesta. El número de sentencias es exacto; los
+tiempos varían entre corridas según la máquina, de ahí la tolerancia amplia
+por defecto.
+
+Uso (desde backend/):
+    python -m benchmark.suite correr [--escalas 1k,100k,1m] [--mysql URL]
+                                     [--repeticiones 5] [--semilla 1]
+                                     [--datos DIR] [--reusar] [--salida archivo.json]
+    python -m benchmark.suite comparar base.json nuevo.json [--tolerancia 0.5] [--minimo-ms 2]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+from benchmark.generador import ESCALAS, conteos_para
+from loadtest import percentile
+
+FECHA = '2024-12-20'  # Open period inside the generated range
+PERIODO_CERRADO = (2023, 1)
+PERIODO_ESCRITURA = (2023, 2)  # Closed and reopened by the write scenarios
+
+# Query strings measured besides the bare rule
+VARIANTES = {
+    '/api/clientes': ['?limit=100'],
+    '/api/facturas-venta': ['?limit=100', '?estado=Pendiente&desde=2024-06-01&hasta=2024-06-30', '?cliente_id=1'],
+    '/api/facturas-compra': ['?limit=100', '?proveedor_id=1'],
+    '/api/recibos': ['?limit=100'],
+    '/api/pagos': ['?limit=100'],
+    '/api/articulos': ['?bajo_stock=true'],
+    '/api/inventario/movimientos': ['?articulo_id=1'],
+    '/api/asientos-contables': ['?limit=100', '?anio=2024&mes=6', '?anio={anio}&mes={mes}', '?anio=2024&mes=6&count=1'],
+    '/api/balanza': ['?anio=2024', '?anio=2024&mes=6'],
+    '/api/reportes/ventas': ['?por=cliente,mes&anio=2024', '?por=articulo&medidas=cantidad,total'],
+    '/api/reportes/compras': ['?por=proveedor&anio=2024'],
+    '/api/activos-fijos/depreciacion': ['?anio=2024&mes=6', '?anio=2024&mes=6&detalle=1'],
+    '/api/dashboard/summary': ['?fresh=1'],
+}
+
+# Values of the URL parameters, filled in by prepare()
+PARAMETROS = {'anio': PERIODO_CERRADO[0], 'mes': PERIODO_CERRADO[1], 'corrida_id': None, 'trabajo_id': None}
+
+# Rules that are not measured, with the reason
+OMITIDOS = {
+    ('GET', '/api/metrics'): 'solo existe con METRICS',
+}
+
+
+def _factura(ctx, n, tercero):
+    return {
+        'fecha': FECHA,
+        tercero: 1 + n % ctx['conteos'][{'cliente_id': 'clientes', 'proveedor_id': 'proveedores'}[tercero]],
+        'detalles': [
+            {'articulo_id': 1 + (n * 7 + i) % ctx['conteos']['articulos'], 'cantidad': 1 + i, 'precio_unitario': 100}
+            for i in range(3)
+        ]
+    }
+
+
+def _asiento(ctx, n):
+    return {
+        'fecha': FECHA, 'concepto': f'Benchmark {n}', 'estado': 'Aplicado',
+        'movimientos': [
+            {'cuenta': 'Gastos Generales', 'debe': 150, 'haber': 0, 'concepto': 'Gasto'},
+            {'cuenta': 'Bancos', 'debe': 0, 'haber': 150, 'concepto': 'Pago'},
+        ]
+    }
+
+
+def _cerrar(ctx, n):
+    import cierres
+    from database import db
+    anio, mes = PERIODO_ESCRITURA
+    if cierres.reopen_period(anio, mes):
+        db.session.commit()
+    return f'/api/periodos/{anio}/{mes}/cerrar', None
+
+
+def _reabrir(ctx, n):
+    import cierres
+    from database import db
+    anio, mes = PERIODO_ESCRITURA
+    try:
+        cierres.close_period(anio, mes)
+        db.session.commit()
+    except cierres.PeriodoCerrado:
+        db.session.rollback()
+    return f'/api/periodos/{anio}/{mes}/reabrir', None
+
+
+def _cancelar(ctx, n):
+    import trabajos
+    from database import db
+    trabajo = trabajos.submit('eco', {'n': n})
+    db.session.commit()
+    return f'/api/jobs/{trabajo.id}/cancelar', None
+
+
+# (method, rule) -> function(ctx, n) returning (path, body); it may prepare the
+# database first, outside the measured time
+ESCRITURAS = {
+    ('POST', '/api/clientes'): lambda ctx, n: ('/api/clientes', {'nombre': f'Cliente benchmark {n}'}),
+    ('POST', '/api/proveedores'): lambda ctx, n: ('/api/proveedores', {'nombre': f'Proveedor benchmark {n}'}),
+    ('POST', '/api/cuentas-bancarias'): lambda ctx, n: ('/api/cuentas-bancarias', {
+        'nombre': f'Cuenta benchmark {n}', 'banco': 'Banco', 'numero_cuenta': f'BENCH{n:011d}', 'saldo_inicial': 1000
+    }),
+    ('POST', '/api/articulos'): lambda ctx, n: ('/api/articulos', {
+        'codigo': f'BENCH{n:07d}', 'nombre': f'Artículo benchmark {n}', 'precio_compra': 80, 'precio_venta': 100,
+        'stock_actual': 10, 'stock_minimo': 5
+    }),
+    ('POST', '/api/facturas-venta'): lambda ctx, n: ('/api/facturas-venta', _factura(ctx, n, 'cliente_id')),
+    ('POST', '/api/facturas-compra'): lambda ctx, n: ('/api/facturas-compra', _factura(ctx, n, 'proveedor_id')),
+    ('POST', '/api/facturas-venta/bulk'): lambda ctx, n: (
+        '/api/facturas-venta/bulk', [_factura(ctx, n * 100 + i, 'cliente_id') for i in range(100)]
+    ),
+    ('POST', '/api/facturas-compra/bulk'): lambda ctx, n: (
+        '/api/facturas-compra/bulk', [_factura(ctx, n * 100 + i, 'proveedor_id') for i in range(100)]
+    ),
+    ('POST', '/api/recibos'): lambda ctx, n: ('/api/recibos', {
+        'fecha': FECHA, 'cliente_id': 1, 'cuenta_bancaria_id': 1, 'monto': 100
+    }),
+    ('POST', '/api/pagos'): lambda ctx, n: ('/api/pagos', {
+        'fecha': FECHA, 'proveedor_id': 1, 'cuenta_bancaria_id': 1, 'monto': 100
+    }),
+    ('POST', '/api/empleados'): lambda ctx, n: ('/api/empleados', {
+        'nombre': f'Empleado benchmark {n}', 'apellido_paterno': 'Benchmark', 'fecha_nacimiento': '1990-01-01',
+        'salario_diario': 500
+    }),
+    ('POST', '/api/activos-fijos'): lambda ctx, n: ('/api/activos-fijos', {
+        'codigo': f'AFBENCH{n:05d}', 'nombre': f'Activo benchmark {n}', 'valor_adquisicion': 10000,
+        'fecha_adquisicion': '2024-01-15'
+    }),
+    ('POST', '/api/asientos-contables'): lambda ctx, n: ('/api/asientos-contables', _asiento(ctx, n)),
+    ('POST', '/api/recibos-nomina'): lambda ctx, n: ('/api/recibos-nomina', {
+        'empleado_id': 1, 'fecha': FECHA, 'periodo_inicio': '2024-12-01', 'periodo_fin': '2024-12-15',
+        'salario_base': 7500
+    }),
+    ('POST', '/api/jobs'): lambda ctx, n: ('/api/jobs', {'tipo': 'eco', 'parametros': {'n': n}}),
+    ('POST', '/api/jobs/<int:trabajo_id>/cancelar'): _cancelar,
+    # One day per run: a period admits a single run. Only the job is queued, no worker executes it
+    ('POST', '/api/nomina/corridas'): lambda ctx, n: ('/api/nomina/corridas', {
+        'periodo_inicio': (date(2025, 1, 1) + timedelta(days=n)).isoformat(),
+        'periodo_fin': (date(2025, 1, 1) + timedelta(days=n)).isoformat()
+    }),
+    ('POST', '/api/nomina/corridas/<int:corrida_id>/reanudar'): lambda ctx, n: (
+        f"/api/nomina/corridas/{PARAMETROS['corrida_id']}/reanudar", None
+    ),
+    ('POST', '/api/periodos/<int:anio>/<int:mes>/cerrar'): _cerrar,
+    ('POST', '/api/periodos/<int:anio>/<int:mes>/reabrir'): _reabrir,
+}
+# Measured once: a repetition would find nothing left to do
+UNICAS = {('POST', '/api/activos-fijos/depreciacion/contabilizar'): ('/api/activos-fijos/depreciacion/contabilizar', {
+    'anio': 2024, 'mes': 12
+})}
+
+
+def prepare():
+    """Closed period, finished payroll run and a job for the routes that need them"""
+    import cierres
+    import depreciacion
+    import nomina
+    import trabajos
+    from database import db
+
+    # Depreciation is posted before closing, so contabilizar only covers the later months
+    depreciacion.post_through(*PERIODO_CERRADO)
+    db.session.commit()
+    cierres.close_period(*PERIODO_CERRADO)
+    corrida = nomina.create_run({'periodo_inicio': '2024-12-16', 'periodo_fin': '2024-12-31'})
+    db.session.commit()
+    nomina.run(corrida.id)
+    trabajo = trabajos.submit('eco', {'benchmark': True})
+    db.session.commit()
+    PARAMETROS.update(corrida_id=corrida.id, trabajo_id=trabajo.id)
+
+
+def _path(rule):
+    path = rule
+    for nombre, valor in PARAMETROS.items():
+        path = path.replace(f'<int:{nombre}>', str(valor))
+    return path
+
+
+def measure(client, method, build, repeticiones):
+    """First call and repetitions of one endpoint, build(n) gives the path and body of call n"""
+    import query_guard
+    tiempos, primera = [], None
+    for n in range(repeticiones + 1):
+        path, body = build(n)
+        with query_guard.count_queries() as consultas:
+            inicio = time.perf_counter()
+            response = client.open(path, method=method, json=body)
+            tamano = len(response.get_data())
+            ms = (time.perf_counter() - inicio) * 1000
+        if primera is None:
+            primera = {'primera_ms': round(ms, 3), 'status': response.status_code,
+                       'sql': consultas.count, 'bytes': tamano}
+        else:
+            tiempos.append(ms)
+    resultado = dict(primera)
+    if tiempos:
+        ordenados = sorted(tiempos)
+        resultado.update({
+            'mediana_ms': round(statistics.median(ordenados), 3),
+            'p95_ms': round(percentile(ordenados, 95), 3),
+            'min_ms': round(ordenados[0], 3),
+        })
+    return resultado
+
+
+def run_endpoints(app, ctx, repeticiones):
+    """Measure every rule of the app, returns (resultados, omitidos, sin_escenario)"""
+    client = app.test_client()
+    client.get('/api/counts')  # First request of the process, not charged to any endpoint
+    resultados, omitidos, sin_escenario = {}, {}, []
+    reglas = sorted(
+        (method, rule.rule) for rule in app.url_map.iter_rules() if rule.endpoint != 'static'
+        for method in rule.methods - {'HEAD', 'OPTIONS'}
+    )
+
+    # Reads first: the write scenarios change the data and the cached versions
+    for method, rule in reglas:
+        if method != 'GET' or (method, rule) in OMITIDOS or rule.startswith('/api/debug'):
+            continue
+        for variante in [''] + VARIANTES.get(rule, []):
+            path = _path(rule) + variante.format(**PARAMETROS)
+            resultados[f'GET {rule}{variante}'] = measure(client, 'GET', lambda n: (path, None), repeticiones)
+
+    for method, rule in reglas:
+        clave = (method, rule)
+        if method == 'GET' or rule.startswith('/api/debug'):
+            continue
+        if clave in OMITIDOS:
+            omitidos[f'{method} {rule}'] = OMITIDOS[clave]
+        elif clave in ESCRITURAS:
+            build = ESCRITURAS[clave]
+            resultados[f'{method} {rule}'] = measure(client, method, lambda n: build(ctx, n), repeticiones)
+        elif clave in UNICAS:
+            resultados[f'{method} {rule}'] = measure(client, method, lambda n: UNICAS[clave], 0)
+        else:
+            sin_escenario.append(f'{method} {rule}')
+    for clave, razon in OMITIDOS.items():
+        if clave[0] == 'GET':
+            omitidos[' '.join(clave)] = razon
+    return resultados, omitidos, sin_escenario
+
+
+def run_child(opciones):
+    """Generate (unless reused) and measure one database and scale, in this process"""
+    os.environ['DATABASE_URL'] = opciones['url']
+    from app import app
+    from benchmark import generador
+
+    conteos = opciones['conteos']
+    corrida = {'backend': opciones['backend'], 'escala': opciones['escala'], 'semilla': opciones['semilla'],
+               'conteos': conteos}
+    with app.app_context():
+        if opciones['generar']:
+            inicio = time.perf_counter()
+            # The SQLite copies are the suite's own and --mysql names a base to drop
+            insertados = generador.generate(conteos, opciones['semilla'], borrar=True)
+            corrida['generacion'] = {'segundos': round(time.perf_counter() - inicio, 2),
+                                     'renglones': sum(insertados.values())}
+        if opciones.get('pristina'):
+            # Keep an untouched copy so later runs start from the same data
+            from database import db
+            db.engine.dispose()
+            shutil.copyfile(opciones['trabajo'], opciones['pristina'])
+        inicio = time.perf_counter()
+        prepare()
+        corrida['preparacion_s'] = round(time.perf_counter() - inicio, 2)
+        resultados, omitidos, sin_escenario = run_endpoints(app, {'conteos': conteos}, opciones['repeticiones'])
+    corrida.update(resultados=resultados, omitidos=omitidos, sin_escenario=sin_escenario)
+    with open(opciones['salida'], 'w') as archivo:
+        json.dump(corrida, archivo, indent=1)
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=BACKEND, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _versions():
+    import flask
+    import sqlalchemy
+    return {'python': platform.python_version(), 'flask': flask.__version__, 'sqlalchemy': sqlalchemy.__version__}
+
+
+def run_suite(args):
+    escalas = [e.strip().lower() for e in args.escalas.split(',') if e.strip()]
+    for escala in escalas:
+        if escala not in ESCALAS:
+            raise SystemExit(f"Escala desconocida: {escala} (disponibles: {', '.join(ESCALAS)})")
+    os.makedirs(args.datos, exist_ok=True)
+    bases = [('sqlite', None)] + ([('mysql', args.mysql)] if args.mysql else [])
+
+    resultado = {
+        'meta': {
+            'commit': _git('rev-parse', 'HEAD'),
+            'cambios_sin_commit': bool(_git('status', '--porcelain', '--untracked-files=no')),
+            'fecha': datetime.utcnow().isoformat(timespec='seconds'),
+            'plataforma': platform.platform(),
+            'versiones': _versions(),
+            'repeticiones': args.repeticiones,
+        },
+        'corridas': []
+    }
+    for backend, url in bases:
+        for escala in escalas:
+            opciones = {'backend': backend, 'escala': escala, 'semilla': args.semilla,
+                        'conteos': conteos_para(ESCALAS[escala]), 'repeticiones': args.repeticiones,
+                        'url': url, 'generar': True}
+            if backend == 'sqlite':
+                pristina = os.path.join(args.datos, f'bench-{escala}-{args.semilla}.db')
+                trabajo = os.path.join(args.datos, f'bench-{escala}-{args.semilla}.trabajo.db')
+                opciones.update(url=f'sqlite:///{trabajo}', trabajo=trabajo)
+                if args.reusar and os.path.exists(pristina):
+                    shutil.copyfile(pristina, trabajo)
+                    opciones['generar'] = False
+                else:
+                    if os.path.exists(trabajo):
+                        os.remove(trabajo)
+                    opciones['pristina'] = pristina
+
+            print(f"▶ {backend} {escala}: {'generando y ' if opciones['generar'] else ''}midiendo...", flush=True)
+            with tempfile.NamedTemporaryFile('r', suffix='.json') as salida:
+                opciones['salida'] = salida.name
+                subprocess.run([sys.executable, '-m', 'benchmark.suite', '_medir', json.dumps(opciones)],
+                               cwd=BACKEND, check=True, stdout=subprocess.DEVNULL)
+                corrida = json.load(salida)
+            resultado['corridas'].append(corrida)
+            lentos = sorted(corrida['resultados'].items(), key=lambda item: -item[1].get('mediana_ms', 0))[:5]
+            print(f"✅ {len(corrida['resultados'])} endpoints; más lentos: " +
+                  ', '.join(f"{clave} {datos.get('mediana_ms', datos['primera_ms']):.1f}ms" for clave, datos in lentos))
+            if corrida['sin_escenario']:
+                print(f"⚠️  Sin escenario: {', '.join(corrida['sin_escenario'])}")
+
+    with open(args.salida, 'w') as archivo:
+        json.dump(resultado, archivo, indent=1, sort_keys=True)
+    print(f"✅ Resultados en {args.salida}")
+
+
+def compare(base, nuevo, tolerancia, minimo_ms):
+    """Endpoints slower or with more SQL statements in nuevo than in base, as printable lines"""
+    corridas_base = {(c['backend'], c['escala']): c for c in base['corridas']}
+    regresiones = []
+    for corrida in nuevo['corridas']:
+        anterior = corridas_base.get((corrida['backend'], corrida['escala']))
+        if anterior is None:
+            continue
+        for clave, datos in sorted(corrida['resultados'].items()):
+            previo = anterior['resultados'].get(clave)
+            if previo is None:
+                continue
+            etiqueta = f"{corrida['backend']} {corrida['escala']} {clave}"
+            campo = 'mediana_ms' if 'mediana_ms' in datos and 'mediana_ms' in previo else 'primera_ms'
+            antes, ahora = previo[campo], datos[campo]
+            if ahora > antes * (1 + tolerancia) and ahora - antes > minimo_ms:
+                regresiones.append(f'{etiqueta}: {antes:.2f} → {ahora:.2f} ms ({(ahora / antes - 1) * 100:+.0f}%)')
+            if datos['sql'] > previo['sql']:
+                regresiones.append(f"{etiqueta}: {previo['sql']} → {datos['sql']} sentencias SQL")
+            if datos['status'] != previo['status']:
+                regresiones.append(f"{etiqueta}: código {previo['status']} → {datos['status']}")
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks de los endpoints del Sistema Contable')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    correr = comandos.add_parser('correr', help='generar datos y medir los endpoints')
+    correr.add_argument('--escalas', default='1k', help=f"separadas por comas: {', '.join(ESCALAS)}")
+    correr.add_argument('--mysql', help='URL de un servidor compatible con MySQL (la base se borra)')
+    correr.add_argument('--repeticiones', type=int, default=5)
+    correr.add_argument('--semilla', type=int, default=1)
+    correr.add_argument('--datos', default=os.path.join(tempfile.gettempdir(), 'benchmark-contable'),
+                        help='carpeta de las bases SQLite generadas')
+    correr.add_argument('--reusar', action='store_true', help='usar las bases SQLite ya generadas')
+    correr.add_argument('--salida', default='benchmark.json')
+    comparar = comandos.add_parser('comparar', help='detectar regresiones entre dos resultados')
+    comparar.add_argument('base')
+    comparar.add_argument('nuevo')
+    comparar.add_argument('--tolerancia', type=float, default=0.5, help='aumento relativo permitido (0.5 = 50%%)')
+    comparar.add_argument('--minimo-ms', type=float, default=2.0, help='aumento absoluto ignorado')
+    medir = comandos.add_parser('_medir')  # Child process of correr
+    medir.add_argument('opciones')
+    args = parser.parse_args(argv)
+
+    if args.comando == 'correr':
+        run_suite(args)
+    elif args.comando == '_medir':
+        run_child(json.loads(args.opciones))
+    else:
+        with open(args.base) as archivo:
+            base = json.load(archivo)
+        with open(args.nuevo) as archivo:
+            nuevo = json.load(archivo)
+        regresiones = compare(base, nuevo, args.tolerancia, args.minimo_ms)
+        for linea in regresiones:
+            print(f'⚠️  {linea}')
+        if regresiones:
+            return 1
+        print(f"✅ Sin regresiones (tolerancia {args.tolerancia:.0%}, mínimo {args.minimo_ms} ms)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
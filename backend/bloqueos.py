@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Bloqueos explícitos para procesos que corren de uno en uno
+
+Cada proceso serializado tiene un renglón en la tabla bloqueos. Al empezar,
+la transacción toma ese renglón y lo conserva hasta su commit o rollback;
+una segunda solicitud espera ahí y, al continuar, ve lo que hizo la primera.
+El bloqueo se toma con un UPDATE del renglón: en InnoDB obtiene el mismo
+candado exclusivo de renglón que SELECT ... FOR UPDATE, y en SQLite, que
+ignora FOR UPDATE, obtiene el candado de escritura de la base. La migración
+siembra los renglones; si falta alguno, el primero que lo necesita lo inserta.
+
+Uso:
+    bloqueos.acquire(bloqueos.DEPRECIACION)   # antes de leer lo ya contabilizado
+"""
+
+from datetime import datetime
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from database import db
+from models import Bloqueo
+
+DEPRECIACION = 'depreciacion'
+NOMBRES = (DEPRECIACION,)
+
+_bloqueos = Bloqueo.__table__
+
+
+def _touch(nombre, tomado):
+    return db.session.execute(
+        update(_bloqueos).where(_bloqueos.c.nombre == nombre).values(tomado=tomado)
+    ).rowcount
+
+
+def acquire(nombre):
+    """Lock the named row until the current transaction ends, creating it if needed"""
+    ahora = datetime.utcnow()
+    if _touch(nombre, ahora):
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(_bloqueos).values(nombre=nombre, tomado=ahora))
+    except IntegrityError:
+        # Inserted by a concurrent request meanwhile: wait for it like any other holder
+        _touch(nombre, ahora)
+
+
+def seed(conn):
+    """Insert the lock rows that do not exist yet (migration 11)"""
+    existentes = set(conn.execute(select(_bloqueos.c.nombre)).scalars())
+    faltantes = [{'nombre': nombre} for nombre in NOMBRES if nombre not in existentes]
+    if faltantes:
+        conn.execute(insert(_bloqueos), faltantes)
@@ -0,0 +1,308 @@
+"""
+Importación masiva de facturas de venta y de compra
+
+Recibe un arreglo JSON o NDJSON de facturas con el mismo formato que las
+rutas de creación individual. Todas las filas se validan antes de escribir
+(incluida la existencia de clientes/proveedores y artículos, con una consulta
+por tabla). Las filas válidas se insertan por bloques: cada bloque reserva sus
+folios de una vez y escribe facturas, detalles, asientos, movimientos
+contables y movimientos de inventario con inserciones múltiples
+(executemany) en una sola transacción. Las filas de
+periodos cerrados se rechazan. El resultado indica, por fila, el id y folio
+creados o el error encontrado.
+"""
+
+import json
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from sqlalchemy import insert, select
+from database import db
+from folios import reserve_folios
+from models import (ArticuloInventario, AsientoContable, Cliente, DetalleFacturaCompra,
+                    DetalleFacturaVenta, FacturaCompra, FacturaVenta, MovimientoContable,
+                    Proveedor)
+import balanza
+import cierres
+import contadores
+import dashboard
+import eventos
+import inventario
+import journal
+import response_cache
+
+CHUNK_SIZE = 500
+MAX_ROWS = 50000
+
+ESTADOS_FACTURA = ('Pendiente', 'Pagada', 'Cancelada')
+CENTAVO = Decimal('0.01')
+
+TIPOS = {
+    'venta': {
+        'nombre': 'venta',
+        'factura': FacturaVenta,
+        'detalle': DetalleFacturaVenta,
+        'detalle_fk': 'factura_venta_id',
+        'tercero': Cliente,
+        'tercero_fk': 'cliente_id',
+        'prefijo': 'FV',
+        'evento': 'factura_venta',
+        'concepto': 'Venta de productos',
+        'movimientos': journal.sale_movements,
+        'dashboard': dashboard.FACTURA_VENTA_POR_ESTADO,
+    },
+    'compra': {
+        'nombre': 'compra',
+        'factura': FacturaCompra,
+        'detalle': DetalleFacturaCompra,
+        'detalle_fk': 'factura_compra_id',
+        'tercero': Proveedor,
+        'tercero_fk': 'proveedor_id',
+        'prefijo': 'FC',
+        'evento': 'factura_compra',
+        'concepto': 'Compra de productos',
+        'movimientos': journal.purchase_movements,
+        'dashboard': dashboard.FACTURA_COMPRA_POR_ESTADO,
+    },
+}
+
+
+class RowError(ValueError):
+    """Invalid invoice row, reported in the per-row results"""
+
+
+def parse_payload(request):
+    """Read the invoice rows from a JSON array or an NDJSON body"""
+    if request.mimetype == 'application/x-ndjson':
+        lines = request.get_data(as_text=True).splitlines()
+        rows = [json.loads(line) for line in lines if line.strip()]
+    else:
+        rows = request.get_json()
+    if not isinstance(rows, list):
+        raise ValueError('Se esperaba un arreglo de facturas')
+    if len(rows) > MAX_ROWS:
+        raise ValueError(f'Máximo {MAX_ROWS} facturas por solicitud')
+    return rows
+
+
+def _decimal(value, campo):
+    try:
+        numero = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise RowError(f'{campo} inválido: {value}')
+    # NaN would be stored as the totals and Infinity fails to quantize later
+    if not numero.is_finite():
+        raise RowError(f'{campo} inválido: {value}')
+    return numero
+
+
+def _cantidad(value):
+    cantidad = _decimal(value, 'cantidad')
+    # Quantities are whole units: 2.5 is rejected instead of truncated to 2
+    if cantidad != cantidad.to_integral_value():
+        raise RowError(f'La cantidad debe ser un número entero: {value}')
+    return int(cantidad)
+
+
+def parse_row(tipo, data):
+    """Validate one invoice and compute its totals, raises RowError"""
+    if not isinstance(data, dict):
+        raise RowError('La factura debe ser un objeto')
+    tercero_fk = tipo['tercero_fk']
+    try:
+        fecha = datetime.strptime(data['fecha'], '%Y-%m-%d').date()
+        tercero_id = int(data[tercero_fk])
+        detalles_data = data['detalles']
+    except KeyError as e:
+        raise RowError(f'Falta el campo {e.args[0]}')
+    except (TypeError, ValueError):
+        raise RowError('fecha o ' + tercero_fk + ' inválido')
+
+    estado = data.get('estado', 'Pendiente')
+    if estado not in ESTADOS_FACTURA:
+        raise RowError(f'Estado inválido: {estado}')
+    if not isinstance(detalles_data, list) or not detalles_data:
+        raise RowError('La factura no tiene detalles')
+
+    detalles = []
+    for item in detalles_data:
+        try:
+            articulo_id = int(item['articulo_id'])
+            cantidad = item['cantidad']
+        except (KeyError, TypeError, ValueError):
+            raise RowError('Detalle sin articulo_id o cantidad válidos')
+        cantidad = _cantidad(cantidad)
+        if cantidad <= 0:
+            raise RowError('La cantidad debe ser mayor que cero')
+        precio_unitario = _decimal(item.get('precio_unitario'), 'precio_unitario')
+        detalles.append({
+            'articulo_id': articulo_id,
+            'cantidad': cantidad,
+            'precio_unitario': precio_unitario,
+            'subtotal': precio_unitario * cantidad
+        })
+
+    # Round to cents before posting so the entry and the period totals stay balanced
+    subtotal = sum(d['subtotal'] for d in detalles).quantize(CENTAVO, ROUND_HALF_UP)
+    iva = (subtotal * Decimal('0.15')).quantize(CENTAVO, ROUND_HALF_UP)
+    return {
+        'fecha': fecha,
+        'tercero_id': tercero_id,
+        'estado': estado,
+        'subtotal': subtotal,
+        'iva': iva,
+        'total': subtotal + iva,
+        'detalles': detalles
+    }
+
+
+def _existing_ids(model, ids):
+    if not ids:
+        return set()
+    return set(db.session.execute(select(model.id).where(model.id.in_(ids))).scalars())
+
+
+def validate(tipo, rows):
+    """Parse every row; returns (valid [(index, parsed)], errors {index: message})"""
+    validas, errores = [], {}
+    for indice, data in enumerate(rows):
+        try:
+            validas.append((indice, parse_row(tipo, data)))
+        except RowError as e:
+            errores[indice] = str(e)
+
+    terceros = _existing_ids(tipo['tercero'], {p['tercero_id'] for _, p in validas})
+    articulos = _existing_ids(ArticuloInventario, {
+        d['articulo_id'] for _, p in validas for d in p['detalles']
+    })
+    cerrados = cierres.closed_periods()
+
+    aceptadas = []
+    for indice, parsed in validas:
+        fecha = parsed['fecha']
+        if (fecha.year, fecha.month) in cerrados:
+            errores[indice] = f'El periodo {fecha.month:02d}/{fecha.year} está cerrado'
+        elif parsed['tercero_id'] not in terceros:
+            errores[indice] = f"{tipo['tercero_fk']} {parsed['tercero_id']} no existe"
+        elif any(d['articulo_id'] not in articulos for d in parsed['detalles']):
+            errores[indice] = 'Artículo inexistente en los detalles'
+        else:
+            aceptadas.append((indice, parsed))
+    return aceptadas, errores
+
+
+def _ids_by_folio(model, folios):
+    rows = db.session.execute(select(model.id, model.folio).where(model.folio.in_(folios)))
+    return {folio: id_ for id_, folio in rows}
+
+
+def insert_chunk(tipo, chunk):
+    """Insert one block of validated invoices inside the current transaction"""
+    factura_model, detalle_model = tipo['factura'], tipo['detalle']
+    # Re-checked under lock: a period may have been closed after validation
+    for fecha in {parsed['fecha'].replace(day=1) for _, parsed in chunk}:
+        cierres.ensure_open(fecha)
+    folios = reserve_folios(tipo['prefijo'], factura_model, len(chunk))
+    folios_asiento = reserve_folios('AC', AsientoContable, len(chunk))
+
+    db.session.execute(insert(factura_model.__table__), [
+        {
+            'folio': folio,
+            'fecha': parsed['fecha'],
+            tipo['tercero_fk']: parsed['tercero_id'],
+            'subtotal': parsed['subtotal'],
+            'iva': parsed['iva'],
+            'total': parsed['total'],
+            'estado': parsed['estado'],
+            'fecha_creacion': datetime.utcnow()
+        }
+        for folio, (_, parsed) in zip(folios, chunk)
+    ])
+    factura_ids = _ids_by_folio(factura_model, folios)
+
+    # Stock movements first: they lock the articles the details reference
+    valor_inventario = inventario.post_movements([
+        linea
+        for folio, (_, parsed) in zip(folios, chunk)
+        for linea in inventario.invoice_lines(
+            tipo['nombre'], factura_ids[folio], parsed['fecha'], parsed['estado'], parsed['detalles']
+        )
+    ])
+
+    db.session.execute(insert(detalle_model.__table__), [
+        dict(detalle, **{tipo['detalle_fk']: factura_ids[folio]})
+        for folio, (_, parsed) in zip(folios, chunk)
+        for detalle in parsed['detalles']
+    ])
+
+    db.session.execute(insert(AsientoContable.__table__), [
+        {
+            'folio': folio_asiento,
+            'fecha': parsed['fecha'],
+            'mes': parsed['fecha'].month,
+            'anio': parsed['fecha'].year,
+            'concepto': f"{tipo['concepto']} - Factura {folio}",
+            'total_debe': parsed['total'],
+            'total_haber': parsed['total'],
+            'estado': 'Aplicado',
+            'fecha_creacion': datetime.utcnow()
+        }
+        for folio, folio_asiento, (_, parsed) in zip(folios, folios_asiento, chunk)
+    ])
+    asiento_ids = _ids_by_folio(AsientoContable, folios_asiento)
+
+    movimientos, saldos = [], []
+    deltas = {}
+    for folio_asiento, (_, parsed) in zip(folios_asiento, chunk):
+        fecha = parsed['fecha']
+        for mov in tipo['movimientos'](parsed['tercero_id'], parsed['subtotal'], parsed['iva'], parsed['total']):
+            movimientos.append({
+                'asiento_id': asiento_ids[folio_asiento],
+                'cuenta': mov['cuenta'],
+                'debe': Decimal(str(mov['debe'])),
+                'haber': Decimal(str(mov['haber'])),
+                'concepto': mov['concepto']
+            })
+            saldos.append((fecha.year, fecha.month, mov['cuenta'], mov['debe'], mov['haber']))
+        componente = tipo['dashboard'].get(parsed['estado'])
+        if componente:
+            deltas[componente] = deltas.get(componente, Decimal('0')) + parsed['total']
+
+    db.session.execute(insert(MovimientoContable.__table__), movimientos)
+    contadores.added(factura_model, len(chunk))
+    contadores.added(AsientoContable, len(chunk))
+    balanza.post_movement_rows(saldos)
+    deltas['inventario'] = valor_inventario
+    eventos.publish(tipo['evento'], deltas=dashboard.apply_delta(**deltas))
+    response_cache.bump(ArticuloInventario)
+
+    return [
+        {
+            'indice': indice,
+            'id': factura_ids[folio],
+            'folio': folio,
+            'asiento_id': asiento_ids[folio_asiento]
+        }
+        for folio, folio_asiento, (indice, _) in zip(folios, folios_asiento, chunk)
+    ]
+
+
+def import_invoices(tipo_nombre, rows, chunk_size=CHUNK_SIZE, progress=None):
+    """Validate and insert invoices in blocks, returns the per-row results in input order"""
+    tipo = TIPOS[tipo_nombre]
+    aceptadas, errores = validate(tipo, rows)
+    resultados = {indice: {'indice': indice, 'error': error} for indice, error in errores.items()}
+
+    for inicio in range(0, len(aceptadas), chunk_size):
+        chunk = aceptadas[inicio:inicio + chunk_size]
+        try:
+            for resultado in insert_chunk(tipo, chunk):
+                resultados[resultado['indice']] = resultado
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for indice, _ in chunk:
+                resultados[indice] = {'indice': indice, 'error': f'Bloque no insertado: {e}'}
+        if progress:
+            progress(min(inicio + chunk_size, len(aceptadas)), len(aceptadas))
+
+    return [resultados[indice] for indice in range(len(rows))]
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Cierre de periodos contables con instantánea congelada
+
+Cerrar un periodo (anio, mes) guarda en cierres_periodo los totales por
+cuenta, el número de asientos y el listado completo de asientos con sus
+movimientos (JSON comprimido). A partir de ahí el periodo no admite asientos
+nuevos (tampoco los generados por facturas) y las consultas de ese periodo se
+sirven desde la instantánea sin tocar asientos_contables ni
+movimientos_contables. Reabrir el periodo borra la instantánea.
+
+Las escrituras toman un candado compartido sobre la fila (o el hueco) del
+periodo en cierres_periodo; el cierre inserta esa fila antes de leer nada,
+así que espera a que terminen las escrituras en curso, las siguientes ya ven
+el periodo cerrado y el listado se lee después, incluyéndolas todas.
+
+Uso:
+    python cierres.py cerrar 2024 1
+    python cierres.py reabrir 2024 1
+    python cierres.py lista
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from flask import Response, request
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from database import create_app, db
+from listing import page_response, parse_limit, stream_response, wants_stream
+from models import CierrePeriodo
+import balanza
+import journal
+
+# Decoded listings kept per process, keyed by (anio, mes, cerrado_en) and
+# bounded by the size of their decompressed JSON
+MAX_LISTADOS_BYTES = int(os.getenv('CIERRES_CACHE_MB', 64)) * 1024 * 1024
+
+_cierres = CierrePeriodo.__table__
+_listados = OrderedDict()
+_tamano_listados = 0
+_lock = threading.Lock()
+
+
+class PeriodoCerrado(ValueError):
+    """A write targets a closed accounting period"""
+
+
+def _check_month(anio, mes):
+    if not 1 <= mes <= 12:
+        raise ValueError(f'Mes inválido: {mes}')
+
+
+def closed_at(anio, mes, lock=False):
+    """Return when the period was closed, or None if it is open"""
+    query = select(_cierres.c.cerrado_en).where(_cierres.c.anio == anio, _cierres.c.mes == mes)
+    if lock:
+        # Shared lock: a concurrent close waits for this write to commit
+        query = query.with_for_update(read=True)
+    return db.session.execute(query).scalar()
+
+
+def ensure_open(fecha):
+    """Raise PeriodoCerrado if the period of this date is closed"""
+    if closed_at(fecha.year, fecha.month, lock=True) is not None:
+        raise PeriodoCerrado(f'El periodo {fecha.month:02d}/{fecha.year} está cerrado')
+
+
+def closed_periods():
+    """Set of (anio, mes) of every closed period"""
+    return {(row.anio, row.mes) for row in db.session.execute(select(_cierres.c.anio, _cierres.c.mes))}
+
+
+def close_period(anio, mes):
+    """Freeze a period: store its account totals and full listing, returns the summary
+
+    Must be the first read of its transaction: the listing has to come from a
+    read view taken after the period row exists.
+    """
+    _check_month(anio, mes)
+    # Claim the period before reading it. The insert waits for writers holding
+    # the shared lock from ensure_open and makes later ones fail, so nothing can
+    # commit into the period between the listing below and our commit.
+    cierre = CierrePeriodo(anio=anio, mes=mes, asientos=0, totales='[]', listado=zlib.compress(b'[]'))
+    try:
+        with db.session.begin_nested():
+            db.session.add(cierre)
+    except IntegrityError:
+        raise PeriodoCerrado(f'El periodo {mes:02d}/{anio} ya está cerrado')
+
+    asientos = list(journal.stream_entries(journal.period_criteria(mes, anio)))
+    totales = [
+        {'cuenta': c['cuenta'], 'debe': float(c['debe']), 'haber': float(c['haber'])}
+        for c in balanza.trial_balance(anio, mes)
+    ]
+    cierre.asientos = len(asientos)
+    cierre.totales = json.dumps(totales)
+    cierre.listado = zlib.compress(json.dumps(asientos, separators=(',', ':')).encode())
+    db.session.flush()
+    return summary(cierre)
+
+
+def reopen_period(anio, mes):
+    """Delete the snapshot so the period is served live and accepts entries again"""
+    result = db.session.execute(delete(_cierres).where(_cierres.c.anio == anio, _cierres.c.mes == mes))
+    return result.rowcount > 0
+
+
+def summary(cierre):
+    return {
+        'anio': cierre.anio,
+        'mes': cierre.mes,
+        'asientos': cierre.asientos,
+        'totales': json.loads(cierre.totales),
+        'cerrado_en': cierre.cerrado_en.isoformat()
+    }
+
+
+def list_closed():
+    rows = db.session.execute(
+        select(_cierres.c.anio, _cierres.c.mes, _cierres.c.asientos, _cierres.c.cerrado_en)
+        .order_by(_cierres.c.anio.desc(), _cierres.c.mes.desc())
+    )
+    return [
+        {'anio': row.anio, 'mes': row.mes, 'asientos': row.asientos, 'cerrado_en': row.cerrado_en.isoformat()}
+        for row in rows
+    ]
+
+
+def _sort_key(asiento):
+    return (asiento['anio'], asiento['mes'], asiento['fecha'], asiento['id'])
+
+
+def frozen_listing(anio, mes, cerrado_en):
+    """Decoded entries of a closed period (newest first), decompressed once per process while they fit the cache"""
+    global _tamano_listados
+    key = (anio, mes, cerrado_en)
+    with _lock:
+        if key in _listados:
+            _listados.move_to_end(key)
+            return _listados[key][:2]
+
+    blob = db.session.execute(
+        select(_cierres.c.listado).where(_cierres.c.anio == anio, _cierres.c.mes == mes)
+    ).scalar()
+    raw = zlib.decompress(blob)
+    asientos = json.loads(raw)
+    # Ascending keys for bisect; the listing itself is in descending order
+    keys = [_sort_key(a) for a in reversed(asientos)]
+    if len(raw) > MAX_LISTADOS_BYTES:
+        # Larger than the whole cache: decoded for this request only
+        return asientos, keys
+    with _lock:
+        if key in _listados:
+            _tamano_listados -= _listados.pop(key)[2]
+        _listados[key] = (asientos, keys, len(raw))
+        _tamano_listados += len(raw)
+        while _tamano_listados > MAX_LISTADOS_BYTES:
+            _tamano_listados -= _listados.popitem(last=False)[1][2]
+    return asientos, keys
+
+
+def frozen_page(listing, after=None, limit=None):
+    """Slice a frozen listing with the same cursor format as journal.fetch_entries"""
+    asientos, keys = listing
+    start = 0
+    if after:
+        anio, mes, fecha, asiento_id = journal.decode_cursor(after)
+        # Entries strictly older than the cursor
+        start = len(keys) - bisect.bisect_left(keys, (anio, mes, fecha.isoformat(), asiento_id))
+    if limit is None:
+        return asientos[start:], None
+    page = asientos[start:start + limit]
+    next_cursor = None
+    if start + limit < len(asientos):
+        last = page[-1]
+        next_cursor = f"{last['anio']}:{last['mes']}:{last['fecha']}:{last['id']}"
+    return page, next_cursor
+
+
+def frozen_response(anio, mes, cerrado_en):
+    """Serve a closed period listing (page, stream or 304) from its snapshot"""
+    query = '&'.join(sorted(f'{k}={v}' for k, v in request.args.items(multi=True)))
+    etag = hashlib.sha1(f'{anio}:{mes}:{cerrado_en.isoformat()}:{query}'.encode()).hexdigest()[:24]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif wants_stream():
+        return stream_response(iter(frozen_page(frozen_listing(anio, mes, cerrado_en), request.args.get('after'))[0]))
+    else:
+        listing = frozen_listing(anio, mes, cerrado_en)
+        asientos, next_cursor = frozen_page(listing, request.args.get('after'), parse_limit(request.args))
+        con_totales = bool(request.args.get('totales', type=int))
+        total = len(listing[0]) if request.args.get('count', type=int) or con_totales else None
+        totales = journal.listing_totals(listing[0]) if con_totales else None
+        response = page_response(asientos, next_cursor, total, totales)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+if __name__ == '__main__':
+    comando = sys.argv[1] if len(sys.argv) > 1 else None
+    app = create_app()
+    with app.app_context():
+        if comando in ('cerrar', 'reabrir') and len(sys.argv) == 4:
+            anio, mes = int(sys.argv[2]), int(sys.argv[3])
+            if comando == 'cerrar':
+                resumen = close_period(anio, mes)
+                db.session.commit()
+                print(f"✅ Periodo {mes:02d}/{anio} cerrado ({resumen['asientos']} asientos)")
+            elif reopen_period(anio, mes):
+                db.session.commit()
+                print(f"✅ Periodo {mes:02d}/{anio} reabierto")
+            else:
+                print(f"⚠️  El periodo {mes:02d}/{anio} no estaba cerrado")
+        elif comando == 'lista':
+            for cierre in list_closed():
+                print(f"🔒 {cierre['mes']:02d}/{cierre['anio']}: {cierre['asientos']} asientos, cerrado {cierre['cerrado_en']}")
+        else:
+            print(__doc__)
+            sys.exit(2)
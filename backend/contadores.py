@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Contadores de renglones por tabla para /api/counts
+
+Cada ruta de alta suma los renglones que inserta al contador de su tabla en
+contadores_tabla, en la misma transacción (y aumenta la versión de la tabla,
+lo que también invalida la caché de respuestas). /api/counts lee todos los
+contadores con una sola consulta. reconcile() recalcula los conteos reales y
+corrige cualquier diferencia.
+
+Uso:
+    python contadores.py            # compara los contadores con los conteos reales
+    python contadores.py --reparar  # además corrige las diferencias
+"""
+
+import hashlib
+import sys
+from sqlalchemy import select, update
+from database import db
+from models import *
+import upsert
+
+# Key in the /api/counts response -> model
+CONTADORES = {
+    'clientes': Cliente,
+    'proveedores': Proveedor,
+    'cuentas_bancarias': CuentaBancaria,
+    'articulos': ArticuloInventario,
+    'facturas_venta': FacturaVenta,
+    'facturas_compra': FacturaCompra,
+    'recibos': Recibo,
+    'pagos': Pago,
+    'empleados': Empleado,
+    'recibos_nomina': ReciboNomina,
+    'activos_fijos': ActivoFijo,
+    'asientos_contables': AsientoContable,
+}
+
+_contadores = ContadorTabla.__table__
+
+
+def added(model, filas=1):
+    """Count rows inserted into a table and bump its version (inside the current transaction)"""
+    upsert.increment(_contadores, ('tabla',), {
+        'tabla': model.__tablename__, 'version': 1, 'filas': filas
+    })
+
+
+def get_counts():
+    """Read every maintained counter in one query"""
+    tablas = {model.__tablename__: nombre for nombre, model in CONTADORES.items()}
+    counts = dict.fromkeys(CONTADORES, 0)
+    rows = db.session.execute(
+        select(_contadores.c.tabla, _contadores.c.filas).where(_contadores.c.tabla.in_(tablas))
+    )
+    for tabla, filas in rows:
+        counts[tablas[tabla]] = filas
+    return counts
+
+
+def counts_etag(counts):
+    raw = ','.join(f'{nombre}={counts[nombre]}' for nombre in sorted(counts))
+    return hashlib.sha1(raw.encode()).hexdigest()[:24]
+
+
+def recompute_counts(executor=None):
+    """True row counts from the base tables"""
+    executor = executor if executor is not None else db.session
+    return {
+        nombre: executor.execute(select(db.func.count()).select_from(model.__table__)).scalar()
+        for nombre, model in CONTADORES.items()
+    }
+
+
+def reconcile(fix=False, conn=None):
+    """Compare the counters with the real counts; returns {name: (counter, real)} for drift"""
+    executor = conn if conn is not None else db.session
+    reales = recompute_counts(executor)
+    tablas = {model.__tablename__: nombre for nombre, model in CONTADORES.items()}
+    actuales = dict.fromkeys(CONTADORES)
+    for tabla, filas in executor.execute(select(_contadores.c.tabla, _contadores.c.filas)):
+        if tabla in tablas:
+            actuales[tablas[tabla]] = filas
+
+    diferencias = {
+        nombre: (actuales[nombre], reales[nombre])
+        for nombre in CONTADORES if (actuales[nombre] or 0) != reales[nombre]
+    }
+    if fix:
+        for nombre, (actual, real) in diferencias.items():
+            tabla = CONTADORES[nombre].__tablename__
+            if actual is None:
+                executor.execute(_contadores.insert().values(tabla=tabla, version=1, filas=real))
+            else:
+                executor.execute(
+                    update(_contadores).where(_contadores.c.tabla == tabla)
+                    .values(filas=real, version=_contadores.c.version + 1)
+                )
+    return diferencias
+
+
+if __name__ == '__main__':
+    from app import app
+
+    reparar = '--reparar' in sys.argv
+    with app.app_context():
+        diferencias = reconcile(fix=reparar)
+        if reparar:
+            db.session.commit()
+        if not diferencias:
+            print("✅ Contadores consistentes")
+        for nombre, (actual, real) in diferencias.items():
+            estado = 'corregido' if reparar else 'diferencia'
+            print(f"⚠️  {nombre}: contador={actual} real={real} ({estado})")
@@ -0,0 +1,156 @@
+"""
+Resumen materializado del dashboard
+
+Los totales que muestra /api/dashboard/summary se guardan en un solo renglón
+de la tabla resumen_dashboard. Las rutas que crean facturas, recibos, pagos,
+cuentas, artículos y activos aplican su efecto como incremento atómico en la
+misma transacción, así que el dashboard se sirve con una lectura por llave
+primaria. recompute_totals() calcula los mismos valores desde las tablas base
+para reconstruir o verificar el resumen.
+
+El renglón lo crea la migración 10, así que dos solicitudes concurrentes no
+intentan insertarlo a la vez; si falta (p. ej. se borró a mano) se vuelve a
+crear con un upsert que tolera la carrera.
+
+Costo: el incremento bloquea el renglón id = 1 hasta el commit, así que todas
+las escrituras que mueven el dashboard se serializan en ese candado durante
+el resto de su transacción. Por eso las rutas llaman apply_delta como una de
+sus últimas escrituras, justo antes del commit: el candado dura solo lo que
+falta para confirmar, no toda la solicitud.
+"""
+
+import sys
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from database import db
+from models import (ActivoFijo, ArticuloInventario, CuentaBancaria, DepreciacionMensual,
+                    FacturaCompra, FacturaVenta, ResumenDashboard)
+import upsert
+
+RESUMEN_ID = 1
+
+COMPONENTES = (
+    'cuentas_por_cobrar',
+    'efectivo',
+    'inventario',
+    'activos_fijos',
+    'cuentas_por_pagar',
+    'ventas',
+    'depreciacion_acumulada',
+)
+
+# Component affected by an invoice, depending on its estado
+FACTURA_VENTA_POR_ESTADO = {'Pendiente': 'cuentas_por_cobrar', 'Pagada': 'ventas'}
+FACTURA_COMPRA_POR_ESTADO = {'Pendiente': 'cuentas_por_pagar'}
+
+_resumen = ResumenDashboard.__table__
+
+
+def recompute_totals(executor=None):
+    """Compute every summary component from the base tables"""
+    executor = executor if executor is not None else db.session
+
+    def total(expr, *criteria):
+        query = select(db.func.coalesce(db.func.sum(expr), 0))
+        if criteria:
+            query = query.where(*criteria)
+        return Decimal(str(executor.execute(query).scalar() or 0))
+
+    return {
+        'cuentas_por_cobrar': total(FacturaVenta.total, FacturaVenta.estado == 'Pendiente'),
+        'efectivo': total(CuentaBancaria.saldo_actual),
+        'inventario': total(ArticuloInventario.valor_inventario),
+        'activos_fijos': total(ActivoFijo.valor_adquisicion, ActivoFijo.estado == 'Activo'),
+        'cuentas_por_pagar': total(FacturaCompra.total, FacturaCompra.estado == 'Pendiente'),
+        'ventas': total(FacturaVenta.total, FacturaVenta.estado == 'Pagada'),
+        'depreciacion_acumulada': total(DepreciacionMensual.importe),
+    }
+
+
+def rebuild_snapshot():
+    """Recompute the summary from scratch and store it, returns the stored row"""
+    db.session.flush()
+    totals = recompute_totals()
+    resumen = db.session.get(ResumenDashboard, RESUMEN_ID)
+    if resumen is None:
+        try:
+            with db.session.begin_nested():
+                resumen = ResumenDashboard(id=RESUMEN_ID, **totals)
+                db.session.add(resumen)
+        except IntegrityError:
+            # Created by a concurrent request meanwhile: lock it and overwrite it
+            resumen = db.session.get(ResumenDashboard, RESUMEN_ID, with_for_update=True, populate_existing=True)
+    for componente, valor in totals.items():
+        setattr(resumen, componente, valor)
+    resumen.actualizado = datetime.utcnow()
+    db.session.flush()
+    return resumen
+
+
+def apply_delta(**deltas):
+    """Add the given amounts to the summary inside the current transaction, returns the applied deltas"""
+    deltas = {k: Decimal(str(v)) for k, v in deltas.items() if k in COMPONENTES and v}
+    if not deltas:
+        return {}
+
+    values = {k: getattr(_resumen.c, k) + v for k, v in deltas.items()}
+    values['actualizado'] = datetime.utcnow()
+    result = db.session.execute(
+        update(_resumen).where(_resumen.c.id == RESUMEN_ID).values(**values)
+    )
+    if result.rowcount == 0:
+        # No row (the migration seeds it): insert it from the base tables, which
+        # already include the rows flushed by this request, or add the deltas
+        # if a concurrent request inserted it first
+        db.session.flush()
+        upsert.increment(_resumen, ('id',), {'id': RESUMEN_ID, **deltas},
+                         initial=dict(recompute_totals(), actualizado=values['actualizado']))
+    return deltas
+
+
+def seed(conn):
+    """Insert the summary row from the base tables if it does not exist (migration 10)"""
+    if conn.execute(select(_resumen.c.id).where(_resumen.c.id == RESUMEN_ID)).first() is None:
+        conn.execute(insert(_resumen).values(id=RESUMEN_ID, actualizado=datetime.utcnow(), **recompute_totals(conn)))
+
+
+def get_snapshot():
+    """Return the stored summary, building it on first use"""
+    resumen = db.session.get(ResumenDashboard, RESUMEN_ID)
+    if resumen is None:
+        resumen = rebuild_snapshot()
+        db.session.commit()
+    return resumen
+
+
+def check_consistency():
+    """Compare the stored summary against the base tables, returns the differences"""
+    resumen = db.session.get(ResumenDashboard, RESUMEN_ID)
+    totals = recompute_totals()
+    diferencias = {}
+    for componente, esperado in totals.items():
+        guardado = getattr(resumen, componente) if resumen is not None else None
+        if guardado is None or Decimal(str(guardado)) != esperado:
+            diferencias[componente] = {
+                'snapshot': float(guardado) if guardado is not None else None,
+                'calculado': float(esperado)
+            }
+    return diferencias
+
+
+if __name__ == '__main__':
+    from app import app
+
+    with app.app_context():
+        diferencias = check_consistency()
+        if not diferencias:
+            print("✅ El resumen del dashboard es consistente")
+        else:
+            for componente, valores in diferencias.items():
+                print(f"⚠️  {componente}: snapshot={valores['snapshot']} calculado={valores['calculado']}")
+            if '--reparar' in sys.argv:
+                rebuild_snapshot()
+                db.session.commit()
+                print("✅ Resumen reconstruido")
@@ -2,24 +2,53 @@ from flask_sqlalchemy import SQLAlchemy
 from flask import Flask
 import os
 from dotenv import load_dotenv
+import diagnostico
+import metricas
 
 load_dotenv()
 
 db = SQLAlchemy()
 
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+def _env_bool(name, default):
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes')
+
+def database_url():
+    """DATABASE_URL if set, otherwise the MySQL URL built from the DB_* variables"""
+    return os.getenv('DATABASE_URL') or f"mysql+pymysql://{os.getenv('DB_USER', 'root')}:{os.getenv('DB_PASSWORD', '')}@{os.getenv('DB_HOST', 'localhost')}/{os.getenv('DB_NAME', 'sistema_contable')}"
+
+def engine_options(url):
+    """Connection pool settings from the DB_POOL_* variables"""
+    options = {
+        # Check connections on checkout and replace them before MySQL's wait_timeout closes them
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', 'true'),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 280),
+    }
+    if not url.startswith('sqlite'):
+        options.update({
+            'pool_size': _env_int('DB_POOL_SIZE', 10),
+            'max_overflow': _env_int('DB_MAX_OVERFLOW', 20),
+            'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        })
+    return options
+
 def create_app():
     app = Flask(__name__)
     
     # Database configuration
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"mysql+pymysql://{os.getenv('DB_USER', 'root')}:{os.getenv('DB_PASSWORD', '')}@{os.getenv('DB_HOST', 'localhost')}/{os.getenv('DB_NAME', 'sistema_contable')}"
+    url = database_url()
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(url)
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
     
     db.init_app(app)
     
-    return app
-
-def init_db(app):
+    # Request metrics (METRICS=1), slow-query log and profiler (SLOW_QUERY_MS, PROFILER)
     with app.app_context():
-        db.create_all()
-        print("Database tables created successfully!")
+        metricas.configure(app, db.engine)
+        diagnostico.configure(app, db.engine)
+    
+    return app
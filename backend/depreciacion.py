@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Depreciación mensual de activos fijos calculada por lotes
+
+Los activos en estado Activo se cargan una vez en arreglos (costo, valor
+residual, mes de inicio, vida útil en meses, método) y la depreciación
+acumulada de todos se calcula a la vez para un mes dado. Con NumPy instalado
+la línea recta se calcula con operaciones vectorizadas; los saldos
+decrecientes usan fracciones exactas, que no caben en arreglos de enteros,
+así que esos activos se recorren uno por uno en ambos caminos. Sin NumPy se
+recorre la misma fórmula en Python con resultados idénticos.
+
+Los importes se manejan en centavos enteros, así que no hay error de punto
+flotante acumulado:
+    linea_recta          acumulada(k) = redondeo(base * k / n)
+    saldos_decrecientes  valor en libros = redondeo(costo * (1 - 2/n)^k), sin
+                         bajar del valor residual; el último mes deja el
+                         activo en su valor residual. El factor (1 - 2/n)^k
+                         es una fracción exacta, no un flotante
+donde base = costo - residual, n = vida útil en meses y k = meses
+transcurridos desde el mes siguiente a la adquisición. La depreciación del
+mes es acumulada(k) - acumulada(k - 1). El redondeo a centavos (mitad hacia
+arriba) se aplica una sola vez, al pasar de la fórmula a centavos.
+
+Contabilizar un mes genera un asiento (gasto por depreciación contra
+depreciación acumulada, por categoría) y lo registra en
+depreciaciones_mensuales. Los meses se contabilizan en orden; el importe de
+cada mes es la diferencia entre la depreciación acumulada calculada y la ya
+contabilizada, así que un activo registrado con fecha pasada se ajusta en el
+siguiente mes contabilizado. Contabilizar empieza por tomar el renglón
+'depreciacion' de la tabla bloqueos (bloqueos.acquire), así que dos
+solicitudes simultáneas se turnan: la segunda encuentra los meses ya
+contabilizados en lugar de chocar con la llave única (anio, mes).
+
+Uso:
+    python depreciacion.py resumen 2024 6
+    python depreciacion.py contabilizar 2024 6   # todos los meses pendientes hasta 06/2024
+"""
+
+import bisect
+import sys
+from calendar import monthrange
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
+from fractions import Fraction
+from sqlalchemy import insert, select
+from database import create_app, db
+from folios import reserve_folios
+from models import ActivoFijo, AsientoContable, DepreciacionMensual, MovimientoContable
+import balanza
+import bloqueos
+import cierres
+import contadores
+import dashboard
+import eventos
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+METODOS = ('linea_recta', 'saldos_decrecientes')
+# Double declining balance
+FACTOR_SALDOS = 2
+CUENTA_GASTO = 'Gasto por Depreciación'
+CUENTA_ACUMULADA = 'Depreciación Acumulada'
+SIN_CATEGORIA = 'Sin categoría'
+
+_depreciaciones = DepreciacionMensual.__table__
+
+
+def month_index(anio, mes):
+    return anio * 12 + mes - 1
+
+
+def month_of(indice):
+    return indice // 12, indice % 12 + 1
+
+
+def _cents(value):
+    return int((Decimal(str(value or 0)) * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def as_money(centavos):
+    return Decimal(int(centavos)) / 100
+
+
+def _factors(vida):
+    """Remaining book value fraction after k months of declining balance, k = 0..vida"""
+    # Exact: with a rounded factor (float or fixed precision Decimal) the many
+    # products that fall on exactly half a cent, e.g. 3 * 5/6, round either way
+    tasa = max(Fraction(0), 1 - Fraction(FACTOR_SALDOS, vida))
+    return [tasa ** k for k in range(vida + 1)]
+
+
+def _book_value(costo, factor, residual):
+    """Declining balance book value in cents, rounded half up, not below the residual value"""
+    return max(int((2 * costo * factor + 1) // 2), residual)
+
+
+class Cartera:
+    """Active fixed assets loaded as parallel arrays of integer cents and month indexes"""
+
+    def __init__(self, rows, use_numpy=None):
+        self.use_numpy = np is not None and use_numpy is not False
+        self.ids = [row.id for row in rows]
+        self.categorias = sorted({row.categoria or SIN_CATEGORIA for row in rows})
+        codigos = {categoria: i for i, categoria in enumerate(self.categorias)}
+        self.categoria = [codigos[row.categoria or SIN_CATEGORIA] for row in rows]
+        self.costo = [_cents(row.valor_adquisicion) for row in rows]
+        self.residual = [_cents(row.valor_residual) for row in rows]
+        # Depreciation starts the month after acquisition
+        self.inicio = [month_index(row.fecha_adquisicion.year, row.fecha_adquisicion.month) + 1 for row in rows]
+        self.vida = [max(row.vida_util_anos or 0, 0) * 12 for row in rows]
+        self.saldos = [row.metodo_depreciacion == 'saldos_decrecientes' for row in rows]
+
+        self.tablas = {v: _factors(v) for v in {v for v, s in zip(self.vida, self.saldos) if s and v}}
+        if self.use_numpy:
+            self._to_arrays()
+
+    def _to_arrays(self):
+        self.categoria = np.array(self.categoria, dtype=np.int64)
+        self.costo = np.array(self.costo, dtype=np.int64)
+        self.residual = np.array(self.residual, dtype=np.int64)
+        self.inicio = np.array(self.inicio, dtype=np.int64)
+        self.vida = np.array(self.vida, dtype=np.int64)
+        self.saldos = np.array(self.saldos, dtype=bool)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def first_month(self):
+        if not len(self):
+            return None
+        return int(min(self.inicio))
+
+    def accumulated(self, t):
+        """Accumulated depreciation of every asset at the end of month index t, in cents"""
+        if self.use_numpy:
+            return self._accumulated_numpy(t)
+        return self._accumulated_python(t)
+
+    def _accumulated_numpy(self, t):
+        k = np.clip(t - self.inicio + 1, 0, self.vida)
+        n = np.maximum(self.vida, 1)
+        base = np.maximum(self.costo - self.residual, 0)
+        acumulada = (2 * base * k + n) // (2 * n)
+        # Exact fractions do not vectorize: declining balance assets go one by one, as in the Python path
+        decrecientes = np.flatnonzero(self.saldos & (k < self.vida))
+        if len(decrecientes):
+            libros = np.array([
+                _book_value(int(self.costo[i]), self.tablas[int(self.vida[i])][int(k[i])], int(self.residual[i]))
+                for i in decrecientes
+            ], dtype=np.int64)
+            acumulada[decrecientes] = np.minimum(self.costo[decrecientes] - libros, base[decrecientes])
+        return acumulada
+
+    def _accumulated_python(self, t):
+        acumuladas = []
+        for costo, residual, inicio, n, saldos in zip(self.costo, self.residual, self.inicio, self.vida, self.saldos):
+            if n <= 0:
+                acumuladas.append(0)
+                continue
+            k = min(max(t - inicio + 1, 0), n)
+            base = max(costo - residual, 0)
+            if saldos and k < n:
+                libros = _book_value(costo, self.tablas[n][k], residual)
+                acumuladas.append(min(costo - libros, base))
+            else:
+                acumuladas.append((2 * base * k + n) // (2 * n))
+        return acumuladas
+
+    def by_category(self, valores):
+        """Sum per-asset cents into one total per category"""
+        if self.use_numpy:
+            totales = np.zeros(len(self.categorias), dtype=np.int64)
+            np.add.at(totales, self.categoria, valores)
+            return [int(v) for v in totales]
+        totales = [0] * len(self.categorias)
+        for codigo, valor in zip(self.categoria, valores):
+            totales[codigo] += valor
+        return totales
+
+    def total(self, valores):
+        return int(sum(valores)) if not self.use_numpy else int(valores.sum())
+
+
+def load_assets(use_numpy=None):
+    rows = db.session.execute(
+        select(
+            ActivoFijo.id, ActivoFijo.categoria, ActivoFijo.valor_adquisicion, ActivoFijo.valor_residual,
+            ActivoFijo.fecha_adquisicion, ActivoFijo.vida_util_anos, ActivoFijo.metodo_depreciacion
+        ).where(ActivoFijo.estado == 'Activo').order_by(ActivoFijo.id)
+    ).all()
+    return Cartera(rows, use_numpy)
+
+
+def _month(cartera, t):
+    """(accumulated, depreciation of the month) per asset for month index t"""
+    acumulada = cartera.accumulated(t)
+    anterior = cartera.accumulated(t - 1)
+    if cartera.use_numpy:
+        return acumulada, acumulada - anterior
+    return acumulada, [a - b for a, b in zip(acumulada, anterior)]
+
+
+def _amounts(costo, del_mes, acumulada):
+    return {
+        'costo': float(as_money(costo)),
+        'depreciacion_mes': float(as_money(del_mes)),
+        'depreciacion_acumulada': float(as_money(acumulada)),
+        'valor_libros': float(as_money(costo - acumulada))
+    }
+
+
+def month_summary(cartera, anio, mes):
+    """Depreciation of the month, accumulated depreciation and book value, in total and per category"""
+    acumulada, del_mes = _month(cartera, month_index(anio, mes))
+    por_categoria = zip(
+        cartera.categorias,
+        cartera.by_category(cartera.costo),
+        cartera.by_category(del_mes),
+        cartera.by_category(acumulada)
+    )
+    return {
+        'anio': anio,
+        'mes': mes,
+        'activos': len(cartera),
+        'totales': _amounts(cartera.total(cartera.costo), cartera.total(del_mes), cartera.total(acumulada)),
+        'por_categoria': [dict(_amounts(c, m, a), categoria=categoria) for categoria, c, m, a in por_categoria]
+    }
+
+
+def asset_page(cartera, anio, mes, after=None, limit=100):
+    """Per-asset amounts of the month ordered by id, returns (items, next cursor)"""
+    acumulada, del_mes = _month(cartera, month_index(anio, mes))
+    inicio = bisect.bisect_right(cartera.ids, after) if after is not None else 0
+    fin = min(inicio + limit, len(cartera))
+    items = [
+        dict(_amounts(cartera.costo[i], del_mes[i], acumulada[i]), id=cartera.ids[i])
+        for i in range(inicio, fin)
+    ]
+    return items, (cartera.ids[fin - 1] if fin < len(cartera) else None)
+
+
+def last_posted():
+    """(month index, posted accumulated cents) of the last posted month, or None"""
+    row = db.session.execute(
+        select(_depreciaciones.c.anio, _depreciaciones.c.mes, _depreciaciones.c.acumulada)
+        .order_by(_depreciaciones.c.anio.desc(), _depreciaciones.c.mes.desc()).limit(1)
+    ).first()
+    if row is None:
+        return None
+    return month_index(row.anio, row.mes), _cents(row.acumulada)
+
+
+def _movements(categorias, importes, ajuste):
+    movimientos = []
+    for categoria, importe in list(zip(categorias, importes)) + [('Ajuste', ajuste)]:
+        if not importe:
+            continue
+        # A negative amount (assets written off) reverses the entry
+        debe, haber = (as_money(importe), Decimal('0')) if importe > 0 else (Decimal('0'), as_money(-importe))
+        movimientos.append({'cuenta': CUENTA_GASTO, 'debe': debe, 'haber': haber,
+                            'concepto': f'Depreciación {categoria}'})
+        movimientos.append({'cuenta': CUENTA_ACUMULADA, 'debe': haber, 'haber': debe,
+                            'concepto': f'Depreciación {categoria}'})
+    return movimientos
+
+
+def post_through(anio, mes, cartera=None):
+    """Post the depreciation entries of every pending month up to (anio, mes), returns one dict per month"""
+    hasta = month_index(anio, mes)
+    hoy = date.today()
+    if hasta > month_index(hoy.year, hoy.month):
+        raise ValueError('No se puede contabilizar la depreciación de un mes futuro')
+    # Serialize posting before reading what is already posted: a concurrent
+    # post waits here until we commit and then finds our months
+    bloqueos.acquire(bloqueos.DEPRECIACION)
+    cartera = cartera if cartera is not None else load_assets()
+
+    ultimo = last_posted()
+    if ultimo is not None:
+        desde, contabilizada = ultimo[0] + 1, ultimo[1]
+    else:
+        desde, contabilizada = cartera.first_month(), 0
+    if desde is None or desde > hasta:
+        return []
+
+    meses = []
+    anterior = cartera.by_category(cartera.accumulated(desde - 1))
+    for t in range(desde, hasta + 1):
+        actual = cartera.by_category(cartera.accumulated(t))
+        programada = [a - b for a, b in zip(actual, anterior)]
+        importe = sum(actual) - contabilizada
+        meses.append((t, programada, importe - sum(programada), importe))
+        contabilizada += importe
+        anterior = actual
+
+    con_asiento = [m for m in meses if m[3]]
+    for t, *_ in con_asiento:
+        m_anio, m_mes = month_of(t)
+        cierres.ensure_open(date(m_anio, m_mes, 1))
+    folios = reserve_folios('AC', AsientoContable, len(con_asiento))
+    asientos = []
+    movimientos = []
+    for folio, (t, programada, ajuste, importe) in zip(folios, con_asiento):
+        m_anio, m_mes = month_of(t)
+        movs = _movements(cartera.categorias, programada, ajuste)
+        total = sum((m['debe'] for m in movs), Decimal('0'))
+        asientos.append({
+            'folio': folio,
+            'fecha': date(m_anio, m_mes, monthrange(m_anio, m_mes)[1]),
+            'mes': m_mes,
+            'anio': m_anio,
+            'concepto': f'Depreciación de activos fijos {m_mes:02d}/{m_anio}',
+            'total_debe': total,
+            'total_haber': total,
+            'estado': 'Aplicado',
+            'fecha_creacion': datetime.utcnow()
+        })
+        movimientos.append(movs)
+
+    asiento_ids = {}
+    if asientos:
+        db.session.execute(insert(AsientoContable.__table__), asientos)
+        asiento_ids = dict(db.session.execute(
+            select(AsientoContable.folio, AsientoContable.id).where(AsientoContable.folio.in_(folios))
+        ).all())
+        db.session.execute(insert(MovimientoContable.__table__), [
+            dict(mov, asiento_id=asiento_ids[asiento['folio']])
+            for asiento, movs in zip(asientos, movimientos) for mov in movs
+        ])
+        balanza.post_movement_rows([
+            (asiento['anio'], asiento['mes'], mov['cuenta'], mov['debe'], mov['haber'])
+            for asiento, movs in zip(asientos, movimientos) for mov in movs
+        ])
+        contadores.added(AsientoContable, len(asientos))
+
+    folio_por_mes = {t: folio for folio, (t, *_) in zip(folios, con_asiento)}
+    acumulada = ultimo[1] if ultimo is not None else 0
+    registros = []
+    for t, _, _, importe in meses:
+        acumulada += importe
+        m_anio, m_mes = month_of(t)
+        registros.append({
+            'anio': m_anio,
+            'mes': m_mes,
+            'asiento_id': asiento_ids.get(folio_por_mes.get(t)),
+            'importe': as_money(importe),
+            'acumulada': as_money(acumulada),
+            'fecha_registro': datetime.utcnow()
+        })
+    db.session.execute(insert(_depreciaciones), registros)
+
+    total = sum((r['importe'] for r in registros), Decimal('0'))
+    eventos.publish('depreciacion', deltas=dashboard.apply_delta(depreciacion_acumulada=total))
+    return registros
+
+
+def posted_total():
+    """Depreciation posted so far, recomputed from the monthly records"""
+    return db.session.query(db.func.coalesce(db.func.sum(DepreciacionMensual.importe), 0)).scalar()
+
+
+if __name__ == '__main__':
+    comando = sys.argv[1] if len(sys.argv) > 1 else None
+    app = create_app()
+    with app.app_context():
+        if comando in ('resumen', 'contabilizar') and len(sys.argv) == 4:
+            anio, mes = int(sys.argv[2]), int(sys.argv[3])
+            if comando == 'resumen':
+                resumen = month_summary(load_assets(), anio, mes)
+                totales = resumen['totales']
+                print(f"📊 {mes:02d}/{anio}: {resumen['activos']} activos, depreciación del mes "
+                      f"{totales['depreciacion_mes']}, acumulada {totales['depreciacion_acumulada']}, "
+                      f"valor en libros {totales['valor_libros']}")
+            else:
+                registros = post_through(anio, mes)
+                db.session.commit()
+                print(f"✅ {len(registros)} meses contabilizados")
+        else:
+            print(__doc__)
+            sys.exit(2)
@@ -0,0 +1,302 @@
+"""
+Bitácora de consultas lentas y perfilador por muestreo de solicitudes
+
+Consultas lentas (SLOW_QUERY_MS, desactivado si no se define): cada
+sentencia que tarda al menos el umbral se guarda en un búfer circular de
+SLOW_QUERY_BUFFER entradas con sus parámetros, la ruta y método de Flask que
+la emitió (o el hilo, fuera de una solicitud) y la duración. Los parámetros
+se muestran solo por su tipo salvo con SLOW_QUERY_PARAMS=1. El plan de
+EXPLAIN se obtiene al consultar la bitácora, con otra conexión, para no
+alargar la solicitud lenta; cada consulta a la bitácora corre a lo más
+SLOW_QUERY_EXPLAIN (20) EXPLAIN, de las entradas más recientes sin plan, y
+las demás lo obtienen en las siguientes:
+
+    GET    /api/debug/consultas-lentas   entradas recientes primero, con plan
+    DELETE /api/debug/consultas-lentas   vacía el búfer
+
+Perfilador (PROFILER=header o all, desactivado por defecto): un hilo toma
+cada PROFILER_INTERVAL_MS la pila del hilo de cada solicitud perfilada. Con
+PROFILER=header solo se perfilan las solicitudes con el encabezado
+X-Profile: 1 y el token de abajo; con PROFILER=all, todas. Al terminar la solicitud las pilas se escriben en
+formato plegado ("a;b;c muestras", el que leen flamegraph.pl y speedscope)
+en PROFILE_DIR, y la respuesta indica el archivo en X-Profile-File:
+
+    GET /api/debug/perfiles            archivos disponibles
+    GET /api/debug/perfiles/<archivo>  pilas plegadas de una solicitud
+
+Estas rutas muestran SQL, parámetros y código: solo existen con la función
+activada y DEBUG_TOKEN definido, y solo responden a las solicitudes con el
+encabezado X-Debug-Token igual a ese valor; el resto recibe 403. Detrás de
+un proxy local todas las solicitudes llegan de 127.0.0.1, así que la
+dirección de origen no se toma en cuenta. Sin DEBUG_TOKEN las consultas y
+los perfiles se siguen registrando, pero las rutas no se registran.
+"""
+
+import collections
+import functools
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from flask import has_request_context, jsonify, request, send_from_directory
+from sqlalchemy import event
+
+EXPLICABLES = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+MAX_PARAMETRO = 200  # Characters kept of each parameter value
+MAX_EXPLAIN = 20  # EXPLAINs run per request to the slow-query log
+
+_local = threading.local()
+
+
+class ConsultasLentas:
+    """Ring buffer of the statements slower than the threshold"""
+
+    def __init__(self, engine, umbral_ms, capacidad, mostrar_parametros=False, max_explain=MAX_EXPLAIN):
+        self.engine = engine
+        self.umbral = umbral_ms / 1000
+        self.mostrar_parametros = mostrar_parametros
+        self.max_explain = max_explain
+        self.entradas = collections.deque(maxlen=capacidad)
+        self.lock = threading.Lock()
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('diagnostico_inicio', []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        inicios = conn.info.get('diagnostico_inicio')
+        if not inicios:
+            return
+        segundos = time.perf_counter() - inicios.pop()
+        # The log's own EXPLAINs would push the entries they explain out of the buffer
+        if context is not None and context.execution_options.get('diagnostico_explain'):
+            return
+        if segundos >= self.umbral:
+            self.record(statement, parameters, executemany, segundos)
+
+    def handle_error(self, context):
+        # A failed statement never reaches after_cursor_execute
+        inicios = context.connection.info.get('diagnostico_inicio') if context.connection is not None else None
+        if inicios:
+            inicios.pop()
+
+    def record(self, statement, parameters, executemany, segundos):
+        if has_request_context():
+            origen = f'{request.method} {request.url_rule.rule if request.url_rule else request.path}'
+        else:
+            origen = f'hilo {threading.current_thread().name}'
+        entrada = {
+            'fecha': datetime.utcnow().isoformat(),
+            'duracion_ms': round(segundos * 1000, 2),
+            'origen': origen,
+            'sentencia': statement,
+            'parametros': (_shorten if self.mostrar_parametros else _redact)(
+                parameters[0] if executemany and parameters else parameters
+            ),
+            'renglones_executemany': len(parameters) if executemany else None,
+            # Kept to run EXPLAIN later; the redacted or shortened copy above is what is shown
+            '_parametros': None if executemany else parameters,
+            'plan': None
+        }
+        with self.lock:
+            self.entradas.append(entrada)
+
+    def explain(self, entrada):
+        """EXPLAIN of a recorded statement with its own parameters, on a separate connection"""
+        sentencia = entrada['sentencia'].lstrip()
+        prefijo = 'EXPLAIN QUERY PLAN ' if self.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+        try:
+            with self.engine.connect().execution_options(diagnostico_explain=True) as conn:
+                result = conn.exec_driver_sql(prefijo + sentencia, entrada['_parametros'] or ())
+                columnas = list(result.keys())
+                return [dict(zip(columnas, [_json_value(v) for v in row])) for row in result]
+        except Exception as e:
+            return [{'error': str(e)}]
+
+    def snapshot(self):
+        """Recorded statements, newest first, with the plans of up to max_explain more of them"""
+        with self.lock:
+            entradas = list(reversed(self.entradas))
+        # A full buffer would otherwise cost one EXPLAIN per entry on a single request
+        pendientes = [entrada for entrada in entradas if entrada['plan'] is None and _explainable(entrada)]
+        for entrada in pendientes[:self.max_explain]:
+            entrada['plan'] = self.explain(entrada)
+        return [
+            {clave: valor for clave, valor in entrada.items() if not clave.startswith('_')}
+            for entrada in entradas
+        ]
+
+    def clear(self):
+        with self.lock:
+            self.entradas.clear()
+
+
+def _explainable(entrada):
+    return not entrada['renglones_executemany'] and entrada['sentencia'].lstrip().upper().startswith(EXPLICABLES)
+
+
+def _json_value(valor):
+    return valor if valor is None or isinstance(valor, (int, float, str, bool)) else str(valor)
+
+
+def _shorten(parametros):
+    """JSON-friendly copy of the parameters with long values cut"""
+    if isinstance(parametros, dict):
+        return {str(k): _shorten(v) for k, v in parametros.items()}
+    if isinstance(parametros, (list, tuple)):
+        return [_shorten(v) for v in parametros]
+    texto = _json_value(parametros)
+    if isinstance(texto, str) and len(texto) > MAX_PARAMETRO:
+        return texto[:MAX_PARAMETRO] + '…'
+    return texto
+
+
+def _redact(parametros):
+    """Copy of the parameters with each value replaced by its type name"""
+    if isinstance(parametros, dict):
+        return {str(k): _redact(v) for k, v in parametros.items()}
+    if isinstance(parametros, (list, tuple)):
+        return [_redact(v) for v in parametros]
+    return None if parametros is None else f'<{type(parametros).__name__}>'
+
+
+def _allowed(token):
+    """Whether the current request carries the debug token"""
+    return hmac.compare_digest(request.headers.get('X-Debug-Token', ''), token)
+
+
+def _restricted(view, token):
+    """Wrap a debug view so it only answers requests carrying the token"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _allowed(token):
+            return jsonify({'error': 'Acceso restringido a diagnóstico'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class Perfilador:
+    """One sampling thread for every profiled request of the process"""
+
+    def __init__(self, carpeta, intervalo_ms):
+        self.carpeta = carpeta
+        self.intervalo = intervalo_ms / 1000
+        self.activos = {}  # thread id -> Counter of folded stacks
+        self.hay_activos = threading.Event()
+        self.lock = threading.Lock()
+        self._hilo = None
+
+    def start(self):
+        """Begin sampling the current thread"""
+        with self.lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._sample_loop, name='perfilador', daemon=True)
+                self._hilo.start()
+            self.activos[threading.get_ident()] = collections.Counter()
+            self.hay_activos.set()
+
+    def stop(self):
+        """Stop sampling the current thread, returns its folded stacks"""
+        with self.lock:
+            muestras = self.activos.pop(threading.get_ident(), collections.Counter())
+            if not self.activos:
+                self.hay_activos.clear()
+        return muestras
+
+    def _sample_loop(self):
+        while True:
+            self.hay_activos.wait()
+            time.sleep(self.intervalo)
+            frames = sys._current_frames()
+            with self.lock:
+                for ident, muestras in self.activos.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        muestras[_fold(frame)] += 1
+
+    def dump(self, muestras, nombre):
+        """Write the folded stacks of one request, returns the file name"""
+        os.makedirs(self.carpeta, exist_ok=True)
+        archivo = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{re.sub(r'[^A-Za-z0-9]+', '_', nombre).strip('_')}.folded"
+        with open(os.path.join(self.carpeta, archivo), 'w') as salida:
+            for pila, conteo in muestras.most_common():
+                salida.write(f'{pila} {conteo}\n')
+        return archivo
+
+
+def _fold(frame):
+    """Stack of a frame as 'root;...;leaf' with module:function entries"""
+    pila = []
+    while frame is not None:
+        codigo = frame.f_code
+        pila.append(f'{os.path.basename(codigo.co_filename)}:{codigo.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(pila))
+
+
+def _profile_hooks(app, perfilador, todas, token):
+    def before_request():
+        if todas or (token and request.headers.get('X-Profile') == '1' and _allowed(token)):
+            _local.perfilando = True
+            perfilador.start()
+
+    def after_request(response):
+        if getattr(_local, 'perfilando', False):
+            _local.perfilando = False
+            muestras = perfilador.stop()
+            ruta = request.url_rule.rule if request.url_rule else request.path
+            response.headers['X-Profile-File'] = perfilador.dump(muestras, f'{request.method} {ruta}')
+        return response
+
+    app.before_request(before_request)
+    app.after_request(after_request)
+
+
+def configure(app, engine):
+    """Attach the slow-query recorder and the profiler according to the environment"""
+    token = os.getenv('DEBUG_TOKEN')
+    umbral = os.getenv('SLOW_QUERY_MS')
+    if umbral:
+        consultas = ConsultasLentas(
+            engine, float(umbral), int(os.getenv('SLOW_QUERY_BUFFER', 200)),
+            mostrar_parametros=os.getenv('SLOW_QUERY_PARAMS', '').lower() in ('1', 'true', 'yes'),
+            max_explain=int(os.getenv('SLOW_QUERY_EXPLAIN', MAX_EXPLAIN))
+        )
+        event.listen(engine, 'before_cursor_execute', consultas.before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', consultas.after_cursor_execute)
+        event.listen(engine, 'handle_error', consultas.handle_error)
+        app.extensions['consultas_lentas'] = consultas
+
+        def consultas_lentas():
+            if request.method == 'DELETE':
+                consultas.clear()
+                return jsonify({'borradas': True})
+            return jsonify(consultas.snapshot())
+
+        if token:
+            app.add_url_rule('/api/debug/consultas-lentas', 'consultas_lentas', _restricted(consultas_lentas, token),
+                             methods=['GET', 'DELETE'])
+
+    modo = os.getenv('PROFILER', 'off').lower()
+    if modo in ('header', 'all'):
+        perfilador = Perfilador(os.getenv('PROFILE_DIR', 'perfiles'), float(os.getenv('PROFILER_INTERVAL_MS', 2)))
+        app.extensions['perfilador'] = perfilador
+        _profile_hooks(app, perfilador, todas=modo == 'all', token=token)
+
+        def perfiles():
+            os.makedirs(perfilador.carpeta, exist_ok=True)
+            return jsonify(sorted(
+                (archivo for archivo in os.listdir(perfilador.carpeta) if archivo.endswith('.folded')), reverse=True
+            ))
+
+        def perfil(archivo):
+            return send_from_directory(os.path.abspath(perfilador.carpeta), archivo, mimetype='text/plain')
+
+        if token:
+            app.add_url_rule('/api/debug/perfiles', 'perfiles', _restricted(perfiles, token))
+            app.add_url_rule('/api/debug/perfiles/<path:archivo>', 'perfil', _restricted(perfil, token))
+
+    if not token and (umbral or modo in ('header', 'all')):
+        app.logger.warning('DEBUG_TOKEN no definido: las rutas /api/debug no se registran')
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Canal de eventos (Server-Sent Events) para contadores y dashboard
+
+Las rutas de alta publican un evento compacto (tipo de entidad, id e
+incrementos del dashboard) en la tabla eventos, dentro de la misma
+transacción, así que solo se difunden cambios confirmados y cualquier worker
+puede publicarlos.
+
+El concentrador (python eventos.py serve) es un servidor asyncio de un solo
+hilo: una tarea consulta la tabla eventos cada POLL_INTERVAL segundos (una
+consulta sin importar cuántos clientes haya), lee los contadores una vez por
+lote y reparte los mensajes a la cola de cada suscriptor. Cada cliente
+conectado cuesta una corrutina y una cola, no un hilo. Los clientes que se
+reconectan envían Last-Event-ID y reciben los eventos que se perdieron.
+
+La tabla conserva los últimos RETENCION eventos: cada PODA_CADA eventos el
+proceso que publica borra los más antiguos, así que no crece aunque el
+concentrador no esté corriendo. El borrado ocurre después de confirmar la
+transacción que publica, en una conexión y transacción propias, para no
+alargar sus bloqueos ni hacerla fallar; como borra hasta un id fijo
+(id <= actual - RETENCION), repetirlo o hacerlo en desorden no cambia nada.
+
+Mensajes:
+    event: cambio     {"tipo", "id", "dashboard": {componente: incremento}}
+    event: counts     conteos vigentes (igual que /api/counts)
+
+Uso:
+    python eventos.py serve [puerto]   # por defecto EVENTS_PORT o 5001
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from urllib.parse import parse_qs, urlsplit
+from sqlalchemy import delete, event, or_, select
+from database import db
+from models import Evento
+import contadores
+
+EVENTS_PATH = '/api/events'
+POLL_INTERVAL = 0.5
+HEARTBEAT = 15
+QUEUE_SIZE = 256
+BATCH = 500
+# Events kept for clients that reconnect with Last-Event-ID
+RETENCION = 10000
+# The publish that gets an id multiple of this prunes the older events
+PODA_CADA = 1000
+# Seconds to wait for an id skipped by a transaction that commits late
+GAP_TIMEOUT = 10
+MAX_GAP = 1000
+
+_eventos = Evento.__table__
+# Session.info key with the id to prune up to once the transaction commits
+_PODA = 'eventos_poda'
+
+
+def publish(tipo, entidad=None, deltas=None):
+    """Record a change event for a new row inside the current transaction"""
+    entidad_id = None
+    if entidad is not None:
+        db.session.flush()  # Get the ID
+        entidad_id = entidad.id
+    datos = {k: float(v) for k, v in (deltas or {}).items()}
+    result = db.session.execute(_eventos.insert().values(
+        tipo=tipo, entidad_id=entidad_id, datos=json.dumps(datos) if datos else None
+    ))
+    evento_id = result.inserted_primary_key[0]
+    # Decided by the id, so one writer among all processes prunes each time
+    if evento_id % PODA_CADA == 0 and evento_id > RETENCION:
+        info = db.session.info
+        info[_PODA] = max(info.get(_PODA, 0), evento_id - RETENCION)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _prune_after_commit(session):
+    hasta = session.info.pop(_PODA, None)
+    if hasta is None:
+        return
+    try:
+        prune(hasta)
+    except Exception as e:
+        # The next publisher that gets a multiple of PODA_CADA prunes these too
+        print(f"⚠️  Error podando eventos: {e}")
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_prune(session):
+    session.info.pop(_PODA, None)
+
+
+def fetch_since(after_id, limit=BATCH, also_ids=()):
+    """Events after an id, plus specific older ids that were still uncommitted"""
+    criteria = _eventos.c.id > after_id
+    if also_ids:
+        criteria = or_(criteria, _eventos.c.id.in_(also_ids))
+    rows = db.session.execute(
+        select(_eventos.c.id, _eventos.c.tipo, _eventos.c.entidad_id, _eventos.c.datos)
+        .where(criteria).order_by(_eventos.c.id).limit(limit)
+    )
+    return [
+        {'event_id': row.id, 'tipo': row.tipo, 'id': row.entidad_id,
+         'dashboard': json.loads(row.datos) if row.datos else {}}
+        for row in rows
+    ]
+
+
+def last_event_id():
+    return db.session.execute(select(db.func.max(_eventos.c.id))).scalar() or 0
+
+
+def prune(upto_id):
+    """Delete the events up to an id in a separate connection and transaction"""
+    with db.engine.begin() as conn:
+        conn.execute(delete(_eventos).where(_eventos.c.id <= upto_id))
+
+
+def format_message(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {json.dumps(data, separators=(",", ":"))}']
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+def change_message(evento):
+    data = {'tipo': evento['tipo'], 'id': evento['id']}
+    if evento['dashboard']:
+        data['dashboard'] = evento['dashboard']
+    return format_message('cambio', data, evento['event_id'])
+
+
+class Hub:
+    """Poll the events table once per interval and fan out to every subscriber queue"""
+
+    def __init__(self, app, poll_interval=POLL_INTERVAL, queue_size=QUEUE_SIZE):
+        self.app = app
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.last_id = 0
+        self.counts = None
+        # Ids skipped while polling -> deadline: concurrent transactions can
+        # commit a lower id after a higher one became visible
+        self.gaps = {}
+
+    def _run(self, fn, *args):
+        with self.app.app_context():
+            try:
+                result = fn(*args)
+                db.session.commit()
+                return result
+            finally:
+                db.session.remove()
+
+    def _read_batch(self, after_id, gaps):
+        eventos = fetch_since(after_id, also_ids=gaps)
+        counts = contadores.get_counts() if eventos or self.counts is None else None
+        return eventos, counts
+
+    async def start(self):
+        self.last_id = await asyncio.to_thread(self._run, last_event_id)
+        asyncio.create_task(self.poll())
+
+    async def poll(self):
+        while True:
+            try:
+                eventos, counts = await asyncio.to_thread(
+                    self._run, self._read_batch, self.last_id, list(self.gaps)
+                )
+            except Exception as e:
+                print(f"⚠️  Error leyendo eventos: {e}")
+                eventos, counts = [], None
+            self.track_gaps(eventos)
+            for evento in eventos:
+                self.broadcast(change_message(evento))
+            if counts is not None:
+                self.counts = counts
+                if eventos:
+                    self.broadcast(format_message('counts', counts))
+
+            if len(eventos) < BATCH:
+                await asyncio.sleep(self.poll_interval)
+
+    def track_gaps(self, eventos):
+        ahora = time.monotonic()
+        for evento in eventos:
+            event_id = evento['event_id']
+            self.gaps.pop(event_id, None)
+            if event_id > self.last_id:
+                for missing in range(max(self.last_id + 1, event_id - MAX_GAP), event_id):
+                    self.gaps[missing] = ahora + GAP_TIMEOUT
+                self.last_id = event_id
+        # Ids that never show up belong to rolled back transactions
+        self.gaps = {i: limite for i, limite in self.gaps.items() if limite > ahora}
+
+    def broadcast(self, message):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too slow to keep up: disconnect it, it resumes with Last-Event-ID
+                self.subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def missed_since(self, after_id, until_id):
+        """Events a reconnecting client missed; later ones arrive through its queue"""
+        eventos = []
+        while after_id < until_id:
+            lote = await asyncio.to_thread(self._run, fetch_since, after_id)
+            lote = [e for e in lote if e['event_id'] <= until_id]
+            if not lote:
+                break
+            eventos += lote
+            after_id = lote[-1]['event_id']
+        return eventos
+
+    async def handle(self, reader, writer):
+        queue = None
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if len(request_line) < 2 or request_line[0] != 'GET' or urlsplit(request_line[1]).path != EVENTS_PATH:
+                writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+                await writer.drain()
+                return
+
+            query = parse_qs(urlsplit(request_line[1]).query)
+            last_seen = headers.get('last-event-id') or query.get('last_event_id', [''])[0]
+
+            queue = asyncio.Queue(self.queue_size)
+            self.subscribers.add(queue)
+            hasta = self.last_id
+            writer.write(
+                b'HTTP/1.1 200 OK\r\n'
+                b'Content-Type: text/event-stream\r\n'
+                b'Cache-Control: no-cache\r\n'
+                b'Connection: keep-alive\r\n'
+                b'Access-Control-Allow-Origin: *\r\n\r\n'
+                b'retry: 3000\n\n'
+            )
+            if last_seen.isdigit():
+                for evento in await self.missed_since(int(last_seen), hasta):
+                    writer.write(change_message(evento))
+            if self.counts is not None:
+                writer.write(format_message('counts', self.counts))
+            await writer.drain()
+
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), HEARTBEAT)
+                except asyncio.TimeoutError:
+                    message = b': ping\n\n'
+                if message is None:
+                    break
+                writer.write(message)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.subscribers.discard(queue)
+            writer.close()
+
+
+async def serve(app, host='0.0.0.0', port=5001):
+    hub = Hub(app)
+    await hub.start()
+    server = await asyncio.start_server(hub.handle, host, port, backlog=1024)
+    print(f"✅ Canal de eventos en http://{host}:{port}{EVENTS_PATH}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'serve':
+        print(__doc__)
+        sys.exit(2)
+    from app import app
+
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else int(os.getenv('EVENTS_PORT', 5001))
+    asyncio.run(serve(app, port=port))
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Exportación columnar del libro contable y de las facturas para análisis
+
+Escribe cada conjunto de datos en archivos particionados por año y mes
+(destino/<conjunto>/anio=2024/mes=01/part-....parquet), legibles con
+pyarrow.dataset, pandas, DuckDB o Spark. Los importes se guardan como
+decimal exacto (decimal128 con la precisión y escala de la columna), no como
+float.
+
+Conjuntos:
+    movimientos   MovimientoContable con los datos de su AsientoContable
+    ventas        DetalleFacturaVenta con los datos de su FacturaVenta
+    compras       DetalleFacturaCompra con los datos de su FacturaCompra
+
+Cada ejecución es incremental: exporta solo los renglones con id mayor que
+la marca guardada en destino/<conjunto>/_watermark.json y agrega archivos
+nuevos sin reescribir los anteriores. La consulta se lee con un cursor del
+lado del servidor y los renglones se escriben en bloques de FILE_ROWS, así
+que la memoria no depende del tamaño de la exportación.
+
+Formatos: parquet (requiere pyarrow) o csv (importes como texto exacto).
+
+Uso:
+    python exportacion.py [movimientos|ventas|compras|todo] [--destino DIR]
+                          [--formato parquet|csv] [--completo]
+"""
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import select
+from database import create_app, db
+from models import (AsientoContable, DetalleFacturaCompra, DetalleFacturaVenta, FacturaCompra,
+                    FacturaVenta, MovimientoContable)
+
+# Rows buffered (across all partitions) before they are written out
+FILE_ROWS = 100000
+STREAM_BATCH = 5000
+FORMATOS = ('parquet', 'csv')
+WATERMARK = '_watermark.json'
+
+CONJUNTOS = {
+    'movimientos': {
+        'id': MovimientoContable.id,
+        'columnas': [
+            MovimientoContable.id,
+            MovimientoContable.asiento_id,
+            AsientoContable.folio,
+            AsientoContable.fecha,
+            AsientoContable.estado,
+            AsientoContable.concepto.label('concepto_asiento'),
+            MovimientoContable.cuenta,
+            MovimientoContable.debe,
+            MovimientoContable.haber,
+            MovimientoContable.concepto
+        ],
+        'join': (AsientoContable, MovimientoContable.asiento_id == AsientoContable.id)
+    },
+    'ventas': {
+        'id': DetalleFacturaVenta.id,
+        'columnas': [
+            DetalleFacturaVenta.id,
+            DetalleFacturaVenta.factura_venta_id.label('factura_id'),
+            FacturaVenta.folio,
+            FacturaVenta.fecha,
+            FacturaVenta.cliente_id,
+            FacturaVenta.estado,
+            DetalleFacturaVenta.articulo_id,
+            DetalleFacturaVenta.cantidad,
+            DetalleFacturaVenta.precio_unitario,
+            DetalleFacturaVenta.subtotal,
+            FacturaVenta.subtotal.label('factura_subtotal'),
+            FacturaVenta.iva.label('factura_iva'),
+            FacturaVenta.total.label('factura_total')
+        ],
+        'join': (FacturaVenta, DetalleFacturaVenta.factura_venta_id == FacturaVenta.id)
+    },
+    'compras': {
+        'id': DetalleFacturaCompra.id,
+        'columnas': [
+            DetalleFacturaCompra.id,
+            DetalleFacturaCompra.factura_compra_id.label('factura_id'),
+            FacturaCompra.folio,
+            FacturaCompra.fecha,
+            FacturaCompra.proveedor_id,
+            FacturaCompra.estado,
+            DetalleFacturaCompra.articulo_id,
+            DetalleFacturaCompra.cantidad,
+            DetalleFacturaCompra.precio_unitario,
+            DetalleFacturaCompra.subtotal,
+            FacturaCompra.subtotal.label('factura_subtotal'),
+            FacturaCompra.iva.label('factura_iva'),
+            FacturaCompra.total.label('factura_total')
+        ],
+        'join': (FacturaCompra, DetalleFacturaCompra.factura_compra_id == FacturaCompra.id)
+    },
+}
+
+
+def export_dir():
+    return os.getenv('EXPORT_DIR', 'exportaciones')
+
+
+def read_watermark(carpeta):
+    try:
+        with open(os.path.join(carpeta, WATERMARK)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_watermark(carpeta, marca):
+    tmp = os.path.join(carpeta, WATERMARK + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(marca, f, indent=2)
+    os.replace(tmp, os.path.join(carpeta, WATERMARK))
+
+
+def _arrow_type(pa, column):
+    python_type = column.type.python_type
+    if python_type is int:
+        return pa.int64()
+    if python_type is Decimal:
+        return pa.decimal128(column.type.precision, column.type.scale)
+    if python_type is datetime:
+        return pa.timestamp('us')
+    if python_type is date:
+        return pa.date32()
+    return pa.string()
+
+
+class ParquetWriter:
+    extension = 'parquet'
+
+    def __init__(self, columnas):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError('El formato parquet requiere pyarrow (pip install pyarrow); usa --formato csv')
+        self.pa = pa
+        self.pq = pq
+        self.schema = pa.schema([(column.key, _arrow_type(pa, column)) for column in columnas])
+
+    def write(self, path, rows):
+        columns = list(zip(*rows))
+        table = self.pa.Table.from_arrays(
+            [self.pa.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+            schema=self.schema
+        )
+        self.pq.write_table(table, path, compression='zstd')
+
+
+class CsvWriter:
+    extension = 'csv'
+
+    def __init__(self, columnas):
+        self.header = [column.key for column in columnas]
+
+    def write(self, path, rows):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.header)
+            # Decimal and date render exactly through str()
+            writer.writerows(rows)
+
+
+WRITERS = {'parquet': ParquetWriter, 'csv': CsvWriter}
+
+
+def _partition(fecha):
+    return os.path.join(f'anio={fecha.year}', f'mes={fecha.month:02d}')
+
+
+def export(nombre, destino=None, formato='parquet', completo=False, progress=None):
+    """Append the rows added since the last watermark, returns a summary"""
+    conjunto = CONJUNTOS[nombre]
+    carpeta = os.path.join(destino or export_dir(), nombre)
+    if completo and os.path.isdir(carpeta):
+        shutil.rmtree(carpeta)
+    os.makedirs(carpeta, exist_ok=True)
+
+    marca = read_watermark(carpeta) or {'ultimo_id': 0, 'formato': formato, 'filas': 0, 'archivos': 0}
+    if marca['formato'] != formato:
+        raise ValueError(f"{nombre} ya se exportó en formato {marca['formato']}; usa --completo para cambiarlo")
+    writer = WRITERS[formato](conjunto['columnas'])
+
+    id_column = conjunto['id']
+    desde = marca['ultimo_id']
+    # Fixed upper bound: rows inserted while exporting wait for the next run
+    hasta = db.session.execute(select(db.func.max(id_column))).scalar() or 0
+    prefijo = f'part-{desde + 1:010d}-'
+    _remove_leftovers(carpeta, prefijo)
+
+    fecha_index = [column.key for column in conjunto['columnas']].index('fecha')
+    query = (
+        select(*conjunto['columnas'])
+        .join(*conjunto['join'])
+        .where(id_column > desde, id_column <= hasta)
+        .order_by(id_column)
+        .execution_options(yield_per=STREAM_BATCH)
+    )
+
+    buffers, buffered = {}, 0
+    filas = archivos = 0
+    lote = 0
+
+    def flush():
+        nonlocal archivos, lote
+        for particion, rows in buffers.items():
+            os.makedirs(os.path.join(carpeta, particion), exist_ok=True)
+            path = os.path.join(carpeta, particion, f'{prefijo}{lote:05d}.{writer.extension}')
+            writer.write(path + '.tmp', rows)
+            os.replace(path + '.tmp', path)
+            archivos += 1
+        buffers.clear()
+        lote += 1
+
+    for row in db.session.execute(query):
+        buffers.setdefault(_partition(row[fecha_index]), []).append(tuple(row))
+        buffered += 1
+        filas += 1
+        if buffered >= FILE_ROWS:
+            flush()
+            buffered = 0
+            if progress:
+                progress(filas)
+    if buffers:
+        flush()
+
+    marca = {
+        'ultimo_id': max(desde, hasta),
+        'formato': formato,
+        'filas': marca['filas'] + filas,
+        'archivos': marca['archivos'] + archivos,
+        'actualizado': datetime.utcnow().isoformat()
+    }
+    write_watermark(carpeta, marca)
+    return {'conjunto': nombre, 'filas': filas, 'archivos': archivos, 'desde': desde, 'hasta': marca['ultimo_id']}
+
+
+def _remove_leftovers(carpeta, prefijo):
+    """Delete files of a previous run from the same watermark that did not finish"""
+    for raiz, _, nombres in os.walk(carpeta):
+        for archivo in nombres:
+            if archivo.startswith(prefijo):
+                os.remove(os.path.join(raiz, archivo))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Exportación columnar incremental')
+    parser.add_argument('conjunto', nargs='?', default='todo', choices=list(CONJUNTOS) + ['todo'])
+    parser.add_argument('--destino', default=None, help='Carpeta de salida (EXPORT_DIR por defecto)')
+    parser.add_argument('--formato', default='parquet', choices=FORMATOS)
+    parser.add_argument('--completo', action='store_true', help='Borra la exportación previa y exporta todo')
+    args = parser.parse_args()
+
+    nombres = list(CONJUNTOS) if args.conjunto == 'todo' else [args.conjunto]
+    app = create_app()
+    with app.app_context():
+        for nombre in nombres:
+            try:
+                resumen = export(
+                    nombre, args.destino, args.formato, args.completo,
+                    progress=lambda filas: print(f"   {nombre}: {filas} renglones...")
+                )
+            except (RuntimeError, ValueError) as e:
+                print(f"⚠️  {e}")
+                sys.exit(1)
+            print(f"✅ {nombre}: {resumen['filas']} renglones en {resumen['archivos']} archivos "
+                  f"(ids {resumen['desde'] + 1}-{resumen['hasta']})")
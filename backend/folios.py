@@ -0,0 +1,66 @@
+"""
+Asignación de folios consecutivos por prefijo y día
+
+Cada combinación (prefijo, día) tiene un contador en la tabla folio_secuencias.
+Los folios se reservan con un solo INSERT ... ON DUPLICATE KEY UPDATE
+ultimo = ultimo + n (ON CONFLICT en SQLite) dentro de la misma transacción
+que crea el documento: el primer folio del día crea el renglón y los demás lo
+incrementan, así que dos solicitudes concurrentes nunca obtienen el mismo
+folio, ni siquiera el primero del día, sin reintentos ni interbloqueos entre
+un UPDATE fallido y un INSERT. No quedan huecos si la transacción se
+revierte.
+"""
+
+from datetime import datetime
+from sqlalchemy import select
+from database import db
+from models import FolioSecuencia
+import upsert
+
+_secuencias = FolioSecuencia.__table__
+
+# (prefix, day) counters known to exist; rows are never deleted
+_existentes = set()
+
+
+def format_folio(prefix, day, number):
+    """Build the folio string for a prefix, day (YYYYMMDD) and consecutive"""
+    return f'{prefix}{day}{number:03d}'
+
+
+def _legacy_count(prefix, day, model_class):
+    """Count folios issued before the sequence row existed (old LIKE scheme)"""
+    if model_class is None:
+        return 0
+    return db.session.query(db.func.count(model_class.id)).filter(
+        model_class.folio.like(f'{prefix}{day}%')
+    ).scalar() or 0
+
+
+def _advance(prefix, day, count, model_class):
+    """Atomically move the (prefix, day) counter forward, returns the last number"""
+    key = (_secuencias.c.prefijo == prefix) & (_secuencias.c.dia == day)
+    initial = None
+    if (prefix, day) not in _existentes:
+        if db.session.execute(select(_secuencias.c.ultimo).where(key)).first() is None:
+            # First folio of the day for this prefix: a new counter row starts
+            # after whatever the previous LIKE-based scheme already issued
+            initial = {'ultimo': _legacy_count(prefix, day, model_class) + count}
+        else:
+            _existentes.add((prefix, day))
+    upsert.increment(_secuencias, ('prefijo', 'dia'), {'prefijo': prefix, 'dia': day, 'ultimo': count}, initial)
+    return db.session.execute(select(_secuencias.c.ultimo).where(key)).scalar_one()
+
+
+def reserve_folios(prefix, model_class=None, count=1):
+    """Reserve a block of consecutive folios for today and return them in order"""
+    if count < 1:
+        return []
+    day = datetime.now().strftime('%Y%m%d')
+    last = _advance(prefix, day, count, model_class)
+    return [format_folio(prefix, day, n) for n in range(last - count + 1, last + 1)]
+
+
+def generate_folio(prefix, model_class=None):
+    """Generate unique folio for invoices, receipts, etc."""
+    return reserve_folios(prefix, model_class, 1)[0]
@@ -0,0 +1,58 @@
+"""
+Configuración de gunicorn para producción
+
+Uso (desde la raíz del proyecto):
+    gunicorn -c backend/gunicorn.conf.py wsgi:app
+
+Todos los valores se pueden ajustar con variables de entorno. Cada worker
+abre su propio pool de conexiones (DB_POOL_SIZE + DB_MAX_OVERFLOW), así que
+workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) no debe superar max_connections
+de MySQL. Con hilos, DB_POOL_SIZE debe ser al menos GUNICORN_THREADS.
+"""
+
+import multiprocessing
+import os
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+# The app is imported in each worker so no database connection is shared across fork
+preload_app = False
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+# Per-worker request metrics are summed from METRICS_DIR (see metricas.py)
+metrics_dir = os.getenv('METRICS_DIR')
+
+
+def on_starting(server):
+    if metrics_dir:
+        import metricas
+        metricas.reset_dir(metrics_dir)
+
+
+def worker_exit(server, worker):
+    if metrics_dir:
+        import metricas
+        metricas.save_process(metrics_dir)
+
+
+def child_exit(server, worker):
+    # Keep the counts of a recycled worker (max_requests) in the aggregate
+    if metrics_dir:
+        import metricas
+        metricas.archive_worker(metrics_dir, worker.pid)
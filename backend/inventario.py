@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Movimientos de inventario con existencias y valuación mantenidas
+
+Cada renglón de una factura de compra genera una Entrada y cada renglón de
+una factura de venta una Salida en movimientos_inventario (las facturas
+canceladas no mueven inventario). En la misma transacción que la factura:
+
+1. Los artículos tocados se bloquean con un solo SELECT ... FOR UPDATE
+   (en orden de id) antes de insertar los detalles, cuya llave foránea
+   tomaría un bloqueo compartido sobre el mismo renglón.
+2. Se calcula el costo promedio ponderado de cada movimiento: una entrada
+   promedia su costo con la existencia; una salida sale al costo promedio
+   vigente y no lo cambia. Una salida que dejaría la existencia bajo cero se
+   rechaza (ExistenciaInsuficiente) y con ella toda la factura.
+3. Los movimientos se insertan con una inserción múltiple y los artículos se
+   actualizan con un solo UPDATE por llave ejecutado por lotes
+   (stock_actual = stock_actual + :cantidad, valor_inventario =
+   valor_inventario + :importe).
+
+Así stock_actual, costo_promedio y valor_inventario siempre están al día: el
+valor del inventario se lee del dashboard (incremento por movimiento) o del
+artículo sin recorrer la tabla, y la columna bajo_stock (stock_actual <
+stock_minimo) tiene su propio índice para consultar los artículos por surtir.
+
+Uso:
+    python inventario.py [--reparar]   # compara existencias con la suma de movimientos
+"""
+
+import sys
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from sqlalchemy import bindparam, insert, select, update
+from database import db
+from models import ArticuloInventario, MovimientoInventario
+
+CENTAVO = Decimal('0.01')
+DIEZMILESIMO = Decimal('0.0001')
+
+# Stock direction and movement type of each invoice kind
+FACTURAS = {
+    'venta': ('Salida', -1, 'factura_venta'),
+    'compra': ('Entrada', 1, 'factura_compra'),
+}
+ESTADOS_SIN_MOVIMIENTO = ('Cancelada',)
+
+_articulos = ArticuloInventario.__table__
+_movimientos = MovimientoInventario.__table__
+
+_update_articulo = (
+    update(_articulos)
+    .where(_articulos.c.id == bindparam('b_id'))
+    .values(
+        stock_actual=db.func.coalesce(_articulos.c.stock_actual, 0) + bindparam('b_cantidad'),
+        valor_inventario=_articulos.c.valor_inventario + bindparam('b_importe'),
+        costo_promedio=bindparam('b_costo'),
+        bajo_stock=bindparam('b_bajo_stock')
+    )
+)
+
+
+class MovimientoInvalido(ValueError):
+    """An invoice line cannot move the stock; the route answers 400"""
+
+
+class ArticuloInexistente(MovimientoInvalido):
+    """A movement references an article that does not exist"""
+
+
+class ExistenciaInsuficiente(MovimientoInvalido):
+    """A sale would take an article's stock below zero"""
+
+
+class CantidadInvalida(MovimientoInvalido):
+    """A detail line quantity is not a whole number greater than zero"""
+
+
+def _money(value):
+    return Decimal(value).quantize(CENTAVO, ROUND_HALF_UP)
+
+
+def _cost(value):
+    return Decimal(value).quantize(DIEZMILESIMO, ROUND_HALF_UP)
+
+
+def whole_quantity(value):
+    """A detail line quantity as an int, raises CantidadInvalida"""
+    try:
+        cantidad = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise CantidadInvalida(f'Cantidad inválida: {value}')
+    # Stock is kept in whole units: 2.5 is rejected instead of truncated to 2
+    if not cantidad.is_finite() or cantidad != cantidad.to_integral_value():
+        raise CantidadInvalida(f'La cantidad debe ser un número entero: {value}')
+    if cantidad <= 0:
+        raise CantidadInvalida('La cantidad debe ser mayor que cero')
+    return int(cantidad)
+
+
+def invoice_lines(tipo, factura_id, fecha, estado, detalles):
+    """Stock movements for the detail lines of one invoice, raises CantidadInvalida"""
+    # Checked for cancelled invoices too: their details are stored all the same
+    cantidades = [whole_quantity(detalle['cantidad']) for detalle in detalles]
+    if estado in ESTADOS_SIN_MOVIMIENTO:
+        return []
+    movimiento, signo, origen = FACTURAS[tipo]
+    return [
+        {
+            'articulo_id': int(detalle['articulo_id']),
+            'cantidad': signo * cantidad,
+            'costo': Decimal(str(detalle['precio_unitario'])),
+            'tipo': movimiento,
+            'fecha': fecha,
+            'origen': origen,
+            'documento_id': factura_id
+        }
+        for detalle, cantidad in zip(detalles, cantidades)
+    ]
+
+
+def _lock(articulo_ids):
+    rows = db.session.execute(
+        select(
+            _articulos.c.id, _articulos.c.stock_actual, _articulos.c.stock_minimo,
+            _articulos.c.costo_promedio, _articulos.c.valor_inventario
+        )
+        .where(_articulos.c.id.in_(sorted(articulo_ids)))
+        .order_by(_articulos.c.id)
+        .with_for_update()
+    )
+    return {
+        row.id: {
+            'stock': row.stock_actual or 0,
+            'minimo': row.stock_minimo or 0,
+            'costo': Decimal(str(row.costo_promedio or 0)),
+            'valor': Decimal(str(row.valor_inventario or 0))
+        }
+        for row in rows
+    }
+
+
+def _apply(estado, cantidad, costo_entrada):
+    """Move one article state by a signed quantity, returns (unit cost, valuation change)"""
+    stock, costo, valor = estado['stock'], estado['costo'], estado['valor']
+    nuevo_stock = stock + cantidad
+    if cantidad > 0 and stock > 0:
+        # Weighted average of what is on hand and what comes in
+        nuevo_valor = valor + _money(cantidad * costo_entrada)
+        nuevo_costo = _cost(nuevo_valor / nuevo_stock)
+        unitario = costo_entrada
+    elif cantidad > 0:
+        # Nothing valued on hand: the incoming cost becomes the average
+        nuevo_costo = _cost(costo_entrada)
+        nuevo_valor = _money(nuevo_stock * nuevo_costo)
+        unitario = costo_entrada
+    else:
+        # Exits leave at the current average cost
+        nuevo_costo = costo
+        nuevo_valor = Decimal('0') if nuevo_stock == 0 else valor + _money(cantidad * costo)
+        unitario = costo
+    estado.update(stock=nuevo_stock, costo=nuevo_costo, valor=nuevo_valor)
+    return unitario, nuevo_valor - valor
+
+
+def post_movements(lineas):
+    """Record stock movements and update the articles atomically, returns the inventory value change"""
+    if not lineas:
+        return Decimal('0')
+    estados = _lock({linea['articulo_id'] for linea in lineas})
+    faltantes = sorted({linea['articulo_id'] for linea in lineas} - set(estados))
+    if faltantes:
+        raise ArticuloInexistente(f"Artículos inexistentes: {', '.join(map(str, faltantes))}")
+
+    movimientos = []
+    cambios = {}
+    ahora = datetime.utcnow()
+    for linea in lineas:
+        estado = estados[linea['articulo_id']]
+        if linea['cantidad'] < 0 and estado['stock'] + linea['cantidad'] < 0:
+            raise ExistenciaInsuficiente(
+                f"Existencia insuficiente del artículo {linea['articulo_id']}: "
+                f"hay {estado['stock']}, se piden {-linea['cantidad']}"
+            )
+        unitario, importe = _apply(estado, linea['cantidad'], linea['costo'])
+        movimientos.append({
+            'articulo_id': linea['articulo_id'],
+            'fecha': linea['fecha'],
+            'tipo': linea['tipo'],
+            'cantidad': linea['cantidad'],
+            'costo_unitario': unitario,
+            'importe': importe,
+            'existencia': estado['stock'],
+            'origen': linea['origen'],
+            'documento_id': linea['documento_id'],
+            'fecha_creacion': ahora
+        })
+        cambio = cambios.setdefault(linea['articulo_id'], {'b_cantidad': 0, 'b_importe': Decimal('0')})
+        cambio['b_cantidad'] += linea['cantidad']
+        cambio['b_importe'] += importe
+
+    db.session.execute(insert(_movimientos), movimientos)
+    db.session.execute(_update_articulo, [
+        dict(cambio, b_id=articulo_id, b_costo=estados[articulo_id]['costo'],
+             b_bajo_stock=estados[articulo_id]['stock'] < estados[articulo_id]['minimo'])
+        for articulo_id, cambio in cambios.items()
+    ])
+    return sum(cambio['b_importe'] for cambio in cambios.values())
+
+
+def opening_values(precio_compra, stock_actual, stock_minimo):
+    """Valuation columns of a new article with its opening stock"""
+    costo = _cost(precio_compra or 0)
+    stock = stock_actual or 0
+    return {
+        'costo_promedio': costo,
+        'valor_inventario': _money(stock * costo),
+        'bajo_stock': stock < (stock_minimo or 0)
+    }
+
+
+def record_opening(articulo):
+    """Opening movement of an article created with stock (after it is flushed)"""
+    if articulo.stock_actual:
+        db.session.execute(insert(_movimientos).values(
+            articulo_id=articulo.id,
+            fecha=date.today(),
+            tipo='Inicial',
+            cantidad=articulo.stock_actual,
+            costo_unitario=articulo.costo_promedio,
+            importe=articulo.valor_inventario,
+            existencia=articulo.stock_actual,
+            origen='inicial',
+            fecha_creacion=datetime.utcnow()
+        ))
+
+
+def open_balances(executor=None):
+    """Value the articles that have no movements yet at precio_compra and record their opening stock"""
+    executor = executor if executor is not None else db.session
+    sin_movimientos = _articulos.c.id.notin_(select(_movimientos.c.articulo_id).distinct())
+    stock = db.func.coalesce(_articulos.c.stock_actual, 0)
+    costo = db.func.coalesce(_articulos.c.precio_compra, 0)
+    executor.execute(update(_articulos).where(sin_movimientos).values(
+        costo_promedio=costo,
+        valor_inventario=stock * costo,
+        bajo_stock=stock < db.func.coalesce(_articulos.c.stock_minimo, 0)
+    ))
+    columnas = ('articulo_id', 'fecha', 'tipo', 'cantidad', 'costo_unitario', 'importe', 'existencia',
+                'origen', 'fecha_creacion')
+    return executor.execute(insert(_movimientos).from_select(columnas, select(
+        _articulos.c.id,
+        db.literal(date.today()),
+        db.literal('Inicial'),
+        stock,
+        _articulos.c.costo_promedio,
+        _articulos.c.valor_inventario,
+        stock,
+        db.literal('inicial'),
+        db.literal(datetime.utcnow())
+    ).where(sin_movimientos, stock != 0))).rowcount
+
+
+def check_consistency():
+    """Articles whose stock differs from the sum of their movements, returns the differences"""
+    movido = (
+        select(_movimientos.c.articulo_id, db.func.sum(_movimientos.c.cantidad).label('cantidad'))
+        .group_by(_movimientos.c.articulo_id).subquery()
+    )
+    rows = db.session.execute(
+        select(_articulos.c.id, _articulos.c.stock_actual, db.func.coalesce(movido.c.cantidad, 0))
+        .outerjoin(movido, movido.c.articulo_id == _articulos.c.id)
+        .where(db.func.coalesce(_articulos.c.stock_actual, 0) != db.func.coalesce(movido.c.cantidad, 0))
+    )
+    return {articulo_id: {'stock_actual': stock, 'movimientos': int(cantidad)} for articulo_id, stock, cantidad in rows}
+
+
+if __name__ == '__main__':
+    from app import app
+
+    with app.app_context():
+        diferencias = check_consistency()
+        if not diferencias:
+            print("✅ Las existencias coinciden con los movimientos de inventario")
+        else:
+            for articulo_id, valores in diferencias.items():
+                print(f"⚠️  artículo {articulo_id}: stock_actual={valores['stock_actual']} "
+                      f"movimientos={valores['movimientos']}")
+            if '--reparar' in sys.argv:
+                for articulo_id, valores in diferencias.items():
+                    db.session.execute(update(_articulos).where(_articulos.c.id == articulo_id).values(
+                        stock_actual=valores['movimientos'],
+                        bajo_stock=db.literal(valores['movimientos']) < db.func.coalesce(_articulos.c.stock_minimo, 0)
+                    ))
+                db.session.commit()
+                print("✅ Existencias corregidas")
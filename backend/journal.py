@@ -0,0 +1,234 @@
+"""
+Consulta por lotes de asientos contables y sus movimientos
+
+Una página de asientos se obtiene con dos consultas: los asientos de la página
+(ordenados por anio, mes, fecha e id descendentes) y todos sus movimientos
+con un solo IN. Los renglones se agrupan en Python sin materializar objetos
+del ORM. El cursor de paginación codifica la llave de orden completa del
+último asiento devuelto.
+
+Para exportaciones completas, stream_entries() recorre un solo JOIN ordenado
+con un cursor del lado del servidor y arma cada asiento al cambiar de id.
+
+count_entries() devuelve el conteo y, si se piden, los asientos por estado
+(TOTALES) en la misma sentencia.
+"""
+
+from datetime import date
+from sqlalchemy import select, tuple_
+from database import db
+from listing import STREAM_BATCH, ListError, count_where, matches_any
+from models import AsientoContable, MovimientoContable
+
+ENTRY_COLUMNS = (
+    AsientoContable.id,
+    AsientoContable.folio,
+    AsientoContable.fecha,
+    AsientoContable.mes,
+    AsientoContable.anio,
+    AsientoContable.concepto,
+    AsientoContable.total_debe,
+    AsientoContable.total_haber,
+    AsientoContable.estado,
+    AsientoContable.fecha_creacion,
+)
+
+MOVEMENT_COLUMNS = (
+    MovimientoContable.id,
+    MovimientoContable.asiento_id,
+    MovimientoContable.cuenta,
+    MovimientoContable.debe,
+    MovimientoContable.haber,
+    MovimientoContable.concepto,
+)
+
+
+# Per-state counts served with ?totales=1
+TOTALES = {
+    'aplicados': 'Aplicado',
+    'borradores': 'Borrador',
+    'cancelados': 'Cancelado',
+}
+
+
+# Automatic entries generated by invoices
+def sale_movements(cliente_id, subtotal, iva, total):
+    """Movements of the journal entry for a sales invoice"""
+    return [
+        {
+            'cuenta': 'Cuentas por Cobrar',
+            'debe': total,
+            'haber': 0,
+            'concepto': f'Cobro pendiente - Cliente ID: {cliente_id}'
+        },
+        {
+            'cuenta': 'Ventas',
+            'debe': 0,
+            'haber': subtotal,
+            'concepto': 'Venta de productos'
+        },
+        {
+            'cuenta': 'IVA por Pagar',
+            'debe': 0,
+            'haber': iva,
+            'concepto': 'IVA de venta'
+        }
+    ]
+
+
+def purchase_movements(proveedor_id, subtotal, iva, total):
+    """Movements of the journal entry for a purchase invoice"""
+    return [
+        {
+            'cuenta': 'Compras',
+            'debe': subtotal,
+            'haber': 0,
+            'concepto': 'Compra de productos'
+        },
+        {
+            'cuenta': 'IVA Acreditable',
+            'debe': iva,
+            'haber': 0,
+            'concepto': 'IVA de compra'
+        },
+        {
+            'cuenta': 'Cuentas por Pagar',
+            'debe': 0,
+            'haber': total,
+            'concepto': f'Pago pendiente - Proveedor ID: {proveedor_id}'
+        }
+    ]
+
+
+SORT_KEY = (AsientoContable.anio, AsientoContable.mes, AsientoContable.fecha, AsientoContable.id)
+
+
+def encode_cursor(row):
+    return f'{row.anio}:{row.mes}:{row.fecha.isoformat()}:{row.id}'
+
+
+def decode_cursor(raw):
+    try:
+        anio, mes, fecha, asiento_id = raw.split(':')
+        return int(anio), int(mes), date.fromisoformat(fecha), int(asiento_id)
+    except ValueError:
+        raise ListError(f'Cursor inválido: {raw}')
+
+
+def period_criteria(mes=None, anio=None, q=None):
+    criteria = []
+    if mes:
+        criteria.append(AsientoContable.mes == mes)
+    if anio:
+        criteria.append(AsientoContable.anio == anio)
+    if q:
+        criteria.append(matches_any((AsientoContable.folio, AsientoContable.concepto), q))
+    return criteria
+
+
+def serialize_movement(row):
+    return {
+        'id': row.id,
+        'cuenta': row.cuenta,
+        'debe': float(row.debe),
+        'haber': float(row.haber),
+        'concepto': row.concepto
+    }
+
+
+def serialize_entry(row, movimientos):
+    return {
+        'id': row.id,
+        'folio': row.folio,
+        'fecha': row.fecha.isoformat(),
+        'mes': row.mes,
+        'anio': row.anio,
+        'concepto': row.concepto,
+        'total_debe': float(row.total_debe),
+        'total_haber': float(row.total_haber),
+        'estado': row.estado,
+        'fecha_creacion': row.fecha_creacion.isoformat(),
+        'movimientos': movimientos
+    }
+
+
+def movements_by_entry(asiento_ids):
+    """Fetch the movements of many entries in one query, grouped by asiento_id"""
+    grouped = {asiento_id: [] for asiento_id in asiento_ids}
+    if not asiento_ids:
+        return grouped
+    rows = db.session.execute(
+        select(*MOVEMENT_COLUMNS)
+        .where(MovimientoContable.asiento_id.in_(asiento_ids))
+        .order_by(MovimientoContable.asiento_id, MovimientoContable.id)
+    )
+    for row in rows:
+        grouped[row.asiento_id].append(serialize_movement(row))
+    return grouped
+
+
+def fetch_entries(criteria, after=None, limit=None):
+    """Return one page of serialized entries and the cursor of the next page"""
+    query = select(*ENTRY_COLUMNS).where(*criteria)
+    if after:
+        query = query.where(tuple_(*SORT_KEY) < tuple_(*decode_cursor(after)))
+    query = query.order_by(*(column.desc() for column in SORT_KEY))
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    rows = db.session.execute(query).all()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+
+    movimientos = movements_by_entry([row.id for row in rows])
+    return [serialize_entry(row, movimientos[row.id]) for row in rows], next_cursor
+
+
+def count_entries(criteria, totales=False):
+    """Return the number of matching entries and, with totales, their counts per state"""
+    columns = [db.func.count(AsientoContable.id)]
+    if totales:
+        columns += [count_where(AsientoContable.estado == estado) for estado in TOTALES.values()]
+    total, *conteos = db.session.execute(select(*columns).where(*criteria)).one()
+    return total, (dict(zip(TOTALES, map(int, conteos))) if totales else None)
+
+
+def listing_totals(asientos):
+    """Per-state counts of an already serialized listing, as count_entries computes them"""
+    return {name: sum(1 for asiento in asientos if asiento['estado'] == estado) for name, estado in TOTALES.items()}
+
+
+def stream_entries(criteria, after=None):
+    """Iterate every matching entry with its movements from one ordered join"""
+    query = (
+        select(*ENTRY_COLUMNS, *(column.label(f'mov_{column.key}') for column in MOVEMENT_COLUMNS))
+        .select_from(AsientoContable)
+        .outerjoin(MovimientoContable, MovimientoContable.asiento_id == AsientoContable.id)
+        .where(*criteria)
+    )
+    if after:
+        query = query.where(tuple_(*SORT_KEY) < tuple_(*decode_cursor(after)))
+    query = query.order_by(
+        *(column.desc() for column in SORT_KEY), MovimientoContable.id
+    ).execution_options(yield_per=STREAM_BATCH)
+
+    def entries():
+        current, movimientos = None, []
+        for row in db.session.execute(query):
+            if current is None or row.id != current.id:
+                if current is not None:
+                    yield serialize_entry(current, movimientos)
+                current, movimientos = row, []
+            if row.mov_id is not None:
+                movimientos.append({
+                    'id': row.mov_id,
+                    'cuenta': row.mov_cuenta,
+                    'debe': float(row.mov_debe),
+                    'haber': float(row.mov_haber),
+                    'concepto': row.mov_concepto
+                })
+        if current is not None:
+            yield serialize_entry(current, movimientos)
+    return entries()
@@ -0,0 +1,318 @@
+"""
+Motor compartido para los listados GET
+
+Cada listado se describe con un ListSpec: los campos que puede devolver (como
+expresiones SQL, para seleccionar solo las columnas pedidas), los JOIN que
+esos campos necesitan y los filtros tipados que acepta. paginate() aplica
+paginación por cursor sobre el id (?after=<id>&limit=), proyección
+(?fields=), filtros, búsqueda por texto (?q=, una subcadena en cualquiera de
+las columnas que declara search()) y conteo opcional (?count=1). Con
+?totales=1 la misma sentencia del conteo calcula también los totales que
+declara el ListSpec (sumas y conteos por estado sobre todo el filtro, no
+solo la página), que viajan como JSON en el encabezado X-Totals.
+
+El cuerpo de la respuesta sigue siendo un arreglo JSON; el cursor de la
+siguiente página viaja en los encabezados X-Next-Cursor y Link.
+
+Con ?stream=1 o Accept: application/x-ndjson el listado completo se envía en
+partes conforme se lee de un cursor del lado del servidor, sin construir la
+lista en memoria: NDJSON (un objeto por línea) o un arreglo JSON fragmentado.
+"""
+
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+from flask import Response, jsonify, request, stream_with_context
+from sqlalchemy import or_, select
+from database import db
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+# Rows fetched per round trip from the server-side cursor when streaming
+STREAM_BATCH = 1000
+
+NDJSON = 'application/x-ndjson'
+
+# SQL statements a list request may issue: the page plus the optional count
+LIST_QUERY_BUDGET = 2
+
+# Headers the React client needs to read across origins
+EXPOSED_HEADERS = ['X-Next-Cursor', 'X-Total-Count', 'X-Totals', 'Link']
+
+
+class ListError(ValueError):
+    """Invalid listing parameter, reported to the client as HTTP 400"""
+
+
+# Formatters applied to raw column values
+def as_float(value):
+    return float(value) if value is not None else None
+
+
+def as_float_if_set(value):
+    return float(value) if value else None
+
+
+def as_iso(value):
+    return value.isoformat() if value else None
+
+
+def as_is(value):
+    return value
+
+
+# Parsers for typed filters
+def parse_int(raw):
+    return int(raw)
+
+
+def parse_date(raw):
+    return datetime.strptime(raw, '%Y-%m-%d').date()
+
+
+def parse_bool(raw):
+    return raw.lower() in ('1', 'true', 'si', 'sí')
+
+
+def parse_str(raw):
+    return raw
+
+
+class ListSpec:
+    """Declarative description of a list endpoint"""
+
+    def __init__(self, model, fields, joins=(), filters=None, totals=None):
+        # fields: name -> (SQL expression, formatter)
+        self.model = model
+        self.fields = fields
+        self.joins = joins
+        # filters: query param -> (SQL expression, parser, comparison)
+        self.filters = filters or {}
+        # totals: name -> (SQL aggregate, formatter), served with ?totales=1
+        self.totals = totals or {}
+        # Filters over joined columns: the aggregate query needs the joins only for these
+        self.joined_filters = set()
+        for param, (column, _, _) in self.filters.items():
+            columns = column if isinstance(column, tuple) else (column,)
+            if any(c.expression.table is not model.__table__ for c in columns):
+                self.joined_filters.add(param)
+
+    def columns(self, names):
+        return [self.fields[name][0].label(name) for name in names]
+
+    def base_query(self, names):
+        query = select(*self.columns(names)).select_from(self.model)
+        for target, onclause in self.joins:
+            query = query.outerjoin(target, onclause)
+        return query
+
+    def aggregate_query(self, columns, args):
+        query = select(*columns).select_from(self.model)
+        if any(args.get(param) for param in self.joined_filters):
+            for target, onclause in self.joins:
+                query = query.outerjoin(target, onclause)
+        return query
+
+
+def equals(column, value):
+    return column == value
+
+
+def at_least(column, value):
+    return column >= value
+
+
+def at_most(column, value):
+    return column <= value
+
+
+def matches_any(columns, value):
+    return or_(*(column.icontains(value, autoescape=True) for column in columns))
+
+
+def search(*columns):
+    """Standard ?q= filter: case-insensitive substring of any of the columns"""
+    return {'q': (columns, parse_str, matches_any)}
+
+
+def sum_of(column):
+    """Aggregate adding up a column, 0 over no rows, for ListSpec totals"""
+    return db.func.coalesce(db.func.sum(column), 0)
+
+
+def count_where(condition):
+    """Aggregate counting the rows that meet a condition, for ListSpec totals"""
+    return sum_of(db.case((condition, 1), else_=0))
+
+
+def date_range(column):
+    """Standard ?desde=&hasta= filters over a date column"""
+    return {
+        'desde': (column, parse_date, at_least),
+        'hasta': (column, parse_date, at_most),
+    }
+
+
+def parse_fields(spec, args):
+    """Resolve ?fields= into an ordered list of field names (id always included)"""
+    raw = args.get('fields')
+    if not raw:
+        return list(spec.fields)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in spec.fields]
+    if unknown:
+        raise ListError(f"Campos desconocidos: {', '.join(unknown)}")
+    if 'id' not in names:
+        names.insert(0, 'id')
+    return names
+
+
+def parse_limit(args):
+    raw = args.get('limit')
+    if raw is None:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ListError('limit debe ser un número entero')
+    if limit < 1:
+        raise ListError('limit debe ser mayor que cero')
+    return min(limit, MAX_LIMIT)
+
+
+def filter_criteria(spec, args):
+    """Build WHERE criteria from the typed filters present in the query string"""
+    criteria = []
+    for param, (column, parser, compare) in spec.filters.items():
+        raw = args.get(param)
+        if raw is None or raw == '':
+            continue
+        try:
+            value = parser(raw)
+        except ValueError:
+            raise ListError(f'Valor inválido para {param}: {raw}')
+        criteria.append(compare(column, value))
+    return criteria
+
+
+def fetch_page(spec, args):
+    """Run the listing query, returns (rows as dicts, next cursor, total or None, totals or None)"""
+    names = parse_fields(spec, args)
+    limit = parse_limit(args)
+    criteria = filter_criteria(spec, args)
+    pk = spec.model.id
+
+    query = spec.base_query(names).where(*criteria)
+    after = args.get('after')
+    if after:
+        try:
+            query = query.where(pk > int(after))
+        except ValueError:
+            raise ListError('after debe ser un id numérico')
+    query = query.order_by(pk).limit(limit + 1)
+
+    rows = db.session.execute(query).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+
+    formatters = [(name, spec.fields[name][1]) for name in names]
+    items = [{name: fmt(getattr(row, name)) for name, fmt in formatters} for row in rows]
+
+    total = totales = None
+    con_totales = bool(args.get('totales', type=int)) and bool(spec.totals)
+    if args.get('count', type=int) or con_totales:
+        # The totals share the count's statement: one scan, and the list budget stays at two
+        columns = [db.func.count()]
+        if con_totales:
+            columns += [aggregate for aggregate, _ in spec.totals.values()]
+        total, *valores = db.session.execute(spec.aggregate_query(columns, args).where(*criteria)).one()
+        if con_totales:
+            totales = {name: fmt(valor) for (name, (_, fmt)), valor in zip(spec.totals.items(), valores)}
+
+    return items, next_cursor, total, totales
+
+
+def stream_items(spec, args):
+    """Iterate every matching row as a dict, reading through a server-side cursor"""
+    names = parse_fields(spec, args)
+    criteria = filter_criteria(spec, args)
+    pk = spec.model.id
+
+    query = spec.base_query(names).where(*criteria)
+    after = args.get('after')
+    if after:
+        try:
+            query = query.where(pk > int(after))
+        except ValueError:
+            raise ListError('after debe ser un id numérico')
+    query = query.order_by(pk).execution_options(yield_per=STREAM_BATCH)
+    formatters = [(name, spec.fields[name][1]) for name in names]
+
+    def rows():
+        for row in db.session.execute(query):
+            yield {name: fmt(getattr(row, name)) for name, fmt in formatters}
+    return rows()
+
+
+def wants_stream():
+    """True when the client asked for a streamed listing"""
+    if request.args.get('stream', type=int):
+        return True
+    return request.accept_mimetypes.best_match(['application/json', NDJSON]) == NDJSON
+
+
+def stream_response(items):
+    """Stream dicts as NDJSON, or as a chunked JSON array when NDJSON was not accepted"""
+    ndjson = request.accept_mimetypes.best_match(['application/json', NDJSON]) == NDJSON
+
+    def generate():
+        chunk = []
+        first = True
+        if not ndjson:
+            yield '['
+        for item in items:
+            line = json.dumps(item)
+            if ndjson:
+                chunk.append(line + '\n')
+            else:
+                chunk.append(line if first else ',' + line)
+                first = False
+            if len(chunk) >= STREAM_BATCH:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+        if not ndjson:
+            yield ']'
+
+    mimetype = NDJSON if ndjson else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+def paginate(spec):
+    """Serve a paginated JSON listing for the current request"""
+    try:
+        if wants_stream():
+            return stream_response(stream_items(spec, request.args))
+        items, next_cursor, total, totales = fetch_page(spec, request.args)
+    except ListError as e:
+        return jsonify({'error': str(e)}), 400
+    return page_response(items, next_cursor, total, totales)
+
+
+def page_response(items, next_cursor, total=None, totales=None):
+    """JSON array response with the pagination headers"""
+    response = jsonify(items)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+        args = request.args.to_dict()
+        args['after'] = str(next_cursor)
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    if total is not None:
+        response.headers['X-Total-Count'] = str(total)
+    if totales is not None:
+        response.headers['X-Totals'] = json.dumps(totales)
+    return response
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de los endpoints principales
+
+Cada escenario lanza N hilos que repiten la misma solicitud durante un tiempo
+fijo sobre conexiones HTTP persistentes y reporta solicitudes por segundo y
+latencias p50/p95/p99.
+
+Con --saldos N envía N recibos y pagos en paralelo sobre una misma cuenta
+bancaria nueva, mide el rendimiento y verifica que el saldo final sea exacto
+(saldo inicial + recibos - pagos confirmados).
+
+Con --sse N abre N suscriptores al canal de eventos, crea clientes por la
+API y mide cuántos eventos llegan a cada suscriptor y con qué latencia desde
+que la API respondió.
+
+Uso:
+    python loadtest.py --url http://localhost:5000      # contra un servidor en marcha
+    python loadtest.py --sqlite /tmp/carga.db           # levanta la app en proceso
+                                                        # sobre SQLite con datos de prueba
+    python loadtest.py --sqlite /tmp/carga.db --sse 500 # canal de eventos en proceso
+    python loadtest.py --sqlite /tmp/carga.db --saldos 1000
+Opciones: --concurrency 16 --duration 10 --only lecturas|escrituras
+          --events-url http://localhost:5001/api/events --cambios 50
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from decimal import Decimal
+from urllib.parse import urlencode, urlsplit
+
+LECTURAS = [
+    ('dashboard', 'GET', '/api/dashboard/summary', None),
+    ('counts', 'GET', '/api/counts', None),
+    ('facturas-venta', 'GET', '/api/facturas-venta?limit=100', None),
+    ('asientos', 'GET', '/api/asientos-contables?limit=50', None),
+    ('balanza', 'GET', '/api/balanza', None),
+]
+
+FACTURA = {
+    'fecha': time.strftime('%Y-%m-%d'),
+    'cliente_id': 1,
+    'detalles': [{'articulo_id': 1, 'cantidad': 2, 'precio_unitario': 10}]
+}
+
+ESCRITURAS = [
+    ('crear factura-venta', 'POST', '/api/facturas-venta', FACTURA),
+    ('crear cliente', 'POST', '/api/clientes', {'nombre': 'Cliente de carga'}),
+]
+
+
+def percentile(valores, p):
+    if not valores:
+        return 0.0
+    indice = min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))
+    return valores[indice]
+
+
+def run_scenario(base_url, method, path, body, concurrency, duration):
+    """Hammer one endpoint; returns (requests/sec, sorted latencies in ms, errors)"""
+    url = urlsplit(base_url)
+    payload = json.dumps(body) if body is not None else None
+    headers = {'Content-Type': 'application/json'} if body is not None else {}
+    latencias, errores = [], [0]
+    lock = threading.Lock()
+    fin = time.perf_counter() + duration
+
+    def worker():
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+        propias, fallidas = [], 0
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                respuesta = conn.getresponse()
+                respuesta.read()
+                if respuesta.status >= 400:
+                    fallidas += 1
+            except (OSError, http.client.HTTPException):
+                fallidas += 1
+                conn.close()
+                conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+            propias.append((time.perf_counter() - inicio) * 1000)
+        conn.close()
+        with lock:
+            latencias.extend(propias)
+            errores[0] += fallidas
+
+    hilos = [threading.Thread(target=worker) for _ in range(concurrency)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.perf_counter() - inicio
+    return len(latencias) / transcurrido, sorted(latencias), errores[0]
+
+
+def _request(conn, method, path, body=None):
+    conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                 headers={'Content-Type': 'application/json'} if body is not None else {})
+    respuesta = conn.getresponse()
+    return respuesta.status, json.loads(respuesta.read() or b'null')
+
+
+def write_scenarios(base_url, stock=10_000_000):
+    """ESCRITURAS with the invoice lines on a new article stocked for the whole run"""
+    # Sales that would take stock below zero are rejected, so article 1 runs dry
+    url = urlsplit(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    codigo = f'CARGA-{time.time_ns()}'
+    status, articulo = _request(conn, 'POST', '/api/articulos', {
+        'codigo': codigo, 'nombre': 'Artículo de carga', 'precio_compra': 5, 'precio_venta': 10, 'stock_actual': stock
+    })
+    conn.close()
+    if status != 201:
+        raise RuntimeError(f'No se pudo crear el artículo de prueba: {articulo}')
+    factura = dict(FACTURA, detalles=[dict(detalle, articulo_id=articulo['id']) for detalle in FACTURA['detalles']])
+    return [(nombre, method, path, factura if body is FACTURA else body) for nombre, method, path, body in ESCRITURAS]
+
+
+def run_balances(base_url, movimientos, concurrency, saldo_inicial=Decimal('1000000.00')):
+    """Parallel receipts/payments on one account; returns (requests/sec, latencies, errors, expected, final)"""
+    url = urlsplit(base_url)
+    connect = lambda: http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    banco = f'Carga {time.time_ns()}'
+    conn = connect()
+    status, cuenta = _request(conn, 'POST', '/api/cuentas-bancarias', {
+        'nombre': 'Cuenta de carga', 'banco': banco, 'numero_cuenta': banco, 'saldo_inicial': str(saldo_inicial)
+    })
+    if status != 201:
+        raise RuntimeError(f'No se pudo crear la cuenta de prueba: {cuenta}')
+
+    fecha = time.strftime('%Y-%m-%d')
+    # Alternate receipts and payments with amounts that do not cancel out
+    pendientes = [
+        ('/api/recibos', {'fecha': fecha, 'cliente_id': 1, 'cuenta_bancaria_id': cuenta['id'],
+                          'monto': f'{10 + n % 97}.{n % 100:02d}'})
+        if n % 2 == 0 else
+        ('/api/pagos', {'fecha': fecha, 'proveedor_id': 1, 'cuenta_bancaria_id': cuenta['id'],
+                        'monto': f'{3 + n % 89}.{(n * 7) % 100:02d}'})
+        for n in range(movimientos)
+    ]
+    esperado = [saldo_inicial]
+    latencias, errores = [], [0]
+    lock = threading.Lock()
+
+    def worker():
+        conn = connect()
+        while True:
+            with lock:
+                if not pendientes:
+                    break
+                path, body = pendientes.pop()
+            inicio = time.perf_counter()
+            try:
+                status, _ = _request(conn, 'POST', path, body)
+            except (OSError, http.client.HTTPException):
+                status = None
+                conn.close()
+                conn = connect()
+            transcurrido = (time.perf_counter() - inicio) * 1000
+            signo = 1 if path == '/api/recibos' else -1
+            with lock:
+                latencias.append(transcurrido)
+                if status == 201:
+                    esperado[0] += signo * Decimal(body['monto'])
+                else:
+                    errores[0] += 1
+        conn.close()
+
+    hilos = [threading.Thread(target=worker) for _ in range(concurrency)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.perf_counter() - inicio
+
+    _, cuentas = _request(conn, 'GET', '/api/cuentas-bancarias?' + urlencode({'banco': banco}))
+    conn.close()
+    final = Decimal(str(cuentas[0]['saldo_actual'])).quantize(Decimal('0.01'))
+    return len(latencias) / transcurrido, sorted(latencias), errores[0], esperado[0], final
+
+
+def start_sqlite_server(path, facturas=2000):
+    """Serve the app in-process on a seeded SQLite stand-in, returns the base URL"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(path)}'
+    if os.path.exists(path):
+        os.remove(path)
+
+    from werkzeug.serving import make_server
+    from app import app, db
+    from models import ArticuloInventario, Cliente, Proveedor
+    import bulk_import
+    import contadores
+    import migrations
+
+    with app.app_context():
+        migrations.upgrade()
+        db.session.add(Cliente(nombre='Cliente de carga'))
+        db.session.add(Proveedor(nombre='Proveedor de carga'))
+        db.session.add(ArticuloInventario(codigo='CARGA', nombre='Artículo de carga', precio_venta=10))
+        db.session.commit()
+        bulk_import.import_invoices('venta', [FACTURA] * facturas)
+        contadores.reconcile(fix=True)
+        db.session.commit()
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}'
+
+
+def start_events_hub():
+    """Run the event hub in-process on its own event loop thread, returns its URL"""
+    from app import app
+    import eventos
+
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    threading.Thread(
+        target=asyncio.run, args=(eventos.serve(app, '127.0.0.1', port),), daemon=True
+    ).start()
+    time.sleep(1)
+    return f'http://127.0.0.1:{port}{eventos.EVENTS_PATH}'
+
+
+async def _subscriber(events_url, recibidos, listo):
+    url = urlsplit(events_url)
+    reader, writer = await asyncio.open_connection(url.hostname, url.port)
+    writer.write(f'GET {url.path} HTTP/1.1\r\nHost: {url.hostname}\r\nAccept: text/event-stream\r\n\r\n'.encode())
+    await writer.drain()
+    while (await reader.readline()) not in (b'\r\n', b''):
+        pass
+    listo.set_result(True)
+    evento = None
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.startswith(b'event: '):
+                evento = line[7:].strip()
+            elif line.startswith(b'data: ') and evento == b'cambio':
+                recibidos.append((json.loads(line[6:])['id'], time.perf_counter()))
+    finally:
+        writer.close()
+
+
+def _create_cliente(base_url, numero):
+    url = urlsplit(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    conn.request('POST', '/api/clientes', body=json.dumps({'nombre': f'Suscriptor {numero}'}),
+                 headers={'Content-Type': 'application/json'})
+    respuesta = conn.getresponse()
+    cliente_id = json.loads(respuesta.read())['id']
+    conn.close()
+    return cliente_id, time.perf_counter()
+
+
+async def run_sse(base_url, events_url, suscriptores, cambios):
+    """Fan-out test: N subscribers, M creates; returns (delivered, expected, latencies, threads)"""
+    recibidos = [[] for _ in range(suscriptores)]
+    listos = [asyncio.get_running_loop().create_future() for _ in range(suscriptores)]
+    tareas = [asyncio.create_task(_subscriber(events_url, recibidos[i], listos[i])) for i in range(suscriptores)]
+    await asyncio.gather(*listos)
+    hilos = threading.active_count()
+
+    enviados = {}
+    for numero in range(cambios):
+        cliente_id, confirmado = await asyncio.to_thread(_create_cliente, base_url, numero)
+        enviados[cliente_id] = confirmado
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(2)
+    for tarea in tareas:
+        tarea.cancel()
+
+    latencias = sorted(
+        (recibido - enviados[cliente_id]) * 1000
+        for lista in recibidos for cliente_id, recibido in lista if cliente_id in enviados
+    )
+    return len(latencias), suscriptores * cambios, latencias, hilos
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga del Sistema Contable')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--sqlite', help='levantar la app en proceso sobre esta base SQLite')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--only', choices=('lecturas', 'escrituras'))
+    parser.add_argument('--sse', type=int, metavar='N', help='probar el canal de eventos con N suscriptores')
+    parser.add_argument('--events-url', default='http://localhost:5001/api/events')
+    parser.add_argument('--cambios', type=int, default=50)
+    parser.add_argument('--saldos', type=int, metavar='N', help='N recibos y pagos en paralelo sobre una cuenta')
+    args = parser.parse_args()
+
+    base_url = start_sqlite_server(args.sqlite) if args.sqlite else args.url
+    if args.sse:
+        events_url = start_events_hub() if args.sqlite else args.events_url
+        entregados, esperados, latencias, hilos = asyncio.run(run_sse(base_url, events_url, args.sse, args.cambios))
+        print(f"Canal de eventos: {events_url}  suscriptores={args.sse}  cambios={args.cambios}")
+        print(f"  entregados {entregados}/{esperados}")
+        print(f"  latencia p50={percentile(latencias, 50):.1f} ms  p99={percentile(latencias, 99):.1f} ms"
+              f"  máx={latencias[-1] if latencias else 0:.1f} ms")
+        if args.sqlite:
+            print(f"  hilos del proceso con todos los suscriptores conectados: {hilos}")
+        return
+    if args.saldos:
+        rps, latencias, errores, esperado, final = run_balances(base_url, args.saldos, args.concurrency)
+        print(f"Saldos bancarios: {base_url}  movimientos={args.saldos}  concurrencia={args.concurrency}")
+        print(f"  {rps:.1f} req/s  p50={percentile(latencias, 50):.1f} ms  p99={percentile(latencias, 99):.1f} ms"
+              f"  errores={errores}")
+        print(f"  saldo esperado {esperado}  saldo final {final}  {'✅ exacto' if final == esperado else '⚠️  DIFERENTE'}")
+        return 0 if final == esperado else 1
+    escenarios = []
+    if args.only != 'escrituras':
+        escenarios += LECTURAS
+    if args.only != 'lecturas':
+        escenarios += write_scenarios(base_url)
+
+    print(f"Objetivo: {base_url}  concurrencia={args.concurrency}  duración={args.duration}s")
+    print(f"{'escenario':<22}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errores':>10}")
+    for nombre, method, path, body in escenarios:
+        rps, latencias, errores = run_scenario(base_url, method, path, body, args.concurrency, args.duration)
+        print(f"{nombre:<22}{rps:>10.1f}{percentile(latencias, 50):>10.1f}"
+              f"{percentile(latencias, 95):>10.1f}{percentile(latencias, 99):>10.1f}{errores:>10}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,321 @@
+"""
+Métricas de rendimiento por solicitud en formato Prometheus
+
+Con METRICS activado, create_app() registra ganchos before/after_request y
+eventos del engine que miden por ruta (plantilla de la URL, método y código
+de respuesta):
+
+    contable_http_request_duration_seconds   histograma de latencia
+    contable_http_response_bytes_total       bytes enviados (si se conocen)
+    contable_sql_statements_total            sentencias SQL emitidas
+    contable_sql_duration_seconds_total      tiempo dentro de la base de datos
+    contable_db_pool_checkout_seconds        espera por una conexión del pool
+
+y las publica en /api/metrics. Con METRICS_SERVER_TIMING cada respuesta
+lleva además el encabezado Server-Timing (app, db y número de sentencias),
+visible en las herramientas de desarrollo del navegador. Con METRICS
+desactivado no se registra ningún gancho ni evento y /api/metrics no existe.
+
+Cada proceso acumula sus métricas en memoria. Con varios workers de
+gunicorn, METRICS_DIR es una carpeta compartida: cada worker escribe ahí
+su copia cada FLUSH_SEGUNDOS y al terminar, y /api/metrics suma las de
+todos (gunicorn.conf.py archiva las de workers reciclados).
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from flask import Response, request
+from sqlalchemy import event
+
+PREFIJO = 'contable'
+LATENCIA_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CHECKOUT_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+ARCHIVO_MUERTOS = 'archivados.json'
+
+FLUSH_SEGUNDOS = 5
+
+_local = threading.local()
+_opciones = {'server_timing': False, 'carpeta': None}
+_flush_iniciado = threading.Event()
+
+
+def _enabled(name, default=''):
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+
+class Histograma:
+    """Count per bucket (cumulative only when rendered) and the sum of observations"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.conteos = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.suma = 0.0
+
+    def observe(self, valor):
+        self.conteos[bisect.bisect_left(self.buckets, valor)] += 1
+        self.suma += valor
+
+    def to_list(self):
+        return [self.conteos, self.suma]
+
+    def merge(self, datos):
+        conteos, suma = datos
+        self.conteos = [a + b for a, b in zip(self.conteos, conteos)]
+        self.suma += suma
+
+
+class Registro:
+    """Metrics of one process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.solicitudes = {}  # (ruta, método, código) -> [Histograma, bytes, sentencias, segundos sql]
+        self.checkout = Histograma(CHECKOUT_BUCKETS)
+
+    def observe_request(self, clave, segundos, tamano, sentencias, segundos_sql):
+        with self.lock:
+            entrada = self.solicitudes.get(clave)
+            if entrada is None:
+                entrada = self.solicitudes[clave] = [Histograma(LATENCIA_BUCKETS), 0, 0, 0.0]
+            entrada[0].observe(segundos)
+            entrada[1] += tamano
+            entrada[2] += sentencias
+            entrada[3] += segundos_sql
+
+    def observe_checkout(self, segundos):
+        with self.lock:
+            self.checkout.observe(segundos)
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'solicitudes': [
+                    [list(clave), histograma.to_list(), tamano, sentencias, segundos_sql]
+                    for clave, (histograma, tamano, sentencias, segundos_sql) in self.solicitudes.items()
+                ],
+                'checkout': self.checkout.to_list()
+            }
+
+    def merge(self, datos):
+        for clave, histograma, tamano, sentencias, segundos_sql in datos['solicitudes']:
+            entrada = self.solicitudes.setdefault(tuple(clave), [Histograma(LATENCIA_BUCKETS), 0, 0, 0.0])
+            entrada[0].merge(histograma)
+            entrada[1] += tamano
+            entrada[2] += sentencias
+            entrada[3] += segundos_sql
+        self.checkout.merge(datos['checkout'])
+
+
+registro = Registro()
+
+
+class _Solicitud:
+    __slots__ = ('inicio', 'sentencias', 'segundos_sql', 'inicio_sql')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.sentencias = 0
+        self.segundos_sql = 0.0
+        self.inicio_sql = 0.0
+
+
+def _before_request():
+    _local.solicitud = _Solicitud()
+    if _opciones['carpeta'] and not _flush_iniciado.is_set():
+        _start_flush()
+
+
+def _after_request(response):
+    solicitud = getattr(_local, 'solicitud', None)
+    if solicitud is None:
+        return response
+    _local.solicitud = None
+    segundos = time.perf_counter() - solicitud.inicio
+    ruta = request.url_rule.rule if request.url_rule is not None else 'sin_ruta'
+    # Streamed responses have no known length when the hook runs
+    tamano = response.content_length or 0
+    registro.observe_request(
+        (ruta, request.method, response.status_code), segundos, tamano,
+        solicitud.sentencias, solicitud.segundos_sql
+    )
+    if _opciones['server_timing']:
+        response.headers['Server-Timing'] = (
+            f'app;dur={segundos * 1000:.1f}, '
+            f'db;dur={solicitud.segundos_sql * 1000:.1f};desc="{solicitud.sentencias} sentencias"'
+        )
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    solicitud = getattr(_local, 'solicitud', None)
+    if solicitud is not None:
+        solicitud.inicio_sql = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    solicitud = getattr(_local, 'solicitud', None)
+    if solicitud is not None:
+        solicitud.sentencias += 1
+        solicitud.segundos_sql += time.perf_counter() - solicitud.inicio_sql
+
+
+def _time_checkout(engine):
+    """Wrap the engine's connection checkout (pool wait plus connect or pre-ping)"""
+    checkout = engine.raw_connection
+
+    def raw_connection():
+        inicio = time.perf_counter()
+        try:
+            return checkout()
+        finally:
+            registro.observe_checkout(time.perf_counter() - inicio)
+
+    engine.raw_connection = raw_connection
+
+
+# Prometheus text format
+
+def _escape(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{nombre}="{_escape(valor)}"' for nombre, valor in labels.items())
+
+
+def _histogram_lines(nombre, histograma, **labels):
+    lineas, acumulado = [], 0
+    base = _labels(**labels)
+    separador = ',' if base else ''
+    for limite, conteo in zip(list(histograma.buckets) + ['+Inf'], histograma.conteos):
+        acumulado += conteo
+        lineas.append(f'{nombre}_bucket{{{base}{separador}le="{limite}"}} {acumulado}')
+    etiquetas = f'{{{base}}}' if base else ''
+    lineas.append(f'{nombre}_sum{etiquetas} {histograma.suma}')
+    lineas.append(f'{nombre}_count{etiquetas} {acumulado}')
+    return lineas
+
+
+def render(total):
+    """Prometheus exposition text of a Registro"""
+    latencia = f'{PREFIJO}_http_request_duration_seconds'
+    lineas = [
+        f'# HELP {latencia} Request latency by route, method and status',
+        f'# TYPE {latencia} histogram',
+    ]
+    contadores = {
+        'http_response_bytes_total': ('Response bytes sent (known lengths only)', 1),
+        'sql_statements_total': ('SQL statements issued by requests', 2),
+        'sql_duration_seconds_total': ('Time spent executing SQL statements in requests', 3),
+    }
+    solicitudes = sorted(total.solicitudes.items())
+    for (ruta, metodo, codigo), entrada in solicitudes:
+        lineas.extend(_histogram_lines(latencia, entrada[0], route=ruta, method=metodo, status=codigo))
+    for sufijo, (ayuda, indice) in contadores.items():
+        nombre = f'{PREFIJO}_{sufijo}'
+        lineas.extend([f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} counter'])
+        for (ruta, metodo, codigo), entrada in solicitudes:
+            lineas.append(f'{nombre}{{{_labels(route=ruta, method=metodo, status=codigo)}}} {entrada[indice]}')
+    checkout = f'{PREFIJO}_db_pool_checkout_seconds'
+    lineas.extend([
+        f'# HELP {checkout} Time to check out a database connection from the pool',
+        f'# TYPE {checkout} histogram',
+        *_histogram_lines(checkout, total.checkout),
+    ])
+    return '\n'.join(lineas) + '\n'
+
+
+# Aggregation across gunicorn workers
+
+def _lock_file(carpeta, exclusivo):
+    import fcntl  # Only used with METRICS_DIR (gunicorn, Unix)
+    archivo = open(os.path.join(carpeta, '.lock'), 'a')
+    fcntl.flock(archivo, fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+    return archivo
+
+
+def _write_json(path, datos):
+    with open(path + '.tmp', 'w') as archivo:
+        json.dump(datos, archivo)
+    os.replace(path + '.tmp', path)
+
+
+def save_process(carpeta):
+    """Write this process's metrics to the shared folder"""
+    _write_json(os.path.join(carpeta, f'{os.getpid()}.json'), registro.to_dict())
+
+
+def _start_flush():
+    """Write this worker's metrics every FLUSH_SEGUNDOS so other workers can aggregate them"""
+    _flush_iniciado.set()
+
+    def flush():
+        while True:
+            time.sleep(FLUSH_SEGUNDOS)
+            try:
+                save_process(_opciones['carpeta'])
+            except OSError:
+                pass
+
+    threading.Thread(target=flush, name='metricas-flush', daemon=True).start()
+
+
+def collect(carpeta):
+    """Sum the metrics of every worker (live and archived) in the shared folder"""
+    total = Registro()
+    with _lock_file(carpeta, exclusivo=False):
+        for nombre in os.listdir(carpeta):
+            if nombre.endswith('.json'):
+                with open(os.path.join(carpeta, nombre)) as archivo:
+                    total.merge(json.load(archivo))
+    return total
+
+
+def archive_worker(carpeta, pid):
+    """Fold the file of a finished worker into the archive so its counts are kept"""
+    path = os.path.join(carpeta, f'{pid}.json')
+    if not os.path.exists(path):
+        return
+    with _lock_file(carpeta, exclusivo=True):
+        archivados = Registro()
+        for nombre in (ARCHIVO_MUERTOS, f'{pid}.json'):
+            if os.path.exists(os.path.join(carpeta, nombre)):
+                with open(os.path.join(carpeta, nombre)) as archivo:
+                    archivados.merge(json.load(archivo))
+        _write_json(os.path.join(carpeta, ARCHIVO_MUERTOS), archivados.to_dict())
+        os.remove(path)
+
+
+def reset_dir(carpeta):
+    """Start a server with empty metrics (counters reset like a single process restart)"""
+    os.makedirs(carpeta, exist_ok=True)
+    for nombre in os.listdir(carpeta):
+        if nombre.endswith(('.json', '.tmp')):
+            os.remove(os.path.join(carpeta, nombre))
+
+
+def metrics_view():
+    carpeta = _opciones['carpeta']
+    if carpeta:
+        save_process(carpeta)
+        total = collect(carpeta)
+    else:
+        total = registro
+    return Response(render(total), mimetype='text/plain; version=0.0.4')
+
+
+def configure(app, engine):
+    """Install the hooks, engine events and /api/metrics when METRICS is enabled"""
+    if not _enabled('METRICS'):
+        return
+    _opciones['server_timing'] = _enabled('METRICS_SERVER_TIMING')
+    _opciones['carpeta'] = os.getenv('METRICS_DIR') or None
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    _time_checkout(engine)
+    app.add_url_rule('/api/metrics', 'metrics', metrics_view)
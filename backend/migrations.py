@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Migraciones versionadas del esquema
+
+Cada migración tiene un número de versión y se registra en la tabla
+versiones_esquema al aplicarse, así que upgrade() solo ejecuta las pendientes.
+Las migraciones revisan el esquema real antes de modificarlo, de modo que
+también funcionan sobre bases creadas con db.create_all().
+
+Uso:
+    python migrations.py upgrade   # crea tablas faltantes y aplica migraciones
+    python migrations.py status    # muestra las migraciones aplicadas/pendientes
+    python migrations.py explain   # verifica con EXPLAIN que las consultas
+                                   # críticas usen índices (sale con código 1 si no)
+"""
+
+import sys
+from datetime import date, datetime
+from sqlalchemy import extract, inspect, select, text, update
+from sqlalchemy.schema import CreateIndex
+from database import create_app, db
+from models import *
+import balanza
+import bloqueos
+import contadores
+import dashboard
+import inventario
+
+MIGRACIONES = []
+
+
+def migracion(version, nombre):
+    """Register a migration function under a version number"""
+    def decorator(fn):
+        MIGRACIONES.append((version, nombre, fn))
+        MIGRACIONES.sort(key=lambda m: m[0])
+        return fn
+    return decorator
+
+
+def _column_names(conn, table):
+    return {column['name'] for column in inspect(conn).get_columns(table)}
+
+
+def _index_names(conn, table):
+    return {index['name'] for index in inspect(conn).get_indexes(table)}
+
+
+def create_index_online(conn, index):
+    """Create an index without blocking writes where the database supports it"""
+    ddl = str(CreateIndex(index).compile(dialect=conn.dialect))
+    if conn.dialect.name == 'mysql':
+        ddl += ' ALGORITHM=INPLACE LOCK=NONE'
+    conn.execute(text(ddl))
+
+
+def ensure_indexes(conn, tables=None):
+    """Create every index declared on the models that is missing in the database"""
+    creados = []
+    for table in db.metadata.sorted_tables:
+        if tables is not None and table.name not in tables:
+            continue
+        existentes = _index_names(conn, table.name)
+        columnas = _column_names(conn, table.name)
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            # Indexes on columns a later migration adds are created by that migration
+            if index.name not in existentes and all(c.name in columnas for c in index.columns):
+                create_index_online(conn, index)
+                creados.append(index.name)
+    return creados
+
+
+@migracion(1, 'Columnas mes y anio en asientos_contables')
+def agregar_mes_anio(conn):
+    columnas = _column_names(conn, 'asientos_contables')
+    asientos = AsientoContable.__table__
+    for columna in ('mes', 'anio'):
+        if columna not in columnas:
+            conn.execute(text(f"ALTER TABLE asientos_contables ADD COLUMN {columna} INT"))
+    conn.execute(
+        update(asientos)
+        .where((asientos.c.mes.is_(None)) | (asientos.c.anio.is_(None)))
+        .values(mes=extract('month', asientos.c.fecha), anio=extract('year', asientos.c.fecha))
+    )
+    if conn.dialect.name == 'mysql':
+        conn.execute(text("ALTER TABLE asientos_contables MODIFY COLUMN mes INT NOT NULL"))
+        conn.execute(text("ALTER TABLE asientos_contables MODIFY COLUMN anio INT NOT NULL"))
+
+
+@migracion(2, 'Índices de consultas contables')
+def indices_contables(conn):
+    ensure_indexes(conn)
+
+
+@migracion(3, 'Saldos por cuenta para la balanza de comprobación')
+def saldos_cuenta(conn):
+    balanza.rebuild(conn=conn)
+
+
+@migracion(4, 'Contadores de renglones por tabla')
+def contadores_filas(conn):
+    if 'filas' not in _column_names(conn, 'contadores_tabla'):
+        conn.execute(text("ALTER TABLE contadores_tabla ADD COLUMN filas INT NOT NULL DEFAULT 0"))
+    contadores.reconcile(fix=True, conn=conn)
+
+
+@migracion(5, 'Índices de reportes de ventas y compras')
+def indices_reportes(conn):
+    ensure_indexes(conn, {
+        'facturas_venta', 'facturas_compra', 'detalles_factura_venta', 'detalles_factura_compra'
+    })
+
+
+@migracion(6, 'Depreciación de activos fijos')
+def depreciacion_activos(conn):
+    if 'metodo_depreciacion' not in _column_names(conn, 'activos_fijos'):
+        conn.execute(text("ALTER TABLE activos_fijos ADD COLUMN metodo_depreciacion VARCHAR(20) DEFAULT 'linea_recta'"))
+    if 'depreciacion_acumulada' not in _column_names(conn, 'resumen_dashboard'):
+        conn.execute(text(
+            "ALTER TABLE resumen_dashboard ADD COLUMN depreciacion_acumulada NUMERIC(15, 2) NOT NULL DEFAULT 0"
+        ))
+
+
+@migracion(7, 'Corridas de nómina')
+def corridas_nomina(conn):
+    if 'corrida_id' not in _column_names(conn, 'recibos_nomina'):
+        conn.execute(text('ALTER TABLE recibos_nomina ADD COLUMN corrida_id INT'))
+    ensure_indexes(conn, {'recibos_nomina'})
+
+
+@migracion(8, 'Movimientos y valuación de inventario')
+def movimientos_inventario(conn):
+    columnas = _column_names(conn, 'articulos_inventario')
+    nuevas = {
+        'costo_promedio': 'NUMERIC(12, 4) NOT NULL DEFAULT 0',
+        'valor_inventario': 'NUMERIC(15, 2) NOT NULL DEFAULT 0',
+        'bajo_stock': 'BOOLEAN NOT NULL DEFAULT 0'
+    }
+    for columna, tipo in nuevas.items():
+        if columna not in columnas:
+            conn.execute(text(f"ALTER TABLE articulos_inventario ADD COLUMN {columna} {tipo}"))
+    ensure_indexes(conn, {'articulos_inventario', 'movimientos_inventario'})
+    # Existing stock becomes an opening movement valued at precio_compra,
+    # the same value the dashboard already holds for it
+    inventario.open_balances(conn)
+
+
+@migracion(9, 'Cola de trabajos')
+def cola_trabajos(conn):
+    ensure_indexes(conn, {'trabajos'})
+
+
+@migracion(10, 'Renglón del resumen del dashboard')
+def resumen_dashboard(conn):
+    # Seeded once here, so concurrent first writes never race to insert it
+    dashboard.seed(conn)
+
+
+@migracion(11, 'Bloqueos de procesos')
+def bloqueos_procesos(conn):
+    bloqueos.seed(conn)
+
+
+def current_version(conn):
+    return conn.execute(select(db.func.max(VersionEsquema.version))).scalar() or 0
+
+
+def upgrade():
+    """Create missing tables and apply pending migrations"""
+    db.create_all()
+    with db.engine.begin() as conn:
+        version = current_version(conn)
+    for numero, nombre, fn in MIGRACIONES:
+        if numero <= version:
+            continue
+        print(f"Aplicando migración {numero}: {nombre}...")
+        with db.engine.begin() as conn:
+            fn(conn)
+            conn.execute(VersionEsquema.__table__.insert().values(
+                version=numero, nombre=nombre, fecha_aplicacion=datetime.utcnow()
+            ))
+    print("✅ Esquema actualizado")
+
+
+def status():
+    with db.engine.connect() as conn:
+        version = current_version(conn) if inspect(conn).has_table('versiones_esquema') else 0
+    for numero, nombre, _ in MIGRACIONES:
+        marca = '✅' if numero <= version else '⏳'
+        print(f"{marca} {numero:03d} {nombre}")
+
+
+# Hot queries that must be served through an index
+def consultas_criticas():
+    hoy = date.today()
+    return {
+        'dashboard: facturas de venta pendientes': select(db.func.sum(FacturaVenta.total)).where(FacturaVenta.estado == 'Pendiente'),
+        'dashboard: facturas de compra pendientes': select(db.func.sum(FacturaCompra.total)).where(FacturaCompra.estado == 'Pendiente'),
+        'dashboard: activos fijos activos': select(db.func.sum(ActivoFijo.valor_adquisicion)).where(ActivoFijo.estado == 'Activo'),
+        'asientos por periodo': select(AsientoContable.id).where(
+            AsientoContable.anio == hoy.year, AsientoContable.mes == hoy.month
+        ).order_by(AsientoContable.anio.desc(), AsientoContable.mes.desc(),
+                   AsientoContable.fecha.desc(), AsientoContable.id.desc()).limit(100),
+        'movimientos de una página de asientos': select(MovimientoContable.id).where(
+            MovimientoContable.asiento_id.in_([1, 2, 3])
+        ),
+        'mayor por cuenta': select(MovimientoContable.id).where(MovimientoContable.cuenta == 'Ventas'),
+        'facturas de venta por cliente': select(FacturaVenta.id).where(FacturaVenta.cliente_id == 1),
+        'facturas de venta por fecha': select(FacturaVenta.id).where(FacturaVenta.fecha >= hoy),
+        'recibos por cliente': select(Recibo.id).where(Recibo.cliente_id == 1),
+        'siguiente trabajo de la cola': select(Trabajo.id).where(Trabajo.estado == 'Pendiente').order_by(Trabajo.id).limit(1),
+    }
+
+
+def _uses_index(conn, statement):
+    """Return (uses index, plan text) for a statement according to EXPLAIN"""
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    if conn.dialect.name == 'sqlite':
+        plan = [row.detail for row in conn.execute(text('EXPLAIN QUERY PLAN ' + sql))]
+        full_scan = any(d.startswith('SCAN ') and 'USING' not in d for d in plan)
+        return not full_scan, ' | '.join(plan)
+    rows = conn.execute(text('EXPLAIN ' + sql)).mappings().all()
+    full_scan = any(row['type'] == 'ALL' for row in rows)
+    plan = ' | '.join(f"{row['table']}: type={row['type']} key={row['key']}" for row in rows)
+    return not full_scan, plan
+
+
+def explain():
+    """Check that every hot query uses an index access path, returns True if so"""
+    correcto = True
+    with db.engine.connect() as conn:
+        for nombre, statement in consultas_criticas().items():
+            usa_indice, plan = _uses_index(conn, statement)
+            correcto = correcto and usa_indice
+            print(f"{'✅' if usa_indice else '❌'} {nombre}: {plan}")
+    return correcto
+
+
+if __name__ == '__main__':
+    comando = sys.argv[1] if len(sys.argv) > 1 else 'upgrade'
+    app = create_app()
+    with app.app_context():
+        if comando == 'upgrade':
+            upgrade()
+        elif comando == 'status':
+            status()
+        elif comando == 'explain':
+            sys.exit(0 if explain() else 1)
+        else:
+            print(__doc__)
+            sys.exit(2)
@@ -2,6 +2,7 @@ from database import db
 from datetime import datetime
 from decimal import Decimal
 from sqlalchemy import Numeric
+from sqlalchemy.dialects.mysql import LONGTEXT
 
 class Cliente(db.Model):
     __tablename__ = 'clientes'
@@ -50,6 +51,10 @@ class CuentaBancaria(db.Model):
 
 class ArticuloInventario(db.Model):
     __tablename__ = 'articulos_inventario'
+    __table_args__ = (
+        # Artículos por surtir (stock_actual < stock_minimo) sin recorrer la tabla
+        db.Index('ix_articulos_inventario_bajo_stock', 'bajo_stock', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     codigo = db.Column(db.String(50), unique=True, nullable=False)
@@ -60,6 +65,9 @@ class ArticuloInventario(db.Model):
     stock_actual = db.Column(db.Integer, default=0)
     stock_minimo = db.Column(db.Integer, default=0)
     unidad_medida = db.Column(db.String(20), default='PZA')
+    costo_promedio = db.Column(db.Numeric(12, 4), nullable=False, default=0)  # Costo promedio ponderado
+    valor_inventario = db.Column(db.Numeric(15, 2), nullable=False, default=0)  # Existencia valuada a costo promedio
+    bajo_stock = db.Column(db.Boolean, nullable=False, default=False)  # stock_actual < stock_minimo
     fecha_registro = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relaciones
@@ -79,22 +87,26 @@ class Empleado(db.Model):
     fecha_ingreso = db.Column(db.Date, default=datetime.utcnow().date())
     salario_diario = db.Column(db.Numeric(10, 2))
     puesto = db.Column(db.String(100))
-    activo = db.Column(db.Boolean, default=True)
+    activo = db.Column(db.Boolean, default=True, index=True)
     
     # Relaciones
     recibos_nomina = db.relationship('ReciboNomina', backref='empleado', lazy=True)
 
 class FacturaVenta(db.Model):
     __tablename__ = 'facturas_venta'
+    __table_args__ = (
+        # Cubre los reportes agregados por rango de fechas sin leer la tabla
+        db.Index('ix_facturas_venta_reporte', 'fecha', 'cliente_id', 'estado', 'subtotal', 'iva', 'total'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     folio = db.Column(db.String(20), unique=True, nullable=False)
-    fecha = db.Column(db.Date, nullable=False)
-    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False)
+    fecha = db.Column(db.Date, nullable=False, index=True)
+    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False, index=True)
     subtotal = db.Column(db.Numeric(15, 2), nullable=False)
     iva = db.Column(db.Numeric(15, 2), default=0)
     total = db.Column(db.Numeric(15, 2), nullable=False)
-    estado = db.Column(db.String(20), default='Pendiente')  # Pendiente, Pagada, Cancelada
+    estado = db.Column(db.String(20), default='Pendiente', index=True)  # Pendiente, Pagada, Cancelada
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relaciones
@@ -103,25 +115,33 @@ class FacturaVenta(db.Model):
 
 class DetalleFacturaVenta(db.Model):
     __tablename__ = 'detalles_factura_venta'
+    __table_args__ = (
+        # Cubre los reportes por artículo y cantidad al unir con la factura
+        db.Index('ix_detalles_factura_venta_reporte', 'factura_venta_id', 'articulo_id', 'cantidad', 'subtotal'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    factura_venta_id = db.Column(db.Integer, db.ForeignKey('facturas_venta.id'), nullable=False)
-    articulo_id = db.Column(db.Integer, db.ForeignKey('articulos_inventario.id'), nullable=False)
+    factura_venta_id = db.Column(db.Integer, db.ForeignKey('facturas_venta.id'), nullable=False, index=True)
+    articulo_id = db.Column(db.Integer, db.ForeignKey('articulos_inventario.id'), nullable=False, index=True)
     cantidad = db.Column(db.Integer, nullable=False)
     precio_unitario = db.Column(db.Numeric(10, 2), nullable=False)
     subtotal = db.Column(db.Numeric(15, 2), nullable=False)
 
 class FacturaCompra(db.Model):
     __tablename__ = 'facturas_compra'
+    __table_args__ = (
+        # Cubre los reportes agregados por rango de fechas sin leer la tabla
+        db.Index('ix_facturas_compra_reporte', 'fecha', 'proveedor_id', 'estado', 'subtotal', 'iva', 'total'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     folio = db.Column(db.String(20), unique=True, nullable=False)
-    fecha = db.Column(db.Date, nullable=False)
-    proveedor_id = db.Column(db.Integer, db.ForeignKey('proveedores.id'), nullable=False)
+    fecha = db.Column(db.Date, nullable=False, index=True)
+    proveedor_id = db.Column(db.Integer, db.ForeignKey('proveedores.id'), nullable=False, index=True)
     subtotal = db.Column(db.Numeric(15, 2), nullable=False)
     iva = db.Column(db.Numeric(15, 2), default=0)
     total = db.Column(db.Numeric(15, 2), nullable=False)
-    estado = db.Column(db.String(20), default='Pendiente')  # Pendiente, Pagada, Cancelada
+    estado = db.Column(db.String(20), default='Pendiente', index=True)  # Pendiente, Pagada, Cancelada
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relaciones
@@ -130,10 +150,14 @@ class FacturaCompra(db.Model):
 
 class DetalleFacturaCompra(db.Model):
     __tablename__ = 'detalles_factura_compra'
+    __table_args__ = (
+        # Cubre los reportes por artículo y cantidad al unir con la factura
+        db.Index('ix_detalles_factura_compra_reporte', 'factura_compra_id', 'articulo_id', 'cantidad', 'subtotal'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    factura_compra_id = db.Column(db.Integer, db.ForeignKey('facturas_compra.id'), nullable=False)
-    articulo_id = db.Column(db.Integer, db.ForeignKey('articulos_inventario.id'), nullable=False)
+    factura_compra_id = db.Column(db.Integer, db.ForeignKey('facturas_compra.id'), nullable=False, index=True)
+    articulo_id = db.Column(db.Integer, db.ForeignKey('articulos_inventario.id'), nullable=False, index=True)
     cantidad = db.Column(db.Integer, nullable=False)
     precio_unitario = db.Column(db.Numeric(10, 2), nullable=False)
     subtotal = db.Column(db.Numeric(15, 2), nullable=False)
@@ -143,10 +167,10 @@ class Recibo(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     folio = db.Column(db.String(20), unique=True, nullable=False)
-    fecha = db.Column(db.Date, nullable=False)
-    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False)
-    factura_venta_id = db.Column(db.Integer, db.ForeignKey('facturas_venta.id'))
-    cuenta_bancaria_id = db.Column(db.Integer, db.ForeignKey('cuentas_bancarias.id'), nullable=False)
+    fecha = db.Column(db.Date, nullable=False, index=True)
+    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False, index=True)
+    factura_venta_id = db.Column(db.Integer, db.ForeignKey('facturas_venta.id'), index=True)
+    cuenta_bancaria_id = db.Column(db.Integer, db.ForeignKey('cuentas_bancarias.id'), nullable=False, index=True)
     monto = db.Column(db.Numeric(15, 2), nullable=False)
     concepto = db.Column(db.String(200))
     metodo_pago = db.Column(db.String(50))  # Efectivo, Transferencia, Cheque
@@ -157,10 +181,10 @@ class Pago(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     folio = db.Column(db.String(20), unique=True, nullable=False)
-    fecha = db.Column(db.Date, nullable=False)
-    proveedor_id = db.Column(db.Integer, db.ForeignKey('proveedores.id'), nullable=False)
-    factura_compra_id = db.Column(db.Integer, db.ForeignKey('facturas_compra.id'))
-    cuenta_bancaria_id = db.Column(db.Integer, db.ForeignKey('cuentas_bancarias.id'), nullable=False)
+    fecha = db.Column(db.Date, nullable=False, index=True)
+    proveedor_id = db.Column(db.Integer, db.ForeignKey('proveedores.id'), nullable=False, index=True)
+    factura_compra_id = db.Column(db.Integer, db.ForeignKey('facturas_compra.id'), index=True)
+    cuenta_bancaria_id = db.Column(db.Integer, db.ForeignKey('cuentas_bancarias.id'), nullable=False, index=True)
     monto = db.Column(db.Numeric(15, 2), nullable=False)
     concepto = db.Column(db.String(200))
     metodo_pago = db.Column(db.String(50))  # Efectivo, Transferencia, Cheque
@@ -171,8 +195,8 @@ class ReciboNomina(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     folio = db.Column(db.String(20), unique=True, nullable=False)
-    fecha = db.Column(db.Date, nullable=False)
-    empleado_id = db.Column(db.Integer, db.ForeignKey('empleados.id'), nullable=False)
+    fecha = db.Column(db.Date, nullable=False, index=True)
+    empleado_id = db.Column(db.Integer, db.ForeignKey('empleados.id'), nullable=False, index=True)
     periodo_inicio = db.Column(db.Date, nullable=False)
     periodo_fin = db.Column(db.Date, nullable=False)
     salario_base = db.Column(db.Numeric(10, 2), nullable=False)
@@ -181,6 +205,7 @@ class ReciboNomina(db.Model):
     deducciones = db.Column(db.Numeric(10, 2), default=0)
     total_bruto = db.Column(db.Numeric(10, 2), nullable=False)
     total_neto = db.Column(db.Numeric(10, 2), nullable=False)
+    corrida_id = db.Column(db.Integer, db.ForeignKey('corridas_nomina.id'), index=True)  # Nulo si se capturó individualmente
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
 
 class ActivoFijo(db.Model):
@@ -195,15 +220,20 @@ class ActivoFijo(db.Model):
     fecha_adquisicion = db.Column(db.Date, nullable=False)
     vida_util_anos = db.Column(db.Integer, default=5)
     valor_residual = db.Column(db.Numeric(15, 2), default=0)
-    estado = db.Column(db.String(20), default='Activo')  # Activo, Vendido, Dado de baja
+    metodo_depreciacion = db.Column(db.String(20), default='linea_recta')  # linea_recta, saldos_decrecientes
+    estado = db.Column(db.String(20), default='Activo', index=True)  # Activo, Vendido, Dado de baja
     fecha_registro = db.Column(db.DateTime, default=datetime.utcnow)
 
 class AsientoContable(db.Model):
     __tablename__ = 'asientos_contables'
+    __table_args__ = (
+        # Filtro por periodo y orden del listado (anio, mes, fecha, id)
+        db.Index('ix_asientos_contables_periodo', 'anio', 'mes', 'fecha', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     folio = db.Column(db.String(20), unique=True, nullable=False)
-    fecha = db.Column(db.Date, nullable=False)
+    fecha = db.Column(db.Date, nullable=False, index=True)
     mes = db.Column(db.Integer, nullable=False)  # 1-12
     anio = db.Column(db.Integer, nullable=False)  # Año del asiento
     concepto = db.Column(db.String(200), nullable=False)
@@ -219,8 +249,155 @@ class MovimientoContable(db.Model):
     __tablename__ = 'movimientos_contables'
     
     id = db.Column(db.Integer, primary_key=True)
-    asiento_id = db.Column(db.Integer, db.ForeignKey('asientos_contables.id'), nullable=False)
-    cuenta = db.Column(db.String(100), nullable=False)  # Nombre de la cuenta contable
+    asiento_id = db.Column(db.Integer, db.ForeignKey('asientos_contables.id'), nullable=False, index=True)
+    cuenta = db.Column(db.String(100), nullable=False, index=True)  # Nombre de la cuenta contable
     debe = db.Column(db.Numeric(15, 2), default=0)
     haber = db.Column(db.Numeric(15, 2), default=0)
     concepto = db.Column(db.String(200))
+
+class FolioSecuencia(db.Model):
+    __tablename__ = 'folio_secuencias'
+    
+    prefijo = db.Column(db.String(4), primary_key=True)  # FV, FC, RC, PG, RN, AC
+    dia = db.Column(db.String(8), primary_key=True)  # YYYYMMDD
+    ultimo = db.Column(db.Integer, nullable=False, default=0)  # Último consecutivo asignado
+
+class ResumenDashboard(db.Model):
+    __tablename__ = 'resumen_dashboard'
+    
+    id = db.Column(db.Integer, primary_key=True)  # Un solo renglón (id = 1)
+    cuentas_por_cobrar = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    efectivo = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    inventario = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    activos_fijos = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    cuentas_por_pagar = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    ventas = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    depreciacion_acumulada = db.Column(db.Numeric(15, 2), nullable=False, default=0)  # Contabilizada
+    actualizado = db.Column(db.DateTime, default=datetime.utcnow)
+
+class VersionEsquema(db.Model):
+    __tablename__ = 'versiones_esquema'
+    
+    version = db.Column(db.Integer, primary_key=True)
+    nombre = db.Column(db.String(100), nullable=False)
+    fecha_aplicacion = db.Column(db.DateTime, default=datetime.utcnow)
+
+class SaldoCuenta(db.Model):
+    __tablename__ = 'saldos_cuenta'
+    
+    anio = db.Column(db.Integer, primary_key=True)
+    mes = db.Column(db.Integer, primary_key=True)  # 1-12
+    cuenta = db.Column(db.String(100), primary_key=True)  # Nombre de la cuenta contable
+    debe = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    haber = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+
+class ContadorTabla(db.Model):
+    __tablename__ = 'contadores_tabla'
+    
+    tabla = db.Column(db.String(50), primary_key=True)  # Nombre de la tabla
+    version = db.Column(db.Integer, nullable=False, default=0)  # Aumenta con cada escritura
+    filas = db.Column(db.Integer, nullable=False, default=0)  # Número de renglones mantenido por las altas
+
+class Evento(db.Model):
+    __tablename__ = 'eventos'
+    
+    id = db.Column(db.Integer, primary_key=True)  # Orden de publicación (Last-Event-ID)
+    tipo = db.Column(db.String(50), nullable=False)  # cliente, factura_venta, recibo, etc.
+    entidad_id = db.Column(db.Integer)
+    datos = db.Column(db.Text)  # JSON con los incrementos del dashboard
+    fecha = db.Column(db.DateTime, default=datetime.utcnow)
+
+class CierrePeriodo(db.Model):
+    __tablename__ = 'cierres_periodo'
+    
+    anio = db.Column(db.Integer, primary_key=True)
+    mes = db.Column(db.Integer, primary_key=True)  # 1-12
+    asientos = db.Column(db.Integer, nullable=False)  # Número de asientos del periodo
+    totales = db.Column(db.Text, nullable=False)  # JSON: debe/haber por cuenta
+    listado = db.Column(db.LargeBinary(length=2**32 - 1), nullable=False)  # JSON comprimido (zlib) de los asientos
+    cerrado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class DepreciacionMensual(db.Model):
+    __tablename__ = 'depreciaciones_mensuales'
+    
+    anio = db.Column(db.Integer, primary_key=True)
+    mes = db.Column(db.Integer, primary_key=True)  # 1-12
+    asiento_id = db.Column(db.Integer, db.ForeignKey('asientos_contables.id'))  # Nulo si el importe fue cero
+    importe = db.Column(db.Numeric(15, 2), nullable=False)  # Depreciación contabilizada en el mes
+    acumulada = db.Column(db.Numeric(15, 2), nullable=False)  # Total contabilizado hasta este mes
+    fecha_registro = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Bloqueo(db.Model):
+    __tablename__ = 'bloqueos'
+    
+    nombre = db.Column(db.String(50), primary_key=True)  # Proceso que se ejecuta de uno en uno
+    tomado = db.Column(db.DateTime)  # Última vez que se tomó el bloqueo
+
+class CorridaNomina(db.Model):
+    __tablename__ = 'corridas_nomina'
+    __table_args__ = (
+        # Un periodo se paga una sola vez
+        db.UniqueConstraint('periodo_inicio', 'periodo_fin', name='uq_corridas_nomina_periodo'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.Date, nullable=False)  # Fecha de pago (y del asiento)
+    periodo_inicio = db.Column(db.Date, nullable=False)
+    periodo_fin = db.Column(db.Date, nullable=False)
+    dias = db.Column(db.Integer, nullable=False)  # Días pagados por empleado
+    incidencias = db.Column(db.Text)  # JSON: horas extra, bonos y deducciones por empleado
+    estado = db.Column(db.String(20), nullable=False, default='Pendiente')  # Pendiente, En proceso, Terminada, Error
+    empleados = db.Column(db.Integer, nullable=False, default=0)  # Empleados activos a pagar
+    procesados = db.Column(db.Integer, nullable=False, default=0)  # Recibos ya insertados
+    total_bruto = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    total_deducciones = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    total_neto = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    asiento_id = db.Column(db.Integer, db.ForeignKey('asientos_contables.id'))  # Asiento consolidado al terminar
+    error = db.Column(db.Text)
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+    actualizado = db.Column(db.DateTime, default=datetime.utcnow)  # Último avance registrado
+    fecha_fin = db.Column(db.DateTime)
+
+class MovimientoInventario(db.Model):
+    __tablename__ = 'movimientos_inventario'
+    __table_args__ = (
+        # Kárdex de un artículo en orden
+        db.Index('ix_movimientos_inventario_articulo', 'articulo_id', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    articulo_id = db.Column(db.Integer, db.ForeignKey('articulos_inventario.id'), nullable=False)
+    fecha = db.Column(db.Date, nullable=False, index=True)
+    tipo = db.Column(db.String(20), nullable=False)  # Inicial, Entrada, Salida
+    cantidad = db.Column(db.Integer, nullable=False)  # Positiva en entradas, negativa en salidas
+    costo_unitario = db.Column(db.Numeric(12, 4), nullable=False)  # Costo de compra o costo promedio de salida
+    importe = db.Column(db.Numeric(15, 2), nullable=False)  # Cambio en el valor del inventario
+    existencia = db.Column(db.Integer, nullable=False)  # stock_actual después del movimiento
+    origen = db.Column(db.String(20), nullable=False)  # inicial, factura_venta, factura_compra
+    documento_id = db.Column(db.Integer)  # Id de la factura que generó el movimiento
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Parameters and results of a job can exceed the 64 KB of a MySQL TEXT
+JSON_LARGO = db.Text().with_variant(LONGTEXT(), 'mysql')
+
+class Trabajo(db.Model):
+    __tablename__ = 'trabajos'
+    __table_args__ = (
+        # Cola: el siguiente trabajo pendiente en orden de llegada
+        db.Index('ix_trabajos_estado', 'estado', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)  # importar_facturas, reconstruir_saldos, exportar, eco
+    parametros = db.Column(JSON_LARGO)  # JSON
+    estado = db.Column(db.String(20), nullable=False, default='Pendiente')  # Pendiente, En proceso, Terminado, Error, Cancelado
+    procesados = db.Column(db.Integer, nullable=False, default=0)  # Avance reportado por la tarea
+    total = db.Column(db.Integer)  # Desconocido para tareas sin total
+    resultado = db.Column(JSON_LARGO)  # JSON devuelto por la tarea
+    error = db.Column(db.Text)
+    cancelar = db.Column(db.Boolean, nullable=False, default=False)  # Cancelación pedida mientras corre
+    worker = db.Column(db.String(100))  # host:pid del proceso que lo ejecuta
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+    inicio = db.Column(db.DateTime)
+    actualizado = db.Column(db.DateTime, default=datetime.utcnow)  # Último latido del worker
+    fin = db.Column(db.DateTime)
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Corridas de nómina para todos los empleados activos
+
+Una corrida paga un periodo (periodo_inicio - periodo_fin) a todos los
+empleados activos con salario_diario. Los recibos se calculan juntos en
+centavos enteros:
+    salario_base = salario_diario * dias
+    horas extra  = horas_extra * salario_diario / 8 (jornada de 8 horas)
+    total_bruto  = salario_base + horas extra + bonos
+    total_neto   = total_bruto - deducciones
+Las horas extra, bonos y deducciones llegan como incidencias por empleado.
+
+La corrida se crea en estado Pendiente junto con un trabajo 'nomina' de la
+cola (trabajos.py), así que la ejecuta un worker de la cola y no el proceso
+web que atendió la solicitud: los recibos se insertan por bloques de
+CHUNK_SIZE (folios reservados de una vez e inserción múltiple) y cada bloque
+confirma su avance en corridas_nomina, así que cualquier proceso puede
+responder el progreso. Al terminar se genera un
+solo asiento consolidado (Sueldos y Salarios contra Nómina por Pagar y
+Retenciones por Pagar).
+
+Una corrida interrumpida (Error, o sin avance durante INTERRUMPIDA) se puede
+reanudar: los empleados que ya tienen recibo en la corrida se omiten.
+
+Uso:
+    python nomina.py correr 2024-06-01 2024-06-15 [fecha_pago]
+    python nomina.py reanudar <id>
+    python nomina.py lista
+"""
+
+import json
+import sys
+from datetime import datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from database import create_app, db
+from folios import reserve_folios
+from models import AsientoContable, CorridaNomina, Empleado, MovimientoContable, ReciboNomina
+import balanza
+import cierres
+import contadores
+import eventos
+
+CHUNK_SIZE = 1000
+HORAS_JORNADA = 8
+# A run with no progress for this long is considered interrupted
+INTERRUMPIDA = timedelta(minutes=10)
+
+CUENTA_SUELDOS = 'Sueldos y Salarios'
+CUENTA_NOMINA = 'Nómina por Pagar'
+CUENTA_RETENCIONES = 'Retenciones por Pagar'
+
+_corridas = CorridaNomina.__table__
+_recibos = ReciboNomina.__table__
+
+
+class NominaError(ValueError):
+    """Invalid payroll run request, reported to the client as HTTP 400"""
+
+
+class CorridaConflicto(ValueError):
+    """The period is already paid or the run cannot be resumed now, HTTP 409"""
+
+
+def _date(data, campo):
+    try:
+        return datetime.strptime(data[campo], '%Y-%m-%d').date()
+    except KeyError:
+        raise NominaError(f'Falta {campo}')
+    except (TypeError, ValueError):
+        raise NominaError(f'{campo} inválido: {data[campo]}')
+
+
+def _amount(value, campo, empleado_id):
+    try:
+        amount = Decimal(str(value or 0))
+    except InvalidOperation:
+        raise NominaError(f'{campo} inválido para el empleado {empleado_id}: {value}')
+    if not amount.is_finite() or amount < 0:
+        raise NominaError(f'{campo} inválido para el empleado {empleado_id}: {value}')
+    return amount
+
+
+def parse_request(data):
+    """Validate a run request, returns the CorridaNomina column values"""
+    periodo_inicio = _date(data, 'periodo_inicio')
+    periodo_fin = _date(data, 'periodo_fin')
+    fecha = _date(data, 'fecha') if data.get('fecha') else periodo_fin
+    if periodo_fin < periodo_inicio:
+        raise NominaError('periodo_fin es anterior a periodo_inicio')
+    try:
+        dias = int(data.get('dias') or (periodo_fin - periodo_inicio).days + 1)
+    except (TypeError, ValueError):
+        raise NominaError(f"dias inválido: {data.get('dias')}")
+    if dias < 1:
+        raise NominaError('dias debe ser mayor que cero')
+
+    incidencias = {}
+    for item in data.get('incidencias') or []:
+        try:
+            empleado_id = int(item['empleado_id'])
+        except (KeyError, TypeError, ValueError):
+            raise NominaError('Cada incidencia requiere empleado_id')
+        incidencias[str(empleado_id)] = [
+            str(_amount(item.get(campo), campo, empleado_id)) for campo in ('horas_extra', 'bonos', 'deducciones')
+        ]
+    if incidencias:
+        activos = set(db.session.execute(
+            select(Empleado.id).where(Empleado.id.in_([int(k) for k in incidencias]), Empleado.activo == True)
+        ).scalars())
+        faltantes = sorted(int(k) for k in incidencias if int(k) not in activos)
+        if faltantes:
+            raise NominaError(f"Incidencias de empleados inexistentes o inactivos: {', '.join(map(str, faltantes))}")
+
+    return {
+        'fecha': fecha,
+        'periodo_inicio': periodo_inicio,
+        'periodo_fin': periodo_fin,
+        'dias': dias,
+        'incidencias': json.dumps(incidencias) if incidencias else None
+    }
+
+
+def _payable():
+    return select(Empleado.id, Empleado.salario_diario).where(
+        Empleado.activo == True, Empleado.salario_diario.isnot(None)
+    )
+
+
+def create_run(data):
+    """Register a pending run for a period, returns the CorridaNomina"""
+    valores = parse_request(data)
+    cierres.ensure_open(valores['fecha'])
+    existente = db.session.execute(
+        select(_corridas.c.id).where(
+            _corridas.c.periodo_inicio == valores['periodo_inicio'],
+            _corridas.c.periodo_fin == valores['periodo_fin']
+        )
+    ).scalar()
+    if existente is not None:
+        raise CorridaConflicto(f'El periodo ya tiene la corrida {existente}')
+
+    empleados = db.session.execute(select(db.func.count()).select_from(_payable().subquery())).scalar()
+    corrida = CorridaNomina(empleados=empleados, estado='Pendiente', **valores)
+    try:
+        with db.session.begin_nested():
+            db.session.add(corrida)
+    except IntegrityError:
+        raise CorridaConflicto('El periodo ya tiene una corrida')
+    return corrida
+
+
+def _cents(value):
+    return int((value * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def compute_receipts(empleados, dias, incidencias):
+    """Receipt amounts (in cents) for (id, salario_diario) rows and the run inputs"""
+    sin_incidencias = (Decimal('0'), 0, 0)
+    capturadas = {
+        int(empleado_id): (Decimal(horas), _cents(Decimal(bonos)), _cents(Decimal(deducciones)))
+        for empleado_id, (horas, bonos, deducciones) in incidencias.items()
+    }
+    recibos = []
+    for empleado_id, salario_diario in empleados:
+        diario = _cents(salario_diario)
+        horas_extra, bonos, deducciones = capturadas.get(empleado_id, sin_incidencias)
+        base = diario * dias
+        extra = int((horas_extra * diario / HORAS_JORNADA).to_integral_value(ROUND_HALF_UP))
+        bruto = base + extra + bonos
+        recibos.append((empleado_id, base, horas_extra, bonos, deducciones, bruto, bruto - deducciones))
+    return recibos
+
+
+def _money(centavos):
+    return Decimal(centavos) / 100
+
+
+def resumable(corrida):
+    """A run can be resumed after an error or once it stopped reporting progress"""
+    if corrida.estado == 'Error':
+        return True
+    return corrida.estado in ('Pendiente', 'En proceso') and corrida.actualizado < datetime.utcnow() - INTERRUMPIDA
+
+
+def _claim(corrida_id, resume):
+    """Atomically move a run to En proceso, False if it is not runnable"""
+    criteria = _corridas.c.estado == 'Pendiente'
+    if resume:
+        limite = datetime.utcnow() - INTERRUMPIDA
+        criteria = or_(
+            _corridas.c.estado == 'Error',
+            _corridas.c.estado.in_(('Pendiente', 'En proceso')) & (_corridas.c.actualizado < limite)
+        )
+    result = db.session.execute(
+        update(_corridas).where(_corridas.c.id == corrida_id, criteria)
+        .values(estado='En proceso', error=None, actualizado=datetime.utcnow())
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def _insert_chunk(corrida_id, comunes, chunk):
+    folios = reserve_folios('RN', ReciboNomina, len(chunk))
+    ahora = datetime.utcnow()
+    db.session.execute(insert(_recibos), [
+        {
+            **comunes,
+            'folio': folio,
+            'empleado_id': empleado_id,
+            'salario_base': _money(base),
+            'horas_extra': horas_extra,
+            'bonos': _money(bonos),
+            'deducciones': _money(deducciones),
+            'total_bruto': _money(bruto),
+            'total_neto': _money(neto),
+            'corrida_id': corrida_id,
+            'fecha_creacion': ahora
+        }
+        for folio, (empleado_id, base, horas_extra, bonos, deducciones, bruto, neto) in zip(folios, chunk)
+    ])
+    contadores.added(ReciboNomina, len(chunk))
+    db.session.execute(
+        update(_corridas).where(_corridas.c.id == corrida_id)
+        .values(procesados=_corridas.c.procesados + len(chunk), actualizado=ahora)
+    )
+    eventos.publish('recibo_nomina')
+
+
+def _post_entry(corrida):
+    """Consolidated journal entry of every receipt in the run, returns the totals"""
+    totales = db.session.execute(
+        select(
+            db.func.count(),
+            db.func.coalesce(db.func.sum(_recibos.c.total_bruto), 0),
+            db.func.coalesce(db.func.sum(_recibos.c.deducciones), 0),
+            db.func.coalesce(db.func.sum(_recibos.c.total_neto), 0)
+        ).where(_recibos.c.corrida_id == corrida.id)
+    ).one()
+    recibos, bruto, deducciones, neto = totales[0], *(Decimal(str(v)) for v in totales[1:])
+
+    asiento_id = None
+    if recibos:
+        cierres.ensure_open(corrida.fecha)
+        concepto = f'Nómina {corrida.periodo_inicio.isoformat()} a {corrida.periodo_fin.isoformat()}'
+        movimientos = [(CUENTA_SUELDOS, bruto, Decimal('0')), (CUENTA_NOMINA, Decimal('0'), neto)]
+        if deducciones:
+            movimientos.append((CUENTA_RETENCIONES, Decimal('0'), deducciones))
+        asiento = AsientoContable(
+            folio=reserve_folios('AC', AsientoContable)[0],
+            fecha=corrida.fecha,
+            mes=corrida.fecha.month,
+            anio=corrida.fecha.year,
+            concepto=concepto,
+            total_debe=bruto,
+            total_haber=neto + deducciones,
+            estado='Aplicado'
+        )
+        db.session.add(asiento)
+        db.session.flush()  # Get the ID
+        contadores.added(AsientoContable)
+        db.session.execute(insert(MovimientoContable.__table__), [
+            {'asiento_id': asiento.id, 'cuenta': cuenta, 'debe': debe, 'haber': haber, 'concepto': concepto}
+            for cuenta, debe, haber in movimientos
+        ])
+        balanza.post_movements(asiento.anio, asiento.mes, movimientos, asiento.estado)
+        asiento_id = asiento.id
+
+    db.session.execute(update(_corridas).where(_corridas.c.id == corrida.id).values(
+        estado='Terminada',
+        procesados=recibos,
+        total_bruto=bruto,
+        total_deducciones=deducciones,
+        total_neto=neto,
+        asiento_id=asiento_id,
+        actualizado=datetime.utcnow(),
+        fecha_fin=datetime.utcnow()
+    ))
+    eventos.publish('corrida_nomina', corrida)
+
+
+def run(corrida_id, resume=False, chunk_size=CHUNK_SIZE, progress=None):
+    """Compute and insert every pending receipt of a run, then post its journal entry"""
+    if not _claim(corrida_id, resume):
+        raise CorridaConflicto(f'La corrida {corrida_id} no está pendiente ni interrumpida')
+    corrida = db.session.get(CorridaNomina, corrida_id)
+    try:
+        pagados = set(db.session.execute(
+            select(_recibos.c.empleado_id).where(_recibos.c.corrida_id == corrida_id)
+        ).scalars())
+        empleados = [
+            row for row in db.session.execute(_payable().order_by(Empleado.id)) if row.id not in pagados
+        ]
+        recibos = compute_receipts(empleados, corrida.dias, json.loads(corrida.incidencias or '{}'))
+        # Read once: committing a chunk expires the ORM object
+        comunes = {'fecha': corrida.fecha, 'periodo_inicio': corrida.periodo_inicio, 'periodo_fin': corrida.periodo_fin}
+
+        for inicio in range(0, len(recibos), chunk_size):
+            _insert_chunk(corrida_id, comunes, recibos[inicio:inicio + chunk_size])
+            db.session.commit()
+            if progress:
+                progress(len(pagados) + min(inicio + chunk_size, len(recibos)), len(pagados) + len(recibos))
+
+        _post_entry(corrida)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        db.session.execute(update(_corridas).where(_corridas.c.id == corrida_id).values(
+            estado='Error', error=str(e), actualizado=datetime.utcnow()
+        ))
+        db.session.commit()
+        raise
+    return corrida
+
+
+def serialize(corrida):
+    return {
+        'id': corrida.id,
+        'fecha': corrida.fecha.isoformat(),
+        'periodo_inicio': corrida.periodo_inicio.isoformat(),
+        'periodo_fin': corrida.periodo_fin.isoformat(),
+        'dias': corrida.dias,
+        'estado': corrida.estado,
+        'empleados': corrida.empleados,
+        'procesados': corrida.procesados,
+        'avance': round(100 * corrida.procesados / corrida.empleados, 1) if corrida.empleados else 100.0,
+        'total_bruto': float(corrida.total_bruto),
+        'total_deducciones': float(corrida.total_deducciones),
+        'total_neto': float(corrida.total_neto),
+        'asiento_id': corrida.asiento_id,
+        'error': corrida.error,
+        'fecha_creacion': corrida.fecha_creacion.isoformat() if corrida.fecha_creacion else None,
+        'fecha_fin': corrida.fecha_fin.isoformat() if corrida.fecha_fin else None
+    }
+
+
+if __name__ == '__main__':
+    comando = sys.argv[1] if len(sys.argv) > 1 else None
+    app = create_app()
+    with app.app_context():
+        avance = lambda hechos, total: print(f"   {hechos}/{total} recibos...")
+        try:
+            if comando == 'correr' and len(sys.argv) in (4, 5):
+                corrida = create_run({
+                    'periodo_inicio': sys.argv[2],
+                    'periodo_fin': sys.argv[3],
+                    'fecha': sys.argv[4] if len(sys.argv) == 5 else None
+                })
+                db.session.commit()
+                corrida = run(corrida.id, progress=avance)
+            elif comando == 'reanudar' and len(sys.argv) == 3:
+                corrida = run(int(sys.argv[2]), resume=True, progress=avance)
+            elif comando == 'lista':
+                for corrida in db.session.query(CorridaNomina).order_by(CorridaNomina.id.desc()):
+                    print(f"🧾 {corrida.id}: {corrida.periodo_inicio} a {corrida.periodo_fin} "
+                          f"{corrida.estado} ({corrida.procesados}/{corrida.empleados})")
+                sys.exit(0)
+            else:
+                print(__doc__)
+                sys.exit(2)
+        except ValueError as e:
+            print(f"⚠️  {e}")
+            sys.exit(1)
+        print(f"✅ Corrida {corrida.id}: {corrida.procesados} recibos, neto {corrida.total_neto}")
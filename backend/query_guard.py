@@ -0,0 +1,80 @@
+"""
+Control del número de sentencias SQL por solicitud
+
+Cada sentencia que ejecuta cualquier engine se cuenta en el contador activo
+del hilo. query_budget(n) declara el máximo de sentencias que una ruta puede
+emitir; con QUERY_BUDGET_ENFORCE activado, exceder el presupuesto produce un
+error (útil en desarrollo y pruebas para detectar consultas N+1), de lo
+contrario solo se registra una advertencia. count_queries() permite medir
+cualquier bloque de código fuera de una solicitud.
+"""
+
+import functools
+import os
+import threading
+from contextlib import contextmanager
+from flask import current_app, make_response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_local = threading.local()
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A route issued more SQL statements than its declared budget"""
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    for counter in getattr(_local, 'counters', ()):
+        counter.count += 1
+        counter.statements.append(statement)
+
+
+@contextmanager
+def count_queries():
+    """Count SQL statements executed by the current thread inside the block"""
+    counter = QueryCounter()
+    counters = getattr(_local, 'counters', None)
+    if counters is None:
+        counters = _local.counters = []
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+def query_budget(max_statements):
+    """Declare the maximum number of SQL statements a route may issue"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with count_queries() as counter:
+                response = make_response(view(*args, **kwargs))
+
+            if current_app.config.get('QUERY_BUDGET_ENFORCE'):
+                response.headers['X-Query-Count'] = str(counter.count)
+            if counter.count > max_statements:
+                message = (f'{view.__name__} issued {counter.count} SQL statements '
+                           f'(budget {max_statements})')
+                if current_app.config.get('QUERY_BUDGET_ENFORCE'):
+                    raise QueryBudgetExceeded(message + ':\n' + '\n'.join(counter.statements))
+                current_app.logger.warning(message)
+            return response
+        return wrapper
+    return decorator
+
+
+def configure(app):
+    """Read the enforcement flag from the environment"""
+    app.config.setdefault(
+        'QUERY_BUDGET_ENFORCE',
+        os.getenv('QUERY_BUDGET_ENFORCE', '').lower() in ('1', 'true', 'yes')
+    )
@@ -0,0 +1,226 @@
+"""
+Reportes agregados de ventas y compras (GROUP BY en la base de datos)
+
+/api/reportes/ventas y /api/reportes/compras agrupan por las dimensiones de
+?por= y calculan las medidas de ?medidas= con una sola consulta GROUP BY; los
+nombres de clientes, proveedores y artículos se agregan con un JOIN sobre el
+resultado ya agrupado. Si ninguna dimensión, medida o filtro necesita los
+detalles, la consulta agrupa directamente las facturas, que tienen un
+renglón por factura en lugar de uno por artículo.
+
+Dimensiones: cliente | proveedor, articulo, anio, mes, estado
+Medidas: subtotal, iva, total, cantidad, facturas, renglones
+Filtros: desde, hasta, anio, mes, estado, cliente_id | proveedor_id, articulo_id
+Orden: ?orden=<medida> ordena de mayor a menor (con ?limit= da un top N)
+
+Con detalles, el IVA de cada renglón es la parte proporcional del IVA de su
+factura (subtotal del renglón / subtotal de la factura), así que los totales
+coinciden con los de las facturas.
+"""
+
+from datetime import date
+from sqlalchemy import case, extract, select
+from database import db
+from models import (ArticuloInventario, Cliente, DetalleFacturaCompra, DetalleFacturaVenta,
+                    FacturaCompra, FacturaVenta, Proveedor)
+
+MAX_FILAS = 50000
+MEDIDAS_DEFAULT = ('total',)
+
+REPORTES = {
+    'ventas': {
+        'factura': FacturaVenta,
+        'detalle': DetalleFacturaVenta,
+        'detalle_fk': DetalleFacturaVenta.factura_venta_id,
+        'tercero': 'cliente',
+        'tercero_fk': FacturaVenta.cliente_id,
+        'tercero_model': Cliente
+    },
+    'compras': {
+        'factura': FacturaCompra,
+        'detalle': DetalleFacturaCompra,
+        'detalle_fk': DetalleFacturaCompra.factura_compra_id,
+        'tercero': 'proveedor',
+        'tercero_fk': FacturaCompra.proveedor_id,
+        'tercero_model': Proveedor
+    },
+}
+
+# Measures that only exist at the detail grain
+MEDIDAS_DETALLE = {'cantidad', 'renglones'}
+MEDIDAS = ('subtotal', 'iva', 'total', 'cantidad', 'facturas', 'renglones')
+
+
+class ReporteError(ValueError):
+    """Invalid report parameter, reported to the client as HTTP 400"""
+
+
+def _split(raw):
+    return [valor.strip() for valor in (raw or '').split(',') if valor.strip()]
+
+
+def _dimensions(reporte, detalle):
+    factura = reporte['factura']
+    dimensiones = {
+        reporte['tercero']: reporte['tercero_fk'].label(f"{reporte['tercero']}_id"),
+        'anio': extract('year', factura.fecha).label('anio'),
+        'mes': extract('month', factura.fecha).label('mes'),
+        'estado': factura.estado.label('estado')
+    }
+    if detalle is not None:
+        dimensiones['articulo'] = detalle.articulo_id.label('articulo_id')
+    return dimensiones
+
+
+def _measures(reporte, detalle):
+    factura = reporte['factura']
+    iva = db.func.coalesce(factura.iva, 0)
+    if detalle is None:
+        return {
+            'subtotal': db.func.sum(factura.subtotal),
+            'iva': db.func.sum(iva),
+            'total': db.func.sum(factura.total),
+            'facturas': db.func.count(factura.id)
+        }
+    # Share of the invoice IVA that belongs to each detail row
+    iva_renglon = case((factura.subtotal != 0, detalle.subtotal * iva / factura.subtotal), else_=0)
+    return {
+        'subtotal': db.func.sum(detalle.subtotal),
+        'iva': db.func.sum(iva_renglon),
+        'total': db.func.sum(detalle.subtotal + iva_renglon),
+        'cantidad': db.func.sum(detalle.cantidad),
+        'facturas': db.func.count(db.distinct(factura.id)),
+        'renglones': db.func.count(detalle.id)
+    }
+
+
+def _criteria(reporte, args):
+    factura = reporte['factura']
+    criteria = []
+    try:
+        desde = date.fromisoformat(args['desde']) if args.get('desde') else None
+        hasta = date.fromisoformat(args['hasta']) if args.get('hasta') else None
+        anio = int(args['anio']) if args.get('anio') else None
+        mes = int(args['mes']) if args.get('mes') else None
+        tercero_id = args.get(f"{reporte['tercero']}_id", type=int)
+        articulo_id = args.get('articulo_id', type=int)
+    except ValueError as e:
+        raise ReporteError(f'Filtro inválido: {e}')
+
+    # Year and month become date ranges so the fecha index is used
+    if mes is not None:
+        if anio is None or not 1 <= mes <= 12:
+            raise ReporteError('mes requiere anio y debe estar entre 1 y 12')
+        siguiente = date(anio + mes // 12, mes % 12 + 1, 1)
+        criteria += [factura.fecha >= date(anio, mes, 1), factura.fecha < siguiente]
+    elif anio is not None:
+        criteria += [factura.fecha >= date(anio, 1, 1), factura.fecha < date(anio + 1, 1, 1)]
+    if desde:
+        criteria.append(factura.fecha >= desde)
+    if hasta:
+        criteria.append(factura.fecha <= hasta)
+    if args.get('estado'):
+        criteria.append(factura.estado == args['estado'])
+    if tercero_id is not None:
+        criteria.append(reporte['tercero_fk'] == tercero_id)
+    return criteria, articulo_id
+
+
+def build_query(nombre, args):
+    """Build the aggregate query for the request arguments, returns (query, dimensions, measures, limit)"""
+    reporte = REPORTES[nombre]
+    por = _split(args.get('por'))
+    medidas = _split(args.get('medidas')) or list(MEDIDAS_DEFAULT)
+    orden = args.get('orden')
+    limit = args.get('limit', MAX_FILAS, type=int)
+
+    desconocidas = [m for m in medidas if m not in MEDIDAS]
+    if desconocidas:
+        raise ReporteError(f"Medidas desconocidas: {', '.join(desconocidas)}")
+    if orden and orden not in medidas:
+        raise ReporteError('orden debe ser una de las medidas solicitadas')
+    if not 1 <= limit <= MAX_FILAS:
+        raise ReporteError(f'limit debe estar entre 1 y {MAX_FILAS}')
+    criteria, articulo_id = _criteria(reporte, args)
+
+    usa_detalle = 'articulo' in por or articulo_id is not None or MEDIDAS_DETALLE & set(medidas)
+    detalle = reporte['detalle'] if usa_detalle else None
+    dimensiones = _dimensions(reporte, detalle)
+    desconocidas = [d for d in por if d not in dimensiones]
+    if desconocidas:
+        raise ReporteError(f"Dimensiones desconocidas: {', '.join(desconocidas)}")
+    if articulo_id is not None:
+        criteria.append(detalle.articulo_id == articulo_id)
+
+    columnas = [dimensiones[d] for d in por]
+    expresiones = _measures(reporte, detalle)
+    query = select(*columnas, *(expresiones[m].label(m) for m in medidas))
+    if detalle is not None:
+        query = query.select_from(detalle).join(reporte['factura'], reporte['detalle_fk'] == reporte['factura'].id)
+    else:
+        query = query.select_from(reporte['factura'])
+    query = query.where(*criteria).group_by(*columnas)
+
+    # Names are joined after grouping, on one row per group
+    agrupado = query.subquery()
+    seleccion = [agrupado]
+    joins = []
+    if reporte['tercero'] in por:
+        tercero = reporte['tercero_model']
+        seleccion.append(tercero.nombre.label(f"{reporte['tercero']}_nombre"))
+        joins.append((tercero, tercero.id == agrupado.c[f"{reporte['tercero']}_id"]))
+    if 'articulo' in por:
+        seleccion.append(ArticuloInventario.nombre.label('articulo_nombre'))
+        joins.append((ArticuloInventario, ArticuloInventario.id == agrupado.c.articulo_id))
+    final = select(*seleccion).select_from(agrupado)
+    for model, condition in joins:
+        final = final.outerjoin(model, condition)
+
+    if orden:
+        final = final.order_by(agrupado.c[orden].desc(), *(agrupado.c[c.name] for c in columnas))
+    else:
+        final = final.order_by(*(agrupado.c[c.name] for c in columnas))
+    # One extra row tells whether the result was truncated
+    return final.limit(limit + 1), por, medidas, limit
+
+
+def _as_amount(value):
+    return round(float(value), 2) if value is not None else 0.0
+
+
+def _as_int(value):
+    return int(value) if value is not None else None
+
+
+def _as_count(value):
+    return int(value) if value is not None else 0
+
+
+def _converter(key, medidas):
+    if key in ('subtotal', 'iva', 'total') and key in medidas:
+        return _as_amount
+    if key in medidas:
+        return _as_count
+    if key in ('anio', 'mes'):
+        return _as_int
+    return None
+
+
+def run_report(nombre, args):
+    """Execute a report for the request arguments and serialize it"""
+    query, por, medidas, limit = build_query(nombre, args)
+    result = db.session.execute(query)
+    keys = list(result.keys())
+    converters = [_converter(key, medidas) for key in keys]
+    rows = result.all()
+    filas = [
+        {key: convert(value) if convert else value for key, convert, value in zip(keys, converters, row)}
+        for row in rows[:limit]
+    ]
+    return {
+        'reporte': nombre,
+        'dimensiones': por,
+        'medidas': medidas,
+        'filas': filas,
+        'truncado': len(rows) > limit
+    }
@@ -0,0 +1,208 @@
+"""
+Caché de respuestas para los listados de catálogos y los reportes
+
+Los listados de clientes, proveedores, artículos, cuentas bancarias y
+empleados, y los reportes agregados, se guardan en caché por ruta y
+parámetros. Cada tabla tiene un número de versión en contadores_tabla que las
+rutas de escritura incrementan en la misma transacción (contadores.added al
+insertar, bump al modificar). Las versiones de las tablas que lee la ruta
+forman parte de la llave y del ETag, así que una escritura invalida todas las
+respuestas que dependen de esa tabla sin borrar nada. Si el navegador envía
+If-None-Match con el ETag vigente se responde 304 sin consultar las tablas.
+
+El almacenamiento se elige con RESPONSE_CACHE:
+    memory (por defecto)       LRU en el proceso con expiración (TTL)
+    redis://host:puerto/db     servidor compatible con Redis (requiere redis-py)
+    off                        sin caché
+"""
+
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import Response, current_app, make_response, request
+from sqlalchemy import select
+from database import db
+from listing import EXPOSED_HEADERS, wants_stream
+from models import ContadorTabla
+import upsert
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 512
+# Bump when the serialized shape of a cached listing changes
+FORMATO = 1
+
+CACHED_HEADERS = ['Content-Type'] + EXPOSED_HEADERS
+
+_contadores = ContadorTabla.__table__
+
+
+def bump(*models):
+    """Invalidate the cached listings of these tables (inside the current transaction)"""
+    upsert.increment_many(_contadores, ('tabla',), [
+        {'tabla': model.__tablename__, 'version': 1} for model in models
+    ])
+
+
+def table_versions(models):
+    """Versions of several tables with one query"""
+    tablas = [model.__tablename__ for model in models]
+    versiones = dict(db.session.execute(
+        select(_contadores.c.tabla, _contadores.c.version).where(_contadores.c.tabla.in_(tablas))
+    ).all())
+    return [versiones.get(tabla, 0) for tabla in tablas]
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU with a time to live per entry"""
+    name = 'memory'
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Shared cache on a Redis-compatible server, entries expire after the TTL"""
+    name = 'redis'
+
+    def __init__(self, url, ttl=DEFAULT_TTL):
+        try:
+            import redis
+        except ImportError:
+            raise ValueError(f'RESPONSE_CACHE={url} requiere el paquete redis (pip install redis), '
+                             'o usa RESPONSE_CACHE=memory') from None
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key):
+        raw = self.client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value):
+        self.client.set(key, json.dumps(value), ex=self.ttl)
+
+    def __len__(self):
+        return self.client.dbsize()
+
+
+class CacheStats:
+    """Per-route hit, miss and 304 counters of this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, route, outcome):
+        with self._lock:
+            counters = self.routes.setdefault(route, {'hits': 0, 'misses': 0, 'not_modified': 0})
+            counters[outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            routes = {route: dict(counters) for route, counters in self.routes.items()}
+        totals = {'hits': 0, 'misses': 0, 'not_modified': 0}
+        for counters in routes.values():
+            for outcome, value in counters.items():
+                totals[outcome] += value
+        served = totals['hits'] + totals['not_modified']
+        lookups = served + totals['misses']
+        totals['hit_rate'] = round(served / lookups, 4) if lookups else 0.0
+        return dict(totals, rutas=routes)
+
+
+stats = CacheStats()
+
+
+def create_backend(setting, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+    if setting in ('', 'off', 'none'):
+        return None
+    if setting == 'memory':
+        return MemoryBackend(max_entries, ttl)
+    if setting.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(setting, ttl)
+    raise ValueError(f'RESPONSE_CACHE desconocido: {setting}')
+
+
+def configure(app):
+    """Build the cache backend from the environment"""
+    app.extensions['response_cache'] = create_backend(
+        os.getenv('RESPONSE_CACHE', 'memory'),
+        ttl=int(os.getenv('RESPONSE_CACHE_TTL', DEFAULT_TTL)),
+        max_entries=int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+    )
+
+
+def get_backend():
+    return current_app.extensions.get('response_cache')
+
+
+def _etag(models, versions):
+    query = '&'.join(sorted(f'{k}={v}' for k, v in request.args.items(multi=True)))
+    tablas = ','.join(f'{model.__tablename__}={version}' for model, version in zip(models, versions))
+    raw = f'{FORMATO}:{tablas}:{request.path}?{query}'
+    return hashlib.sha1(raw.encode()).hexdigest()[:24]
+
+
+def cached_response(*models):
+    """Serve a response from the cache, keyed on the versions of the tables it reads and the query string"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            backend = get_backend()
+            if backend is None or wants_stream():
+                return view(*args, **kwargs)
+
+            etag = _etag(models, table_versions(models))
+            if request.if_none_match.contains(etag):
+                stats.record(request.path, 'not_modified')
+                response = Response(status=304)
+            else:
+                entry = backend.get(f'respuesta:{etag}')
+                if entry is not None:
+                    stats.record(request.path, 'hits')
+                    response = Response(entry['body'], status=entry['status'], headers=entry['headers'])
+                else:
+                    stats.record(request.path, 'misses')
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    backend.set(f'respuesta:{etag}', {
+                        'status': response.status_code,
+                        'headers': [(h, response.headers[h]) for h in CACHED_HEADERS if h in response.headers],
+                        'body': response.get_data(as_text=True)
+                    })
+
+            response.set_etag(etag)
+            # Browsers revalidate every time, so a create is visible on the next modal open
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
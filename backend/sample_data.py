@@ -4,6 +4,11 @@ Script para insertar datos de muestra en el Sistema Contable
 """
 
 from app import app, db
+import balanza
+import contadores
+import dashboard
+import inventario
+import migrations
 from models import *
 from datetime import datetime, date
 from decimal import Decimal
@@ -15,7 +20,7 @@ def create_sample_data():
         # Limpiar datos existentes
         print("Limpiando datos existentes...")
         db.drop_all()
-        db.create_all()
+        migrations.upgrade()
         
         # Crear clientes de muestra
         print("Creando clientes...")
@@ -234,10 +239,10 @@ def create_sample_data():
         # Crear algunos asientos contables
         print("Creando asientos contables...")
         asientos = [
-            AsientoContable(folio="AC202401001", fecha=date(2024, 1, 15), 
+            AsientoContable(folio="AC202401001", fecha=date(2024, 1, 15), mes=1, anio=2024, 
                            concepto="Venta de productos", total_debe=Decimal('1740.00'), 
                            total_haber=Decimal('1740.00'), estado="Aplicado"),
-            AsientoContable(folio="AC202401002", fecha=date(2024, 1, 10), 
+            AsientoContable(folio="AC202401002", fecha=date(2024, 1, 10), mes=1, anio=2024, 
                            concepto="Compra de mercancía", total_debe=Decimal('2320.00'), 
                            total_haber=Decimal('2320.00'), estado="Aplicado")
         ]
@@ -273,6 +278,12 @@ def create_sample_data():
         # Guardar todos los cambios
         print("Guardando datos en la base de datos...")
         db.session.commit()
+        # Maintained state, as the data generator does after its bulk inserts
+        inventario.open_balances()
+        balanza.rebuild()
+        dashboard.rebuild_snapshot()
+        contadores.reconcile(fix=True)
+        db.session.commit()
         
         print("✅ Datos de muestra creados exitosamente!")
         print("\n📊 Resumen de datos creados:")
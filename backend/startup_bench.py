@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Medición del arranque en frío de la aplicación
+
+Cada corrida importa app.py en un proceso nuevo y atiende una primera
+solicitud con el cliente de pruebas de Flask. Reporta la mediana del tiempo de
+importación, del tiempo hasta la primera respuesta y las sentencias SQL
+emitidas durante la importación (debe ser 0: el esquema lo maneja
+migrations.py) y durante la primera solicitud.
+
+Uso:
+    python startup_bench.py [corridas] [ruta]   # por defecto 5 /api/dashboard/summary
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = """
+import json, sys, time
+inicio = time.perf_counter()
+import query_guard
+with query_guard.count_queries() as importacion:
+    from app import app
+importado = time.perf_counter()
+with query_guard.count_queries() as solicitud:
+    status = app.test_client().get(sys.argv[1]).status_code
+fin = time.perf_counter()
+print(json.dumps({
+    'import_ms': (importado - inicio) * 1000,
+    'first_request_ms': (fin - importado) * 1000,
+    'total_ms': (fin - inicio) * 1000,
+    'import_queries': importacion.count,
+    'request_queries': solicitud.count,
+    'status': status
+}))
+"""
+
+
+def run_once(path):
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD, path],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    corridas = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    path = sys.argv[2] if len(sys.argv) > 2 else '/api/dashboard/summary'
+    resultados = [run_once(path) for _ in range(corridas)]
+
+    print(f"Arranque en frío ({corridas} corridas, primera solicitud GET {path})")
+    for campo, etiqueta in (('import_ms', 'importar app'), ('first_request_ms', 'primera solicitud'),
+                            ('total_ms', 'total')):
+        print(f"  {etiqueta:<20}{statistics.median(r[campo] for r in resultados):>10.1f} ms")
+    print(f"  {'SQL al importar':<20}{max(r['import_queries'] for r in resultados):>10}")
+    print(f"  {'SQL 1a solicitud':<20}{max(r['request_queries'] for r in resultados):>10}")
+    print(f"  {'estado HTTP':<20}{resultados[-1]['status']:>10}")
@@ -0,0 +1,112 @@
+"""
+Configuración común de las pruebas
+
+Las pruebas usan una base SQLite temporal, o la de TEST_DATABASE_URL si se
+define (p. ej. un MySQL desechable para las pruebas de concurrencia). Cada
+prueba parte de un esquema vacío recién migrado y de una caché de
+respuestas vacía.
+
+Uso (desde la raíz del proyecto):
+    python -m pytest backend/tests
+    TEST_DATABASE_URL=mysql+pymysql://root@localhost/contable_pruebas python -m pytest backend/tests
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+# Before the app is imported: the engine is built from the environment on import
+os.environ['DATABASE_URL'] = (
+    os.getenv('TEST_DATABASE_URL') or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'pruebas.db')}"
+)
+for variable in ('METRICS', 'SLOW_QUERY_MS', 'PROFILER', 'RESPONSE_CACHE', 'QUERY_BUDGET_ENFORCE'):
+    os.environ.pop(variable, None)
+
+import pytest
+from app import app as flask_app
+from benchmark.generador import conteos_para, generate
+from database import db
+import folios
+import migrations
+import nomina
+import response_cache
+import trabajos
+
+
+def run_concurrently(app, fn, hilos):
+    """Run fn(client, n) for n in range(hilos), one thread each released together, returns the results by n"""
+    salida = threading.Barrier(hilos)
+    resultados, errores = [None] * hilos, []
+
+    def worker(n):
+        client = app.test_client()
+        salida.wait()
+        try:
+            resultados[n] = fn(client, n)
+        except Exception as e:
+            errores.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(hilos)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errores:
+        raise errores[0]
+    return resultados
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+        # Pooled SQLite connections opened by other threads keep the old
+        # schema cached and PRAGMA index_list does not reload it
+        db.engine.dispose()
+        migrations.upgrade()
+        # Cached entries are keyed on table versions, which start over with the schema
+        response_cache.configure(flask_app)
+        # Folio counters are assumed never to be deleted, which a fresh schema breaks
+        folios._existentes.clear()
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def catalogos(client):
+    """One client, supplier, bank account and article created through the API, returns their ids"""
+    ids = {
+        'cliente_id': client.post('/api/clientes', json={'nombre': 'Cliente de prueba'}).get_json()['id'],
+        'proveedor_id': client.post('/api/proveedores', json={'nombre': 'Proveedor de prueba'}).get_json()['id'],
+        'cuenta_bancaria_id': client.post('/api/cuentas-bancarias', json={
+            'nombre': 'Cuenta de prueba', 'banco': 'Banco', 'numero_cuenta': '0001', 'saldo_inicial': '1000.00'
+        }).get_json()['id'],
+        'articulo_id': client.post('/api/articulos', json={
+            'codigo': 'ART-1', 'nombre': 'Artículo de prueba', 'precio_compra': 8, 'precio_venta': 10,
+            'stock_actual': 1000, 'stock_minimo': 5
+        }).get_json()['id'],
+    }
+    return ids
+
+
+@pytest.fixture
+def datos(app):
+    """Every table filled by the benchmark generator, plus a finished payroll run and a job, returns the row counts"""
+    conteos = conteos_para(200)
+    generate(conteos, borrar=True)
+    corrida = nomina.create_run({'periodo_inicio': '2024-12-16', 'periodo_fin': '2024-12-31'})
+    db.session.commit()
+    nomina.run(corrida.id)
+    trabajos.submit('eco', {})
+    db.session.commit()
+    return conteos
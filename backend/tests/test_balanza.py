@@ -0,0 +1,45 @@
+from datetime import date
+from decimal import Decimal
+import pytest
+from database import db
+from models import ArticuloInventario, AsientoContable, FacturaCompra, FacturaVenta, MovimientoContable
+import balanza
+
+HOY = date.today()
+
+
+def _factura(tercero, ids):
+    return {
+        'fecha': HOY.isoformat(), tercero: ids[tercero],
+        'detalles': [{'articulo_id': ids['articulo_id'], 'cantidad': 2, 'precio_unitario': 10}]
+    }
+
+
+def _count(model):
+    return db.session.query(db.func.count(model.id)).scalar()
+
+
+@pytest.mark.parametrize('ruta,tercero,model', [
+    ('/api/facturas-venta', 'cliente_id', FacturaVenta),
+    ('/api/facturas-compra', 'proveedor_id', FacturaCompra),
+])
+def test_failed_balance_update_rolls_back_the_invoice(client, catalogos, monkeypatch, ruta, tercero, model):
+    def falla(*args, **kwargs):
+        raise RuntimeError('saldos_cuenta no disponible')
+
+    monkeypatch.setattr(balanza, 'post_movements', falla)
+    response = client.post(ruta, json=_factura(tercero, catalogos))
+    assert response.status_code == 500
+    assert 'saldos_cuenta' in response.get_json()['error']
+
+    db.session.expire_all()
+    assert (_count(model), _count(AsientoContable), _count(MovimientoContable)) == (0, 0, 0)
+    assert db.session.get(ArticuloInventario, catalogos['articulo_id']).stock_actual == 1000
+    assert balanza.trial_balance(HOY.year, HOY.month) == []
+
+
+def test_invoice_entries_reach_the_trial_balance(client, catalogos):
+    assert client.post('/api/facturas-venta', json=_factura('cliente_id', catalogos)).status_code == 201
+    assert client.post('/api/facturas-compra', json=_factura('proveedor_id', catalogos)).status_code == 201
+    cuentas = balanza.trial_balance(HOY.year, HOY.month)
+    assert sum(c['debe'] for c in cuentas) == sum(c['haber'] for c in cuentas) == Decimal('46.00')
@@ -0,0 +1,39 @@
+from datetime import date
+from decimal import Decimal
+from database import db
+from models import CuentaBancaria
+import bancos
+from conftest import run_concurrently
+
+HILOS = 8
+MOVIMIENTOS_POR_HILO = 25
+RECIBO, PAGO = Decimal('12.34'), Decimal('7.89')
+
+
+def test_concurrent_receipts_and_payments_give_the_exact_balance(app, catalogos):
+    cuenta_id = catalogos['cuenta_bancaria_id']
+    base = {'fecha': date.today().isoformat(), 'cuenta_bancaria_id': cuenta_id}
+
+    def mover(client, n):
+        # Half the threads receive and half pay, all on the same account
+        if n % 2:
+            ruta, cuerpo = '/api/recibos', dict(base, cliente_id=catalogos['cliente_id'], monto=str(RECIBO))
+        else:
+            ruta, cuerpo = '/api/pagos', dict(base, proveedor_id=catalogos['proveedor_id'], monto=str(PAGO))
+        return [client.post(ruta, json=cuerpo).status_code for _ in range(MOVIMIENTOS_POR_HILO)]
+
+    resultados = [status for hilo in run_concurrently(app, mover, HILOS) for status in hilo]
+    assert resultados == [201] * HILOS * MOVIMIENTOS_POR_HILO
+    movimientos = HILOS // 2 * MOVIMIENTOS_POR_HILO
+    saldo = db.session.get(CuentaBancaria, cuenta_id).saldo_actual
+    assert Decimal(str(saldo)) == Decimal('1000.00') + movimientos * (RECIBO - PAGO)
+    assert bancos.check_consistency() == {}
+
+
+def test_movement_on_a_missing_account_is_rejected(client, catalogos):
+    response = client.post('/api/recibos', json={
+        'fecha': date.today().isoformat(), 'cliente_id': catalogos['cliente_id'],
+        'cuenta_bancaria_id': 999, 'monto': '10'
+    })
+    assert response.status_code == 400
+    assert bancos.check_consistency() == {}
@@ -0,0 +1,50 @@
+from datetime import date
+import pytest
+from bulk_import import TIPOS, RowError, parse_row
+
+
+def _fila(cantidad, precio_unitario='10.00'):
+    return {
+        'fecha': date.today().isoformat(), 'cliente_id': 1,
+        'detalles': [{'articulo_id': 1, 'cantidad': cantidad, 'precio_unitario': precio_unitario}]
+    }
+
+
+@pytest.mark.parametrize('cantidad, esperada', [(3, 3), ('3', 3), (3.0, 3), ('2.00', 2)])
+def test_whole_quantities_are_accepted(cantidad, esperada):
+    assert parse_row(TIPOS['venta'], _fila(cantidad))['detalles'][0]['cantidad'] == esperada
+
+
+@pytest.mark.parametrize('cantidad', [2.5, '2.5', '0.1', 'dos', None, True, float('inf'), 0, -1])
+def test_fractional_or_invalid_quantities_are_rejected(cantidad):
+    with pytest.raises(RowError):
+        parse_row(TIPOS['venta'], _fila(cantidad))
+
+
+@pytest.mark.parametrize('precio_unitario', ['NaN', 'Infinity', '-Infinity', 'sNaN'])
+def test_non_finite_prices_are_rejected(precio_unitario):
+    with pytest.raises(RowError, match='precio_unitario'):
+        parse_row(TIPOS['venta'], _fila(1, precio_unitario))
+
+
+def test_fractional_quantity_fails_only_its_row(client, catalogos):
+    filas = [_fila(1), _fila(2.5)]
+    for fila in filas:
+        fila['cliente_id'] = catalogos['cliente_id']
+        fila['detalles'][0]['articulo_id'] = catalogos['articulo_id']
+    response = client.post('/api/facturas-venta/bulk', json=filas)
+    assert response.status_code == 201
+    datos = response.get_json()
+    assert (datos['creadas'], datos['errores']) == (1, 1)
+    assert 'entero' in datos['resultados'][1]['error']
+
+
+def test_non_finite_price_fails_only_its_row(client, catalogos):
+    filas = [_fila(1), _fila(1, 'NaN'), _fila(1, 'Infinity')]
+    for fila in filas:
+        fila['cliente_id'] = catalogos['cliente_id']
+        fila['detalles'][0]['articulo_id'] = catalogos['articulo_id']
+    response = client.post('/api/facturas-venta/bulk', json=filas)
+    assert response.status_code == 201
+    datos = response.get_json()
+    assert (datos['creadas'], datos['errores']) == (1, 2)
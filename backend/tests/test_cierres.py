@@ -0,0 +1,85 @@
+import os
+from datetime import date
+import pytest
+from database import db
+from models import AsientoContable
+from conftest import run_concurrently
+import cierres
+
+HILOS = 4
+FACTURAS_POR_HILO = 15
+
+
+def _factura(catalogos, fecha):
+    return {
+        'fecha': fecha.isoformat(),
+        'cliente_id': catalogos['cliente_id'],
+        'detalles': [{'articulo_id': catalogos['articulo_id'], 'cantidad': 1, 'precio_unitario': 10}]
+    }
+
+
+def test_close_twice_is_a_conflict(client):
+    assert client.post('/api/periodos/2024/3/cerrar').status_code == 201
+    assert client.post('/api/periodos/2024/3/cerrar').status_code == 409
+    assert client.post('/api/periodos/2024/13/cerrar').status_code == 400
+
+
+@pytest.mark.skipif(os.environ['DATABASE_URL'].startswith('sqlite'),
+                    reason='SQLite takes no shared lock on the period check; set TEST_DATABASE_URL to a MySQL base')
+def test_close_during_writes_freezes_every_committed_entry(app, catalogos):
+    """Invoices racing the close either land in its snapshot or get a 409"""
+    hoy = date.today()
+    cuerpo = _factura(catalogos, hoy)
+
+    def escribir_o_cerrar(client, n):
+        # The last thread closes the period while the others keep writing
+        if n == HILOS:
+            return client.post(f'/api/periodos/{hoy.year}/{hoy.month}/cerrar')
+        return [client.post('/api/facturas-venta', json=cuerpo).status_code for _ in range(FACTURAS_POR_HILO)]
+
+    *escrituras, cierre = run_concurrently(app, escribir_o_cerrar, HILOS + 1)
+    resultados = [status for hilo in escrituras for status in hilo]
+
+    assert cierre.status_code == 201
+    assert set(resultados) <= {201, 409}
+    creadas = resultados.count(201)
+    en_base = db.session.query(db.func.count(AsientoContable.id)).filter_by(anio=hoy.year, mes=hoy.month).scalar()
+    assert cierre.get_json()['asientos'] == en_base == creadas
+    listado = app.test_client().get(f'/api/asientos-contables?anio={hoy.year}&mes={hoy.month}&count=1')
+    assert listado.headers['X-Total-Count'] == str(creadas)
+
+
+def test_closed_period_freezes_its_entries_and_rejects_new_ones(client, catalogos):
+    hoy = date.today()
+    cuerpo = _factura(catalogos, hoy)
+    assert client.post('/api/facturas-venta', json=cuerpo).status_code == 201
+    cierre = client.post(f'/api/periodos/{hoy.year}/{hoy.month}/cerrar')
+    assert cierre.status_code == 201 and cierre.get_json()['asientos'] == 1
+    assert client.post('/api/facturas-venta', json=cuerpo).status_code == 409
+
+
+def test_frozen_listing_cache_is_bounded_by_decoded_size(client, catalogos, monkeypatch):
+    monkeypatch.setattr(cierres, '_listados', cierres.OrderedDict())
+    monkeypatch.setattr(cierres, '_tamano_listados', 0)
+    for mes in (1, 2, 3):
+        for _ in range(mes):
+            assert client.post('/api/facturas-venta', json=_factura(catalogos, date(2024, mes, 10))).status_code == 201
+        assert client.post(f'/api/periodos/2024/{mes}/cerrar').status_code == 201
+
+    def leer(mes):
+        respuesta = client.get(f'/api/asientos-contables?anio=2024&mes={mes}&count=1')
+        assert respuesta.headers['X-Total-Count'] == str(mes)
+        return [(clave[1], tamano) for clave, (_, _, tamano) in cierres._listados.items()]
+
+    # Room for January and March but not February too: reading March evicts the least recently used
+    tamanos = dict(leer(1) + leer(2))
+    monkeypatch.setattr(cierres, 'MAX_LISTADOS_BYTES', tamanos[1] + 2 * tamanos[2])
+    leer(1)
+    assert [mes for mes, _ in leer(3)] == [1, 3]
+    assert cierres._tamano_listados == sum(tamano for _, tamano in leer(3)) <= cierres.MAX_LISTADOS_BYTES
+
+    # A listing larger than the whole budget is served without being kept
+    monkeypatch.setattr(cierres, 'MAX_LISTADOS_BYTES', tamanos[1] - 1)
+    monkeypatch.setattr(cierres, '_listados', cierres.OrderedDict())
+    monkeypatch.setattr(cierres, '_tamano_listados', 0)
+    assert leer(2) == [] and cierres._tamano_listados == 0
@@ -0,0 +1,54 @@
+from datetime import date
+from sqlalchemy import delete
+from database import db
+from models import Cliente
+import contadores
+
+
+def _factura(catalogos, cantidad=1):
+    return {
+        'fecha': date.today().isoformat(),
+        'cliente_id': catalogos['cliente_id'],
+        'detalles': [{'articulo_id': catalogos['articulo_id'], 'cantidad': cantidad, 'precio_unitario': 10}]
+    }
+
+
+def test_counts_stay_exact_through_the_routes(client, catalogos):
+    for n in range(3):
+        assert client.post('/api/clientes', json={'nombre': f'Cliente {n}'}).status_code == 201
+        assert client.post('/api/facturas-venta', json=_factura(catalogos)).status_code == 201
+    # A rejected create rolls its counter back with the rows
+    assert client.post('/api/facturas-venta', json=_factura(catalogos, cantidad=5000)).status_code == 400
+
+    counts = client.get('/api/counts').get_json()
+    assert counts == contadores.recompute_counts()
+    assert counts['clientes'] == 4 and counts['facturas_venta'] == 3
+    # Each sale also posts its journal entry
+    assert counts['asientos_contables'] == 3
+    assert contadores.reconcile() == {}
+
+
+def test_reconcile_repairs_drift_from_direct_deletes(client, catalogos):
+    for n in range(3):
+        assert client.post('/api/clientes', json={'nombre': f'Cliente {n}'}).status_code == 201
+    anterior = client.get('/api/counts')
+
+    # Rows deleted outside the routes do not touch the counters
+    db.session.execute(delete(Cliente).where(Cliente.nombre == 'Cliente 0'))
+    db.session.commit()
+    assert contadores.reconcile() == {'clientes': (4, 3)}
+
+    assert contadores.reconcile(fix=True) == {'clientes': (4, 3)}
+    db.session.commit()
+    assert contadores.reconcile() == {}
+    counts = client.get('/api/counts', headers={'If-None-Match': anterior.headers['ETag']})
+    assert counts.status_code == 200
+    assert counts.get_json() == contadores.recompute_counts()
+
+
+def test_reconcile_creates_missing_counters(app, catalogos):
+    db.session.execute(delete(contadores._contadores))
+    db.session.commit()
+    assert contadores.reconcile(fix=True)['clientes'] == (None, 1)
+    db.session.commit()
+    assert contadores.get_counts() == contadores.recompute_counts()
@@ -0,0 +1,45 @@
+from datetime import date
+from sqlalchemy import delete
+from database import db
+from models import ResumenDashboard
+import dashboard
+from conftest import run_concurrently
+
+HILOS = 8
+
+
+def _borrar_resumen():
+    db.session.execute(delete(ResumenDashboard))
+    db.session.commit()
+
+
+def _en_paralelo(app, peticion):
+    """Run peticion(client, n) in HILOS threads released together, returns the status codes"""
+    return [response.status_code for response in run_concurrently(app, peticion, HILOS)]
+
+
+def test_migration_seeds_the_summary_row(app, catalogos):
+    assert db.session.get(ResumenDashboard, dashboard.RESUMEN_ID) is not None
+    assert dashboard.check_consistency() == {}
+
+    # On a base that already has data, the row is seeded from its totals
+    _borrar_resumen()
+    with db.engine.begin() as conn:
+        dashboard.seed(conn)
+    assert dashboard.check_consistency() == {}
+
+
+def test_concurrent_first_writes_without_the_row(app, catalogos):
+    _borrar_resumen()
+    cuerpo = {
+        'fecha': date.today().isoformat(), 'cliente_id': catalogos['cliente_id'],
+        'cuenta_bancaria_id': catalogos['cuenta_bancaria_id'], 'monto': '10.50'
+    }
+    assert _en_paralelo(app, lambda client, n: client.post('/api/recibos', json=cuerpo)) == [201] * HILOS
+    assert dashboard.check_consistency() == {}
+
+
+def test_concurrent_first_reads_without_the_row(app, catalogos):
+    _borrar_resumen()
+    assert _en_paralelo(app, lambda client, n: client.get('/api/dashboard/summary')) == [200] * HILOS
+    assert dashboard.check_consistency() == {}
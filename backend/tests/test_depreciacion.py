@@ -0,0 +1,89 @@
+import random
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+import pytest
+from database import db
+from models import Bloqueo, DepreciacionMensual
+import bloqueos
+import depreciacion
+from conftest import run_concurrently
+
+HILOS = 6
+
+
+def _activos(n, semilla=7):
+    rnd = random.Random(semilla)
+    return [SimpleNamespace(
+        id=i, categoria=rnd.choice(['Equipo', 'Vehículos', None]),
+        valor_adquisicion=Decimal(rnd.randrange(100_000, 5_000_000_000)) / 100,
+        valor_residual=Decimal(rnd.choice([0, 0, rnd.randrange(0, 50_000_000)])) / 100,
+        fecha_adquisicion=date(2015 + rnd.randrange(8), 1 + rnd.randrange(12), 1),
+        vida_util_anos=rnd.randrange(1, 11),
+        metodo_depreciacion=rnd.choice(depreciacion.METODOS)
+    ) for i in range(1, n + 1)]
+
+
+def test_declining_balance_matches_exact_arithmetic():
+    filas = [a for a in _activos(300) if a.metodo_depreciacion == 'saldos_decrecientes']
+    cartera = depreciacion.Cartera(filas, use_numpy=False)
+    for t in range(depreciacion.month_index(2015, 1), depreciacion.month_index(2026, 1), 7):
+        for i, acumulada in enumerate(cartera.accumulated(t)):
+            costo, residual, n = cartera.costo[i], cartera.residual[i], cartera.vida[i]
+            k = min(max(t - cartera.inicio[i] + 1, 0), n)
+            if k < n:
+                # Book value costo * ((n - 2) / n)^k rounded half up, in integers
+                libros = max((2 * costo * (n - 2) ** k + n ** k) // (2 * n ** k), residual)
+                assert acumulada == min(costo - libros, costo - residual)
+
+
+def test_half_cent_book_value_rounds_up():
+    # 72 * (22/24)^2 is exactly 60.5 cents; a float factor gives 60.4999...
+    activo = SimpleNamespace(id=1, categoria=None, valor_adquisicion=Decimal('0.72'), valor_residual=Decimal('0'),
+                             fecha_adquisicion=date(2024, 1, 1), vida_util_anos=2,
+                             metodo_depreciacion='saldos_decrecientes')
+    cartera = depreciacion.Cartera([activo], use_numpy=False)
+    assert cartera.accumulated(depreciacion.month_index(2024, 3))[0] == 72 - 61
+
+
+def test_numpy_and_python_give_identical_cents():
+    pytest.importorskip('numpy')
+    filas = _activos(500)
+    python, vectorizada = depreciacion.Cartera(filas, use_numpy=False), depreciacion.Cartera(filas, use_numpy=True)
+    for t in range(depreciacion.month_index(2015, 1), depreciacion.month_index(2026, 1)):
+        assert list(vectorizada.accumulated(t)) == python.accumulated(t)
+
+
+def test_concurrent_posts_record_each_month_once(app):
+    client = app.test_client()
+    for i, metodo in enumerate(depreciacion.METODOS):
+        assert client.post('/api/activos-fijos', json={
+            'codigo': f'AF-{i}', 'nombre': 'Activo', 'valor_adquisicion': 120000, 'fecha_adquisicion': '2024-01-15',
+            'metodo_depreciacion': metodo, 'categoria': 'Equipo'
+        }).status_code == 201
+    hoy = date.today()
+    cuerpo = {'anio': hoy.year, 'mes': hoy.month}
+
+    def contabilizar(client, n):
+        response = client.post('/api/activos-fijos/depreciacion/contabilizar', json=cuerpo)
+        return response.status_code, response.get_json()
+
+    respuestas = run_concurrently(app, contabilizar, HILOS)
+
+    assert [status for status, _ in respuestas] == [201] * HILOS, respuestas
+    meses = depreciacion.month_index(hoy.year, hoy.month) - depreciacion.month_index(2024, 2) + 1
+    assert sum(len(datos['meses']) for _, datos in respuestas) == meses
+    assert db.session.query(db.func.count()).select_from(DepreciacionMensual).scalar() == meses
+    assert Decimal(str(depreciacion.posted_total())) == sum(
+        Decimal(str(m['importe'])) for _, datos in respuestas for m in datos['meses']
+    )
+
+
+def test_lock_row_is_seeded_and_recreated(app):
+    assert db.session.get(Bloqueo, bloqueos.DEPRECIACION) is not None
+    db.session.query(Bloqueo).delete()
+    db.session.commit()
+
+    bloqueos.acquire(bloqueos.DEPRECIACION)
+    db.session.commit()
+    assert db.session.get(Bloqueo, bloqueos.DEPRECIACION).tomado is not None
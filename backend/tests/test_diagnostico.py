@@ -0,0 +1,88 @@
+from flask import Flask
+import pytest
+from sqlalchemy import create_engine
+import diagnostico
+
+TOKEN = {'X-Debug-Token': 's3creto'}
+
+
+@pytest.fixture
+def debug_app(monkeypatch, tmp_path):
+    """Build a Flask app with the slow-query log and profiler on its own SQLite engine; call it after setting the environment"""
+    monkeypatch.setenv('SLOW_QUERY_MS', '0')
+    monkeypatch.setenv('PROFILER', 'header')
+    monkeypatch.setenv('PROFILE_DIR', str(tmp_path))
+    monkeypatch.setenv('DEBUG_TOKEN', 's3creto')
+
+    def build():
+        app = Flask(__name__)
+        engine = create_engine(f"sqlite:///{tmp_path / 'diagnostico.db'}")
+        diagnostico.configure(app, engine)
+        return app, engine
+    return build
+
+
+def _consultas(engine, n):
+    with engine.connect() as conn:
+        for i in range(n):
+            conn.exec_driver_sql('SELECT ? AS valor', (f'secreto-{i}',))
+
+
+@pytest.mark.parametrize('ruta', ['/api/debug/consultas-lentas', '/api/debug/perfiles'])
+def test_debug_routes_require_the_token(debug_app, ruta):
+    app, _ = debug_app()
+    client = app.test_client()
+    assert client.get(ruta, headers=TOKEN).status_code == 200
+    # A local proxy makes every request come from 127.0.0.1, so that is not enough
+    assert client.get(ruta).status_code == 403
+    assert client.get(ruta, headers={'X-Debug-Token': 'otro'}).status_code == 403
+    assert client.delete('/api/debug/consultas-lentas').status_code == 403
+
+
+def test_without_token_the_routes_are_not_registered(debug_app, monkeypatch):
+    monkeypatch.delenv('DEBUG_TOKEN')
+    app, _ = debug_app()
+    app.add_url_rule('/eco', 'eco', lambda: 'eco')
+    client = app.test_client()
+    assert client.get('/api/debug/consultas-lentas').status_code == 404
+    assert client.get('/api/debug/perfiles').status_code == 404
+    assert 'X-Profile-File' not in client.get('/eco', headers={'X-Profile': '1'}).headers
+
+
+def test_profiling_header_requires_the_token(debug_app):
+    app, _ = debug_app()
+    app.add_url_rule('/eco', 'eco', lambda: 'eco')
+    client = app.test_client()
+    assert 'X-Profile-File' in client.get('/eco', headers=dict(TOKEN, **{'X-Profile': '1'})).headers
+    assert 'X-Profile-File' not in client.get('/eco', headers={'X-Profile': '1'}).headers
+
+
+def test_parameters_are_redacted_unless_enabled(debug_app, monkeypatch):
+    app, engine = debug_app()
+    _consultas(engine, 1)
+    entrada = app.test_client().get('/api/debug/consultas-lentas', headers=TOKEN).get_json()[0]
+    assert entrada['parametros'] == ['<str>']
+    # The plan still runs with the real values
+    assert entrada['plan'] and 'error' not in entrada['plan'][0]
+
+    monkeypatch.setenv('SLOW_QUERY_PARAMS', '1')
+    app, engine = debug_app()
+    _consultas(engine, 1)
+    entrada = app.test_client().get('/api/debug/consultas-lentas', headers=TOKEN).get_json()[0]
+    assert entrada['parametros'] == ['secreto-0']
+
+
+def test_each_request_runs_a_bounded_number_of_explains(debug_app, monkeypatch):
+    monkeypatch.setenv('SLOW_QUERY_EXPLAIN', '5')
+    app, engine = debug_app()
+    _consultas(engine, 12)
+    client = app.test_client()
+
+    def sin_plan():
+        entradas = client.get('/api/debug/consultas-lentas', headers=TOKEN).get_json()
+        return [entrada['plan'] is None for entrada in entradas]
+
+    # Newest first: each request explains the next five most recent entries still without a plan
+    assert sin_plan() == [False] * 5 + [True] * 7
+    assert sin_plan() == [False] * 10 + [True] * 2
+    assert sin_plan() == [False] * 12
@@ -0,0 +1,49 @@
+from database import db
+from models import Cliente, Evento
+import eventos
+
+
+def test_publishers_keep_the_table_bounded(app, monkeypatch):
+    monkeypatch.setattr(eventos, 'RETENCION', 30)
+    monkeypatch.setattr(eventos, 'PODA_CADA', 10)
+    for n in range(1, 101):
+        cliente = Cliente(nombre=f'Cliente {n}')
+        db.session.add(cliente)
+        eventos.publish('cliente', cliente)
+        db.session.commit()
+
+        ids = db.session.execute(db.select(Evento.id).order_by(Evento.id)).scalars().all()
+        assert ids[-1] == n
+        # Never more than RETENCION + PODA_CADA rows, and the newest RETENCION always kept
+        assert len(ids) <= 40
+        assert ids[0] <= max(1, n - 29)
+
+
+def test_reconnecting_client_reads_the_retained_events(app, monkeypatch):
+    monkeypatch.setattr(eventos, 'RETENCION', 30)
+    monkeypatch.setattr(eventos, 'PODA_CADA', 10)
+    for n in range(1, 51):
+        eventos.publish('cliente')
+    db.session.commit()
+    assert [e['event_id'] for e in eventos.fetch_since(20)] == list(range(21, 51))
+
+
+def test_prune_waits_for_the_publishing_commit(app, monkeypatch):
+    monkeypatch.setattr(eventos, 'RETENCION', 30)
+    monkeypatch.setattr(eventos, 'PODA_CADA', 10)
+    for n in range(1, 40):
+        eventos.publish('cliente')
+    db.session.commit()
+
+    # The publish that gets id 40 leaves the delete out of its own transaction
+    eventos.publish('cliente')
+    assert db.session.execute(db.select(db.func.min(Evento.id))).scalar() == 1
+    db.session.rollback()
+    assert db.session.execute(db.select(db.func.min(Evento.id))).scalar() == 1
+
+    # Rolled back: nothing pruned until a later publisher commits its turn
+    # (SQLite reuses the rolled back id, MySQL skips it)
+    while eventos.last_event_id() < 50:
+        eventos.publish('cliente')
+    db.session.commit()
+    assert db.session.execute(db.select(db.func.min(Evento.id))).scalar() == 21
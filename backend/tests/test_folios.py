@@ -0,0 +1,62 @@
+import statistics
+import time
+from datetime import date, datetime
+from database import db
+from folios import format_folio, generate_folio
+from models import Cliente, FacturaVenta
+from conftest import run_concurrently
+
+HILOS = 8
+FACTURAS_POR_HILO = 40
+
+
+def _factura(catalogos):
+    return {
+        'fecha': date.today().isoformat(),
+        'cliente_id': catalogos['cliente_id'],
+        'detalles': [{'articulo_id': catalogos['articulo_id'], 'cantidad': 1, 'precio_unitario': 10}]
+    }
+
+
+def test_parallel_invoices_get_unique_consecutive_folios(app, catalogos):
+    """Hundreds of concurrent creates, all starting on the first folio of the day"""
+    cuerpo = _factura(catalogos)
+
+    def crear(client, n):
+        respuestas = [client.post('/api/facturas-venta', json=cuerpo) for _ in range(FACTURAS_POR_HILO)]
+        return [(response.status_code, response.get_json()) for response in respuestas]
+
+    resultados = [r for hilo in run_concurrently(app, crear, HILOS) for r in hilo]
+
+    total = HILOS * FACTURAS_POR_HILO
+    assert [status for status, _ in resultados] == [201] * total, [r for r in resultados if r[0] != 201][:3]
+    folios = [datos['folio'] for _, datos in resultados]
+    dia = datetime.now().strftime('%Y%m%d')
+    assert sorted(folios) == [format_folio('FV', dia, n) for n in range(1, total + 1)]
+    assert db.session.query(db.func.count(FacturaVenta.id)).scalar() == total
+
+
+def test_insert_latency_does_not_grow_with_the_day(client, catalogos):
+    cuerpo = _factura(catalogos)
+    latencias = []
+    for _ in range(320):
+        inicio = time.perf_counter()
+        assert client.post('/api/facturas-venta', json=cuerpo).status_code == 201
+        latencias.append(time.perf_counter() - inicio)
+    # Skip the warm-up, then compare the start and the end of the day's sequence
+    primeras, ultimas = latencias[20:120], latencias[-100:]
+    assert statistics.median(ultimas) < 2 * statistics.median(primeras)
+
+
+def test_first_folio_continues_the_legacy_numbering(app):
+    cliente = Cliente(nombre='Cliente')
+    db.session.add(cliente)
+    db.session.flush()
+    dia = datetime.now().strftime('%Y%m%d')
+    for n in (1, 2, 3):
+        db.session.add(FacturaVenta(folio=format_folio('FV', dia, n), fecha=date.today(), cliente_id=cliente.id,
+                                    subtotal=1, total=1))
+    db.session.commit()
+
+    assert generate_folio('FV', FacturaVenta) == format_folio('FV', dia, 4)
+    assert generate_folio('FV', FacturaVenta) == format_folio('FV', dia, 5)
@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _generador(tmp_path, *args):
+    entorno = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'produccion.db'}")
+    return subprocess.run([sys.executable, '-m', 'benchmark.generador', '--escala', '20', *args],
+                          cwd=BACKEND, env=entorno, capture_output=True, text=True)
+
+
+def test_without_db_it_writes_a_sqlite_file_and_ignores_database_url(tmp_path):
+    resultado = _generador(tmp_path, '--datos', str(tmp_path / 'datos'))
+    assert resultado.returncode == 0, resultado.stderr
+    assert os.listdir(tmp_path / 'datos') == ['generador-20-1.db']
+    assert not (tmp_path / 'produccion.db').exists()
+
+
+def test_non_sqlite_base_is_not_dropped_without_borrar(tmp_path):
+    # Refused before connecting: nothing listens on this port
+    resultado = _generador(tmp_path, '--db', 'mysql+pymysql://root@127.0.0.1:1/sistema_contable')
+    assert resultado.returncode == 1
+    assert '--borrar' in resultado.stdout
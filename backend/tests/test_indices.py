@@ -0,0 +1,30 @@
+import pytest
+from database import db
+import migrations
+
+# Index each hot query must be served from (names are the same on SQLite and MySQL)
+INDICES = {
+    'dashboard: facturas de venta pendientes': 'ix_facturas_venta_estado',
+    'dashboard: facturas de compra pendientes': 'ix_facturas_compra_estado',
+    'dashboard: activos fijos activos': 'ix_activos_fijos_estado',
+    'asientos por periodo': 'ix_asientos_contables_periodo',
+    'movimientos de una página de asientos': 'ix_movimientos_contables_asiento_id',
+    'mayor por cuenta': 'ix_movimientos_contables_cuenta',
+    'facturas de venta por cliente': 'ix_facturas_venta_cliente_id',
+    'facturas de venta por fecha': 'ix_facturas_venta_fecha',
+    'recibos por cliente': 'ix_recibos_cliente_id',
+    'siguiente trabajo de la cola': 'ix_trabajos_estado',
+}
+
+
+def test_every_hot_query_is_checked():
+    assert set(INDICES) == set(migrations.consultas_criticas())
+
+
+@pytest.mark.parametrize('nombre', INDICES)
+def test_hot_query_uses_its_index(datos, nombre):
+    statement = migrations.consultas_criticas()[nombre]
+    with db.engine.connect() as conn:
+        usa_indice, plan = migrations._uses_index(conn, statement)
+    assert usa_indice, plan
+    assert INDICES[nombre] in plan, plan
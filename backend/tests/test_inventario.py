@@ -0,0 +1,93 @@
+from datetime import date
+from database import db
+from models import ArticuloInventario, FacturaCompra, FacturaVenta, MovimientoInventario
+import dashboard
+import inventario
+
+
+def _articulo(client, stock=0):
+    return client.post('/api/articulos', json={
+        'codigo': 'INV-1', 'nombre': 'Artículo valuado', 'precio_compra': 0, 'precio_venta': 20,
+        'stock_actual': stock, 'stock_minimo': 5
+    }).get_json()['id']
+
+
+def _factura(catalogos, tercero, articulo_id, cantidad, precio):
+    return {
+        'fecha': date.today().isoformat(),
+        tercero: catalogos[tercero],
+        'detalles': [{'articulo_id': articulo_id, 'cantidad': cantidad, 'precio_unitario': precio}]
+    }
+
+
+def _comprar(client, catalogos, articulo_id, cantidad, precio):
+    return client.post('/api/facturas-compra', json=_factura(catalogos, 'proveedor_id', articulo_id, cantidad, precio))
+
+
+def _vender(client, catalogos, articulo_id, cantidad, precio=20):
+    return client.post('/api/facturas-venta', json=_factura(catalogos, 'cliente_id', articulo_id, cantidad, precio))
+
+
+def _estado(articulo_id):
+    articulo = db.session.get(ArticuloInventario, articulo_id, populate_existing=True)
+    return articulo.stock_actual, float(articulo.costo_promedio), float(articulo.valor_inventario)
+
+
+def test_purchase_sale_purchase_keeps_the_weighted_average(client, catalogos):
+    articulo_id = _articulo(client)
+    assert _comprar(client, catalogos, articulo_id, 10, 5).status_code == 201
+    assert _estado(articulo_id) == (10, 5.0, 50.0)
+
+    # A sale leaves at the average cost and does not change it
+    assert _vender(client, catalogos, articulo_id, 4).status_code == 201
+    assert _estado(articulo_id) == (6, 5.0, 30.0)
+
+    # (6 * 5 + 6 * 8) / 12
+    assert _comprar(client, catalogos, articulo_id, 6, 8).status_code == 201
+    assert _estado(articulo_id) == (12, 6.5, 78.0)
+
+    libro = client.get(f'/api/inventario/movimientos?articulo_id={articulo_id}').get_json()
+    assert [(m['tipo'], m['cantidad'], m['existencia']) for m in libro] == [
+        ('Entrada', 10, 10), ('Salida', -4, 6), ('Entrada', 6, 12)
+    ]
+    assert inventario.check_consistency() == {}
+    assert dashboard.check_consistency() == {}
+
+
+def test_sale_below_zero_stock_is_rejected(client, catalogos):
+    articulo_id = _articulo(client, stock=3)
+    response = _vender(client, catalogos, articulo_id, 4)
+    assert response.status_code == 400
+    assert 'Existencia insuficiente' in response.get_json()['error']
+    # Nothing of the invoice remains
+    assert db.session.query(FacturaVenta).count() == 0
+    assert db.session.query(MovimientoInventario).filter_by(tipo='Salida').count() == 0
+    assert _estado(articulo_id) == (3, 0.0, 0.0)
+
+    assert _vender(client, catalogos, articulo_id, 3).status_code == 201
+    assert _estado(articulo_id)[0] == 0
+
+
+def test_fractional_quantity_is_rejected(client, catalogos):
+    articulo_id = catalogos['articulo_id']
+    for cantidad in (2.5, 0, -1):
+        assert _vender(client, catalogos, articulo_id, cantidad).status_code == 400
+        assert _comprar(client, catalogos, articulo_id, cantidad, 8).status_code == 400
+    assert db.session.query(FacturaVenta).count() == db.session.query(FacturaCompra).count() == 0
+    assert _estado(articulo_id)[0] == 1000
+    # Whole quantities written as decimals are accepted
+    assert _vender(client, catalogos, articulo_id, 2.0).status_code == 201
+    assert _estado(articulo_id)[0] == 998
+
+
+def test_stock_matches_the_movements_after_the_invoice_routes(client, catalogos):
+    articulo_id = catalogos['articulo_id']
+    for n in range(1, 6):
+        assert _comprar(client, catalogos, articulo_id, n, 8 + n).status_code == 201
+        assert _vender(client, catalogos, articulo_id, 2 * n).status_code == 201
+    cancelada = dict(_factura(catalogos, 'cliente_id', articulo_id, 7, 20), estado='Cancelada')
+    assert client.post('/api/facturas-venta', json=cancelada).status_code == 201
+
+    assert _estado(articulo_id)[0] == 1000 + 15 - 30
+    assert inventario.check_consistency() == {}
+    assert dashboard.check_consistency() == {}
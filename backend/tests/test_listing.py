@@ -0,0 +1,68 @@
+import json
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import select
+from database import db
+from models import AsientoContable, Cliente, FacturaVenta
+
+
+def _totales(response):
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return int(response.headers['X-Total-Count']), json.loads(response.headers['X-Totals'])
+
+
+def test_search_matches_a_substring_of_any_column(client):
+    clientes = (('Ferretería López', 'ventas@lopez.mx'), ('Papelería Sur', 'hola@sur.mx'), ('100% Algodón', None))
+    for nombre, email in clientes:
+        assert client.post('/api/clientes', json={'nombre': nombre, 'email': email}).status_code == 201
+    nombres = lambda q: [c['nombre'] for c in client.get('/api/clientes', query_string={'q': q}).get_json()]
+    assert nombres('FERRETER') == nombres('lópez') == ['Ferretería López']
+    assert nombres('ería') == ['Ferretería López', 'Papelería Sur']
+    assert nombres('@sur') == ['Papelería Sur']
+    # LIKE wildcards in the term are matched literally
+    assert nombres('%') == ['100% Algodón']
+    assert nombres('_') == []
+
+
+def test_search_over_a_joined_column_counts_the_same_rows(client, datos):
+    nombre = db.session.execute(select(Cliente.nombre).order_by(Cliente.id.desc())).scalar()
+    esperadas = db.session.query(db.func.count(FacturaVenta.id)).join(Cliente).filter(
+        Cliente.nombre.icontains(nombre, autoescape=True) | FacturaVenta.folio.icontains(nombre, autoescape=True)
+    ).scalar()
+    response = client.get('/api/facturas-venta', query_string={'q': nombre, 'count': 1, 'limit': 1000})
+    filas = response.get_json()
+    assert filas and all(nombre.lower() in f['cliente_nombre'].lower() for f in filas)
+    assert int(response.headers['X-Total-Count']) == len(filas) == esperadas
+
+
+def test_totals_cover_every_matching_row_not_just_the_page(client, datos):
+    total, totales = _totales(client.get('/api/facturas-venta?limit=5&totales=1'))
+    facturas = db.session.execute(select(FacturaVenta.total, FacturaVenta.estado)).all()
+    assert total == len(facturas)
+    assert Decimal(str(totales['total'])) == sum(Decimal(str(f.total)) for f in facturas)
+    assert totales['pendientes'] == sum(1 for f in facturas if f.estado == 'Pendiente')
+    assert totales['canceladas'] == sum(1 for f in facturas if f.estado == 'Cancelada')
+
+    total, totales = _totales(client.get('/api/facturas-venta?limit=5&totales=1&estado=Pendiente'))
+    assert total == totales['pendientes'] > 0 and totales['canceladas'] == 0
+    # Without totales=1 the header is absent
+    assert 'X-Totals' not in client.get('/api/facturas-venta?limit=5&count=1').headers
+
+
+def test_journal_totals_match_between_live_and_closed_periods(client, catalogos):
+    hoy = date.today()
+    factura = {
+        'fecha': hoy.isoformat(), 'cliente_id': catalogos['cliente_id'],
+        'detalles': [{'articulo_id': catalogos['articulo_id'], 'cantidad': 1, 'precio_unitario': 10}]
+    }
+    for _ in range(3):
+        assert client.post('/api/facturas-venta', json=factura).status_code == 201
+    ruta = f'/api/asientos-contables?anio={hoy.year}&mes={hoy.month}&limit=1&totales=1'
+    abierto = _totales(client.get(ruta))
+    assert abierto == (3, {'aplicados': 3, 'borradores': 0, 'cancelados': 0})
+
+    assert client.post(f'/api/periodos/{hoy.year}/{hoy.month}/cerrar').status_code == 201
+    assert _totales(client.get(ruta)) == abierto
+    # A search reads the live rows even for a closed period
+    folio = db.session.execute(select(AsientoContable.folio).order_by(AsientoContable.id)).scalar()
+    assert [a['folio'] for a in client.get(f'{ruta}&q={folio}').get_json()] == [folio]
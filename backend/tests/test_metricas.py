@@ -0,0 +1,108 @@
+import re
+from flask import Flask
+import pytest
+from sqlalchemy import create_engine
+import metricas
+
+LATENCIA = 'contable_http_request_duration_seconds'
+
+
+@pytest.fixture
+def metrics_app(monkeypatch, tmp_path):
+    """Build a Flask app with metricas configured on its own SQLite engine and an empty registry"""
+    monkeypatch.setattr(metricas, 'registro', metricas.Registro())
+    monkeypatch.setattr(metricas, '_opciones', {'server_timing': False, 'carpeta': None})
+
+    def build():
+        app = Flask(__name__)
+        engine = create_engine(f"sqlite:///{tmp_path / 'metricas.db'}")
+
+        @app.route('/api/eco/<int:n>')
+        def eco(n):
+            with engine.connect() as conn:
+                return {'n': conn.exec_driver_sql('SELECT ?', (n,)).scalar()}
+
+        metricas.configure(app, engine)
+        return app
+    return build
+
+
+def _serie(texto, nombre):
+    """{le: value} of the bucket lines and the _sum/_count values of one histogram series"""
+    buckets = {le: int(valor) for le, valor in re.findall(rf'^{nombre}_bucket{{.*le="([^"]+)"}} (\d+)$', texto, re.M)}
+    suma = float(re.search(rf'^{nombre}_sum(?:{{.*}})? (\S+)$', texto, re.M).group(1))
+    conteo = int(re.search(rf'^{nombre}_count(?:{{.*}})? (\d+)$', texto, re.M).group(1))
+    return buckets, suma, conteo
+
+
+def _observar(registro, ruta, latencias, sentencias=2):
+    for segundos in latencias:
+        registro.observe_request((ruta, 'GET', 200), segundos, 100, sentencias, 0.001)
+
+
+def test_histogram_buckets_are_cumulative():
+    registro = metricas.Registro()
+    # 0.005 falls in le="0.005": Prometheus buckets are upper-inclusive
+    _observar(registro, '/api/x', [0.001, 0.005, 0.02, 0.3, 20])
+    buckets, suma, conteo = _serie(metricas.render(registro), LATENCIA)
+
+    assert list(buckets) == [str(b) for b in metricas.LATENCIA_BUCKETS] + ['+Inf']
+    assert list(buckets.values()) == [2, 2, 3, 3, 3, 3, 4, 4, 4, 4, 4, 5]
+    assert conteo == buckets['+Inf'] == 5
+    assert suma == pytest.approx(20.326)
+
+
+def test_empty_checkout_histogram_counts_zero():
+    buckets, suma, conteo = _serie(metricas.render(metricas.Registro()), 'contable_db_pool_checkout_seconds')
+    assert set(buckets.values()) == {0} and conteo == 0 and suma == 0
+
+
+def test_label_values_are_escaped():
+    registro = metricas.Registro()
+    _observar(registro, 'a"b\\c\nd', [0.1])
+    texto = metricas.render(registro)
+    assert 'route="a\\"b\\\\c\\nd"' in texto
+    # Every sample stays on one line
+    assert all(linea.startswith(('#', 'contable_')) for linea in texto.splitlines())
+
+
+def test_collect_sums_live_and_archived_workers(tmp_path):
+    carpeta = str(tmp_path)
+    metricas.reset_dir(carpeta)
+    for pid, latencias in ((101, [0.01, 0.02]), (102, [0.2]), (103, [3.0])):
+        registro = metricas.Registro()
+        _observar(registro, '/api/x', latencias)
+        registro.observe_checkout(0.002)
+        metricas._write_json(str(tmp_path / f'{pid}.json'), registro.to_dict())
+
+    # Recycled workers are folded into one archive that keeps their counts
+    metricas.archive_worker(carpeta, 101)
+    metricas.archive_worker(carpeta, 102)
+    metricas.archive_worker(carpeta, 999)  # No file: nothing to do
+    assert sorted(p.name for p in tmp_path.glob('*.json')) == ['103.json', metricas.ARCHIVO_MUERTOS]
+
+    texto = metricas.render(metricas.collect(carpeta))
+    buckets, suma, conteo = _serie(texto, LATENCIA)
+    assert conteo == buckets['+Inf'] == 4
+    assert buckets['0.025'] == 2 and buckets['0.25'] == 3 and buckets['5.0'] == 4
+    assert suma == pytest.approx(3.23)
+    assert 'contable_sql_statements_total{route="/api/x",method="GET",status="200"} 8' in texto
+    assert _serie(texto, 'contable_db_pool_checkout_seconds')[2] == 3
+
+
+def test_metrics_route_only_exists_with_metrics_on(metrics_app, monkeypatch, client):
+    # The test app is built with METRICS unset
+    assert client.get('/api/metrics').status_code == 404
+
+    monkeypatch.delenv('METRICS', raising=False)
+    app = metrics_app()
+    assert app.test_client().get('/api/metrics').status_code == 404
+    assert not app.before_request_funcs and not app.after_request_funcs
+
+    monkeypatch.setenv('METRICS', '1')
+    app = metrics_app()
+    client = app.test_client()
+    assert client.get('/api/eco/7').get_json() == {'n': 7}
+    texto = client.get('/api/metrics').get_data(as_text=True)
+    assert f'{LATENCIA}_count{{route="/api/eco/<int:n>",method="GET",status="200"}} 1' in texto
+    assert 'contable_sql_statements_total{route="/api/eco/<int:n>",method="GET",status="200"} 1' in texto
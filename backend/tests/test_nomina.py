@@ -0,0 +1,68 @@
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from database import db
+from models import CorridaNomina, ReciboNomina, Trabajo
+import nomina
+import trabajos
+
+PERIODO = {'periodo_inicio': '2024-06-01', 'periodo_fin': '2024-06-15'}
+
+
+def _empleados(client, n=3):
+    for i in range(n):
+        assert client.post('/api/empleados', json={
+            'nombre': f'Empleado {i}', 'apellido_paterno': 'Prueba', 'salario_diario': 300 + i
+        }).status_code == 201
+
+
+def _work():
+    """Run every queued job in this process, as a trabajos worker would"""
+    estados = []
+    while (trabajo_id := trabajos.claim('pruebas')) is not None:
+        estados.append(trabajos.execute(trabajo_id))
+    return estados
+
+
+def test_run_is_queued_and_executed_by_a_worker(client):
+    _empleados(client)
+    response = client.post('/api/nomina/corridas', json=PERIODO)
+    assert response.status_code == 202
+    corrida = response.get_json()
+    assert corrida['estado'] == 'Pendiente'
+    trabajo = db.session.get(Trabajo, corrida['trabajo_id'])
+    assert (trabajo.tipo, trabajo.estado) == ('nomina', 'Pendiente')
+    assert json.loads(trabajo.parametros) == {'corrida_id': corrida['id']}
+
+    assert _work() == ['Terminado']
+    terminada = client.get(response.headers['Location']).get_json()
+    assert (terminada['estado'], terminada['procesados'], terminada['avance']) == ('Terminada', 3, 100.0)
+    assert terminada['asiento_id'] is not None
+    resultado = client.get(f"/api/jobs/{corrida['trabajo_id']}").get_json()
+    assert resultado['estado'] == 'Terminado'
+
+
+def test_interrupted_run_is_resumed_through_the_queue(client):
+    _empleados(client)
+    corrida = client.post('/api/nomina/corridas', json=PERIODO).get_json()
+    # Its job never ran (cancelled here, or lost with its worker) and the run went quiet
+    assert client.post(f"/api/jobs/{corrida['trabajo_id']}/cancelar").status_code == 200
+    assert client.post(f"/api/nomina/corridas/{corrida['id']}/reanudar").status_code == 409
+    db.session.execute(update(CorridaNomina).where(CorridaNomina.id == corrida['id']).values(
+        actualizado=datetime.utcnow() - nomina.INTERRUMPIDA - timedelta(minutes=1)
+    ))
+    db.session.commit()
+
+    response = client.post(f"/api/nomina/corridas/{corrida['id']}/reanudar")
+    assert response.status_code == 202
+    assert json.loads(db.session.get(Trabajo, response.get_json()['trabajo_id']).parametros)['reanudar'] is True
+    assert _work() == ['Terminado']
+    assert client.get(f"/api/nomina/corridas/{corrida['id']}").get_json()['estado'] == 'Terminada'
+    assert db.session.query(db.func.count(ReciboNomina.id)).filter_by(corrida_id=corrida['id']).scalar() == 3
+
+
+def test_second_run_for_a_period_is_a_conflict(client):
+    _empleados(client, 1)
+    assert client.post('/api/nomina/corridas', json=PERIODO).status_code == 202
+    assert client.post('/api/nomina/corridas', json=PERIODO).status_code == 409
+    assert db.session.query(db.func.count(Trabajo.id)).scalar() == 1
@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import text
+from database import db
+from query_guard import QueryBudgetExceeded, query_budget
+
+# Statements of a first (uncached) page request with count=1; the totals
+# share the count's statement, without the count there is one less, and a
+# cached route answers a repeat with just the version read
+LISTADOS = {
+    '/api/clientes': 3,
+    '/api/proveedores': 3,
+    '/api/cuentas-bancarias': 3,
+    '/api/articulos': 3,
+    '/api/empleados': 3,
+    '/api/inventario/movimientos': 2,
+    '/api/facturas-venta': 2,
+    '/api/facturas-compra': 2,
+    '/api/recibos': 2,
+    '/api/pagos': 2,
+    '/api/activos-fijos': 2,
+    '/api/recibos-nomina': 2,
+    '/api/nomina/corridas': 2,
+    '/api/jobs': 2,
+    '/api/asientos-contables': 3,
+}
+CACHEADOS = {'/api/clientes', '/api/proveedores', '/api/cuentas-bancarias', '/api/articulos', '/api/empleados'}
+
+
+@pytest.fixture
+def enforced(app):
+    app.config['QUERY_BUDGET_ENFORCE'] = True
+    yield
+    app.config['QUERY_BUDGET_ENFORCE'] = False
+
+
+def _statements(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert response.get_json(), url
+    return int(response.headers['X-Query-Count'])
+
+
+@pytest.mark.parametrize('path', LISTADOS)
+def test_list_statement_count_does_not_depend_on_rows(client, datos, enforced, path):
+    esperadas = LISTADOS[path]
+    # Pages of different sizes, so a per-row query would show up as a difference
+    assert _statements(client, f'{path}?limit=5&count=1') == esperadas
+    assert _statements(client, f'{path}?limit=5&count=1&totales=1') == esperadas
+    assert _statements(client, f'{path}?limit=100') == esperadas - 1
+    if path in CACHEADOS:
+        assert _statements(client, f'{path}?limit=5&count=1') == 1
+
+
+def test_enforced_budget_rejects_extra_statements(app, enforced):
+    @query_budget(1)
+    def vista():
+        db.session.execute(text('SELECT 1'))
+        db.session.execute(text('SELECT 2'))
+        return 'ok'
+
+    with app.test_request_context(), pytest.raises(QueryBudgetExceeded, match='2 SQL statements'):
+        vista()
@@ -0,0 +1,85 @@
+from datetime import date
+import pytest
+import sys
+from models import ActivoFijo, ArticuloInventario, Cliente, CuentaBancaria, Empleado, FacturaCompra, FacturaVenta, Proveedor
+import response_cache
+
+HOY = date.today().isoformat()
+
+
+def _factura(tercero):
+    return lambda ids: {
+        'fecha': HOY, tercero: ids[tercero],
+        'detalles': [{'articulo_id': ids['articulo_id'], 'cantidad': 2, 'precio_unitario': 10}]
+    }
+
+
+# Cached route, write that must invalidate it, body of the write, table whose version it bumps
+ESCRITURAS = {
+    'cliente': ('/api/clientes', '/api/clientes', lambda ids: {'nombre': 'Otro cliente'}, Cliente),
+    'proveedor': ('/api/proveedores', '/api/proveedores', lambda ids: {'nombre': 'Otro proveedor'}, Proveedor),
+    'cuenta bancaria': ('/api/cuentas-bancarias', '/api/cuentas-bancarias', lambda ids: {
+        'nombre': 'Otra cuenta', 'banco': 'Banco', 'numero_cuenta': '0002', 'saldo_inicial': '0'
+    }, CuentaBancaria),
+    'artículo': ('/api/articulos', '/api/articulos', lambda ids: {
+        'codigo': 'ART-2', 'nombre': 'Otro artículo', 'precio_compra': 1, 'precio_venta': 2
+    }, ArticuloInventario),
+    'empleado': ('/api/empleados', '/api/empleados', lambda ids: {
+        'nombre': 'Ana', 'apellido_paterno': 'López', 'salario_diario': 300
+    }, Empleado),
+    'activo fijo': ('/api/activos-fijos/depreciacion', '/api/activos-fijos', lambda ids: {
+        'codigo': 'AF-1', 'nombre': 'Equipo', 'valor_adquisicion': 12000, 'fecha_adquisicion': '2020-01-01'
+    }, ActivoFijo),
+    'factura de venta': ('/api/reportes/ventas', '/api/facturas-venta', _factura('cliente_id'), FacturaVenta),
+    'factura de compra': ('/api/reportes/compras', '/api/facturas-compra', _factura('proveedor_id'), FacturaCompra),
+    # Stock and balances change without a new catalog row
+    'existencias por venta': ('/api/articulos', '/api/facturas-venta', _factura('cliente_id'), ArticuloInventario),
+    'saldo por recibo': ('/api/cuentas-bancarias', '/api/recibos', lambda ids: {
+        'fecha': HOY, 'cliente_id': ids['cliente_id'], 'cuenta_bancaria_id': ids['cuenta_bancaria_id'], 'monto': 50
+    }, CuentaBancaria),
+}
+
+
+def _outcomes(path):
+    return dict(response_cache.stats.snapshot()['rutas'].get(path, {'hits': 0, 'misses': 0, 'not_modified': 0}))
+
+
+@pytest.mark.parametrize('caso', ESCRITURAS)
+def test_write_bumps_version_and_replaces_cached_entry(client, catalogos, caso):
+    ruta, escritura, cuerpo, model = ESCRITURAS[caso]
+    primera = client.get(ruta)
+    assert primera.status_code == 200
+    etag = primera.headers['ETag']
+    version = response_cache.table_versions([model])[0]
+
+    antes = _outcomes(ruta)
+    assert client.get(ruta).get_data() == primera.get_data()
+    assert _outcomes(ruta)['hits'] == antes['hits'] + 1
+
+    assert client.post(escritura, json=cuerpo(catalogos)).status_code == 201
+    assert response_cache.table_versions([model])[0] == version + 1
+
+    # The stale ETag no longer matches and the old entry is not served again
+    antes = _outcomes(ruta)
+    segunda = client.get(ruta, headers={'If-None-Match': etag})
+    assert segunda.status_code == 200
+    assert segunda.headers['ETag'] != etag
+    assert segunda.get_data() != primera.get_data()
+    assert _outcomes(ruta)['misses'] == antes['misses'] + 1
+
+
+def test_current_etag_is_not_modified(client, catalogos):
+    primera = client.get('/api/clientes?limit=10')
+    etag = primera.headers['ETag']
+    revalidada = client.get('/api/clientes?limit=10', headers={'If-None-Match': etag})
+    assert revalidada.status_code == 304
+    assert revalidada.headers['ETag'] == etag
+    assert revalidada.get_data() == b''
+    # The ETag is per query string
+    assert client.get('/api/clientes?limit=5', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_redis_backend_without_redis_package_fails_clearly(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'redis', None)
+    with pytest.raises(ValueError, match='pip install redis'):
+        response_cache.create_backend('redis://localhost:6379/0')
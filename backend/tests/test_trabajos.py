@@ -0,0 +1,102 @@
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from database import db
+from models import Cliente, Trabajo
+import trabajos
+from conftest import run_concurrently
+
+HILOS = 4
+TRABAJOS = 40
+
+
+def _trabajo(trabajo_id):
+    return db.session.get(Trabajo, trabajo_id, populate_existing=True)
+
+
+def _encolar(tipo, parametros=None):
+    trabajo_id = trabajos.submit(tipo, parametros).id
+    db.session.commit()
+    return trabajo_id
+
+
+def test_workers_never_claim_the_same_job(app):
+    ids = [_encolar('eco', {'n': n}) for n in range(TRABAJOS)]
+
+    def reclamar(client, n):
+        tomados = []
+        with app.app_context():
+            while (trabajo_id := trabajos.claim(f'worker-{n}')) is not None:
+                tomados.append(trabajo_id)
+            db.session.remove()
+        return tomados
+
+    tomados = [trabajo_id for hilo in run_concurrently(app, reclamar, HILOS) for trabajo_id in hilo]
+    assert sorted(tomados) == ids
+    assert {_trabajo(trabajo_id).estado for trabajo_id in ids} == {'En proceso'}
+
+
+def test_pending_job_is_cancelled_at_once(app):
+    trabajo_id = _encolar('eco')
+    assert trabajos.cancel(_trabajo(trabajo_id))
+    trabajo = _trabajo(trabajo_id)
+    assert trabajo.estado == 'Cancelado' and trabajo.fin is not None
+    assert trabajos.claim('worker') is None
+    # A finished job cannot be cancelled again
+    assert not trabajos.cancel(trabajo)
+
+
+def test_running_job_stops_at_its_next_progress_report(app, monkeypatch):
+    monkeypatch.setattr(trabajos, 'LATIDO_SEGUNDOS', 0.01)
+    reportes = []
+
+    def larga(parametros, progress):
+        for n in range(1000):
+            reportes.append(n)
+            progress(n, 1000)
+            time.sleep(0.005)
+        return {'terminada': True}
+
+    monkeypatch.setitem(trabajos.TAREAS, 'larga', (larga, None))
+    trabajo_id = _encolar('larga')
+    assert trabajos.claim('worker') == trabajo_id
+    # Claimed: the request only flags it, the worker notices through the heartbeat
+    assert trabajos.cancel(_trabajo(trabajo_id))
+    assert _trabajo(trabajo_id).estado == 'En proceso'
+
+    assert trabajos.execute(trabajo_id) == 'Cancelado'
+    trabajo = _trabajo(trabajo_id)
+    assert trabajo.estado == 'Cancelado' and trabajo.resultado is None
+    assert 'cancelado' in trabajo.error
+    assert len(reportes) < 1000
+
+
+def test_reap_marks_jobs_without_heartbeat_as_error(app):
+    perdido, vivo = _encolar('eco'), _encolar('eco')
+    assert trabajos.claim('worker') == perdido
+    assert trabajos.claim('worker') == vivo
+    db.session.execute(update(Trabajo).where(Trabajo.id == perdido).values(
+        actualizado=datetime.utcnow() - trabajos.INTERRUMPIDO - timedelta(seconds=1)
+    ))
+    db.session.commit()
+
+    assert trabajos.reap() == 1
+    assert _trabajo(perdido).estado == 'Error'
+    assert 'Interrumpido' in _trabajo(perdido).error
+    assert _trabajo(vivo).estado == 'En proceso'
+
+
+def test_failing_task_stores_the_error_and_rolls_back(app, monkeypatch):
+    def falla(parametros, progress):
+        db.session.add(Cliente(nombre='Escrito a medias'))
+        db.session.flush()
+        raise RuntimeError('falla a la mitad')
+
+    monkeypatch.setitem(trabajos.TAREAS, 'falla', (falla, None))
+    trabajo_id = _encolar('falla')
+    assert trabajos.claim('worker') == trabajo_id
+
+    assert trabajos.execute(trabajo_id) == 'Error'
+    trabajo = _trabajo(trabajo_id)
+    assert trabajo.error == 'falla a la mitad' and trabajo.fin is not None
+    assert db.session.query(Cliente).count() == 0
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Cola de trabajos en segundo plano para operaciones pesadas
+
+Los trabajos se guardan en la tabla trabajos de la misma base de datos (sin
+broker externo) y los ejecuta un grupo de procesos worker:
+
+    POST /api/jobs {"tipo": ..., "parametros": {...}}  -> 202, trabajo Pendiente
+    GET  /api/jobs/<id>                                -> estado, avance y resultado
+    POST /api/jobs/<id>/cancelar
+
+Tareas registradas:
+    importar_facturas    {"tipo": "venta"|"compra", "filas": [...]} (bulk_import)
+    reconstruir_saldos   {"anio": 2024} opcional (balanza.rebuild)
+    exportar             {"conjunto": "todo", "formato": "parquet", "completo": false}
+    nomina               {"corrida_id": 1, "reanudar": false} (nomina.run)
+    eco                  devuelve sus parámetros (prueba y medición de la cola)
+
+Cada worker toma el siguiente trabajo pendiente con un UPDATE condicionado al
+estado (más SELECT ... FOR UPDATE SKIP LOCKED en MySQL 8), así que dos workers
+nunca ejecutan el mismo trabajo. Mientras corre, un hilo de latido escribe el
+avance reportado por la tarea y lee si se pidió cancelarlo, con su propia
+conexión para no mezclarse con la transacción de la tarea. Un trabajo sin
+latido durante INTERRUMPIDO se marca como Error: no se reintenta solo porque
+una importación ya confirmó sus primeros bloques.
+
+Uso:
+    python trabajos.py worker [--procesos N]                  # atiende la cola
+    python trabajos.py benchmark [--trabajos N] [--procesos N]  # mide la cola
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select, update
+from database import create_app, db
+from models import Trabajo
+import balanza
+import bulk_import
+import exportacion
+import nomina
+
+POLL_SEGUNDOS = float(os.getenv('TRABAJOS_POLL', '1'))
+LATIDO_SEGUNDOS = 2
+# A running job with no heartbeat for this long lost its worker
+INTERRUMPIDO = timedelta(minutes=1)
+
+ESTADOS_FINALES = ('Terminado', 'Error', 'Cancelado')
+
+_trabajos = Trabajo.__table__
+
+TAREAS = {}
+
+
+class TrabajoError(ValueError):
+    """Invalid job request, reported to the client as HTTP 400"""
+
+
+class TrabajoCancelado(Exception):
+    """Raised at the next progress report of a job whose cancellation was requested"""
+
+
+def tarea(nombre, validate=None):
+    """Register a task: fn(parametros, progress) returns a JSON-serializable result"""
+    def registrar(fn):
+        TAREAS[nombre] = (fn, validate)
+        return fn
+    return registrar
+
+
+def _validate_importacion(parametros):
+    if parametros.get('tipo') not in bulk_import.TIPOS:
+        raise TrabajoError(f"tipo de factura inválido: {parametros.get('tipo')}")
+    if not isinstance(parametros.get('filas'), list):
+        raise TrabajoError('Se esperaba un arreglo de facturas en filas')
+    if len(parametros['filas']) > bulk_import.MAX_ROWS:
+        raise TrabajoError(f'Máximo {bulk_import.MAX_ROWS} facturas por trabajo')
+
+
+def _validate_anio(parametros):
+    if parametros.get('anio') is not None and not isinstance(parametros['anio'], int):
+        raise TrabajoError(f"anio inválido: {parametros['anio']}")
+
+
+def _validate_exportacion(parametros):
+    conjunto = parametros.get('conjunto', 'todo')
+    if conjunto != 'todo' and conjunto not in exportacion.CONJUNTOS:
+        raise TrabajoError(f'conjunto inválido: {conjunto}')
+    if parametros.get('formato', 'parquet') not in exportacion.FORMATOS:
+        raise TrabajoError(f"formato inválido: {parametros.get('formato')}")
+
+
+def _validate_corrida(parametros):
+    if not isinstance(parametros.get('corrida_id'), int):
+        raise TrabajoError(f"corrida_id inválido: {parametros.get('corrida_id')}")
+
+
+@tarea('importar_facturas', validate=_validate_importacion)
+def importar_facturas(parametros, progress):
+    resultados = bulk_import.import_invoices(parametros['tipo'], parametros['filas'], progress=progress)
+    creadas = sum(1 for r in resultados if 'error' not in r)
+    return {'creadas': creadas, 'errores': len(resultados) - creadas, 'resultados': resultados}
+
+
+@tarea('reconstruir_saldos', validate=_validate_anio)
+def reconstruir_saldos(parametros, progress):
+    renglones = balanza.rebuild(parametros.get('anio'))
+    db.session.commit()
+    return {'renglones': renglones}
+
+
+@tarea('exportar', validate=_validate_exportacion)
+def exportar(parametros, progress):
+    # Always under EXPORT_DIR: the destination folder is not taken from the request
+    conjunto = parametros.get('conjunto', 'todo')
+    nombres = list(exportacion.CONJUNTOS) if conjunto == 'todo' else [conjunto]
+    resumenes, filas = [], 0
+    for nombre in nombres:
+        resumen = exportacion.export(
+            nombre, formato=parametros.get('formato', 'parquet'), completo=bool(parametros.get('completo')),
+            progress=lambda hechas: progress(filas + hechas)
+        )
+        filas += resumen['filas']
+        resumenes.append(resumen)
+    return {'conjuntos': resumenes}
+
+
+@tarea('nomina', validate=_validate_corrida)
+def nomina_corrida(parametros, progress):
+    corrida = nomina.run(parametros['corrida_id'], resume=bool(parametros.get('reanudar')), progress=progress)
+    return {'corrida_id': corrida.id, 'recibos': corrida.procesados, 'total_neto': str(corrida.total_neto)}
+
+
+@tarea('eco')
+def eco(parametros, progress):
+    return parametros
+
+
+def submit(tipo, parametros=None):
+    """Queue a job in the current transaction, raises TrabajoError"""
+    if tipo not in TAREAS:
+        raise TrabajoError(f"Tipo de trabajo desconocido: {tipo}; opciones: {', '.join(sorted(TAREAS))}")
+    parametros = parametros if parametros is not None else {}
+    if not isinstance(parametros, dict):
+        raise TrabajoError('parametros debe ser un objeto')
+    validate = TAREAS[tipo][1]
+    if validate:
+        validate(parametros)
+    trabajo = Trabajo(tipo=tipo, parametros=json.dumps(parametros, default=str), estado='Pendiente')
+    db.session.add(trabajo)
+    db.session.flush()  # Get the ID
+    return trabajo
+
+
+def cancel(trabajo):
+    """Cancel a pending job or ask a running one to stop, False if it already finished"""
+    if trabajo.estado in ESTADOS_FINALES:
+        return False
+    ahora = datetime.utcnow()
+    result = db.session.execute(
+        update(_trabajos).where(_trabajos.c.id == trabajo.id, _trabajos.c.estado == 'Pendiente')
+        .values(estado='Cancelado', fin=ahora, actualizado=ahora)
+    )
+    if result.rowcount == 0:
+        # Already claimed: the worker stops at its next progress report
+        db.session.execute(
+            update(_trabajos).where(_trabajos.c.id == trabajo.id, _trabajos.c.estado == 'En proceso')
+            .values(cancelar=True)
+        )
+    db.session.commit()
+    db.session.refresh(trabajo)
+    return True
+
+
+def claim(worker):
+    """Atomically take the oldest pending job, returns its id or None"""
+    while True:
+        trabajo_id = db.session.execute(
+            select(_trabajos.c.id).where(_trabajos.c.estado == 'Pendiente')
+            .order_by(_trabajos.c.id).limit(1)
+            .with_for_update(skip_locked=db.engine.dialect.name == 'mysql')
+        ).scalar()
+        if trabajo_id is None:
+            db.session.commit()
+            return None
+        ahora = datetime.utcnow()
+        result = db.session.execute(
+            update(_trabajos).where(_trabajos.c.id == trabajo_id, _trabajos.c.estado == 'Pendiente')
+            .values(estado='En proceso', worker=worker, inicio=ahora, actualizado=ahora)
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            return trabajo_id
+        # Another worker took it between the SELECT and the UPDATE
+
+
+def reap():
+    """Mark as Error the running jobs whose worker stopped sending heartbeats"""
+    ahora = datetime.utcnow()
+    result = db.session.execute(
+        update(_trabajos).where(_trabajos.c.estado == 'En proceso', _trabajos.c.actualizado < ahora - INTERRUMPIDO)
+        .values(estado='Error', error='Interrumpido: el worker dejó de responder', fin=ahora)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+class Latido:
+    """Heartbeat thread of a running job: saves its progress and watches for cancellation"""
+
+    def __init__(self, engine, trabajo_id):
+        self.engine = engine
+        self.trabajo_id = trabajo_id
+        self.avance = (0, None)
+        self.cancelado = False
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._run, name=f'latido-{trabajo_id}', daemon=True)
+
+    def progress(self, hechos, total=None):
+        """Progress callback handed to the task"""
+        self.avance = (hechos, total)
+        if self.cancelado:
+            raise TrabajoCancelado(f'Trabajo {self.trabajo_id} cancelado después de {hechos} elementos')
+
+    def _beat(self):
+        procesados, total = self.avance
+        with self.engine.connect() as conn:
+            # Read first: a failed progress write must not hide a cancellation
+            self.cancelado = bool(conn.execute(
+                select(_trabajos.c.cancelar).where(_trabajos.c.id == self.trabajo_id)
+            ).scalar())
+            conn.commit()
+            conn.execute(update(_trabajos).where(_trabajos.c.id == self.trabajo_id).values(
+                procesados=procesados, total=total, actualizado=datetime.utcnow()
+            ))
+            conn.commit()
+
+    def _run(self):
+        while not self._parar.wait(LATIDO_SEGUNDOS):
+            try:
+                self._beat()
+            except Exception:
+                # A missed beat only delays the progress; the next one retries
+                pass
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._hilo.join()
+
+
+def execute(trabajo_id):
+    """Run a claimed job and store its result or error"""
+    trabajo = db.session.get(Trabajo, trabajo_id)
+    fn = TAREAS[trabajo.tipo][0] if trabajo.tipo in TAREAS else None
+    parametros = json.loads(trabajo.parametros or '{}')
+    db.session.commit()
+
+    resultado, error = None, None
+    with Latido(db.engine, trabajo_id) as latido:
+        try:
+            if fn is None:
+                raise TrabajoError(f'Tipo de trabajo desconocido: {trabajo.tipo}')
+            resultado = fn(parametros, latido.progress)
+            estado = 'Terminado'
+        except TrabajoCancelado as e:
+            db.session.rollback()
+            estado, error = 'Cancelado', str(e)
+        except Exception as e:
+            db.session.rollback()
+            estado, error = 'Error', str(e)
+
+    procesados, total = latido.avance
+    ahora = datetime.utcnow()
+    db.session.execute(update(_trabajos).where(_trabajos.c.id == trabajo_id).values(
+        estado=estado,
+        procesados=procesados,
+        total=total,
+        resultado=json.dumps(resultado, default=str) if resultado is not None else None,
+        error=error,
+        actualizado=ahora,
+        fin=ahora
+    ))
+    db.session.commit()
+    return estado
+
+
+def _worker(hasta_vaciar=False):
+    """Worker loop of one process"""
+    nombre = f'{socket.gethostname()}:{os.getpid()}'
+    detener = threading.Event()
+    # Finish the current job on SIGTERM instead of leaving it half done
+    signal.signal(signal.SIGTERM, lambda *args: detener.set())
+    app = create_app()
+    with app.app_context():
+        ultimo_reap = 0
+        while not detener.is_set():
+            if time.monotonic() - ultimo_reap > INTERRUMPIDO.total_seconds():
+                reap()
+                ultimo_reap = time.monotonic()
+            trabajo_id = claim(nombre)
+            if trabajo_id is not None:
+                execute(trabajo_id)
+            elif hasta_vaciar:
+                break
+            else:
+                detener.wait(POLL_SEGUNDOS)
+        db.session.remove()
+
+
+def work(procesos=1, hasta_vaciar=False):
+    """Run the worker loop in N processes until stopped (or until the queue is empty)"""
+    if procesos == 1:
+        _worker(hasta_vaciar)
+        return
+    hijos = [
+        multiprocessing.Process(target=_worker, args=(hasta_vaciar,), name=f'trabajos-{n}')
+        for n in range(procesos)
+    ]
+    for hijo in hijos:
+        hijo.start()
+    try:
+        for hijo in hijos:
+            hijo.join()
+    except KeyboardInterrupt:
+        for hijo in hijos:
+            hijo.terminate()
+        for hijo in hijos:
+            hijo.join()
+
+
+def serialize(trabajo):
+    return {
+        'id': trabajo.id,
+        'tipo': trabajo.tipo,
+        'estado': trabajo.estado,
+        'procesados': trabajo.procesados,
+        'total': trabajo.total,
+        'avance': round(100 * trabajo.procesados / trabajo.total, 1) if trabajo.total else None,
+        'resultado': json.loads(trabajo.resultado) if trabajo.resultado else None,
+        'error': trabajo.error,
+        'cancelar': trabajo.cancelar,
+        'worker': trabajo.worker,
+        'fecha_creacion': trabajo.fecha_creacion.isoformat() if trabajo.fecha_creacion else None,
+        'inicio': trabajo.inicio.isoformat() if trabajo.inicio else None,
+        'fin': trabajo.fin.isoformat() if trabajo.fin else None
+    }
+
+
+def benchmark(trabajos=2000, procesos=4):
+    """Queue throughput: submit N no-op jobs one per transaction, then drain them with the worker pool"""
+    inicio = time.perf_counter()
+    ids = []
+    for n in range(trabajos):
+        ids.append(submit('eco', {'n': n}).id)
+        db.session.commit()
+    encolar = time.perf_counter() - inicio
+
+    db.session.remove()  # Do not carry a pooled connection into the forked workers
+    db.engine.dispose()
+    inicio = time.perf_counter()
+    work(procesos, hasta_vaciar=True)
+    vaciar = time.perf_counter() - inicio
+
+    estados = dict(db.session.execute(
+        select(_trabajos.c.estado, db.func.count()).where(_trabajos.c.id.in_(ids)).group_by(_trabajos.c.estado)
+    ).all())
+    db.session.execute(delete(_trabajos).where(_trabajos.c.id.in_(ids)))
+    db.session.commit()
+    return {'trabajos': trabajos, 'procesos': procesos, 'encolar': encolar, 'vaciar': vaciar, 'estados': estados}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cola de trabajos en segundo plano')
+    parser.add_argument('comando', choices=['worker', 'benchmark'])
+    parser.add_argument('--procesos', type=int, default=int(os.getenv('TRABAJOS_PROCESOS', 2)))
+    parser.add_argument('--trabajos', type=int, default=2000, help='Trabajos de prueba para benchmark')
+    args = parser.parse_args()
+
+    if args.comando == 'worker':
+        print(f"✅ Atendiendo la cola con {args.procesos} procesos (Ctrl+C para salir)")
+        work(args.procesos)
+        sys.exit(0)
+
+    app = create_app()
+    with app.app_context():
+        r = benchmark(args.trabajos, args.procesos)
+    terminados = r['estados'].get('Terminado', 0)
+    print(f"✅ Encolar: {r['trabajos']} trabajos en {r['encolar']:.2f}s ({r['trabajos'] / r['encolar']:.0f}/s)")
+    print(f"✅ Ejecutar: {terminados} trabajos con {r['procesos']} procesos en {r['vaciar']:.2f}s "
+          f"({terminados / r['vaciar']:.0f}/s)")
+    if terminados != r['trabajos']:
+        print(f"⚠️  Estados inesperados: {r['estados']}")
+        sys.exit(1)
@@ -0,0 +1,66 @@
+"""
+Incrementos con inserción (upsert) para tablas de totales
+
+Las tablas de totales mantenidos (saldos por cuenta, contadores, etc.) se
+actualizan con un solo INSERT ... ON DUPLICATE KEY UPDATE (MySQL) o
+INSERT ... ON CONFLICT DO UPDATE (SQLite/PostgreSQL), que suma los importes
+al renglón existente o lo crea si no existe, sin leerlo antes.
+"""
+
+from sqlalchemy import insert, update
+from database import db
+
+
+def _upsert(table, keys, values, changes):
+    """INSERT the rows, or apply changes(new_row) to the existing row with the same keys"""
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(table).values(values)
+        stmt = stmt.on_duplicate_key_update(changes(stmt.inserted))
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as conflict_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as conflict_insert
+        stmt = conflict_insert(table).values(values)
+        stmt = stmt.on_conflict_do_update(index_elements=list(keys), set_=changes(stmt.excluded))
+    else:
+        for row in values:
+            criteria = [table.c[k] == row[k] for k in keys]
+            result = db.session.execute(update(table).where(*criteria).values(changes(row)))
+            if result.rowcount == 0:
+                db.session.execute(insert(table).values(row))
+        return
+
+    db.session.execute(stmt)
+
+
+def increment_many(table, keys, rows):
+    """Add the amounts in each row dict to the row with the same key columns"""
+    # Collapse duplicate keys first: one statement may not touch a row twice
+    merged = {}
+    for row in rows:
+        key = tuple(row[k] for k in keys)
+        if key in merged:
+            for column, value in row.items():
+                if column not in keys:
+                    merged[key][column] += value
+        else:
+            merged[key] = dict(row)
+    if not merged:
+        return
+
+    values = list(merged.values())
+    amounts = [column for column in values[0] if column not in keys]
+    _upsert(table, keys, values, lambda new: {c: table.c[c] + new[c] for c in amounts})
+
+
+def increment(table, keys, row, initial=None):
+    """Add the amounts in a single row dict; a missing row is inserted with row (or row updated with initial)"""
+    if initial is None:
+        increment_many(table, keys, [row])
+        return
+    amounts = [column for column in row if column not in keys]
+    _upsert(table, keys, [{**row, **initial}], lambda new: {c: table.c[c] + row[c] for c in amounts})
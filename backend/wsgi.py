@@ -0,0 +1,12 @@
+"""
+Punto de entrada WSGI para producción
+
+    gunicorn -c backend/gunicorn.conf.py wsgi:app
+
+El servidor de desarrollo de Flask (python backend/app.py) atiende una
+solicitud a la vez y no debe usarse con carga real.
+"""
+
+from app import app
+
+application = app
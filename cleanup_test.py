@@ -9,7 +9,6 @@ def cleanup_test_files():
     """Eliminar archivos de prueba"""
     test_files = [
         'test_counters.html',
-        'backend/add_columns.py',
         'cleanup_test.py'
     ]
     
@@ -139,9 +139,10 @@ def main():
     print("\n✅ Configuración completada exitosamente!")
     print("\n📋 Próximos pasos:")
     print("1. Actualiza la contraseña de MySQL en el archivo .env")
-    print("2. Ejecuta el backend: python backend/app.py")
-    print("3. En otra terminal, ejecuta el frontend: npm start")
-    print("4. Abre http://localhost:3000 en tu navegador")
+    print("2. Crea las tablas y aplica las migraciones: python backend/migrations.py upgrade")
+    print("3. Ejecuta el backend: python backend/app.py")
+    print("4. En otra terminal, ejecuta el frontend: npm start")
+    print("5. Abre http://localhost:3000 en tu navegador")
     
     return True
 
@@ -1,6 +1,7 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { X, Plus, Trash2 } from 'lucide-react';
 import axios from 'axios';
+import SearchSelect from './SearchSelect';
 
 const FacturaCompraModal = ({ isOpen, onClose, onSuccess }) => {
   const [formData, setFormData] = useState({
@@ -9,35 +10,8 @@ const FacturaCompraModal = ({ isOpen, onClose, onSuccess }) => {
     estado: 'Pendiente'
   });
   const [detalles, setDetalles] = useState([{ articulo_id: '', cantidad: 1, precio_unitario: 0 }]);
-  const [proveedores, setProveedores] = useState([]);
-  const [articulos, setArticulos] = useState([]);
   const [loading, setLoading] = useState(false);
 
-  useEffect(() => {
-    if (isOpen) {
-      fetchProveedores();
-      fetchArticulos();
-    }
-  }, [isOpen]);
-
-  const fetchProveedores = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/proveedores');
-      setProveedores(response.data);
-    } catch (error) {
-      console.error('Error fetching proveedores:', error);
-    }
-  };
-
-  const fetchArticulos = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/articulos');
-      setArticulos(response.data);
-    } catch (error) {
-      console.error('Error fetching articulos:', error);
-    }
-  };
-
   const handleInputChange = (e) => {
     const { name, value } = e.target;
     setFormData(prev => ({
@@ -146,20 +120,15 @@ const FacturaCompraModal = ({ isOpen, onClose, onSuccess }) => {
             </div>
             <div>
               <label className="form-label">Proveedor *</label>
-              <select
-                name="proveedor_id"
+              <SearchSelect
+                url="http://localhost:5000/api/proveedores"
+                params={{ fields: 'id,nombre' }}
                 value={formData.proveedor_id}
-                onChange={handleInputChange}
-                className="form-input"
+                onChange={(id) => setFormData(prev => ({ ...prev, proveedor_id: id }))}
+                label={proveedor => proveedor.nombre}
+                placeholder="Seleccionar proveedor"
                 required
-              >
-                <option value="">Seleccionar proveedor</option>
-                {proveedores.map(proveedor => (
-                  <option key={proveedor.id} value={proveedor.id}>
-                    {proveedor.nombre}
-                  </option>
-                ))}
-              </select>
+              />
             </div>
             <div>
               <label className="form-label">Estado</label>
@@ -195,25 +164,20 @@ const FacturaCompraModal = ({ isOpen, onClose, onSuccess }) => {
                 <div key={index} className="grid grid-cols-1 md:grid-cols-6 gap-4 items-end">
                   <div className="md:col-span-2">
                     <label className="form-label">Artículo</label>
-                    <select
+                    <SearchSelect
+                      url="http://localhost:5000/api/articulos"
+                      params={{ fields: 'id,codigo,nombre,precio_venta' }}
                       value={detalle.articulo_id}
-                      onChange={(e) => {
-                        const articulo = articulos.find(a => a.id === parseInt(e.target.value));
-                        handleDetalleChange(index, 'articulo_id', e.target.value);
+                      onChange={(id, articulo) => {
+                        handleDetalleChange(index, 'articulo_id', id);
                         if (articulo) {
-                          handleDetalleChange(index, 'precio_unitario', articulo.precio_compra || 0);
+                          handleDetalleChange(index, 'precio_unitario', articulo.precio_venta || 0);
                         }
                       }}
-                      className="form-input"
+                      label={articulo => `${articulo.nombre} - $${articulo.precio_venta || 0}`}
+                      placeholder="Seleccionar artículo"
                       required
-                    >
-                      <option value="">Seleccionar artículo</option>
-                      {articulos.map(articulo => (
-                        <option key={articulo.id} value={articulo.id}>
-                          {articulo.nombre} - ${articulo.precio_compra || 0}
-                        </option>
-                      ))}
-                    </select>
+                    />
                   </div>
                   <div>
                     <label className="form-label">Cantidad</label>
@@ -0,0 +1,20 @@
+import React from 'react';
+
+// Footer of a paginated table: how many rows are shown and a button for the next page
+const LoadMoreButton = ({ shown, total, hasMore, loading, onClick }) => (
+  <div className="flex items-center justify-between px-6 py-3 border-t text-sm text-gray-600">
+    <span>Mostrando {shown} de {total}</span>
+    {hasMore && (
+      <button
+        type="button"
+        onClick={onClick}
+        className="btn-secondary"
+        disabled={loading}
+      >
+        {loading ? 'Cargando...' : 'Cargar más'}
+      </button>
+    )}
+  </div>
+);
+
+export default LoadMoreButton;
@@ -1,6 +1,7 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { X } from 'lucide-react';
 import axios from 'axios';
+import SearchSelect from './SearchSelect';
 
 const ReciboModal = ({ isOpen, onClose, onSuccess }) => {
   const [formData, setFormData] = useState({
@@ -12,46 +13,8 @@ const ReciboModal = ({ isOpen, onClose, onSuccess }) => {
     concepto: '',
     metodo_pago: 'Efectivo'
   });
-  const [clientes, setClientes] = useState([]);
-  const [facturas, setFacturas] = useState([]);
-  const [cuentas, setCuentas] = useState([]);
   const [loading, setLoading] = useState(false);
 
-  useEffect(() => {
-    if (isOpen) {
-      fetchClientes();
-      fetchFacturas();
-      fetchCuentas();
-    }
-  }, [isOpen]);
-
-  const fetchClientes = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/clientes');
-      setClientes(response.data);
-    } catch (error) {
-      console.error('Error fetching clientes:', error);
-    }
-  };
-
-  const fetchFacturas = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/facturas-venta');
-      setFacturas(response.data.filter(f => f.estado === 'Pendiente'));
-    } catch (error) {
-      console.error('Error fetching facturas:', error);
-    }
-  };
-
-  const fetchCuentas = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/cuentas-bancarias');
-      setCuentas(response.data);
-    } catch (error) {
-      console.error('Error fetching cuentas:', error);
-    }
-  };
-
   const handleInputChange = (e) => {
     const { name, value } = e.target;
     setFormData(prev => ({
@@ -126,56 +89,42 @@ const ReciboModal = ({ isOpen, onClose, onSuccess }) => {
             </div>
             <div>
               <label className="form-label">Cliente *</label>
-              <select
-                name="cliente_id"
+              <SearchSelect
+                url="http://localhost:5000/api/clientes"
+                params={{ fields: 'id,nombre' }}
                 value={formData.cliente_id}
-                onChange={handleInputChange}
-                className="form-input"
+                onChange={(id) => setFormData(prev => ({ ...prev, cliente_id: id, factura_venta_id: '' }))}
+                label={cliente => cliente.nombre}
+                placeholder="Seleccionar cliente"
                 required
-              >
-                <option value="">Seleccionar cliente</option>
-                {clientes.map(cliente => (
-                  <option key={cliente.id} value={cliente.id}>
-                    {cliente.nombre}
-                  </option>
-                ))}
-              </select>
+              />
             </div>
           </div>
 
           <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
             <div>
               <label className="form-label">Factura de Venta (Opcional)</label>
-              <select
-                name="factura_venta_id"
+              <SearchSelect
+                url="http://localhost:5000/api/facturas-venta"
+                params={{ estado: 'Pendiente', cliente_id: formData.cliente_id, fields: 'id,folio,total' }}
                 value={formData.factura_venta_id}
-                onChange={handleInputChange}
-                className="form-input"
-              >
-                <option value="">Sin factura específica</option>
-                {facturas.map(factura => (
-                  <option key={factura.id} value={factura.id}>
-                    {factura.folio} - ${factura.total}
-                  </option>
-                ))}
-              </select>
+                onChange={(id) => setFormData(prev => ({ ...prev, factura_venta_id: id }))}
+                label={factura => `${factura.folio} - $${factura.total}`}
+                placeholder="Sin factura específica"
+                disabled={!formData.cliente_id}
+              />
             </div>
             <div>
               <label className="form-label">Cuenta Bancaria *</label>
-              <select
-                name="cuenta_bancaria_id"
+              <SearchSelect
+                url="http://localhost:5000/api/cuentas-bancarias"
+                params={{ fields: 'id,nombre,banco' }}
                 value={formData.cuenta_bancaria_id}
-                onChange={handleInputChange}
-                className="form-input"
+                onChange={(id) => setFormData(prev => ({ ...prev, cuenta_bancaria_id: id }))}
+                label={cuenta => `${cuenta.nombre} - ${cuenta.banco}`}
+                placeholder="Seleccionar cuenta"
                 required
-              >
-                <option value="">Seleccionar cuenta</option>
-                {cuentas.map(cuenta => (
-                  <option key={cuenta.id} value={cuenta.id}>
-                    {cuenta.nombre} - {cuenta.banco}
-                  </option>
-                ))}
-              </select>
+              />
             </div>
           </div>
 
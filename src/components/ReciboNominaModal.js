@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { X } from 'lucide-react';
 import axios from 'axios';
+import SearchSelect from './SearchSelect';
 
 const ReciboNominaModal = ({ isOpen, onClose, onSuccess }) => {
   const [formData, setFormData] = useState({
@@ -13,12 +14,10 @@ const ReciboNominaModal = ({ isOpen, onClose, onSuccess }) => {
     bonos: 0,
     deducciones: 0
   });
-  const [empleados, setEmpleados] = useState([]);
   const [loading, setLoading] = useState(false);
 
   useEffect(() => {
     if (isOpen) {
-      fetchEmpleados();
       // Set default period (current month)
       const now = new Date();
       const firstDay = new Date(now.getFullYear(), now.getMonth(), 1);
@@ -32,15 +31,6 @@ const ReciboNominaModal = ({ isOpen, onClose, onSuccess }) => {
     }
   }, [isOpen]);
 
-  const fetchEmpleados = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/empleados');
-      setEmpleados(response.data.filter(e => e.activo));
-    } catch (error) {
-      console.error('Error fetching empleados:', error);
-    }
-  };
-
   const handleInputChange = (e) => {
     const { name, value } = e.target;
     setFormData(prev => ({
@@ -140,20 +130,15 @@ const ReciboNominaModal = ({ isOpen, onClose, onSuccess }) => {
             </div>
             <div>
               <label className="form-label">Empleado *</label>
-              <select
-                name="empleado_id"
+              <SearchSelect
+                url="http://localhost:5000/api/empleados"
+                params={{ activo: 1, fields: 'id,nombre,apellido_paterno,apellido_materno' }}
                 value={formData.empleado_id}
-                onChange={handleInputChange}
-                className="form-input"
+                onChange={(id) => setFormData(prev => ({ ...prev, empleado_id: id }))}
+                label={empleado => `${empleado.nombre} ${empleado.apellido_paterno} ${empleado.apellido_materno || ''}`}
+                placeholder="Seleccionar empleado"
                 required
-              >
-                <option value="">Seleccionar empleado</option>
-                {empleados.map(empleado => (
-                  <option key={empleado.id} value={empleado.id}>
-                    {empleado.nombre} {empleado.apellido_paterno} {empleado.apellido_materno || ''}
-                  </option>
-                ))}
-              </select>
+              />
             </div>
           </div>
 
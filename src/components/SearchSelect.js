@@ -0,0 +1,79 @@
+import React, { useState, useEffect } from 'react';
+import { fetchPage, PICKER_LIMIT } from '../utils/apiUtils';
+
+const SEARCH_DELAY_MS = 300;
+
+// Select fed by a server-side search: it lists the first PICKER_LIMIT rows
+// matching what was typed (?q=) instead of the whole table. The chosen row
+// stays listed while the search changes. onChange receives the id and the row.
+const SearchSelect = ({ url, params = {}, value, onChange, label, placeholder, required = false, disabled = false }) => {
+  const [search, setSearch] = useState('');
+  const [options, setOptions] = useState([]);
+  const [selected, setSelected] = useState(null);
+  const paramsKey = JSON.stringify(params);
+  const query = search.trim();
+
+  useEffect(() => {
+    if (disabled) {
+      setOptions([]);
+      return undefined;
+    }
+    let current = true;
+    const timer = setTimeout(async () => {
+      try {
+        const page = await fetchPage(url, { ...JSON.parse(paramsKey), limit: PICKER_LIMIT, ...(query && { q: query }) });
+        if (current) setOptions(page.rows);
+      } catch (error) {
+        console.error(`Error fetching ${url}:`, error);
+      }
+    }, query ? SEARCH_DELAY_MS : 0);
+    return () => {
+      current = false;
+      clearTimeout(timer);
+    };
+  }, [url, paramsKey, query, disabled]);
+
+  // The form cleared the value (reset or a change upstream)
+  useEffect(() => {
+    if (!value) {
+      setSelected(null);
+    }
+  }, [value]);
+
+  const shown = selected && !options.some(row => row.id === selected.id) ? [selected, ...options] : options;
+
+  const handleChange = (e) => {
+    const row = shown.find(option => String(option.id) === e.target.value) || null;
+    setSelected(row);
+    onChange(e.target.value, row);
+  };
+
+  return (
+    <div className="space-y-2">
+      <input
+        type="text"
+        value={search}
+        onChange={(e) => setSearch(e.target.value)}
+        placeholder="Buscar..."
+        className="form-input"
+        disabled={disabled}
+      />
+      <select
+        value={value}
+        onChange={handleChange}
+        className="form-input"
+        required={required}
+        disabled={disabled}
+      >
+        <option value="">{placeholder}</option>
+        {shown.map(row => (
+          <option key={row.id} value={row.id}>
+            {label(row)}
+          </option>
+        ))}
+      </select>
+    </div>
+  );
+};
+
+export default SearchSelect;
@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react';
 import axios from 'axios';
+import { isEventsConnected, subscribe } from '../utils/eventsUtils';
 
 export const useCounts = () => {
   const [counts, setCounts] = useState({});
@@ -21,17 +22,29 @@ export const useCounts = () => {
     }
   };
 
+  // After a change the new counts are pushed by the event channel; poll only without it
+  const refetch = () => {
+    if (!isEventsConnected()) {
+      fetchCounts();
+    }
+  };
+
   useEffect(() => {
     fetchCounts();
   }, []);
 
+  useEffect(() => subscribe('counts', (data) => {
+    setCounts(data);
+    setLoading(false);
+  }), []);
+
   // Listen for count updates from other components
   useEffect(() => {
     const handleCountUpdate = (event) => {
       if (event.detail) {
         setCounts(event.detail);
       } else {
-        fetchCounts();
+        refetch();
       }
     };
 
@@ -44,5 +57,5 @@ export const useCounts = () => {
     };
   }, []);
 
-  return { counts, loading, error, refetch: fetchCounts };
+  return { counts, loading, error, refetch };
 };
@@ -0,0 +1,58 @@
+import { useState, useEffect, useCallback, useRef } from 'react';
+import { fetchPage, PAGE_SIZE } from '../utils/apiUtils';
+
+const SEARCH_DELAY_MS = 300;
+
+// First page of a list with the count and totals of all its rows, then the
+// following pages on demand. The search term is sent to the server (?q=)
+// once typing pauses, so it covers every row and not only the loaded ones.
+export const usePagedList = (url, searchTerm = '') => {
+  const [rows, setRows] = useState([]);
+  const [next, setNext] = useState(null);
+  const [total, setTotal] = useState(0);
+  const [totals, setTotals] = useState({});
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Answers to an older search or reload are dropped
+  const latest = useRef(0);
+  const query = searchTerm.trim();
+
+  const load = useCallback(async () => {
+    const request = ++latest.current;
+    try {
+      const page = await fetchPage(url, { limit: PAGE_SIZE, totales: 1, ...(query && { q: query }) });
+      if (request !== latest.current) return;
+      setRows(page.rows);
+      setNext(page.next);
+      setTotal(page.total ?? page.rows.length);
+      setTotals(page.totals || {});
+    } catch (error) {
+      console.error(`Error fetching ${url}:`, error);
+    } finally {
+      if (request === latest.current) setLoading(false);
+    }
+  }, [url, query]);
+
+  useEffect(() => {
+    const timer = setTimeout(load, query ? SEARCH_DELAY_MS : 0);
+    return () => clearTimeout(timer);
+  }, [load, query]);
+
+  const loadMore = async () => {
+    if (!next || loadingMore) return;
+    const request = latest.current;
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage(url, { limit: PAGE_SIZE, after: next, ...(query && { q: query }) });
+      if (request !== latest.current) return;
+      setRows(prev => prev.concat(page.rows));
+      setNext(page.next);
+    } catch (error) {
+      console.error(`Error fetching ${url}:`, error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  return { rows, total, totals, loading, loadingMore, hasMore: next !== null, loadMore, reload: load };
+};
@@ -1,31 +1,18 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { Plus, Search, Edit, Trash2, Wrench, Eye } from 'lucide-react';
-import axios from 'axios';
+import { usePagedList } from '../hooks/usePagedList';
+import LoadMoreButton from '../components/LoadMoreButton';
 import ActivoFijoModal from '../components/ActivoFijoModal'; // Import the modal
 
 const ActivosFijos = () => {
-  const [activos, setActivos] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const { rows: activos, total, totals, loading, loadingMore, hasMore, loadMore, reload } = usePagedList(
+    'http://localhost:5000/api/activos-fijos', searchTerm
+  );
   const [showModal, setShowModal] = useState(false); // State for modal visibility
 
-  useEffect(() => {
-    fetchActivos();
-  }, []);
-
-  const fetchActivos = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/activos-fijos');
-      setActivos(response.data);
-    } catch (error) {
-      console.error('Error fetching activos:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
-
   const handleSuccess = () => {
-    fetchActivos(); // Refresh the list after successful creation
+    reload(); // Refresh the list after successful creation
     // Update sidebar counts
     if (window.updateSidebarCounts) {
       window.updateSidebarCounts();
@@ -48,12 +35,6 @@ const ActivosFijos = () => {
     }
   };
 
-  const filteredActivos = activos.filter(activo =>
-    activo.nombre.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    activo.codigo.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    activo.categoria?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -86,7 +67,7 @@ const ActivosFijos = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Activos</p>
-              <p className="text-2xl font-bold text-gray-900">{activos.length}</p>
+              <p className="text-2xl font-bold text-gray-900">{total}</p>
             </div>
           </div>
         </div>
@@ -98,7 +79,7 @@ const ActivosFijos = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Valor Total</p>
               <p className="text-2xl font-bold text-gray-900">
-                {formatCurrency(activos.reduce((sum, a) => sum + a.valor_adquisicion, 0))}
+                {formatCurrency(totals.valor_adquisicion || 0)}
               </p>
             </div>
           </div>
@@ -111,7 +92,7 @@ const ActivosFijos = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Activos</p>
               <p className="text-2xl font-bold text-gray-900">
-                {activos.filter(a => a.estado === 'Activo').length}
+                {totals.activos || 0}
               </p>
             </div>
           </div>
@@ -124,7 +105,7 @@ const ActivosFijos = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Dados de Baja</p>
               <p className="text-2xl font-bold text-gray-900">
-                {activos.filter(a => a.estado === 'Dado de baja').length}
+                {totals.bajas || 0}
               </p>
             </div>
           </div>
@@ -164,7 +145,7 @@ const ActivosFijos = () => {
               </tr>
             </thead>
             <tbody>
-              {filteredActivos.map((activo) => (
+              {activos.map((activo) => (
                 <tr key={activo.id}>
                   <td className="font-mono text-sm">{activo.codigo}</td>
                   <td className="font-medium">{activo.nombre}</td>
@@ -200,6 +181,13 @@ const ActivosFijos = () => {
             </tbody>
           </table>
         </div>
+        <LoadMoreButton
+          shown={activos.length}
+          total={total}
+          hasMore={hasMore}
+          loading={loadingMore}
+          onClick={loadMore}
+        />
       </div>
 
       {/* Modal */}
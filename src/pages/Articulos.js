@@ -1,11 +1,14 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { Plus, Search, Edit, Trash2, Package } from 'lucide-react';
 import axios from 'axios';
+import { usePagedList } from '../hooks/usePagedList';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 const Articulos = () => {
-  const [articulos, setArticulos] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const { rows: articulos, total, totals, loading, loadingMore, hasMore, loadMore, reload } = usePagedList(
+    'http://localhost:5000/api/articulos', searchTerm
+  );
   const [showModal, setShowModal] = useState(false);
   const [editingArticulo, setEditingArticulo] = useState(null);
   const [formData, setFormData] = useState({
@@ -19,21 +22,6 @@ const Articulos = () => {
     unidad_medida: 'PZA'
   });
 
-  useEffect(() => {
-    fetchArticulos();
-  }, []);
-
-  const fetchArticulos = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/articulos');
-      setArticulos(response.data);
-    } catch (error) {
-      console.error('Error fetching articulos:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
-
   const handleSubmit = async (e) => {
     e.preventDefault();
     try {
@@ -42,7 +30,7 @@ const Articulos = () => {
       } else {
         await axios.post('http://localhost:5000/api/articulos', formData);
       }
-      fetchArticulos();
+      reload();
       setShowModal(false);
       setEditingArticulo(null);
       setFormData({
@@ -79,7 +67,7 @@ const Articulos = () => {
     if (window.confirm('¿Estás seguro de que quieres eliminar este artículo?')) {
       try {
         await axios.delete(`http://localhost:5000/api/articulos/${id}`);
-        fetchArticulos();
+        reload();
       } catch (error) {
         console.error('Error deleting articulo:', error);
       }
@@ -93,12 +81,6 @@ const Articulos = () => {
     }).format(amount);
   };
 
-  const filteredArticulos = articulos.filter(articulo =>
-    articulo.nombre.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    articulo.codigo.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    articulo.descripcion?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -133,7 +115,7 @@ const Articulos = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Artículos</p>
-              <p className="text-2xl font-bold text-gray-900">{articulos.length}</p>
+              <p className="text-2xl font-bold text-gray-900">{total}</p>
             </div>
           </div>
         </div>
@@ -145,7 +127,7 @@ const Articulos = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Valor Total</p>
               <p className="text-2xl font-bold text-gray-900">
-                {formatCurrency(articulos.reduce((sum, art) => sum + (art.stock_actual * (art.precio_compra || 0)), 0))}
+                {formatCurrency(totals.valor_inventario || 0)}
               </p>
             </div>
           </div>
@@ -158,7 +140,7 @@ const Articulos = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Stock Bajo</p>
               <p className="text-2xl font-bold text-gray-900">
-                {articulos.filter(art => art.stock_actual <= art.stock_minimo).length}
+                {totals.bajo_stock || 0}
               </p>
             </div>
           </div>
@@ -171,7 +153,7 @@ const Articulos = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Sin Stock</p>
               <p className="text-2xl font-bold text-gray-900">
-                {articulos.filter(art => art.stock_actual === 0).length}
+                {totals.agotados || 0}
               </p>
             </div>
           </div>
@@ -213,7 +195,7 @@ const Articulos = () => {
               </tr>
             </thead>
             <tbody>
-              {filteredArticulos.map((articulo) => (
+              {articulos.map((articulo) => (
                 <tr key={articulo.id}>
                   <td className="font-mono text-sm">{articulo.codigo}</td>
                   <td className="font-medium">{articulo.nombre}</td>
@@ -251,6 +233,13 @@ const Articulos = () => {
             </tbody>
           </table>
         </div>
+        <LoadMoreButton
+          shown={articulos.length}
+          total={total}
+          hasMore={hasMore}
+          loading={loadingMore}
+          onClick={loadMore}
+        />
       </div>
 
       {/* Modal */}
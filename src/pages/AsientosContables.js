@@ -1,31 +1,18 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { Plus, Search, Edit, Trash2, BookOpen, Eye } from 'lucide-react';
-import axios from 'axios';
+import { usePagedList } from '../hooks/usePagedList';
+import LoadMoreButton from '../components/LoadMoreButton';
 import AsientoContableModal from '../components/AsientoContableModal'; // Import the modal
 
 const AsientosContables = () => {
-  const [asientos, setAsientos] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const { rows: asientos, total, totals, loading, loadingMore, hasMore, loadMore, reload } = usePagedList(
+    'http://localhost:5000/api/asientos-contables', searchTerm
+  );
   const [showModal, setShowModal] = useState(false); // State for modal visibility
 
-  useEffect(() => {
-    fetchAsientos();
-  }, []);
-
-  const fetchAsientos = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/asientos-contables');
-      setAsientos(response.data);
-    } catch (error) {
-      console.error('Error fetching asientos:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
-
   const handleSuccess = () => {
-    fetchAsientos(); // Refresh the list after successful creation
+    reload(); // Refresh the list after successful creation
     // Update sidebar counts
     if (window.updateSidebarCounts) {
       window.updateSidebarCounts();
@@ -48,11 +35,6 @@ const AsientosContables = () => {
     }
   };
 
-  const filteredAsientos = asientos.filter(asiento =>
-    asiento.folio.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    asiento.concepto.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -85,7 +67,7 @@ const AsientosContables = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Asientos</p>
-              <p className="text-2xl font-bold text-gray-900">{asientos.length}</p>
+              <p className="text-2xl font-bold text-gray-900">{total}</p>
             </div>
           </div>
         </div>
@@ -97,7 +79,7 @@ const AsientosContables = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Aplicados</p>
               <p className="text-2xl font-bold text-gray-900">
-                {asientos.filter(a => a.estado === 'Aplicado').length}
+                {totals.aplicados || 0}
               </p>
             </div>
           </div>
@@ -110,7 +92,7 @@ const AsientosContables = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Borradores</p>
               <p className="text-2xl font-bold text-gray-900">
-                {asientos.filter(a => a.estado === 'Borrador').length}
+                {totals.borradores || 0}
               </p>
             </div>
           </div>
@@ -123,7 +105,7 @@ const AsientosContables = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Cancelados</p>
               <p className="text-2xl font-bold text-gray-900">
-                {asientos.filter(a => a.estado === 'Cancelado').length}
+                {totals.cancelados || 0}
               </p>
             </div>
           </div>
@@ -162,7 +144,7 @@ const AsientosContables = () => {
               </tr>
             </thead>
             <tbody>
-              {filteredAsientos.map((asiento) => (
+              {asientos.map((asiento) => (
                 <tr key={asiento.id}>
                   <td className="font-mono text-sm">{asiento.folio}</td>
                   <td>
@@ -197,6 +179,13 @@ const AsientosContables = () => {
             </tbody>
           </table>
         </div>
+        <LoadMoreButton
+          shown={asientos.length}
+          total={total}
+          hasMore={hasMore}
+          loading={loadingMore}
+          onClick={loadMore}
+        />
       </div>
 
       {/* Modal */}
@@ -1,11 +1,14 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { Plus, Search, Edit, Trash2, Eye } from 'lucide-react';
 import axios from 'axios';
+import { usePagedList } from '../hooks/usePagedList';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 const Clientes = () => {
-  const [clientes, setClientes] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const { rows: clientes, total, loading, loadingMore, hasMore, loadMore, reload } = usePagedList(
+    'http://localhost:5000/api/clientes', searchTerm
+  );
   const [showModal, setShowModal] = useState(false);
   const [editingCliente, setEditingCliente] = useState(null);
   const [formData, setFormData] = useState({
@@ -16,21 +19,6 @@ const Clientes = () => {
     email: ''
   });
 
-  useEffect(() => {
-    fetchClientes();
-  }, []);
-
-  const fetchClientes = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/clientes');
-      setClientes(response.data);
-    } catch (error) {
-      console.error('Error fetching clientes:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
-
   const handleSubmit = async (e) => {
     e.preventDefault();
     try {
@@ -39,7 +27,7 @@ const Clientes = () => {
       } else {
         await axios.post('http://localhost:5000/api/clientes', formData);
       }
-      fetchClientes();
+      reload();
       setShowModal(false);
       setEditingCliente(null);
       setFormData({ nombre: '', rfc: '', direccion: '', telefono: '', email: '' });
@@ -68,7 +56,7 @@ const Clientes = () => {
     if (window.confirm('¿Estás seguro de que quieres eliminar este cliente?')) {
       try {
         await axios.delete(`http://localhost:5000/api/clientes/${id}`);
-        fetchClientes();
+        reload();
         // Update sidebar counts
         if (window.updateSidebarCounts) {
           window.updateSidebarCounts();
@@ -79,12 +67,6 @@ const Clientes = () => {
     }
   };
 
-  const filteredClientes = clientes.filter(cliente =>
-    cliente.nombre.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    cliente.rfc?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    cliente.email?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -143,7 +125,7 @@ const Clientes = () => {
               </tr>
             </thead>
             <tbody>
-              {filteredClientes.map((cliente) => (
+              {clientes.map((cliente) => (
                 <tr key={cliente.id}>
                   <td className="font-medium">{cliente.nombre}</td>
                   <td>{cliente.rfc || '-'}</td>
@@ -178,6 +160,13 @@ const Clientes = () => {
             </tbody>
           </table>
         </div>
+        <LoadMoreButton
+          shown={clientes.length}
+          total={total}
+          hasMore={hasMore}
+          loading={loadingMore}
+          onClick={loadMore}
+        />
       </div>
 
       {/* Modal */}
@@ -1,11 +1,14 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { Plus, Search, Edit, Trash2, CreditCard } from 'lucide-react';
 import axios from 'axios';
+import { usePagedList } from '../hooks/usePagedList';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 const CuentasBancarias = () => {
-  const [cuentas, setCuentas] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const { rows: cuentas, total, totals, loading, loadingMore, hasMore, loadMore, reload } = usePagedList(
+    'http://localhost:5000/api/cuentas-bancarias', searchTerm
+  );
   const [showModal, setShowModal] = useState(false);
   const [editingCuenta, setEditingCuenta] = useState(null);
   const [formData, setFormData] = useState({
@@ -15,21 +18,6 @@ const CuentasBancarias = () => {
     saldo_inicial: ''
   });
 
-  useEffect(() => {
-    fetchCuentas();
-  }, []);
-
-  const fetchCuentas = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/cuentas-bancarias');
-      setCuentas(response.data);
-    } catch (error) {
-      console.error('Error fetching cuentas:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
-
   const handleSubmit = async (e) => {
     e.preventDefault();
     try {
@@ -38,7 +26,7 @@ const CuentasBancarias = () => {
       } else {
         await axios.post('http://localhost:5000/api/cuentas-bancarias', formData);
       }
-      fetchCuentas();
+      reload();
       setShowModal(false);
       setEditingCuenta(null);
       setFormData({ nombre: '', banco: '', numero_cuenta: '', saldo_inicial: '' });
@@ -62,7 +50,7 @@ const CuentasBancarias = () => {
     if (window.confirm('¿Estás seguro de que quieres eliminar esta cuenta bancaria?')) {
       try {
         await axios.delete(`http://localhost:5000/api/cuentas-bancarias/${id}`);
-        fetchCuentas();
+        reload();
       } catch (error) {
         console.error('Error deleting cuenta:', error);
       }
@@ -76,12 +64,6 @@ const CuentasBancarias = () => {
     }).format(amount);
   };
 
-  const filteredCuentas = cuentas.filter(cuenta =>
-    cuenta.nombre.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    cuenta.banco.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    cuenta.numero_cuenta.includes(searchTerm)
-  );
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -116,7 +98,7 @@ const CuentasBancarias = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Cuentas</p>
-              <p className="text-2xl font-bold text-gray-900">{cuentas.length}</p>
+              <p className="text-2xl font-bold text-gray-900">{total}</p>
             </div>
           </div>
         </div>
@@ -128,7 +110,7 @@ const CuentasBancarias = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Saldo Total</p>
               <p className="text-2xl font-bold text-gray-900">
-                {formatCurrency(cuentas.reduce((sum, cuenta) => sum + cuenta.saldo_actual, 0))}
+                {formatCurrency(totals.saldo_actual || 0)}
               </p>
             </div>
           </div>
@@ -141,8 +123,8 @@ const CuentasBancarias = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Promedio por Cuenta</p>
               <p className="text-2xl font-bold text-gray-900">
-                {cuentas.length > 0 
-                  ? formatCurrency(cuentas.reduce((sum, cuenta) => sum + cuenta.saldo_actual, 0) / cuentas.length)
+                {total > 0 
+                  ? formatCurrency((totals.saldo_actual || 0) / total)
                   : formatCurrency(0)
                 }
               </p>
@@ -184,7 +166,7 @@ const CuentasBancarias = () => {
               </tr>
             </thead>
             <tbody>
-              {filteredCuentas.map((cuenta) => (
+              {cuentas.map((cuenta) => (
                 <tr key={cuenta.id}>
                   <td className="font-medium">{cuenta.nombre}</td>
                   <td>{cuenta.banco}</td>
@@ -223,6 +205,13 @@ const CuentasBancarias = () => {
             </tbody>
           </table>
         </div>
+        <LoadMoreButton
+          shown={cuentas.length}
+          total={total}
+          hasMore={hasMore}
+          loading={loadingMore}
+          onClick={loadMore}
+        />
       </div>
 
       {/* Modal */}
@@ -17,6 +17,7 @@ import {
   BookOpen
 } from 'lucide-react';
 import axios from 'axios';
+import { subscribe } from '../utils/eventsUtils';
 
 const Dashboard = () => {
   const [summary, setSummary] = useState(null);
@@ -28,6 +29,13 @@ const Dashboard = () => {
     fetchSummary();
   }, []);
 
+  // Refresh the totals only when a pushed change affects them
+  useEffect(() => subscribe('cambio', (data) => {
+    if (data.dashboard) {
+      fetchSummary();
+    }
+  }), []);
+
   const fetchSummary = async () => {
     try {
       const response = await axios.get('http://localhost:5000/api/dashboard/summary');
@@ -1,31 +1,18 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { Plus, Search, Edit, Trash2, UserCheck, Eye } from 'lucide-react';
-import axios from 'axios';
+import { usePagedList } from '../hooks/usePagedList';
+import LoadMoreButton from '../components/LoadMoreButton';
 import EmpleadoModal from '../components/EmpleadoModal'; // Import the modal
 
 const Empleados = () => {
-  const [empleados, setEmpleados] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const { rows: empleados, total, totals, loading, loadingMore, hasMore, loadMore, reload } = usePagedList(
+    'http://localhost:5000/api/empleados', searchTerm
+  );
   const [showModal, setShowModal] = useState(false); // State for modal visibility
 
-  useEffect(() => {
-    fetchEmpleados();
-  }, []);
-
-  const fetchEmpleados = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/empleados');
-      setEmpleados(response.data);
-    } catch (error) {
-      console.error('Error fetching empleados:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
-
   const handleSuccess = () => {
-    fetchEmpleados(); // Refresh the list after successful creation
+    reload(); // Refresh the list after successful creation
     // Update sidebar counts
     if (window.updateSidebarCounts) {
       window.updateSidebarCounts();
@@ -39,12 +26,6 @@ const Empleados = () => {
     }).format(amount);
   };
 
-  const filteredEmpleados = empleados.filter(empleado =>
-    empleado.nombre.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    empleado.apellido_paterno.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    empleado.puesto?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -77,7 +58,7 @@ const Empleados = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Empleados</p>
-              <p className="text-2xl font-bold text-gray-900">{empleados.length}</p>
+              <p className="text-2xl font-bold text-gray-900">{total}</p>
             </div>
           </div>
         </div>
@@ -89,7 +70,7 @@ const Empleados = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Activos</p>
               <p className="text-2xl font-bold text-gray-900">
-                {empleados.filter(e => e.activo).length}
+                {totals.activos || 0}
               </p>
             </div>
           </div>
@@ -102,8 +83,8 @@ const Empleados = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Salario Promedio</p>
               <p className="text-2xl font-bold text-gray-900">
-                {empleados.length > 0 
-                  ? formatCurrency(empleados.reduce((sum, e) => sum + (e.salario_diario || 0), 0) / empleados.length)
+                {total > 0 
+                  ? formatCurrency((totals.salario_diario || 0) / total)
                   : formatCurrency(0)
                 }
               </p>
@@ -118,7 +99,7 @@ const Empleados = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Inactivos</p>
               <p className="text-2xl font-bold text-gray-900">
-                {empleados.filter(e => !e.activo).length}
+                {total - (totals.activos || 0)}
               </p>
             </div>
           </div>
@@ -157,7 +138,7 @@ const Empleados = () => {
               </tr>
             </thead>
             <tbody>
-              {filteredEmpleados.map((empleado) => (
+              {empleados.map((empleado) => (
                 <tr key={empleado.id}>
                   <td className="font-medium">
                     {empleado.nombre} {empleado.apellido_paterno} {empleado.apellido_materno || ''}
@@ -200,6 +181,13 @@ const Empleados = () => {
             </tbody>
           </table>
         </div>
+        <LoadMoreButton
+          shown={empleados.length}
+          total={total}
+          hasMore={hasMore}
+          loading={loadingMore}
+          onClick={loadMore}
+        />
       </div>
 
       {/* Modal */}
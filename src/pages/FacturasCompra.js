@@ -1,31 +1,18 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { Plus, Search, Edit, Trash2, ShoppingCart, Eye } from 'lucide-react';
-import axios from 'axios';
+import { usePagedList } from '../hooks/usePagedList';
+import LoadMoreButton from '../components/LoadMoreButton';
 import FacturaCompraModal from '../components/FacturaCompraModal'; // Import the modal
 
 const FacturasCompra = () => {
-  const [facturas, setFacturas] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const { rows: facturas, total, totals, loading, loadingMore, hasMore, loadMore, reload } = usePagedList(
+    'http://localhost:5000/api/facturas-compra', searchTerm
+  );
   const [showModal, setShowModal] = useState(false); // State for modal visibility
 
-  useEffect(() => {
-    fetchFacturas();
-  }, []);
-
-  const fetchFacturas = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/facturas-compra');
-      setFacturas(response.data);
-    } catch (error) {
-      console.error('Error fetching facturas:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
-
   const handleSuccess = () => {
-    fetchFacturas(); // Refresh the list after successful creation
+    reload(); // Refresh the list after successful creation
     // Update sidebar counts
     if (window.updateSidebarCounts) {
       window.updateSidebarCounts();
@@ -48,11 +35,6 @@ const FacturasCompra = () => {
     }
   };
 
-  const filteredFacturas = facturas.filter(factura =>
-    factura.folio.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    factura.proveedor_nombre?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -85,7 +67,7 @@ const FacturasCompra = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Facturas</p>
-              <p className="text-2xl font-bold text-gray-900">{facturas.length}</p>
+              <p className="text-2xl font-bold text-gray-900">{total}</p>
             </div>
           </div>
         </div>
@@ -97,7 +79,7 @@ const FacturasCompra = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Comprado</p>
               <p className="text-2xl font-bold text-gray-900">
-                {formatCurrency(facturas.reduce((sum, f) => sum + f.total, 0))}
+                {formatCurrency(totals.total || 0)}
               </p>
             </div>
           </div>
@@ -110,7 +92,7 @@ const FacturasCompra = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Pendientes</p>
               <p className="text-2xl font-bold text-gray-900">
-                {facturas.filter(f => f.estado === 'Pendiente').length}
+                {totals.pendientes || 0}
               </p>
             </div>
           </div>
@@ -123,7 +105,7 @@ const FacturasCompra = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Canceladas</p>
               <p className="text-2xl font-bold text-gray-900">
-                {facturas.filter(f => f.estado === 'Cancelada').length}
+                {totals.canceladas || 0}
               </p>
             </div>
           </div>
@@ -163,7 +145,7 @@ const FacturasCompra = () => {
               </tr>
             </thead>
             <tbody>
-              {filteredFacturas.map((factura) => (
+              {facturas.map((factura) => (
                 <tr key={factura.id}>
                   <td className="font-mono text-sm">{factura.folio}</td>
                   <td>
@@ -199,6 +181,13 @@ const FacturasCompra = () => {
             </tbody>
           </table>
         </div>
+        <LoadMoreButton
+          shown={facturas.length}
+          total={total}
+          hasMore={hasMore}
+          loading={loadingMore}
+          onClick={loadMore}
+        />
       </div>
 
       {/* Modal */}
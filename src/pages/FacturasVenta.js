@@ -1,31 +1,18 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { Plus, Search, Edit, Trash2, FileText, Eye } from 'lucide-react';
-import axios from 'axios';
+import { usePagedList } from '../hooks/usePagedList';
+import LoadMoreButton from '../components/LoadMoreButton';
 import FacturaVentaModal from '../components/FacturaVentaModal';
 
 const FacturasVenta = () => {
-  const [facturas, setFacturas] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const { rows: facturas, total, totals, loading, loadingMore, hasMore, loadMore, reload } = usePagedList(
+    'http://localhost:5000/api/facturas-venta', searchTerm
+  );
   const [showModal, setShowModal] = useState(false);
 
-  useEffect(() => {
-    fetchFacturas();
-  }, []);
-
-  const fetchFacturas = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/facturas-venta');
-      setFacturas(response.data);
-    } catch (error) {
-      console.error('Error fetching facturas:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
-
   const handleSuccess = () => {
-    fetchFacturas(); // Refresh the list
+    reload(); // Refresh the list
     // Update sidebar counts
     if (window.updateSidebarCounts) {
       window.updateSidebarCounts();
@@ -48,11 +35,6 @@ const FacturasVenta = () => {
     }
   };
 
-  const filteredFacturas = facturas.filter(factura =>
-    factura.folio.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    factura.cliente_nombre?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -87,7 +69,7 @@ const FacturasVenta = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Facturas</p>
-              <p className="text-2xl font-bold text-gray-900">{facturas.length}</p>
+              <p className="text-2xl font-bold text-gray-900">{total}</p>
             </div>
           </div>
         </div>
@@ -99,7 +81,7 @@ const FacturasVenta = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Vendido</p>
               <p className="text-2xl font-bold text-gray-900">
-                {formatCurrency(facturas.reduce((sum, f) => sum + f.total, 0))}
+                {formatCurrency(totals.total || 0)}
               </p>
             </div>
           </div>
@@ -112,7 +94,7 @@ const FacturasVenta = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Pendientes</p>
               <p className="text-2xl font-bold text-gray-900">
-                {facturas.filter(f => f.estado === 'Pendiente').length}
+                {totals.pendientes || 0}
               </p>
             </div>
           </div>
@@ -125,7 +107,7 @@ const FacturasVenta = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Canceladas</p>
               <p className="text-2xl font-bold text-gray-900">
-                {facturas.filter(f => f.estado === 'Cancelada').length}
+                {totals.canceladas || 0}
               </p>
             </div>
           </div>
@@ -167,7 +149,7 @@ const FacturasVenta = () => {
               </tr>
             </thead>
             <tbody>
-              {filteredFacturas.map((factura) => (
+              {facturas.map((factura) => (
                 <tr key={factura.id}>
                   <td className="font-mono text-sm">{factura.folio}</td>
                   <td>
@@ -212,6 +194,13 @@ const FacturasVenta = () => {
             </tbody>
           </table>
         </div>
+        <LoadMoreButton
+          shown={facturas.length}
+          total={total}
+          hasMore={hasMore}
+          loading={loadingMore}
+          onClick={loadMore}
+        />
       </div>
 
       {/* Modal */}
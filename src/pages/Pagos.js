@@ -1,31 +1,18 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { Plus, Search, Edit, Trash2, CreditCard, Eye } from 'lucide-react';
-import axios from 'axios';
+import { usePagedList } from '../hooks/usePagedList';
+import LoadMoreButton from '../components/LoadMoreButton';
 import PagoModal from '../components/PagoModal'; // Import the modal
 
 const Pagos = () => {
-  const [pagos, setPagos] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const { rows: pagos, total, totals, loading, loadingMore, hasMore, loadMore, reload } = usePagedList(
+    'http://localhost:5000/api/pagos', searchTerm
+  );
   const [showModal, setShowModal] = useState(false); // State for modal visibility
 
-  useEffect(() => {
-    fetchPagos();
-  }, []);
-
-  const fetchPagos = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/pagos');
-      setPagos(response.data);
-    } catch (error) {
-      console.error('Error fetching pagos:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
-
   const handleSuccess = () => {
-    fetchPagos(); // Refresh the list after successful creation
+    reload(); // Refresh the list after successful creation
     // Update sidebar counts
     if (window.updateSidebarCounts) {
       window.updateSidebarCounts();
@@ -39,11 +26,6 @@ const Pagos = () => {
     }).format(amount);
   };
 
-  const filteredPagos = pagos.filter(pago =>
-    pago.folio.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    pago.proveedor_nombre?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -76,7 +58,7 @@ const Pagos = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Pagos</p>
-              <p className="text-2xl font-bold text-gray-900">{pagos.length}</p>
+              <p className="text-2xl font-bold text-gray-900">{total}</p>
             </div>
           </div>
         </div>
@@ -88,7 +70,7 @@ const Pagos = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Pagado</p>
               <p className="text-2xl font-bold text-gray-900">
-                {formatCurrency(pagos.reduce((sum, p) => sum + p.monto, 0))}
+                {formatCurrency(totals.monto || 0)}
               </p>
             </div>
           </div>
@@ -101,8 +83,8 @@ const Pagos = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Promedio</p>
               <p className="text-2xl font-bold text-gray-900">
-                {pagos.length > 0 
-                  ? formatCurrency(pagos.reduce((sum, p) => sum + p.monto, 0) / pagos.length)
+                {total > 0 
+                  ? formatCurrency((totals.monto || 0) / total)
                   : formatCurrency(0)
                 }
               </p>
@@ -143,7 +125,7 @@ const Pagos = () => {
               </tr>
             </thead>
             <tbody>
-              {filteredPagos.map((pago) => (
+              {pagos.map((pago) => (
                 <tr key={pago.id}>
                   <td className="font-mono text-sm">{pago.folio}</td>
                   <td>
@@ -178,6 +160,13 @@ const Pagos = () => {
             </tbody>
           </table>
         </div>
+        <LoadMoreButton
+          shown={pagos.length}
+          total={total}
+          hasMore={hasMore}
+          loading={loadingMore}
+          onClick={loadMore}
+        />
       </div>
 
       {/* Modal */}
@@ -1,11 +1,14 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { Plus, Search, Edit, Trash2 } from 'lucide-react';
 import axios from 'axios';
+import { usePagedList } from '../hooks/usePagedList';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 const Proveedores = () => {
-  const [proveedores, setProveedores] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const { rows: proveedores, total, loading, loadingMore, hasMore, loadMore, reload } = usePagedList(
+    'http://localhost:5000/api/proveedores', searchTerm
+  );
   const [showModal, setShowModal] = useState(false);
   const [editingProveedor, setEditingProveedor] = useState(null);
   const [formData, setFormData] = useState({
@@ -16,21 +19,6 @@ const Proveedores = () => {
     email: ''
   });
 
-  useEffect(() => {
-    fetchProveedores();
-  }, []);
-
-  const fetchProveedores = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/proveedores');
-      setProveedores(response.data);
-    } catch (error) {
-      console.error('Error fetching proveedores:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
-
   const handleSubmit = async (e) => {
     e.preventDefault();
     try {
@@ -39,7 +27,7 @@ const Proveedores = () => {
       } else {
         await axios.post('http://localhost:5000/api/proveedores', formData);
       }
-      fetchProveedores();
+      reload();
       setShowModal(false);
       setEditingProveedor(null);
       setFormData({ nombre: '', rfc: '', direccion: '', telefono: '', email: '' });
@@ -64,19 +52,13 @@ const Proveedores = () => {
     if (window.confirm('¿Estás seguro de que quieres eliminar este proveedor?')) {
       try {
         await axios.delete(`http://localhost:5000/api/proveedores/${id}`);
-        fetchProveedores();
+        reload();
       } catch (error) {
         console.error('Error deleting proveedor:', error);
       }
     }
   };
 
-  const filteredProveedores = proveedores.filter(proveedor =>
-    proveedor.nombre.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    proveedor.rfc?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    proveedor.email?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -135,7 +117,7 @@ const Proveedores = () => {
               </tr>
             </thead>
             <tbody>
-              {filteredProveedores.map((proveedor) => (
+              {proveedores.map((proveedor) => (
                 <tr key={proveedor.id}>
                   <td className="font-medium">{proveedor.nombre}</td>
                   <td>{proveedor.rfc || '-'}</td>
@@ -170,6 +152,13 @@ const Proveedores = () => {
             </tbody>
           </table>
         </div>
+        <LoadMoreButton
+          shown={proveedores.length}
+          total={total}
+          hasMore={hasMore}
+          loading={loadingMore}
+          onClick={loadMore}
+        />
       </div>
 
       {/* Modal */}
@@ -1,31 +1,18 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { Plus, Search, Edit, Trash2, Receipt, Eye } from 'lucide-react';
-import axios from 'axios';
+import { usePagedList } from '../hooks/usePagedList';
+import LoadMoreButton from '../components/LoadMoreButton';
 import ReciboModal from '../components/ReciboModal';
 
 const Recibos = () => {
-  const [recibos, setRecibos] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const { rows: recibos, total, totals, loading, loadingMore, hasMore, loadMore, reload } = usePagedList(
+    'http://localhost:5000/api/recibos', searchTerm
+  );
   const [showModal, setShowModal] = useState(false);
 
-  useEffect(() => {
-    fetchRecibos();
-  }, []);
-
-  const fetchRecibos = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/recibos');
-      setRecibos(response.data);
-    } catch (error) {
-      console.error('Error fetching recibos:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
-
   const handleSuccess = () => {
-    fetchRecibos(); // Refresh the list
+    reload(); // Refresh the list
     // Update sidebar counts
     if (window.updateSidebarCounts) {
       window.updateSidebarCounts();
@@ -39,11 +26,6 @@ const Recibos = () => {
     }).format(amount);
   };
 
-  const filteredRecibos = recibos.filter(recibo =>
-    recibo.folio.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    recibo.cliente_nombre?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -76,7 +58,7 @@ const Recibos = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Recibos</p>
-              <p className="text-2xl font-bold text-gray-900">{recibos.length}</p>
+              <p className="text-2xl font-bold text-gray-900">{total}</p>
             </div>
           </div>
         </div>
@@ -88,7 +70,7 @@ const Recibos = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Cobrado</p>
               <p className="text-2xl font-bold text-gray-900">
-                {formatCurrency(recibos.reduce((sum, r) => sum + r.monto, 0))}
+                {formatCurrency(totals.monto || 0)}
               </p>
             </div>
           </div>
@@ -101,8 +83,8 @@ const Recibos = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Promedio</p>
               <p className="text-2xl font-bold text-gray-900">
-                {recibos.length > 0 
-                  ? formatCurrency(recibos.reduce((sum, r) => sum + r.monto, 0) / recibos.length)
+                {total > 0 
+                  ? formatCurrency((totals.monto || 0) / total)
                   : formatCurrency(0)
                 }
               </p>
@@ -143,7 +125,7 @@ const Recibos = () => {
               </tr>
             </thead>
             <tbody>
-              {filteredRecibos.map((recibo) => (
+              {recibos.map((recibo) => (
                 <tr key={recibo.id}>
                   <td className="font-mono text-sm">{recibo.folio}</td>
                   <td>
@@ -178,6 +160,13 @@ const Recibos = () => {
             </tbody>
           </table>
         </div>
+        <LoadMoreButton
+          shown={recibos.length}
+          total={total}
+          hasMore={hasMore}
+          loading={loadingMore}
+          onClick={loadMore}
+        />
       </div>
 
       {/* Modal */}
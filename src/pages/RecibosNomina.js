@@ -1,31 +1,18 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { Plus, Search, Edit, Trash2, FileSpreadsheet, Eye } from 'lucide-react';
-import axios from 'axios';
+import { usePagedList } from '../hooks/usePagedList';
+import LoadMoreButton from '../components/LoadMoreButton';
 import ReciboNominaModal from '../components/ReciboNominaModal'; // Import the modal
 
 const RecibosNomina = () => {
-  const [recibos, setRecibos] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
+  const { rows: recibos, total, totals, loading, loadingMore, hasMore, loadMore, reload } = usePagedList(
+    'http://localhost:5000/api/recibos-nomina', searchTerm
+  );
   const [showModal, setShowModal] = useState(false); // State for modal visibility
 
-  useEffect(() => {
-    fetchRecibos();
-  }, []);
-
-  const fetchRecibos = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/recibos-nomina');
-      setRecibos(response.data);
-    } catch (error) {
-      console.error('Error fetching recibos:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
-
   const handleSuccess = () => {
-    fetchRecibos(); // Refresh the list after successful creation
+    reload(); // Refresh the list after successful creation
     // Update sidebar counts
     if (window.updateSidebarCounts) {
       window.updateSidebarCounts();
@@ -39,11 +26,6 @@ const RecibosNomina = () => {
     }).format(amount);
   };
 
-  const filteredRecibos = recibos.filter(recibo =>
-    recibo.folio.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    recibo.empleado_nombre?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -76,7 +58,7 @@ const RecibosNomina = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Recibos</p>
-              <p className="text-2xl font-bold text-gray-900">{recibos.length}</p>
+              <p className="text-2xl font-bold text-gray-900">{total}</p>
             </div>
           </div>
         </div>
@@ -88,7 +70,7 @@ const RecibosNomina = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Bruto</p>
               <p className="text-2xl font-bold text-gray-900">
-                {formatCurrency(recibos.reduce((sum, r) => sum + r.total_bruto, 0))}
+                {formatCurrency(totals.total_bruto || 0)}
               </p>
             </div>
           </div>
@@ -101,7 +83,7 @@ const RecibosNomina = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Total Neto</p>
               <p className="text-2xl font-bold text-gray-900">
-                {formatCurrency(recibos.reduce((sum, r) => sum + r.total_neto, 0))}
+                {formatCurrency(totals.total_neto || 0)}
               </p>
             </div>
           </div>
@@ -114,8 +96,8 @@ const RecibosNomina = () => {
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-600">Promedio Neto</p>
               <p className="text-2xl font-bold text-gray-900">
-                {recibos.length > 0 
-                  ? formatCurrency(recibos.reduce((sum, r) => sum + r.total_neto, 0) / recibos.length)
+                {total > 0 
+                  ? formatCurrency((totals.total_neto || 0) / total)
                   : formatCurrency(0)
                 }
               </p>
@@ -156,7 +138,7 @@ const RecibosNomina = () => {
               </tr>
             </thead>
             <tbody>
-              {filteredRecibos.map((recibo) => (
+              {recibos.map((recibo) => (
                 <tr key={recibo.id}>
                   <td className="font-mono text-sm">{recibo.folio}</td>
                   <td>
@@ -192,6 +174,13 @@ const RecibosNomina = () => {
             </tbody>
           </table>
         </div>
+        <LoadMoreButton
+          shown={recibos.length}
+          total={total}
+          hasMore={hasMore}
+          loading={loadingMore}
+          onClick={loadMore}
+        />
       </div>
 
       {/* Modal */}
@@ -0,0 +1,23 @@
+import axios from 'axios';
+
+// List endpoints are paginated: the body is one page and the X-Next-Cursor
+// header carries the cursor to continue from. Pages show the first page and
+// fetch the next one on demand (usePagedList); pickers search with ?q= and
+// a small limit (SearchSelect). Nothing downloads a whole table.
+export const PAGE_SIZE = 50;
+export const PICKER_LIMIT = 20;
+
+// One page of a list: its rows, the next cursor (null on the last page) and,
+// when requested with count=1 or totales=1, the count and the totals of every
+// matching row
+export const fetchPage = async (url, params = {}) => {
+  const response = await axios.get(url, { params });
+  const total = response.headers['x-total-count'];
+  const totals = response.headers['x-totals'];
+  return {
+    rows: response.data,
+    next: response.headers['x-next-cursor'] || null,
+    total: total !== undefined ? parseInt(total, 10) : null,
+    totals: totals ? JSON.parse(totals) : null
+  };
+};
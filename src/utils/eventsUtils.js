@@ -0,0 +1,27 @@
+// Push channel for counts and dashboard changes (backend/eventos.py).
+// A single EventSource per tab is shared by every subscriber; the browser
+// reconnects on its own and sends Last-Event-ID to replay missed changes.
+const EVENTS_URL = process.env.REACT_APP_EVENTS_URL || 'http://localhost:5001/api/events';
+
+let source = null;
+const listeners = { counts: new Set(), cambio: new Set() };
+
+const connect = () => {
+  if (source || typeof EventSource === 'undefined') return;
+  source = new EventSource(EVENTS_URL);
+  Object.keys(listeners).forEach((type) => {
+    source.addEventListener(type, (event) => {
+      const data = JSON.parse(event.data);
+      listeners[type].forEach((listener) => listener(data));
+    });
+  });
+};
+
+// While the channel is open, counts arrive after every change without polling
+export const isEventsConnected = () => source !== null && source.readyState === 1;
+
+export const subscribe = (type, listener) => {
+  listeners[type].add(listener);
+  connect();
+  return () => listeners[type].delete(listener);
+};
@@ -2,9 +2,25 @@
 echo Iniciando Sistema Contable...
 echo.
 
+echo Aplicando migraciones...
+cd /d "%~dp0"
+python backend/migrations.py upgrade
+if errorlevel 1 (
+    echo Error al aplicar las migraciones; revisa la configuracion de la base de datos en .env
+    pause
+    exit /b 1
+)
+echo.
+
 echo Iniciando Backend (Flask)...
 start "Backend" cmd /k "cd /d %~dp0 && python backend/app.py"
 
+echo Iniciando canal de eventos...
+start "Eventos" cmd /k "cd /d %~dp0 && python backend/eventos.py serve"
+
+echo Iniciando worker de la cola de trabajos...
+start "Trabajos" cmd /k "cd /d %~dp0 && python backend/trabajos.py worker"
+
 echo Esperando 3 segundos...
 timeout /t 3 /nobreak > nul
 
@@ -14,6 +30,7 @@ start "Frontend" cmd /k "cd /d %~dp0 && npm start"
 echo.
 echo Sistema iniciado!
 echo Backend: http://localhost:5000
+echo Eventos: http://localhost:5001/api/events
 echo Frontend: http://localhost:3000
 echo.
 pause
@@ -3,9 +3,22 @@
 echo "Iniciando Sistema Contable..."
 echo
 
+echo "Aplicando migraciones..."
+if ! python backend/migrations.py upgrade; then
+    echo "Error al aplicar las migraciones; revisa la configuración de la base de datos en .env"
+    exit 1
+fi
+echo
+
 echo "Iniciando Backend (Flask)..."
 gnome-terminal -- bash -c "cd $(pwd) && python backend/app.py; exec bash" &
 
+echo "Iniciando canal de eventos..."
+gnome-terminal -- bash -c "cd $(pwd) && python backend/eventos.py serve; exec bash" &
+
+echo "Iniciando worker de la cola de trabajos..."
+gnome-terminal -- bash -c "cd $(pwd) && python backend/trabajos.py worker; exec bash" &
+
 echo "Esperando 3 segundos..."
 sleep 3
 
@@ -15,5 +28,6 @@ gnome-terminal -- bash -c "cd $(pwd) && npm start; exec bash" &
 echo
 echo "Sistema iniciado!"
 echo "Backend: http://localhost:5000"
+echo "Eventos: http://localhost:5001/api/events"
 echo "Frontend: http://localhost:3000"
 echo